@@ -1,4 +1,4 @@
-from flask import Flask, render_template, session, g
+from flask import Flask, render_template, request, session, g
 from database import db
 import os
 from datetime import timedelta
@@ -8,7 +8,7 @@ from dotenv import load_dotenv
 
 load_dotenv() 
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     
     # Configurações de segurança e ambiente
@@ -27,6 +27,25 @@ def create_app():
     app.config['SESSION_COOKIE_SECURE'] = True  # Requer HTTPS
     app.config['SESSION_COOKIE_HTTPONLY'] = True  # Impede acesso via JavaScript
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Proteção contra CSRF
+    
+    # Configurações do log de auditoria (gravação assíncrona em lote)
+    app.config['AUDIT_LOG_SYNC'] = os.environ.get('AUDIT_LOG_SYNC', 'false').lower() == 'true'  # Síncrono para testes
+    app.config['AUDIT_LOG_QUEUE_SIZE'] = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))
+    app.config['AUDIT_LOG_BATCH_SIZE'] = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 100))
+
+    # Sessões: 'cookie' (padrão, sessão do Flask), 'sqlite' (arquivo em instance/) ou 'redis'
+    for chave in ('SESSAO_BACKEND', 'SESSAO_SQLITE_PATH', 'SESSAO_REDIS_URL'):
+        if os.environ.get(chave):
+            app.config[chave] = os.environ[chave]
+
+    # Configurações do Mercado Pago (MERCADO_PAGO_API_URL permite apontar para um servidor local de testes)
+    for chave in ('MERCADO_PAGO_ACCESS_TOKEN', 'MERCADO_PAGO_API_URL', 'MERCADO_PAGO_NOTIFICATION_URL', 'MERCADO_PAGO_WEBHOOK_SECRET'):
+        if os.environ.get(chave):
+            app.config[chave] = os.environ[chave]
+
+    # Configurações passadas explicitamente (testes) têm prioridade sobre as padrão e as do ambiente
+    if config:
+        app.config.update(config)
 
     # Garantir que os diretórios de upload existem
     os.makedirs(os.path.join(app.root_path, 'static/uploads/profile_pics'), exist_ok=True)
@@ -34,41 +53,105 @@ def create_app():
 
     # Inicializar o banco de dados com a aplicação
     db.init_app(app)
+    
+    # Inicializar a fila de gravação dos logs de auditoria
+    from utils.audit_log import audit_log
+    audit_log.init_app(app)
+    
+    # Inicializar a fila persistente de emails
+    from utils.email_sender import email_outbox
+    email_outbox.init_app(app)
+
+    # Cache de validação dos tokens de autenticação
+    from utils.token_cache import token_cache, backfill_token_hash_command
+    token_cache.init_app(app)
+    app.cli.add_command(backfill_token_hash_command)
+
+    # Inicializar o catálogo em memória dos produtos ativos
+    from utils.catalog import catalogo
+    catalogo.init_app(app)
+
+    # Cache do HTML das páginas públicas do catálogo
+    from utils.page_cache import page_cache, NAMESPACE_CATALOGO
+    page_cache.init_app(app)
+
+    # Versões reduzidas/WebP das imagens enviadas, geradas em um pool de processos
+    from utils.images import image_pipeline, gerar_variantes_imagens_command
+    image_pipeline.init_app(app)
+    app.cli.add_command(gerar_variantes_imagens_command)
+
+    # Uploads gravados pelo hash do conteúdo: cache imutável e comandos de manutenção
+    from utils.storage import aplicar_cache_imutavel, limpar_uploads_orfaos_command, migrar_uploads_cas_command
+    app.after_request(aplicar_cache_imutavel)
+    app.cli.add_command(limpar_uploads_orfaos_command)
+    app.cli.add_command(migrar_uploads_cas_command)
+
+    # CSS/JS versionados e pré-compactados (asset_url nos templates)
+    from utils.assets import assets, construir_assets_command
+    assets.init_app(app)
+    app.cli.add_command(construir_assets_command)
+
+    # Respostas condicionais (ETag / Last-Modified) das páginas do catálogo
+    from utils.http_cache import http_cache
+    http_cache.init_app(app)
+
+    # Cliente HTTP do Mercado Pago (keep-alive, timeouts, repetições e circuit breaker)
+    from utils.payment_gateway import mercado_pago
+    mercado_pago.init_app(app)
+
+    # Links de pagamento reaproveitados enquanto o carrinho não muda
+    from utils.preference_cache import preference_cache
+    preference_cache.init_app(app)
+
+    # Fila das notificações de pagamento: cria os pedidos aprovados em segundo plano
+    from utils.payment_events import payment_events
+    payment_events.init_app(app)
+
+    # Rascunhos dos pedidos aguardando pagamento
+    from utils.checkout_draft import limpar_rascunhos_pedido_command
+    app.cli.add_command(limpar_rascunhos_pedido_command)
+
+    # Sessão guardada no servidor: o cookie leva apenas o ID assinado
+    from utils.server_session import sessoes_servidor
+    sessoes_servidor.init_app(app)
+
+    # Comando para verificar o uso de índices nas consultas principais
+    from utils.index_advisor import analisar_indices_command
+    app.cli.add_command(analisar_indices_command)
+
+    # Comando para migrar o histórico de status dos pedidos a partir dos logs
+    from utils.order_details import migrar_historico_status_command
+    app.cli.add_command(migrar_historico_status_command)
 
     # Importar modelos APÓS a inicialização do db
     from models.models import Produto, Usuario
 
     # Importar utilitários APÓS os modelos
-    from utils.helpers import is_admin, allowed_file, registrar_log, inicializar_db
+    from utils.helpers import is_admin, allowed_file, registrar_log, inicializar_db, get_usuario_atual, definir_usuario_atual
     from utils.payment import create_mercadopago_preference
 
     # Registrar o processador de contexto com funcionalidades expandidas
+    # O usuário é resolvido no máximo uma vez por requisição (cache em flask.g)
     @app.context_processor
     def utility_processor():
-        def is_admin_context():
-            if 'usuario_id' in session:
-                usuario = Usuario.query.get(session['usuario_id'])
-                return usuario and usuario.is_admin
-            return False
-        
-        def get_usuario():
-            if 'usuario_id' in session:
-                return Usuario.query.get(session['usuario_id'])
-            return None
-        
         return {
-            'is_admin': is_admin_context,
-            'get_usuario': get_usuario
+            'is_admin': is_admin,
+            'get_usuario': get_usuario_atual
         }
 
     # Middleware para verificar tokens JWT
     @app.before_request
     def verificar_token():
+        # Arquivos estáticos não precisam carregar a sessão
+        if request.endpoint == 'static':
+            return
         if 'auth_token' in session and 'usuario_id' not in session:
             token = session['auth_token']
             usuario = Usuario.verificar_auth_token(token)
             if usuario:
                 session['usuario_id'] = usuario.id
+                # Reaproveitar o usuário já carregado no restante da requisição
+                definir_usuario_atual(usuario)
 
     # Importar e registrar rotas - mantendo compatibilidade com estrutura atual
     from routes.auth_routes import auth_bp
@@ -111,8 +194,11 @@ def create_app():
 
     # Rota principal
     @app.route('/')
+    @http_cache.condicional(lambda **kwargs: catalogo.validadores())
+    @page_cache.cachear(NAMESPACE_CATALOGO)
     def index():
-        produtos = Produto.query.all()
+        # Apenas produtos ativos, servidos a partir do catálogo em memória
+        produtos = catalogo.destaques(6)
         return render_template('index.html', produtos=produtos)
 
     return app
@@ -0,0 +1,23 @@
+-- Migração 001: índices para as consultas mais frequentes
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/001_indices_consultas.sql
+-- Depois confira com: flask analisar-indices
+
+USE doce_sonho;
+
+-- Carrinho (busca por usuário e por usuário + produto)
+CREATE INDEX idx_carrinho_usuario_produto ON carrinho(usuario_id, produto_id);
+CREATE INDEX idx_carrinho_personalizado_usuario_bolo ON carrinho_personalizado(usuario_id, bolo_personalizado_id);
+
+-- Pedidos (listagem do cliente e filtro por status no painel, ambos ordenados por data)
+CREATE INDEX idx_pedido_usuario_data ON pedido(usuario_id, data);
+CREATE INDEX idx_pedido_status_data ON pedido(status, data);
+CREATE INDEX idx_item_pedido_pedido ON item_pedido(pedido_id);
+
+-- Logs (listagem ordenada por data e filtro por tipo)
+-- A tabela log é criada pelo db.create_all(); em instalações novas os índices já vêm do modelo
+CREATE INDEX idx_log_data ON log(data);
+CREATE INDEX idx_log_tipo_data ON log(tipo, data);
+
+-- Catálogo (produtos ativos por categoria)
+CREATE INDEX idx_produto_ativo_categoria ON produto(ativo, categoria);
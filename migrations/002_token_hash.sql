@@ -0,0 +1,26 @@
+-- Migração 002: tokens gravados e buscados pelo SHA-256 em vez do JWT de 500 caracteres
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/002_token_hash.sql
+-- Em outros bancos (ex.: SQLite de desenvolvimento) use: flask backfill-token-hash --limpar-token
+--   O comando cria a coluna token_hash e o índice idx_token_hash quando ainda não existem.
+
+USE doce_sonho;
+
+-- 1. Nova coluna com o hash do token
+ALTER TABLE token ADD COLUMN token_hash CHAR(64) NULL AFTER usuario_id;
+
+-- 2. Backfill dos registros existentes (mesmo valor de Token.calcular_hash)
+UPDATE token SET token_hash = SHA2(token, 256) WHERE token_hash IS NULL;
+
+-- 3. Tokens duplicados (mesmo JWT gravado mais de uma vez) impediriam o índice único
+DELETE t1 FROM token t1
+JOIN token t2 ON t1.token_hash = t2.token_hash AND t1.id > t2.id;
+
+-- 4. Índice único no hash e remoção do índice sobre o VARCHAR(500)
+ALTER TABLE token MODIFY token_hash CHAR(64) NOT NULL;
+CREATE UNIQUE INDEX idx_token_hash ON token(token_hash);
+DROP INDEX idx_token_token ON token;
+
+-- 5. O JWT bruto não é mais gravado nem consultado
+ALTER TABLE token MODIFY token VARCHAR(500) NULL;
+UPDATE token SET token = NULL;
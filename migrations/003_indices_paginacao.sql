@@ -0,0 +1,13 @@
+-- Migração 003: índices para a paginação por cursor do painel administrativo
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/003_indices_paginacao.sql
+-- No InnoDB o id (chave primária) já faz parte de todo índice secundário,
+-- então (data) e (is_admin, nome) atendem às chaves (data, id) e (nome, id).
+
+USE doce_sonho;
+
+-- Listagem de pedidos sem filtro de status, ordenada por (data, id)
+CREATE INDEX idx_pedido_data ON pedido(data);
+
+-- Listagem de clientes (is_admin = FALSE) ordenada por (nome, id)
+CREATE INDEX idx_usuario_admin_nome ON usuario(is_admin, nome);
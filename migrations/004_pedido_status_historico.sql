@@ -0,0 +1,21 @@
+-- Migração 004: histórico de status dos pedidos em tabela própria
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/004_pedido_status_historico.sql
+-- Em seguida migre o histórico gravado na tabela log:
+--   flask migrar-historico-status
+
+USE doce_sonho;
+
+-- Tabela de Histórico de Status dos Pedidos
+CREATE TABLE IF NOT EXISTS pedido_status_historico (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    pedido_id INT NOT NULL,
+    status_anterior VARCHAR(20) NULL,
+    status_novo VARCHAR(20) NOT NULL,
+    usuario_id INT NULL,
+    observacao TEXT NULL,
+    data DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (pedido_id) REFERENCES pedido(id),
+    FOREIGN KEY (usuario_id) REFERENCES usuario(id),
+    INDEX idx_pedido_status_historico_pedido_data (pedido_id, data)
+);
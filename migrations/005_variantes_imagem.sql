@@ -0,0 +1,9 @@
+-- Migração 005: versões reduzidas e WebP das imagens enviadas
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/005_variantes_imagem.sql
+-- Depois gere as variantes das imagens já existentes com: flask gerar-variantes-imagens
+
+USE doce_sonho;
+
+ALTER TABLE produto ADD COLUMN imagem_variantes TEXT NULL AFTER imagem;
+ALTER TABLE usuario ADD COLUMN foto_perfil_variantes TEXT NULL AFTER foto_perfil;
@@ -0,0 +1,28 @@
+-- Migração 006: notificações de pagamento do Mercado Pago e criação idempotente dos pedidos
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/006_eventos_pagamento.sql
+-- Configure no Mercado Pago a URL de notificação /pagamento/notificacao
+-- (MERCADO_PAGO_NOTIFICATION_URL) e a chave secreta em MERCADO_PAGO_WEBHOOK_SECRET.
+
+USE doce_sonho;
+
+-- Um pedido por pagamento
+CREATE UNIQUE INDEX idx_pedido_mp_transacao ON pedido(mercado_pago_transaction_id);
+
+-- Tabela de Eventos de Pagamento (fila processada em segundo plano)
+CREATE TABLE IF NOT EXISTS evento_pagamento (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    pagamento_id VARCHAR(64) NOT NULL,
+    origem VARCHAR(20) NOT NULL DEFAULT 'webhook',
+    status VARCHAR(20) NOT NULL DEFAULT 'pendente',
+    status_pagamento VARCHAR(30) NULL,
+    pedido_id INT NULL,
+    tentativas INT NOT NULL DEFAULT 0,
+    ultimo_erro TEXT NULL,
+    proxima_tentativa DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    data_processamento DATETIME NULL,
+    FOREIGN KEY (pedido_id) REFERENCES pedido(id),
+    INDEX idx_evento_pagamento_status (status, proxima_tentativa),
+    INDEX idx_evento_pagamento_pagamento (pagamento_id)
+);
@@ -0,0 +1,26 @@
+-- Migração 007: pedidos pendentes gravados no banco em vez da sessão
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/007_rascunho_pedido.sql
+-- Remova periodicamente os rascunhos abandonados com: flask limpar-rascunhos-pedido
+
+USE doce_sonho;
+
+-- Tabela de Rascunhos de Pedido (aguardando pagamento)
+CREATE TABLE IF NOT EXISTS rascunho_pedido (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    codigo VARCHAR(32) NOT NULL,
+    usuario_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'aberto',
+    tipo_entrega VARCHAR(20) NULL,
+    valor_frete FLOAT DEFAULT 0.0,
+    endereco_entrega TEXT NULL,
+    observacoes TEXT NULL,
+    total FLOAT DEFAULT 0.0,
+    itens TEXT NOT NULL,
+    pedido_id INT NULL,
+    data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES usuario(id),
+    FOREIGN KEY (pedido_id) REFERENCES pedido(id),
+    UNIQUE INDEX idx_rascunho_pedido_codigo (codigo),
+    INDEX idx_rascunho_pedido_status_data (status, data_criacao)
+);
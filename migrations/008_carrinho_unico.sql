@@ -0,0 +1,37 @@
+-- Migração 008: um item por produto/bolo no carrinho de cada usuário
+-- Execute no MySQL em bancos criados antes desta versão:
+--   mysql -u root -p doce_sonho < migrations/008_carrinho_unico.sql
+-- Os índices únicos permitem somar itens com INSERT ... ON DUPLICATE KEY UPDATE.
+
+USE doce_sonho;
+
+-- Juntar linhas duplicadas (soma das quantidades, limitada a 10) na mais antiga
+UPDATE carrinho c
+JOIN (
+    SELECT MIN(id) AS id, LEAST(SUM(quantidade), 10) AS quantidade
+    FROM carrinho GROUP BY usuario_id, produto_id HAVING COUNT(*) > 1
+) d ON d.id = c.id
+SET c.quantidade = d.quantidade;
+
+DELETE c FROM carrinho c
+JOIN carrinho k ON k.usuario_id = c.usuario_id AND k.produto_id = c.produto_id AND k.id < c.id;
+
+UPDATE carrinho_personalizado c
+JOIN (
+    SELECT MIN(id) AS id, LEAST(SUM(quantidade), 10) AS quantidade
+    FROM carrinho_personalizado GROUP BY usuario_id, bolo_personalizado_id HAVING COUNT(*) > 1
+) d ON d.id = c.id
+SET c.quantidade = d.quantidade;
+
+DELETE c FROM carrinho_personalizado c
+JOIN carrinho_personalizado k ON k.usuario_id = c.usuario_id
+    AND k.bolo_personalizado_id = c.bolo_personalizado_id AND k.id < c.id;
+
+-- Trocar os índices pelos únicos no mesmo ALTER (a chave estrangeira de usuario_id continua coberta)
+ALTER TABLE carrinho
+    DROP INDEX idx_carrinho_usuario_produto,
+    ADD UNIQUE INDEX idx_carrinho_usuario_produto (usuario_id, produto_id);
+
+ALTER TABLE carrinho_personalizado
+    DROP INDEX idx_carrinho_personalizado_usuario_bolo,
+    ADD UNIQUE INDEX idx_carrinho_personalizado_usuario_bolo (usuario_id, bolo_personalizado_id);
@@ -8,6 +8,9 @@ import hashlib
 
 class Usuario(db.Model):
     __tablename__ = 'usuario'
+    __table_args__ = (
+        db.Index('idx_usuario_admin_nome', 'is_admin', 'nome'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
@@ -15,6 +18,7 @@ class Usuario(db.Model):
     senha = db.Column(db.String(200), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     foto_perfil = db.Column(db.String(100), nullable=True)
+    foto_perfil_variantes = db.Column(db.Text, nullable=True)  # JSON com as versões reduzidas/WebP
     data_registro = db.Column(db.DateTime, default=datetime.utcnow)
     concordou_politica = db.Column(db.Boolean, default=False)
     
@@ -90,7 +94,9 @@ class Usuario(db.Model):
         """Gera um token JWT para autenticação"""
         payload = {
             'id': self.id,
-            'exp': datetime.utcnow() + timedelta(hours=expira_em)
+            'exp': datetime.utcnow() + timedelta(hours=expira_em),
+            # Identificador único: dois logins no mesmo segundo geram tokens diferentes
+            'jti': uuid.uuid4().hex
         }
         return jwt.encode(
             payload,
@@ -116,6 +122,9 @@ class Usuario(db.Model):
 
 class Produto(db.Model):
     __tablename__ = 'produto'
+    __table_args__ = (
+        db.Index('idx_produto_ativo_categoria', 'ativo', 'categoria'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
@@ -123,6 +132,7 @@ class Produto(db.Model):
     preco = db.Column(db.Float, nullable=False)
     categoria = db.Column(db.String(50), nullable=False)
     imagem = db.Column(db.String(100), nullable=True)
+    imagem_variantes = db.Column(db.Text, nullable=True)  # JSON com as versões reduzidas/WebP
     peso = db.Column(db.Float, nullable=True)
     ingredientes = db.Column(db.Text, nullable=True)
     data_validade = db.Column(db.DateTime, nullable=True)
@@ -184,6 +194,13 @@ class BoloPersonalizado(db.Model):
 
 class Pedido(db.Model):
     __tablename__ = 'pedido'
+    __table_args__ = (
+        db.Index('idx_pedido_data', 'data'),
+        db.Index('idx_pedido_usuario_data', 'usuario_id', 'data'),
+        db.Index('idx_pedido_status_data', 'status', 'data'),
+        # Um pedido por pagamento: a criação a partir das notificações é idempotente
+        db.Index('idx_pedido_mp_transacao', 'mercado_pago_transaction_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
@@ -213,8 +230,53 @@ class Pedido(db.Model):
     def __repr__(self):
         return f'<Pedido {self.id} - {self.status}>'
 
+class PedidoStatusHistorico(db.Model):
+    __tablename__ = 'pedido_status_historico'
+    __table_args__ = (
+        db.Index('idx_pedido_status_historico_pedido_data', 'pedido_id', 'data'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=False)
+    status_anterior = db.Column(db.String(20), nullable=True)
+    status_novo = db.Column(db.String(20), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=True)
+    observacao = db.Column(db.Text, nullable=True)
+    data = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    @classmethod
+    def registrar(cls, pedido_id, status_novo, status_anterior=None, usuario_id=None, observacao=None, data=None):
+        """Adiciona a mudança de status na sessão atual (gravada no mesmo commit do pedido)"""
+        registro = cls(
+            pedido_id=pedido_id,
+            status_anterior=status_anterior,
+            status_novo=status_novo,
+            usuario_id=usuario_id,
+            observacao=observacao or None,
+            data=data or datetime.utcnow()
+        )
+        db.session.add(registro)
+        return registro
+    
+    @property
+    def descricao(self):
+        """Texto exibido no histórico, no mesmo formato usado pelos logs de pedido"""
+        if self.status_anterior:
+            texto = f'Pedido #{self.pedido_id} atualizado de "{self.status_anterior}" para "{self.status_novo}"'
+        else:
+            texto = f'Pedido #{self.pedido_id} criado com status "{self.status_novo}"'
+        if self.observacao:
+            texto += f' com observação: "{self.observacao}"'
+        return texto
+    
+    def __repr__(self):
+        return f'<PedidoStatusHistorico pedido={self.pedido_id} {self.status_anterior} -> {self.status_novo}>'
+
 class ItemPedido(db.Model):
     __tablename__ = 'item_pedido'
+    __table_args__ = (
+        db.Index('idx_item_pedido_pedido', 'pedido_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=False)
@@ -239,6 +301,10 @@ class ItemPedidoPersonalizado(db.Model):
 
 class Log(db.Model):
     __tablename__ = 'log'
+    __table_args__ = (
+        db.Index('idx_log_data', 'data'),
+        db.Index('idx_log_tipo_data', 'tipo', 'data'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(50), nullable=False)
@@ -252,10 +318,16 @@ class Log(db.Model):
 
 class Token(db.Model):
     __tablename__ = 'token'
+    __table_args__ = (
+        db.Index('idx_token_hash', 'token_hash', unique=True),
+        db.Index('idx_token_usuario_id', 'usuario_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
-    token = db.Column(db.String(500), nullable=False)
+    # SHA-256 do JWT; o token em si não é mais gravado (coluna mantida para registros antigos)
+    token_hash = db.Column(db.String(64), nullable=False)
+    token = db.Column(db.String(500), nullable=True)
     tipo = db.Column(db.String(20), default='access')
     device_info = db.Column(db.String(200), nullable=True)
     # A coluna IP foi removida
@@ -263,11 +335,34 @@ class Token(db.Model):
     data_expiracao = db.Column(db.DateTime, nullable=False)
     is_revogado = db.Column(db.Boolean, default=False)
     
+    @staticmethod
+    def calcular_hash(token):
+        """Digest SHA-256 (hex) usado para gravar e buscar tokens"""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def criar(cls, usuario_id, token, data_expiracao, device_info=None):
+        """Cria o registro de um token guardando apenas o seu hash"""
+        return cls(
+            usuario_id=usuario_id,
+            token_hash=cls.calcular_hash(token),
+            device_info=device_info,
+            data_expiracao=data_expiracao
+        )
+    
+    @classmethod
+    def buscar(cls, token, **filtros):
+        """Query dos tokens com o valor informado (busca pelo hash)"""
+        return cls.query.filter_by(token_hash=cls.calcular_hash(token), **filtros)
+    
     def __repr__(self):
         return f'<Token {self.id} - {self.tipo}>'
 
 class CarrinhoItem(db.Model):
     __tablename__ = 'carrinho'
+    __table_args__ = (
+        db.Index('idx_carrinho_usuario_produto', 'usuario_id', 'produto_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
@@ -283,6 +378,9 @@ class CarrinhoItem(db.Model):
 
 class CarrinhoBoloPersonalizado(db.Model):
     __tablename__ = 'carrinho_personalizado'
+    __table_args__ = (
+        db.Index('idx_carrinho_personalizado_usuario_bolo', 'usuario_id', 'bolo_personalizado_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
@@ -294,4 +392,60 @@ class CarrinhoBoloPersonalizado(db.Model):
     usuario = db.relationship('Usuario', backref=db.backref('carrinho_bolos', lazy=True))
     
     def __repr__(self):
-        return f'<CarrinhoBoloPersonalizado {self.id}: {self.quantidade}x bolo {self.bolo_personalizado_id}>'
\ No newline at end of file
+        return f'<CarrinhoBoloPersonalizado {self.id}: {self.quantidade}x bolo {self.bolo_personalizado_id}>'
+
+class RascunhoPedido(db.Model):
+    """Pedido aguardando pagamento; a sessão e a preferência do Mercado Pago guardam apenas o código"""
+    __tablename__ = 'rascunho_pedido'
+    __table_args__ = (
+        db.Index('idx_rascunho_pedido_codigo', 'codigo', unique=True),
+        db.Index('idx_rascunho_pedido_status_data', 'status', 'data_criacao'),
+    )
+    
+    STATUS_ABERTO = 'aberto'
+    STATUS_CONCLUIDO = 'concluido'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    codigo = db.Column(db.String(32), nullable=False, default=lambda: uuid.uuid4().hex)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_ABERTO)
+    tipo_entrega = db.Column(db.String(20), nullable=True)
+    valor_frete = db.Column(db.Float, default=0.0)
+    endereco_entrega = db.Column(db.Text, nullable=True)
+    observacoes = db.Column(db.Text, nullable=True)
+    total = db.Column(db.Float, default=0.0)
+    itens = db.Column(db.Text, nullable=False)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=True)
+    data_criacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RascunhoPedido {self.codigo} - {self.status}>'
+
+class EventoPagamento(db.Model):
+    """Notificação de pagamento do Mercado Pago aguardando processamento (utils/payment_events.py)"""
+    __tablename__ = 'evento_pagamento'
+    __table_args__ = (
+        db.Index('idx_evento_pagamento_status', 'status', 'proxima_tentativa'),
+        db.Index('idx_evento_pagamento_pagamento', 'pagamento_id'),
+    )
+    
+    STATUS_PENDENTE = 'pendente'
+    STATUS_PROCESSANDO = 'processando'
+    STATUS_PROCESSADO = 'processado'
+    STATUS_IGNORADO = 'ignorado'
+    STATUS_FALHOU = 'falhou'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pagamento_id = db.Column(db.String(64), nullable=False)
+    origem = db.Column(db.String(20), nullable=False, default='webhook')
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDENTE)
+    status_pagamento = db.Column(db.String(30), nullable=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedido.id'), nullable=True)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    proxima_tentativa = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data_criacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data_processamento = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<EventoPagamento {self.id} pagamento={self.pagamento_id} {self.status}>'
@@ -1,14 +1,48 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, abort
 from database import db
-from models.models import Produto, Log, Pedido, ItemPedido, ItemPedidoPersonalizado, BoloPersonalizado, Usuario
+from models.models import Produto, Log, Pedido, ItemPedido, Usuario, PedidoStatusHistorico, Token
 from datetime import datetime, timedelta, date
-from werkzeug.utils import secure_filename
-import os
-from utils.helpers import is_admin, allowed_file, registrar_log
+from utils.helpers import is_admin, registrar_log, invalidar_usuario_atual
+from utils.audit_log import audit_log
+from utils.catalog import catalogo
+from utils.page_cache import page_cache
+from utils.keyset import paginar_por_cursor
+from utils.token_cache import token_cache
+from utils.order_details import carregar_pedido_detalhado, montar_itens_pedido, historico_status_pedido
+from utils.images import image_pipeline
+from utils.storage import armazenar, liberar, variantes_conhecidas
+from utils.uploads import receber_upload, verificar_tamanho_requisicao, UploadInvalido
  
 
 admin_bp = Blueprint('admin', __name__)
 
+def _agendar_variantes_produto(produto):
+    """Gera em segundo plano as versões reduzidas/WebP da imagem do produto"""
+    produto_id = produto.id
+
+    def invalidar_caches():
+        # As páginas em cache foram montadas sem o srcset das novas variantes
+        catalogo.invalidar()
+        page_cache.invalidar_produto(produto_id)
+
+    image_pipeline.agendar(Produto, produto_id, 'imagem', 'imagem_variantes', produto.imagem,
+                           ao_concluir=invalidar_caches)
+
+def _salvar_imagem_produto(arquivo):
+    """
+    Valida e grava a imagem enviada no formulário de produto.
+
+    Returns:
+        URL da imagem gravada
+
+    Raises:
+        UploadInvalido: arquivo grande demais ou em formato não aceito
+    """
+    recebido = receber_upload(arquivo, 'produto')
+    # Gravada pelo hash do conteúdo: imagens repetidas reaproveitam o mesmo arquivo
+    url, _ = armazenar(recebido)
+    return url
+
 @admin_bp.route('/admin')
 def admin():
     if not is_admin():
@@ -36,7 +70,7 @@ def admin_clientes():
         flash('Acesso negado. Apenas administradores podem acessar esta área.', 'danger')
         return redirect(url_for('index'))
     
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 10
     busca = request.args.get('busca', '')
     
@@ -48,45 +82,26 @@ def admin_clientes():
             (Usuario.email.ilike(f'%{busca}%'))
         )
     
-    # Criar uma subquery para contar pedidos por cliente
-    from sqlalchemy import func
-    pedidos_count = db.session.query(
-        Pedido.usuario_id, 
-        func.count(Pedido.id).label('total_pedidos')
-    ).group_by(Pedido.usuario_id).subquery()
-    
-    # Adicionar a contagem de pedidos à query principal
-    query = query.outerjoin(
-        pedidos_count, 
-        Usuario.id == pedidos_count.c.usuario_id
-    ).add_columns(
-        func.coalesce(pedidos_count.c.total_pedidos, 0).label('total_pedidos')
+    # Paginação por cursor em (nome, id): o custo não cresce com o número da página
+    clientes_resultado = paginar_por_cursor(
+        query,
+        (Usuario.nome, Usuario.id),
+        cursor=cursor,
+        por_pagina=per_page,
+        decrescente=False,
+        chave_total=('clientes', busca)
     )
     
-    # Paginar os resultados
-    clientes_paginados = query.order_by(Usuario.nome).paginate(page=page, per_page=per_page)
-    
-    # Criar uma lista de objetos compostos com os dados dos clientes e contagem de pedidos
-    clientes = []
-    for cliente, total_pedidos in clientes_paginados.items:
-        cliente.total_pedidos = total_pedidos
-        clientes.append(cliente)
-    
-    # Criar um objeto de paginação com os mesmos atributos do original
-    from collections import namedtuple
-    Pagination = namedtuple('Pagination', ['items', 'page', 'per_page', 'total', 'has_prev', 'has_next', 'prev_num', 'next_num', 'iter_pages'])
-    
-    clientes_resultado = Pagination(
-        items=clientes,
-        page=clientes_paginados.page,
-        per_page=clientes_paginados.per_page,
-        total=clientes_paginados.total,
-        has_prev=clientes_paginados.has_prev,
-        has_next=clientes_paginados.has_next,
-        prev_num=clientes_paginados.prev_num,
-        next_num=clientes_paginados.next_num,
-        iter_pages=clientes_paginados.iter_pages
-    )
+    # Contar pedidos apenas dos clientes exibidos na página
+    from sqlalchemy import func
+    ids = [cliente.id for cliente in clientes_resultado.items]
+    contagens = dict(db.session.query(
+        Pedido.usuario_id,
+        func.count(Pedido.id)
+    ).filter(Pedido.usuario_id.in_(ids)).group_by(Pedido.usuario_id).all()) if ids else {}
+    
+    for cliente in clientes_resultado.items:
+        cliente.total_pedidos = contagens.get(cliente.id, 0)
     
     return render_template('admin/clientes.html', clientes=clientes_resultado)
 
@@ -193,6 +208,7 @@ def admin_editar_usuario(usuario_id):
             usuario.endereco_estado = request.form.get('estado')
         
         db.session.commit()
+        invalidar_usuario_atual()
         
         # Registrar log de atualização
         registrar_log(
@@ -230,7 +246,14 @@ def admin_alterar_status_usuario(usuario_id):
     
     if novo_status in ['ativo', 'inativo']:
         usuario.status = novo_status
+        
+        # Usuário desativado perde as sessões abertas (o cache dos outros processos expira pelo TTL)
+        if novo_status == 'inativo':
+            Token.query.filter_by(usuario_id=usuario.id, is_revogado=False).update({'is_revogado': True})
+        
         db.session.commit()
+        invalidar_usuario_atual()
+        token_cache.revogar_usuario(usuario.id)
         
         # Registrar log de alteração de status
         registrar_log(
@@ -252,13 +275,34 @@ def admin_logs():
         flash('Acesso negado. Apenas administradores podem acessar esta área.', 'danger')
         return redirect(url_for('index'))
     
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    logs = Log.query.order_by(Log.data.desc()).paginate(page=page, per_page=per_page)
+    logs = paginar_por_cursor(
+        Log.query,
+        (Log.data, Log.id),
+        cursor=request.args.get('cursor'),
+        por_pagina=per_page,
+        chave_total=('logs',)
+    )
     
     return render_template('admin/logs.html', logs=logs)
 
+@admin_bp.route('/admin/logs/metricas')
+def admin_logs_metricas():
+    """Métricas da fila de gravação dos logs de auditoria"""
+    if not is_admin():
+        return jsonify({'status': 'error', 'message': 'Acesso negado'}), 403
+    
+    return jsonify({'status': 'success', 'metricas': audit_log.estatisticas()})
+
+@admin_bp.route('/admin/cache/metricas')
+def admin_cache_metricas():
+    """Métricas de acerto do cache de páginas do catálogo"""
+    if not is_admin():
+        return jsonify({'status': 'error', 'message': 'Acesso negado'}), 403
+    
+    return jsonify({'status': 'success', 'metricas': page_cache.estatisticas()})
+
 @admin_bp.route('/admin/logs/filtrar', methods=['GET'])
 def filtrar_logs():
     if not is_admin():
@@ -286,10 +330,15 @@ def filtrar_logs():
     if usuario_id:
         query = query.filter(Log.usuario_id == usuario_id)
     
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    logs = query.order_by(Log.data.desc()).paginate(page=page, per_page=per_page)
+    logs = paginar_por_cursor(
+        query,
+        (Log.data, Log.id),
+        cursor=request.args.get('cursor'),
+        por_pagina=per_page,
+        chave_total=('logs', tipo, str(data_inicio), str(data_fim), usuario_id)
+    )
     
     return render_template('admin/logs.html', logs=logs, filtros=request.args)
 
@@ -300,7 +349,6 @@ def admin_pedidos():
         flash('Acesso negado. Apenas administradores podem acessar esta área.', 'danger')
         return redirect(url_for('index'))
     
-    page = request.args.get('page', 1, type=int)
     per_page = 10
     status = request.args.get('status', '')
     
@@ -309,7 +357,13 @@ def admin_pedidos():
     if status:
         query = query.filter(Pedido.status == status)
     
-    pedidos = query.order_by(Pedido.data.desc()).paginate(page=page, per_page=per_page)
+    pedidos = paginar_por_cursor(
+        query,
+        (Pedido.data, Pedido.id),
+        cursor=request.args.get('cursor'),
+        por_pagina=per_page,
+        chave_total=('pedidos', status)
+    )
     
     return render_template('admin/pedidos.html', pedidos=pedidos, status_atual=status)
 
@@ -319,58 +373,16 @@ def admin_detalhes_pedido(pedido_id):
         flash('Acesso negado. Apenas administradores podem acessar esta área.', 'danger')
         return redirect(url_for('index'))
     
-    pedido = Pedido.query.get_or_404(pedido_id)
-    usuario = Usuario.query.get(pedido.usuario_id)
+    pedido = carregar_pedido_detalhado(pedido_id)
+    if not pedido:
+        abort(404)
+    usuario = pedido.cliente
     
-    # Obter itens regulares
-    itens_regulares = ItemPedido.query.filter_by(pedido_id=pedido.id).all()
-    
-    detalhes_itens_regulares = []
-    for item in itens_regulares:
-        produto = Produto.query.get(item.produto_id)
-        
-        # Verificar se o produto ainda existe (mesmo que inativo)
-        if produto:
-            nome_produto = produto.nome
-            if not produto.ativo:
-                nome_produto += " (Produto descontinuado)"
-        else:
-            nome_produto = "Produto removido"
-        
-        detalhes_itens_regulares.append({
-            'nome': nome_produto,
-            'quantidade': item.quantidade,
-            'preco_unitario': item.preco_unitario,
-            'subtotal': item.preco_unitario * item.quantidade,
-            'tipo': 'regular',
-            'produto_ativo': produto.ativo if produto else False,
-            'produto': produto  # Adicionar o objeto completo para acessar outras informações
-        })
-    
-    # Obter itens personalizados
-    itens_personalizados = ItemPedidoPersonalizado.query.filter_by(pedido_id=pedido.id).all()
-    
-    detalhes_itens_personalizados = []
-    for item in itens_personalizados:
-        bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-        detalhes_itens_personalizados.append({
-            'nome': f"Bolo Personalizado de {bolo.massa.capitalize()}",
-            'quantidade': item.quantidade,
-            'preco_unitario': item.preco_unitario,
-            'subtotal': item.preco_unitario * item.quantidade,
-            'tipo': 'personalizado',
-            'bolo_id': bolo.id,
-            'bolo': bolo  # Adicionar o objeto completo para acessar detalhes
-        })
-    
-    # Combinar os dois tipos de itens
-    todos_itens = detalhes_itens_regulares + detalhes_itens_personalizados
+    # Itens regulares e personalizados já carregados junto com o pedido
+    todos_itens = montar_itens_pedido(pedido)
     
     # Obtém histórico de atualizações de status, se existir
-    historico_status = Log.query.filter(
-        Log.tipo == 'pedido_atualizado',
-        Log.descricao.like(f'Pedido #{pedido.id} atualizado%')
-    ).order_by(Log.data.desc()).all()
+    historico_status = historico_status_pedido(pedido.id)
     
     return render_template('admin/detalhes_pedido.html', 
                           pedido=pedido, 
@@ -384,8 +396,10 @@ def admin_atualizar_pedido(pedido_id):
         flash('Acesso negado. Apenas administradores podem acessar esta área.', 'danger')
         return redirect(url_for('index'))
     
-    pedido = Pedido.query.get_or_404(pedido_id)
-    usuario = Usuario.query.get(pedido.usuario_id)
+    pedido = carregar_pedido_detalhado(pedido_id)
+    if not pedido:
+        abort(404)
+    usuario = pedido.cliente
     
     if request.method == 'POST':
         status_anterior = pedido.status
@@ -402,6 +416,14 @@ def admin_atualizar_pedido(pedido_id):
                 else:
                     pedido.observacoes_admin = f"[{datetime.now().strftime('%d/%m/%Y %H:%M')}] {observacoes}"
             
+            # Histórico de status gravado na mesma transação da alteração
+            PedidoStatusHistorico.registrar(
+                pedido_id=pedido.id,
+                status_anterior=status_anterior,
+                status_novo=novo_status,
+                usuario_id=session.get('usuario_id'),
+                observacao=observacoes
+            )
             db.session.commit()
             
             # Registrar o log de atualização
@@ -421,50 +443,10 @@ def admin_atualizar_pedido(pedido_id):
     # Se for GET ou se ocorrer algum erro no POST, mostrar a página de atualização
     
     # Obter histórico de status para exibir
-    historico_status = Log.query.filter(
-        Log.tipo == 'pedido_atualizado',
-        Log.descricao.like(f'Pedido #{pedido.id} atualizado%')
-    ).order_by(Log.data.desc()).all()
-    
-    # Obter itens do pedido
-    itens_regulares = ItemPedido.query.filter_by(pedido_id=pedido.id).all()
-    itens_personalizados = ItemPedidoPersonalizado.query.filter_by(pedido_id=pedido.id).all()
-    
-    # Processar itens regulares
-    detalhes_itens_regulares = []
-    for item in itens_regulares:
-        produto = Produto.query.get(item.produto_id)
-        if produto:
-            nome_produto = produto.nome
-            if not produto.ativo:
-                nome_produto += " (Produto descontinuado)"
-        else:
-            nome_produto = "Produto removido"
-        
-        detalhes_itens_regulares.append({
-            'nome': nome_produto,
-            'quantidade': item.quantidade,
-            'preco_unitario': item.preco_unitario,
-            'subtotal': item.preco_unitario * item.quantidade,
-            'tipo': 'regular'
-        })
-    
-    # Processar itens personalizados
-    detalhes_itens_personalizados = []
-    for item in itens_personalizados:
-        bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-        detalhes_itens_personalizados.append({
-            'nome': f"Bolo Personalizado de {bolo.massa.capitalize()}",
-            'quantidade': item.quantidade,
-            'preco_unitario': item.preco_unitario,
-            'subtotal': item.preco_unitario * item.quantidade,
-            'tipo': 'personalizado',
-            'bolo_id': bolo.id,
-            'bolo': bolo
-        })
-    
-    # Combinar os dois tipos de itens
-    todos_itens = detalhes_itens_regulares + detalhes_itens_personalizados
+    historico_status = historico_status_pedido(pedido.id)
+    
+    # Itens regulares e personalizados já carregados junto com o pedido
+    todos_itens = montar_itens_pedido(pedido)
     
     return render_template('admin/atualizar_pedido.html', 
                           pedido=pedido, 
@@ -495,6 +477,12 @@ def admin_novo_produto():
         return redirect(url_for('index'))
     
     if request.method == 'POST':
+        try:
+            verificar_tamanho_requisicao('produto')
+        except UploadInvalido as e:
+            flash(str(e), 'danger')
+            return render_template('admin/novo_produto.html')
+
         nome = request.form.get('nome')
         descricao = request.form.get('descricao')
         preco = float(request.form.get('preco'))
@@ -526,15 +514,11 @@ def admin_novo_produto():
         if 'imagem' in request.files:
             arquivo = request.files['imagem']
             if arquivo.filename != '':
-                if allowed_file(arquivo.filename):
-                    filename = secure_filename(arquivo.filename)
-                    
-                    # Criar diretório se não existir
-                    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
-                    
-                    # Salvar o arquivo
-                    arquivo.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
-                    imagem = '/static/uploads/' + filename
+                try:
+                    imagem = _salvar_imagem_produto(arquivo)
+                except UploadInvalido as e:
+                    flash(str(e), 'danger')
+                    return render_template('admin/novo_produto.html')
         
         novo_produto = Produto(
             nome=nome,
@@ -542,6 +526,7 @@ def admin_novo_produto():
             preco=preco,
             categoria=categoria,
             imagem=imagem,
+            imagem_variantes=variantes_conhecidas(imagem) if imagem else None,
             peso=peso,
             ingredientes=ingredientes,
             data_validade=data_validade,
@@ -551,6 +536,10 @@ def admin_novo_produto():
         
         db.session.add(novo_produto)
         db.session.commit()
+        catalogo.invalidar()
+        page_cache.invalidar_produto(novo_produto.id)
+        if novo_produto.imagem and not novo_produto.imagem_variantes:
+            _agendar_variantes_produto(novo_produto)
         
         # Registrar log de novo produto
         registrar_log(
@@ -575,6 +564,12 @@ def admin_editar_produto(produto_id):
     produto = Produto.query.get_or_404(produto_id)
     
     if request.method == 'POST':
+        try:
+            verificar_tamanho_requisicao('produto')
+        except UploadInvalido as e:
+            flash(str(e), 'danger')
+            return render_template('admin/editar_produto.html', produto=produto)
+
         produto.nome = request.form.get('nome')
         produto.descricao = request.form.get('descricao')
         
@@ -624,21 +619,27 @@ def admin_editar_produto(produto_id):
         produto.informacoes_nutricionais = request.form.get('informacoes_nutricionais')
         
         # Upload da imagem (se fornecida)
+        imagem_anterior = produto.imagem
+        variantes_anteriores = produto.imagem_variantes
         if 'imagem' in request.files:
             arquivo = request.files['imagem']
             if arquivo.filename != '':
-                if allowed_file(arquivo.filename):
-                    filename = secure_filename(arquivo.filename)
-                    
-                    # Criar diretório se não existir
-                    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
-                    
-                    # Salvar o arquivo
-                    arquivo.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
-                    produto.imagem = '/static/uploads/' + filename
+                try:
+                    produto.imagem = _salvar_imagem_produto(arquivo)
+                    if produto.imagem != imagem_anterior:
+                        produto.imagem_variantes = variantes_conhecidas(produto.imagem)
+                except UploadInvalido as e:
+                    flash(str(e), 'danger')
+                    return render_template('admin/editar_produto.html', produto=produto)
         
         produto.data_atualizacao = datetime.utcnow()
         db.session.commit()
+        catalogo.invalidar()
+        page_cache.invalidar_produto(produto_id)
+        if produto.imagem != imagem_anterior:
+            liberar(imagem_anterior, variantes_anteriores)
+        if produto.imagem and not produto.imagem_variantes:
+            _agendar_variantes_produto(produto)
         
         # Registrar log de atualização
         registrar_log(
@@ -670,6 +671,8 @@ def admin_deletar_produto(produto_id):
         produto.ativo = False
         produto.data_atualizacao = datetime.utcnow()
         db.session.commit()
+        catalogo.invalidar()
+        page_cache.invalidar_produto(produto_id)
         
         # Registrar log da ação
         registrar_log(
@@ -699,6 +702,8 @@ def admin_reativar_produto(produto_id):
         produto.ativo = True
         produto.data_atualizacao = datetime.utcnow()
         db.session.commit()
+        catalogo.invalidar()
+        page_cache.invalidar_produto(produto_id)
         
         # Registrar log da ação
         registrar_log(
@@ -732,21 +737,19 @@ def admin_deletar_produto_permanente(produto_id):
             flash('Não é possível excluir permanentemente este produto pois ele está associado a pedidos existentes. Use a desativação em vez disso.', 'danger')
             return redirect(url_for('admin.admin_produtos'))
         
-        # Remover imagem se existir
-        if produto.imagem and produto.imagem.startswith('/static/uploads/'):
-            try:
-                caminho_imagem = os.path.join(current_app.root_path, produto.imagem.lstrip('/'))
-                if os.path.exists(caminho_imagem):
-                    os.remove(caminho_imagem)
-            except Exception as e:
-                print(f"Erro ao excluir imagem: {e}")
-        
         nome_produto = produto.nome
         produto_id_log = produto.id
+        imagem = produto.imagem
+        imagem_variantes = produto.imagem_variantes
         
         # Excluir permanentemente do banco de dados
         db.session.delete(produto)
         db.session.commit()
+        catalogo.invalidar()
+        page_cache.invalidar_produto(produto_id)
+        
+        # Remover a imagem depois do commit, se nenhum outro registro a usa
+        liberar(imagem, imagem_variantes, legado=True)
         
         # Registrar log da exclusão permanente
         registrar_log(
@@ -10,8 +10,10 @@ import re
 import os
 import hashlib
 import secrets
-from utils.email_sender import enviar_email  # Supondo que você tenha um módulo para enviar emails
-from utils.helpers import registrar_log
+from utils.email_sender import enfileirar_email
+from utils.helpers import registrar_log, get_usuario_atual, invalidar_usuario_atual
+from utils.token_cache import token_cache
+from utils.server_session import regenerar_sessao
 from flask_mail import Mail, Message
 
 auth_bp = Blueprint('auth', __name__)
@@ -49,20 +51,17 @@ def token_required(f):
                 current_app.config['SECRET_KEY'],
                 algorithms=['HS256']
             )
-            usuario = Usuario.query.get(payload['id'])
+            # Reaproveitar o usuário da requisição quando o token é do usuário logado
+            usuario = get_usuario_atual()
+            if not usuario or usuario.id != payload['id']:
+                usuario = Usuario.query.get(payload['id'])
             
             if not usuario or usuario.status != 'ativo':
                 flash('Sessão inválida. Por favor, faça login novamente', 'warning')
                 return redirect(url_for('auth.login'))
                 
-            # Verificar se o token está na lista de tokens válidos
-            token_db = Token.query.filter_by(
-                usuario_id=usuario.id, 
-                token=token,
-                is_revogado=False
-            ).first()
-            
-            if not token_db or token_db.data_expiracao < datetime.utcnow():
+            # Verificar se o token está na lista de tokens válidos (com cache em memória)
+            if not token_cache.validar(usuario.id, token):
                 flash('Sua sessão expirou. Por favor, faça login novamente', 'warning')
                 return redirect(url_for('auth.login'))
                 
@@ -73,9 +72,8 @@ def token_required(f):
             flash('Sessão inválida. Por favor, faça login novamente', 'warning')
             return redirect(url_for('auth.login'))
         
-        # Atualizar último acesso
-        usuario.ultimo_acesso = datetime.utcnow()
-        db.session.commit()
+        # Atualizar último acesso (no máximo uma gravação por intervalo)
+        token_cache.registrar_acesso(usuario)
         
         return f(usuario, *args, **kwargs)
     
@@ -111,20 +109,17 @@ def admin_required(f):
                 current_app.config['SECRET_KEY'],
                 algorithms=['HS256']
             )
-            usuario = Usuario.query.get(payload['id'])
+            # Reaproveitar o usuário da requisição quando o token é do usuário logado
+            usuario = get_usuario_atual()
+            if not usuario or usuario.id != payload['id']:
+                usuario = Usuario.query.get(payload['id'])
             
             if not usuario or usuario.status != 'ativo' or not usuario.is_admin:
                 flash('Você não tem permissão para acessar esta página', 'danger')
                 return redirect(url_for('index'))
                 
-            # Verificar se o token está na lista de tokens válidos
-            token_db = Token.query.filter_by(
-                usuario_id=usuario.id, 
-                token=token,
-                is_revogado=False
-            ).first()
-            
-            if not token_db or token_db.data_expiracao < datetime.utcnow():
+            # Verificar se o token está na lista de tokens válidos (com cache em memória)
+            if not token_cache.validar(usuario.id, token):
                 flash('Sua sessão expirou. Por favor, faça login novamente', 'warning')
                 return redirect(url_for('auth.login'))
                 
@@ -135,9 +130,8 @@ def admin_required(f):
             flash('Sessão inválida. Por favor, faça login novamente', 'warning')
             return redirect(url_for('auth.login'))
         
-        # Atualizar último acesso
-        usuario.ultimo_acesso = datetime.utcnow()
-        db.session.commit()
+        # Atualizar último acesso (no máximo uma gravação por intervalo)
+        token_cache.registrar_acesso(usuario)
         
         return f(usuario, *args, **kwargs)
     
@@ -248,9 +242,9 @@ def registro():
                     usuario_id=novo_usuario.id
                 )
             
-            # Enviar email de boas-vindas
+            # Enfileirar email de boas-vindas (enviado em segundo plano)
             try:
-                enviar_email(
+                enfileirar_email(
                     destinatario=email,
                     assunto='Bem-vindo à Doce Sonho Confeitaria',
                     mensagem=f'Olá {nome},\n\nSeu cadastro foi realizado com sucesso! Agora você pode fazer pedidos e aproveitar todos os nossos produtos.\n\nAtenciosamente,\nEquipe Doce Sonho Confeitaria'
@@ -325,11 +319,10 @@ def login():
                 
                 # Salvar token no banco se modelo Token existir
                 try:
-                    novo_token = Token(
+                    novo_token = Token.criar(
                         usuario_id=usuario.id,
                         token=token,
                         device_info=request.user_agent.string,
-                        ip=request.remote_addr,
                         data_expiracao=datetime.utcnow() + timedelta(days=expira_em if lembrar else 0, hours=0 if lembrar else expira_em)
                     )
                     db.session.add(novo_token)
@@ -342,6 +335,9 @@ def login():
         if hasattr(usuario, 'ultimo_acesso'):
             usuario.ultimo_acesso = datetime.utcnow()
         
+        # Persistir token e último acesso (o registro de log não faz mais commit na sessão)
+        db.session.commit()
+        
         # Registrar login bem-sucedido usando ambos os métodos
         try:
             log = Log(
@@ -360,7 +356,8 @@ def login():
                 usuario_id=usuario.id
             )
         
-        # Salvar na sessão
+        # Salvar na sessão (com um novo ID, para evitar fixação de sessão)
+        regenerar_sessao()
         session['usuario_id'] = usuario.id
         if token:
             session['auth_token'] = token
@@ -387,16 +384,17 @@ def login():
 def logout():
     if 'usuario_id' in session:
         usuario_id = session['usuario_id']
-        usuario = Usuario.query.get(usuario_id)
+        usuario = get_usuario_atual()
         
         # Revogar token JWT se existir
         if 'auth_token' in session:
             token = session['auth_token']
             try:
-                token_db = Token.query.filter_by(token=token).first()
+                token_db = Token.buscar(token).first()
                 if token_db:
                     token_db.is_revogado = True
                     db.session.commit()
+                token_cache.revogar(token)
             except Exception as e:
                 print(f"Erro ao revogar token: {str(e)}")
         
@@ -419,6 +417,7 @@ def logout():
             )
     
     # Limpar sessão
+    invalidar_usuario_atual()
     session.pop('usuario_id', None)
     session.pop('auth_token', None)
     session.pop('carrinho', None)
@@ -508,8 +507,8 @@ def esqueci_senha():
             </html>
             """
             
-            # Enviar email
-            enviado = enviar_email(email, assunto, mensagem, html)
+            # Enfileirar email (o envio acontece em segundo plano)
+            enviado = enfileirar_email(email, assunto, mensagem, html)
             
             if enviado:
                 flash('Um link de recuperação foi enviado para o seu email.', 'success')
@@ -2,6 +2,9 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from database import db
 from models.models import Produto, BoloPersonalizado, Usuario, CarrinhoItem, CarrinhoBoloPersonalizado
 from utils.helpers import registrar_log
+from utils.cart_repository import (carregar_carrinho, normalizar_carrinho, carregar_produtos_ativos, carregar_bolos,
+                                   somar_produtos_carrinho, somar_bolos_carrinho, QUANTIDADE_MAXIMA)
+from utils.cart_snapshot import invalidar_snapshot_carrinho
 import json
 
 cart_bp = Blueprint('cart', __name__)
@@ -49,76 +52,45 @@ def calcular_totais_carrinho(usuario_id=None):
     erros = []
     
     if usuario_id:
-        # Buscar itens regulares do banco de dados
-        itens_db = CarrinhoItem.query.filter_by(usuario_id=usuario_id).all()
-        for item in itens_db:
-            produto = Produto.query.get(item.produto_id)
-            if produto and produto.ativo:
-                # Validar quantidade
-                if item.quantidade <= 0:
-                    erros.append(f"Quantidade inválida para {produto.nome}")
-                    continue
-                if item.quantidade > 10:
-                    item.quantidade = 10
-                    db.session.commit()
-                    erros.append(f"Quantidade de {produto.nome} ajustada para o máximo permitido (10)")
-                
-                subtotal = produto.preco * item.quantidade
-                total += subtotal
-                itens_regulares.append({
-                    'id': produto.id,
-                    'nome': produto.nome,
-                    'preco': produto.preco,
-                    'quantidade': item.quantidade,
-                    'subtotal': subtotal,
-                    'tipo': 'regular'
-                })
-            else:
-                # Produto não existe ou está inativo, remover do carrinho
-                db.session.delete(item)
-                db.session.commit()
-                erros.append(f"Produto ID {item.produto_id} removido do carrinho (não disponível)")
+        # Carregar o carrinho com uma query por tipo de item e aplicar as regras em lote
+        regulares_db, bolos_db = carregar_carrinho(usuario_id)
+        regulares_db, bolos_db, erros = normalizar_carrinho(regulares_db, bolos_db)
         
-        # Buscar bolos personalizados do banco de dados
-        bolos_db = CarrinhoBoloPersonalizado.query.filter_by(usuario_id=usuario_id).all()
-        for item in bolos_db:
-            bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-            if bolo:
-                # Validar quantidade
-                if item.quantidade <= 0:
-                    erros.append(f"Quantidade inválida para bolo personalizado")
-                    continue
-                if item.quantidade > 10:
-                    item.quantidade = 10
-                    db.session.commit()
-                    erros.append(f"Quantidade de bolo personalizado ajustada para o máximo permitido (10)")
-                
-                subtotal = bolo.preco * item.quantidade
-                total += subtotal
-                itens_personalizados.append({
-                    'id': bolo.id,
-                    'nome': bolo.nome or f"Bolo Personalizado de {formatar_campo_simples(bolo.massa) if bolo.massa else 'Personalizado'}",
-                    'massa': formatar_campo_simples(bolo.massa),
-                    'recheios': formatar_lista_json(bolo.recheios),
-                    'cobertura': formatar_campo_simples(bolo.cobertura),
-                    'finalizacao': formatar_lista_json(bolo.finalizacao),
-                    'observacoes': bolo.observacoes,
-                    'preco': bolo.preco,
-                    'quantidade': item.quantidade,
-                    'subtotal': subtotal,
-                    'tipo': 'personalizado'
-                })
-            else:
-                # Bolo não existe, remover do carrinho
-                db.session.delete(item)
-                db.session.commit()
-                erros.append(f"Bolo personalizado ID {item.bolo_personalizado_id} removido do carrinho (não disponível)")
+        for item, produto in regulares_db:
+            subtotal = produto.preco * item.quantidade
+            total += subtotal
+            itens_regulares.append({
+                'id': produto.id,
+                'nome': produto.nome,
+                'preco': produto.preco,
+                'quantidade': item.quantidade,
+                'subtotal': subtotal,
+                'tipo': 'regular'
+            })
+        
+        for item, bolo in bolos_db:
+            subtotal = bolo.preco * item.quantidade
+            total += subtotal
+            itens_personalizados.append({
+                'id': bolo.id,
+                'nome': bolo.nome or f"Bolo Personalizado de {formatar_campo_simples(bolo.massa) if bolo.massa else 'Personalizado'}",
+                'massa': formatar_campo_simples(bolo.massa),
+                'recheios': formatar_lista_json(bolo.recheios),
+                'cobertura': formatar_campo_simples(bolo.cobertura),
+                'finalizacao': formatar_lista_json(bolo.finalizacao),
+                'observacoes': bolo.observacoes,
+                'preco': bolo.preco,
+                'quantidade': item.quantidade,
+                'subtotal': subtotal,
+                'tipo': 'personalizado'
+            })
     else:
         # Carrinho na sessão para usuários não logados
         if 'carrinho' in session and session['carrinho']:
             carrinho_atualizado = {}
+            produtos = carregar_produtos_ativos(item['id'] for item in session['carrinho'].values())
             for item_id, item in session['carrinho'].items():
-                produto = Produto.query.filter_by(id=item['id'], ativo=True).first()
+                produto = produtos.get(int(item['id']))
                 if produto:
                     # Validar e ajustar quantidade
                     quantidade = item['quantidade']
@@ -157,8 +129,9 @@ def calcular_totais_carrinho(usuario_id=None):
         
         if 'carrinho_personalizado' in session and session['carrinho_personalizado']:
             carrinho_personalizado_atualizado = {}
+            bolos = carregar_bolos(item['id'] for item in session['carrinho_personalizado'].values())
             for item_id, item in session['carrinho_personalizado'].items():
-                bolo = BoloPersonalizado.query.get(item['id'])
+                bolo = bolos.get(int(item['id']))
                 if bolo:
                     # Validar e ajustar quantidade
                     quantidade = item['quantidade']
@@ -231,31 +204,20 @@ def adicionar_ao_carrinho(produto_id):
     # Se o usuário estiver logado, salvar no banco de dados
     if 'usuario_id' in session:
         usuario_id = session['usuario_id']
-        # Verificar se o item já está no carrinho
-        item_existente = CarrinhoItem.query.filter_by(
-            usuario_id=usuario_id, 
+        # Soma atômica no banco: não duplica linhas em cliques simultâneos
+        somar_produtos_carrinho(usuario_id, {produto_id: 1})
+        quantidade = db.session.query(CarrinhoItem.quantidade).filter_by(
+            usuario_id=usuario_id,
             produto_id=produto_id
-        ).first()
+        ).scalar()
+        db.session.commit()
         
-        if item_existente:
-            # Verificar limite de quantidade
-            if item_existente.quantidade >= 10:
-                flash(f'Quantidade máxima de {produto.nome} atingida (10 unidades)', 'warning')
-            else:
-                item_existente.quantidade += 1
-                db.session.commit()
-                flash(f'{produto.nome} adicionado ao carrinho!', 'success')
+        if quantidade >= QUANTIDADE_MAXIMA:
+            flash(f'{produto.nome} está no carrinho com a quantidade máxima ({QUANTIDADE_MAXIMA} unidades)', 'warning')
         else:
-            # Criar novo item
-            novo_item = CarrinhoItem(
-                usuario_id=usuario_id,
-                produto_id=produto_id,
-                quantidade=1
-            )
-            db.session.add(novo_item)
-            db.session.commit()
             flash(f'{produto.nome} adicionado ao carrinho!', 'success')
         
+        invalidar_snapshot_carrinho(usuario_id)
         registrar_log("INFO", f"Produto adicionado ao carrinho: ID {produto_id}", usuario_id)
     else:
         # Manter o comportamento da sessão para usuários não logados
@@ -298,31 +260,20 @@ def adicionar_bolo_personalizado_ao_carrinho(bolo_id):
         return redirect(url_for('index'))
     
     usuario_id = session['usuario_id']
-    # Verificar se o bolo já está no carrinho
-    item_existente = CarrinhoBoloPersonalizado.query.filter_by(
-        usuario_id=usuario_id, 
+    # Soma atômica no banco: não duplica linhas em cliques simultâneos
+    somar_bolos_carrinho(usuario_id, {bolo_id: 1})
+    quantidade = db.session.query(CarrinhoBoloPersonalizado.quantidade).filter_by(
+        usuario_id=usuario_id,
         bolo_personalizado_id=bolo_id
-    ).first()
+    ).scalar()
+    db.session.commit()
     
-    if item_existente:
-        # Verificar limite de quantidade
-        if item_existente.quantidade >= 10:
-            flash(f'Quantidade máxima de bolo personalizado atingida (10 unidades)', 'warning')
-        else:
-            item_existente.quantidade += 1
-            db.session.commit()
-            flash(f'Bolo personalizado adicionado ao carrinho!', 'success')
+    if quantidade >= QUANTIDADE_MAXIMA:
+        flash(f'Bolo personalizado está no carrinho com a quantidade máxima ({QUANTIDADE_MAXIMA} unidades)', 'warning')
     else:
-        # Criar novo item
-        novo_item = CarrinhoBoloPersonalizado(
-            usuario_id=usuario_id,
-            bolo_personalizado_id=bolo_id,
-            quantidade=1
-        )
-        db.session.add(novo_item)
-        db.session.commit()
         flash(f'Bolo personalizado adicionado ao carrinho!', 'success')
     
+    invalidar_snapshot_carrinho(usuario_id)
     registrar_log("INFO", f"Bolo personalizado adicionado ao carrinho: ID {bolo_id}", usuario_id)
     
     return redirect(url_for('cart.carrinho'))
@@ -339,6 +290,7 @@ def remover_do_carrinho(produto_id):
         if item_existente:
             db.session.delete(item_existente)
             db.session.commit()
+            invalidar_snapshot_carrinho(session['usuario_id'])
             registrar_log("INFO", f"Produto removido do carrinho: ID {produto_id}", session['usuario_id'])
             flash('Item removido do carrinho!', 'success')
         else:
@@ -370,6 +322,7 @@ def remover_bolo_personalizado(bolo_id):
         if item_existente:
             db.session.delete(item_existente)
             db.session.commit()
+            invalidar_snapshot_carrinho(session['usuario_id'])
             registrar_log("INFO", f"Bolo personalizado removido do carrinho: ID {bolo_id}", session['usuario_id'])
             flash('Bolo personalizado removido do carrinho!', 'success')
         else:
@@ -425,14 +378,15 @@ def atualizar_quantidade():
                 if item:
                     item.quantidade = nova_quantidade
                     db.session.commit()
+                    invalidar_snapshot_carrinho(usuario_id)
                     
-                    # Calcular novo subtotal
+                    # Recalcular total do carrinho (já carrega o produto junto com os itens)
+                    _, _, total, _ = calcular_totais_carrinho(usuario_id)
+                    
+                    # Calcular novo subtotal - o produto já está na sessão do SQLAlchemy
                     produto = Produto.query.get(item_id)
                     subtotal = produto.preco * nova_quantidade
                     
-                    # Recalcular total do carrinho
-                    _, _, total, _ = calcular_totais_carrinho(usuario_id)
-                    
                     return jsonify({
                         'status': 'success',
                         'subtotal': subtotal,
@@ -447,14 +401,15 @@ def atualizar_quantidade():
                 if item:
                     item.quantidade = nova_quantidade
                     db.session.commit()
+                    invalidar_snapshot_carrinho(usuario_id)
                     
-                    # Calcular novo subtotal
+                    # Recalcular total do carrinho (já carrega o bolo junto com os itens)
+                    _, _, total, _ = calcular_totais_carrinho(usuario_id)
+                    
+                    # Calcular novo subtotal - o bolo já está na sessão do SQLAlchemy
                     bolo = BoloPersonalizado.query.get(item_id)
                     subtotal = bolo.preco * nova_quantidade
                     
-                    # Recalcular total do carrinho
-                    _, _, total, _ = calcular_totais_carrinho(usuario_id)
-                    
                     return jsonify({
                         'status': 'success',
                         'subtotal': subtotal,
@@ -533,63 +488,15 @@ def sincronizar_carrinho():
     
     usuario_id = session['usuario_id']
     
-    # Transferir produtos regulares
-    if 'carrinho' in session and session['carrinho']:
-        for item_id, item in session['carrinho'].items():
-            produto_id = item['id']
-            quantidade = item['quantidade']
-            
-            # Verificar se o item já existe no banco
-            item_existente = CarrinhoItem.query.filter_by(
-                usuario_id=usuario_id, 
-                produto_id=produto_id
-            ).first()
-            
-            if item_existente:
-                # Somar as quantidades (respeitando o limite)
-                nova_quantidade = min(item_existente.quantidade + quantidade, 10)
-                item_existente.quantidade = nova_quantidade
-            else:
-                # Criar novo item
-                novo_item = CarrinhoItem(
-                    usuario_id=usuario_id,
-                    produto_id=produto_id,
-                    quantidade=min(quantidade, 10)
-                )
-                db.session.add(novo_item)
-        
-        # Limpar carrinho da sessão
-        session.pop('carrinho')
+    # Uma instrução por tabela: as quantidades são somadas às do banco, limitadas ao máximo
+    carrinho = session.pop('carrinho', None) or {}
+    somar_produtos_carrinho(usuario_id, {item['id']: item['quantidade'] for item in carrinho.values()})
     
-    # Transferir bolos personalizados
-    if 'carrinho_personalizado' in session and session['carrinho_personalizado']:
-        for item_id, item in session['carrinho_personalizado'].items():
-            bolo_id = item['id']
-            quantidade = item['quantidade']
-            
-            # Verificar se o item já existe no banco
-            item_existente = CarrinhoBoloPersonalizado.query.filter_by(
-                usuario_id=usuario_id, 
-                bolo_personalizado_id=bolo_id
-            ).first()
-            
-            if item_existente:
-                # Somar as quantidades (respeitando o limite)
-                nova_quantidade = min(item_existente.quantidade + quantidade, 10)
-                item_existente.quantidade = nova_quantidade
-            else:
-                # Criar novo item
-                novo_item = CarrinhoBoloPersonalizado(
-                    usuario_id=usuario_id,
-                    bolo_personalizado_id=bolo_id,
-                    quantidade=min(quantidade, 10)
-                )
-                db.session.add(novo_item)
-        
-        # Limpar carrinho personalizado da sessão
-        session.pop('carrinho_personalizado')
+    carrinho_personalizado = session.pop('carrinho_personalizado', None) or {}
+    somar_bolos_carrinho(usuario_id, {item['id']: item['quantidade'] for item in carrinho_personalizado.values()})
     
     db.session.commit()
+    invalidar_snapshot_carrinho(usuario_id)
     registrar_log("INFO", f"Carrinho sincronizado", usuario_id)
     
     return jsonify({'status': 'success', 'message': 'Carrinho sincronizado com sucesso'})
\ No newline at end of file
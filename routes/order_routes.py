@@ -3,9 +3,15 @@
 from flask import Blueprint, jsonify, render_template, request, redirect, url_for, flash, session, current_app
 import mercadopago
 from database import db
-from models.models import Pedido, ItemPedido, ItemPedidoPersonalizado, Produto, BoloPersonalizado, Usuario, CarrinhoItem, CarrinhoBoloPersonalizado
-from utils.helpers import is_admin, registrar_log
+from models.models import Pedido, ItemPedido, ItemPedidoPersonalizado, Produto, BoloPersonalizado
+from utils.helpers import is_admin, registrar_log, get_usuario_atual
 from utils.payment import create_mercadopago_preference, create_mercadopago_preference_simple, create_mercadopago_preference_minimal
+from utils.payment_gateway import GatewayIndisponivel
+from utils.cart_snapshot import obter_snapshot_carrinho, TAXA_ENTREGA
+from utils.preference_cache import preference_cache
+from utils.payment_events import payment_events, extrair_pagamento_id
+from utils.checkout_draft import salvar_rascunho, carregar_rascunho, CHAVE_SESSAO as CHAVE_RASCUNHO
+from decimal import Decimal
 import json
 
 order_bp = Blueprint('order', __name__)
@@ -21,48 +27,35 @@ def finalizar_compra():
     
     # Buscar itens do carrinho do usuário
     usuario_id = session['usuario_id']
-    usuario = Usuario.query.get(usuario_id)
+    usuario = get_usuario_atual()
     
     if not usuario:
         flash('Usuário não encontrado', 'danger')
         return redirect(url_for('auth.login'))
     
+    # Montar o snapshot do carrinho uma única vez para toda a requisição
+    snapshot = obter_snapshot_carrinho(usuario_id)
+    subtotal_produtos = snapshot.subtotal
+    
     # Itens regulares
-    itens_regulares = []
-    itens_db = CarrinhoItem.query.filter_by(usuario_id=usuario_id).all()
-    subtotal_produtos = 0
-    
-    for item in itens_db:
-        produto = Produto.query.get(item.produto_id)
-        if produto:
-            subtotal = produto.preco * item.quantidade
-            subtotal_produtos += subtotal
-            itens_regulares.append({
-                'id': produto.id,
-                'nome': produto.nome,
-                'preco': produto.preco,
-                'quantidade': item.quantidade,
-                'subtotal': subtotal,
-                'tipo': 'regular'
-            })
+    itens_regulares = [{
+        'id': linha.id,
+        'nome': linha.nome,
+        'preco': linha.preco,
+        'quantidade': linha.quantidade,
+        'subtotal': linha.subtotal,
+        'tipo': 'regular'
+    } for linha in snapshot.regulares]
     
     # Bolos personalizados
-    itens_personalizados = []
-    bolos_db = CarrinhoBoloPersonalizado.query.filter_by(usuario_id=usuario_id).all()
-    
-    for item in bolos_db:
-        bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-        if bolo:
-            subtotal = bolo.preco * item.quantidade
-            subtotal_produtos += subtotal
-            itens_personalizados.append({
-                'id': bolo.id,
-                'nome': f"Bolo Personalizado de {bolo.massa.capitalize()}",
-                'preco': bolo.preco,
-                'quantidade': item.quantidade,
-                'subtotal': subtotal,
-                'tipo': 'personalizado'
-            })
+    itens_personalizados = [{
+        'id': linha.id,
+        'nome': f"Bolo Personalizado de {linha.massa.capitalize()}",
+        'preco': linha.preco,
+        'quantidade': linha.quantidade,
+        'subtotal': linha.subtotal,
+        'tipo': 'personalizado'
+    } for linha in snapshot.personalizados]
     
     # Verificar se o carrinho está vazio
     tem_itens = len(itens_regulares) > 0 or len(itens_personalizados) > 0
@@ -83,7 +76,7 @@ def finalizar_compra():
         try:
             # Obter tipo de entrega
             tipo_entrega = request.form.get('tipo_entrega')
-            valor_frete = 0
+            valor_frete = Decimal('0.00')
             
             current_app.logger.info(f"=== PROCESSANDO FINALIZAR COMPRA ===")
             current_app.logger.info(f"Tipo de entrega selecionado: {tipo_entrega}")
@@ -95,7 +88,7 @@ def finalizar_compra():
             
             # Aplicar lógica de frete
             if tipo_entrega == 'frete':
-                valor_frete = 12.00  # Valor do frete fixo
+                valor_frete = TAXA_ENTREGA  # Valor do frete fixo
                 current_app.logger.info(f"Taxa de entrega aplicada: R$ {valor_frete}")
                 
                 # Usar o endereço já cadastrado do usuário
@@ -131,19 +124,19 @@ def finalizar_compra():
                 flash('Total do pedido inválido. Verifique os itens do carrinho.', 'danger')
                 return redirect(url_for('cart.carrinho'))
             
-            # SALVAR OS DADOS DO PEDIDO NA SESSÃO (não no banco ainda)
-            session['pedido_temp'] = {
-                'usuario_id': session['usuario_id'],
+            # SALVAR O PEDIDO PENDENTE EM UM RASCUNHO (a sessão guarda apenas o código)
+            rascunho = salvar_rascunho(usuario_id, {
                 'tipo_entrega': tipo_entrega,
-                'valor_frete': valor_frete,
+                'valor_frete': float(valor_frete),
                 'endereco_entrega': endereco_entrega,
                 'observacoes': request.form.get('observacoes', ''),
-                'total': total,
-                'itens_regulares': [{'produto_id': item.produto_id, 'quantidade': item.quantidade} for item in itens_db],
-                'itens_personalizados': [{'bolo_personalizado_id': item.bolo_personalizado_id, 'quantidade': item.quantidade} for item in bolos_db]
-            }
+                'total': float(total),
+                'itens_regulares': [{'produto_id': linha.id, 'quantidade': linha.quantidade} for linha in snapshot.regulares],
+                'itens_personalizados': [{'bolo_personalizado_id': linha.id, 'quantidade': linha.quantidade} for linha in snapshot.personalizados]
+            }, session.get(CHAVE_RASCUNHO))
+            session[CHAVE_RASCUNHO] = rascunho.codigo
             
-            current_app.logger.info(f"Dados do pedido temporário salvos na sessão: {session['pedido_temp']}")
+            current_app.logger.info(f"Rascunho do pedido salvo: {rascunho.codigo}")
             
             # URLs de retorno após o pagamento - garantir que estejam absolutas e válidas
             base_url = request.host_url.rstrip('/')
@@ -174,46 +167,56 @@ def finalizar_compra():
             delivery_option = 'delivery' if tipo_entrega == 'frete' else 'pickup'
             current_app.logger.info(f"Delivery option configurado: {delivery_option}")
             
-            # Tentar criar preferência de pagamento - usando as funções existentes
+            # Carrinho, preços e entrega iguais aos da última tentativa: reaproveitar o link já criado
+            chave_preferencia = preference_cache.calcular_chave(
+                snapshot, delivery_option, success_url, failure_url, pending_url, rascunho.codigo
+            )
+            payment_url = preference_cache.obter(usuario_id, chave_preferencia)
+            if payment_url:
+                current_app.logger.info(f"Preferência reaproveitada do cache. Redirecionando para: {payment_url}")
+                return redirect(payment_url)
+            
+            # Tentar criar preferência de pagamento. Os formatos mais simples só são tentados
+            # quando o Mercado Pago recusa os dados; se ele estiver lento ou fora do ar
+            # (GatewayIndisponivel) a compra falha na hora, sem novas chamadas
             payment_url = None
             error = None
-            
-            # 1ª tentativa: Usar a função principal (mais completa)
-            current_app.logger.info("Tentativa 1: create_mercadopago_preference")
-            payment_url, error = create_mercadopago_preference(
-                session['usuario_id'], success_url, failure_url, pending_url, delivery_option
+            tentativas = (
+                ('create_mercadopago_preference', create_mercadopago_preference),
+                ('create_mercadopago_preference_simple', create_mercadopago_preference_simple),
+                ('create_mercadopago_preference_minimal', create_mercadopago_preference_minimal)
             )
-            
-            # 2ª tentativa: Usar a versão simplificada
-            if not payment_url:
-                current_app.logger.warning(f"Tentativa 1 falhou: {error}")
-                current_app.logger.info("Tentativa 2: create_mercadopago_preference_simple")
-                payment_url, error = create_mercadopago_preference_simple(
-                    session['usuario_id'], success_url, failure_url, pending_url, delivery_option
-                )
-            
-            # 3ª tentativa: Usar a versão minimalista
-            if not payment_url:
-                current_app.logger.warning(f"Tentativa 2 falhou: {error}")
-                current_app.logger.info("Tentativa 3: create_mercadopago_preference_minimal")
-                payment_url, error = create_mercadopago_preference_minimal(
-                    session['usuario_id'], success_url, failure_url, pending_url, delivery_option
-                )
+            try:
+                for numero, (nome, criar_preferencia) in enumerate(tentativas, start=1):
+                    current_app.logger.info(f"Tentativa {numero}: {nome}")
+                    payment_url, error = criar_preferencia(
+                        session['usuario_id'], success_url, failure_url, pending_url, delivery_option,
+                        snapshot=snapshot, rascunho=rascunho.codigo
+                    )
+                    if payment_url:
+                        break
+                    current_app.logger.warning(f"Tentativa {numero} falhou: {error}")
+            except GatewayIndisponivel as e:
+                session.pop(CHAVE_RASCUNHO, None)
+                current_app.logger.error(f"Mercado Pago indisponível: {e}")
+                flash('O serviço de pagamento está temporariamente indisponível. Tente novamente em alguns minutos.', 'warning')
+                return redirect(url_for('cart.carrinho'))
             
             if payment_url:
+                preference_cache.guardar(usuario_id, chave_preferencia, payment_url)
                 current_app.logger.info(f"Preferência criada com sucesso! Redirecionando para: {payment_url}")
                 # Redirecionar para o Mercado Pago
                 return redirect(payment_url)
             else:
                 # Se houve erro na criação da preferência, limpar dados temporários
-                session.pop('pedido_temp', None)
+                session.pop(CHAVE_RASCUNHO, None)
                 current_app.logger.error(f"TODAS as tentativas falharam. Último erro: {error}")
                 flash(f"Erro ao processar pagamento: {error}", 'danger')
                 return redirect(url_for('cart.carrinho'))
                 
         except Exception as e:
             # Se houve erro, limpar dados temporários
-            session.pop('pedido_temp', None)
+            session.pop(CHAVE_RASCUNHO, None)
             current_app.logger.error(f"Erro ao processar pedido: {str(e)}")
             current_app.logger.error("Traceback:", exc_info=True)
             flash(f"Erro ao processar pagamento: {str(e)}", 'danger')
@@ -223,114 +226,72 @@ def finalizar_compra():
     return render_template('finalizar_compra.html', itens=todos_itens, total=subtotal_produtos, usuario=usuario)
 
 
-# ROTA DE SUCESSO DO PAGAMENTO - CRIAR O PEDIDO APENAS AQUI
+# NOTIFICAÇÕES DO MERCADO PAGO - O PEDIDO É CRIADO PELO WORKER (utils/payment_events.py)
+@order_bp.route('/pagamento/notificacao', methods=['POST'])
+def notificacao_pagamento():
+    pagamento_id = extrair_pagamento_id(request.args, request.get_json(silent=True))
+    if not pagamento_id:
+        # Outros tópicos (merchant_order, etc.) só precisam ser confirmados
+        return jsonify({'status': 'ignorado'}), 200
+    
+    if not payment_events.verificar_assinatura(request.headers.get('x-signature'),
+                                               request.headers.get('x-request-id'), pagamento_id):
+        current_app.logger.warning(f"Notificação com assinatura inválida para o pagamento {pagamento_id}")
+        return jsonify({'status': 'assinatura_invalida'}), 401
+    
+    try:
+        payment_events.enfileirar(pagamento_id)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erro ao enfileirar o pagamento {pagamento_id}: {str(e)}")
+        # Erro 5xx: o Mercado Pago reenvia a notificação mais tarde
+        return jsonify({'status': 'erro'}), 500
+    
+    return jsonify({'status': 'recebido'}), 200
+
+
+# ROTA DE SUCESSO DO PAGAMENTO - ACOMPANHA A CRIAÇÃO DO PEDIDO
 @order_bp.route('/pagamento/sucesso')
 def pagamento_sucesso():
-    try:
-        # DEBUG: Log para verificar se a rota está sendo chamada
-        current_app.logger.info("=== ROTA DE SUCESSO CHAMADA ===")
-        current_app.logger.info(f"Session keys: {list(session.keys())}")
-        
-        # Verificar se existem dados temporários do pedido
-        if 'pedido_temp' not in session:
-            current_app.logger.error("pedido_temp não encontrado na session")
-            current_app.logger.info(f"Session completa: {dict(session)}")
-            flash('Dados do pedido não encontrados. Tente finalizar a compra novamente.', 'warning')
-            return redirect(url_for('cart.carrinho'))
-        
-        pedido_temp = session['pedido_temp']
-        current_app.logger.info(f"pedido_temp encontrado: {pedido_temp}")
-        
-        # Criar o pedido no banco de dados APENAS AGORA
-        novo_pedido = Pedido(
-            usuario_id=pedido_temp['usuario_id'],
-            status='Aprovado',  # Já criamos como aprovado
-            tipo_entrega=pedido_temp['tipo_entrega'],
-             valor_frete=pedido_temp['valor_frete'],
-            endereco_entrega=json.dumps(pedido_temp['endereco_entrega']) if pedido_temp['endereco_entrega'] else None,
-            observacoes=pedido_temp['observacoes'],
-            total=pedido_temp['total']
-        )
-        
-        current_app.logger.info(f"Criando pedido: {novo_pedido.__dict__}")
-        
-        db.session.add(novo_pedido)
-        db.session.flush()  # Para obter o ID do pedido
-        
-        current_app.logger.info(f"Pedido criado com ID: {novo_pedido.id}")
-        
-        itens_descricao = []
-        
-        # Adicionar itens regulares ao pedido
-        for item_data in pedido_temp['itens_regulares']:
-            current_app.logger.info(f"Processando item regular: {item_data}")
-            produto = Produto.query.get(item_data['produto_id'])
-            if produto:
-                item_pedido = ItemPedido(
-                    pedido_id=novo_pedido.id,
-                    produto_id=produto.id,
-                    quantidade=item_data['quantidade'],
-                    preco_unitario=produto.preco
-                )
-                
-                db.session.add(item_pedido)
-                itens_descricao.append(f"{item_data['quantidade']}x {produto.nome}")
-                current_app.logger.info(f"Item regular adicionado: {item_pedido.__dict__}")
-        
-        # Adicionar itens personalizados ao pedido
-        for item_data in pedido_temp['itens_personalizados']:
-            current_app.logger.info(f"Processando item personalizado: {item_data}")
-            bolo = BoloPersonalizado.query.get(item_data['bolo_personalizado_id'])
-            if bolo:
-                item_pedido_personalizado = ItemPedidoPersonalizado(
-                    pedido_id=novo_pedido.id,
-                    bolo_personalizado_id=bolo.id,
-                    quantidade=item_data['quantidade'],
-                    preco_unitario=bolo.preco
-                )
-                
-                db.session.add(item_pedido_personalizado)
-                itens_descricao.append(f"{item_data['quantidade']}x Bolo personalizado de {bolo.massa.capitalize()}")
-                current_app.logger.info(f"Item personalizado adicionado: {item_pedido_personalizado.__dict__}")
-        
-        # Limpar o carrinho após pagamento confirmado
-        current_app.logger.info("Limpando carrinho...")
-        CarrinhoItem.query.filter_by(usuario_id=pedido_temp['usuario_id']).delete()
-        CarrinhoBoloPersonalizado.query.filter_by(usuario_id=pedido_temp['usuario_id']).delete()
-        
-        # Salvar tudo no banco
-        current_app.logger.info("Fazendo commit no banco...")
-        db.session.commit()
-        current_app.logger.info("Commit realizado com sucesso!")
-        
-        # Limpar dados temporários da sessão
-        session.pop('pedido_temp', None)
-        
-        # Registrar log
-        descricao_log = f"Pedido #{novo_pedido.id} criado e aprovado com {len(itens_descricao)} itens: {', '.join(itens_descricao)}. Total: R$ {pedido_temp['total']:.2f}"
-        if pedido_temp['valor_frete'] > 0:
-            descricao_log += f" (inclui frete de R$ {pedido_temp['valor_frete']:.2f})"
-        
-        current_app.logger.info(f"Registrando log: {descricao_log}")
-        
-        registrar_log(
-            tipo='pagamento_aprovado',
-            descricao=descricao_log,
-            usuario_id=session.get('usuario_id')
-        )
-        
+    # O pedido não depende deste redirecionamento: ele é criado a partir do rascunho
+    codigo_rascunho = session.pop(CHAVE_RASCUNHO, None)
+    
+    if 'usuario_id' not in session:
+        flash('Faça login para ver seus pedidos!', 'danger')
+        return redirect(url_for('auth.login'))
+    
+    rascunho = carregar_rascunho(codigo_rascunho, session['usuario_id'])
+    if rascunho and rascunho.pedido_id:
         flash('Pagamento realizado com sucesso! Obrigado pela sua compra.', 'success')
-        current_app.logger.info("=== SUCESSO PROCESSADO COM SUCESSO ===")
-        
+        return redirect(url_for('order.detalhes_pedido', pedido_id=rascunho.pedido_id))
+    
+    pagamento_id = request.args.get('payment_id') or request.args.get('collection_id')
+    if not pagamento_id or pagamento_id == 'null':
+        flash('Se o pagamento foi aprovado, seu pedido aparecerá aqui em instantes.', 'info')
+        return redirect(url_for('order.pedidos'))
+    
+    # Caso a notificação do Mercado Pago ainda não tenha chegado
+    try:
+        payment_events.enfileirar(pagamento_id, origem='retorno')
     except Exception as e:
-        current_app.logger.error(f"ERRO ao processar confirmação de pagamento: {str(e)}")
-        current_app.logger.error(f"Traceback: ", exc_info=True)
         db.session.rollback()
-        # Limpar dados temporários em caso de erro
-        session.pop('pedido_temp', None)
-        flash('Erro ao processar confirmação de pagamento.', 'danger')
+        current_app.logger.error(f"Erro ao enfileirar o pagamento {pagamento_id}: {str(e)}")
+    
+    return render_template('pagamento_processando.html', pagamento_id=pagamento_id, rascunho=rascunho)
+
+
+@order_bp.route('/pagamento/<pagamento_id>/situacao')
+def situacao_pagamento(pagamento_id):
+    if 'usuario_id' not in session:
+        return jsonify({'situacao': 'nao_autenticado'}), 401
+    
+    situacao = payment_events.situacao(pagamento_id, session['usuario_id'])
+    if situacao.get('pedido_id'):
+        situacao['url'] = url_for('order.detalhes_pedido', pedido_id=situacao['pedido_id'])
     
-    return redirect(url_for('order.pedidos'))
+    resposta = jsonify(situacao)
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
 
 
 # ROTAS DE ERRO E PENDENTE - LIMPAR DADOS TEMPORÁRIOS
@@ -338,7 +299,7 @@ def pagamento_sucesso():
 def pagamento_erro():
     try:
         # Limpar dados temporários da sessão (não criar pedido)
-        session.pop('pedido_temp', None)
+        session.pop(CHAVE_RASCUNHO, None)
         
         registrar_log(
             tipo='pagamento_erro',
@@ -359,7 +320,7 @@ def pagamento_erro():
 def pagamento_pendente():
     try:
         # Limpar dados temporários da sessão (não criar pedido)
-        session.pop('pedido_temp', None)
+        session.pop(CHAVE_RASCUNHO, None)
         
         registrar_log(
             tipo='pagamento_pendente',
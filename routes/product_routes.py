@@ -2,6 +2,10 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from database import db
 from models.models import Produto, BoloPersonalizado, CarrinhoBoloPersonalizado, Usuario
 from utils.helpers import is_admin, allowed_file, registrar_log
+from utils.catalog import catalogo
+from utils.page_cache import page_cache, NAMESPACE_CATALOGO, namespace_produto
+from utils.http_cache import http_cache
+from utils.cart_snapshot import invalidar_snapshot_carrinho
 import os
 from werkzeug.utils import secure_filename
 from sqlalchemy import desc
@@ -12,16 +16,52 @@ product_bp = Blueprint('product', __name__)
 # No arquivo product_bp.py (ou onde estiver a rota 'todos_produtos')
 
 @product_bp.route('/produtos')
+@http_cache.condicional(lambda **kwargs: catalogo.validadores())
+@page_cache.cachear(NAMESPACE_CATALOGO)
 def todos_produtos():
-    # Modificar a consulta para buscar apenas produtos ativos
-    produtos = Produto.query.filter_by(ativo=True).all()
-    # Buscando todas as categorias distintas de produtos ativos
-    categorias = db.session.query(Produto.categoria).filter_by(ativo=True).distinct().all()
-    # Convertendo para lista simples e removendo valores vazios
-    categorias = [categoria[0] for categoria in categorias if categoria[0]]
-    return render_template('todos_produtos.html', produtos=produtos, categorias=categorias)
+    # Filtros, ordenação e paginação feitos no servidor sobre o catálogo em memória
+    filtros = _filtros_catalogo()
+    pagina = catalogo.paginar(**filtros)
+    return render_template('todos_produtos.html',
+                           produtos=pagina.items,
+                           paginacao=pagina,
+                           categorias=catalogo.categorias(),
+                           filtros=filtros)
+
+@product_bp.route('/api/produtos')
+def api_produtos():
+    """Catálogo paginado em JSON (mesmos filtros da página de produtos)"""
+    pagina = catalogo.paginar(**_filtros_catalogo())
+    return jsonify({
+        'produtos': [produto.to_dict() for produto in pagina.items],
+        'pagina': pagina.page,
+        'por_pagina': pagina.per_page,
+        'total': pagina.total,
+        'paginas': pagina.pages,
+        'versao': catalogo.versao
+    })
+
+def _filtros_catalogo():
+    """Lê os filtros do catálogo da query string"""
+    por_pagina = request.args.get('por_pagina', type=int)
+    return {
+        'pagina': request.args.get('pagina', 1, type=int),
+        'por_pagina': min(max(por_pagina, 1), 60) if por_pagina else None,
+        'categoria': request.args.get('categoria', '').strip(),
+        'ordem': request.args.get('ordem', '').strip(),
+        'busca': request.args.get('busca', '').strip()
+    }
+
+def _validadores_produto(produto_id):
+    """ETag/Last-Modified da página do produto, a partir da data_atualizacao da linha"""
+    data_atualizacao = db.session.query(Produto.data_atualizacao).filter_by(id=produto_id, ativo=True).first()
+    if data_atualizacao is None:
+        return None
+    return produto_id, data_atualizacao[0]
 
 @product_bp.route('/produto/<int:produto_id>')
+@http_cache.condicional(_validadores_produto)
+@page_cache.cachear(namespace_produto)
 def detalhes_produto(produto_id):
     # Buscar produto e verificar se está ativo
     produto = Produto.query.filter_by(id=produto_id, ativo=True).first_or_404()
@@ -139,6 +179,7 @@ def salvar_bolo_personalizado():
         )
         db.session.add(novo_item_carrinho)
         db.session.commit()
+        invalidar_snapshot_carrinho(session['usuario_id'])
         
         registrar_log("INFO", f"Bolo personalizado adicionado ao carrinho: ID {novo_bolo.id}", session['usuario_id'])
         
@@ -1,13 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, Response, stream_with_context
 from database import db
-from models.models import Usuario, Pedido, BoloPersonalizado, ItemPedido, ItemPedidoPersonalizado, Produto, Token
+from models.models import Usuario, Pedido, BoloPersonalizado, Token, RascunhoPedido
 from werkzeug.security import check_password_hash, generate_password_hash
-from werkzeug.utils import secure_filename
-from utils.helpers import allowed_file
+from utils.helpers import get_usuario_atual, invalidar_usuario_atual
+from utils.token_cache import token_cache
+from utils import data_export
+from utils.images import image_pipeline
+from utils.storage import armazenar, liberar, variantes_conhecidas
+from utils.uploads import receber_upload, verificar_tamanho_requisicao, UploadInvalido
+from utils.checkout_draft import CHAVE_SESSAO as CHAVE_RASCUNHO
 from datetime import datetime, timedelta
-import os
-import json
-import io
 import uuid
 import re
 from functools import wraps
@@ -27,15 +29,16 @@ def login_required(f):
 @user_bp.route('/perfil')
 @login_required
 def perfil():
-    usuario = db.session.get(Usuario, session['usuario_id'])
+    usuario = get_usuario_atual()
     # Buscar tokens ativos para exibir nas sessões
     tokens = Token.query.filter_by(usuario_id=usuario.id, is_revogado=False).all()
-    return render_template('perfil.html', usuario=usuario, tokens=tokens)
+    token_atual_hash = Token.calcular_hash(session['auth_token']) if session.get('auth_token') else None
+    return render_template('perfil.html', usuario=usuario, tokens=tokens, token_atual_hash=token_atual_hash)
 
 @user_bp.route('/perfil/atualizar', methods=['POST'])
 @login_required
 def atualizar_perfil():
-    usuario = db.session.get(Usuario, session['usuario_id'])
+    usuario = get_usuario_atual()
     
     # Debug: Imprimir todos os dados do formulário
     print("=== DEBUG: Dados recebidos do formulário ===")
@@ -178,13 +181,22 @@ def atualizar_perfil():
     except Exception as e:
         db.session.rollback()
         flash(f'Erro ao atualizar perfil: {str(e)}', 'danger')
+    finally:
+        invalidar_usuario_atual()
     
     return redirect(url_for('user.perfil'))
 
 @user_bp.route('/perfil/foto', methods=['POST'])
 @login_required
 def atualizar_foto():
-    usuario = db.session.get(Usuario, session['usuario_id'])
+    usuario = get_usuario_atual()
+    
+    # Recusar pelo Content-Length antes de ler o corpo da requisição
+    try:
+        verificar_tamanho_requisicao('perfil')
+    except UploadInvalido as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('user.perfil'))
     
     # Verificar se há um arquivo de foto no formulário
     if 'foto_perfil' not in request.files:
@@ -197,44 +209,39 @@ def atualizar_foto():
         flash('Nenhuma foto foi selecionada', 'danger')
         return redirect(url_for('user.perfil'))
     
-    if not allowed_file(arquivo.filename):
-        flash('Formato de arquivo não permitido. Use JPG, JPEG, PNG ou GIF', 'danger')
-        return redirect(url_for('user.perfil'))
-    
-    # Limitar tamanho do arquivo (5MB)
-    if len(arquivo.read()) > 5 * 1024 * 1024:
-        flash('O arquivo é muito grande. O tamanho máximo permitido é 5MB', 'danger')
+    # Validar tamanho (5MB) e formato pelo conteúdo, copiando o arquivo em blocos
+    try:
+        recebido = receber_upload(arquivo, 'perfil')
+    except UploadInvalido as e:
+        flash(str(e), 'danger')
         return redirect(url_for('user.perfil'))
     
-    # Resetar o ponteiro do arquivo
-    arquivo.seek(0)
-    
-    # Criar uma pasta para fotos de perfil se não existir
-    diretorio_uploads = os.path.join(current_app.config['UPLOAD_FOLDER'], 'profile_pics')
-    os.makedirs(diretorio_uploads, exist_ok=True)
-    
-    # Salvar a foto com um nome seguro que inclui o ID do usuário e um UUID para evitar colisões
-    filename = f"user_{usuario.id}_{uuid.uuid4()}_{secure_filename(arquivo.filename)}"
-    arquivo.save(os.path.join(diretorio_uploads, filename))
+    # Gravada pelo hash do conteúdo: fotos repetidas reaproveitam o mesmo arquivo
+    url, _ = armazenar(recebido)
     
-    # Excluir foto antiga se existir
-    if usuario.foto_perfil and usuario.foto_perfil.startswith('/static/uploads/profile_pics/'):
-        try:
-            caminho_foto_antiga = os.path.join(current_app.root_path, usuario.foto_perfil.lstrip('/'))
-            if os.path.exists(caminho_foto_antiga):
-                os.remove(caminho_foto_antiga)
-        except Exception as e:
-            print(f"Erro ao excluir foto antiga: {e}")
+    foto_anterior = usuario.foto_perfil
+    variantes_anteriores = usuario.foto_perfil_variantes
     
     # Atualizar o caminho da foto no banco de dados
-    usuario.foto_perfil = f'/static/uploads/profile_pics/{filename}'
+    usuario.foto_perfil = url
+    if url != foto_anterior:
+        usuario.foto_perfil_variantes = variantes_conhecidas(url)
     
     try:
         db.session.commit()
+        # A foto anterior só é removida depois que a nova foi gravada
+        if url != foto_anterior:
+            liberar(foto_anterior, variantes_anteriores,
+                    legado=bool(foto_anterior) and foto_anterior.startswith('/static/uploads/profile_pics/'))
+        if not usuario.foto_perfil_variantes:
+            # Versões reduzidas/WebP geradas fora da requisição (o EXIF já foi removido em armazenar)
+            image_pipeline.agendar(Usuario, usuario.id, 'foto_perfil', 'foto_perfil_variantes', usuario.foto_perfil)
         flash('Foto de perfil atualizada com sucesso!', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Erro ao atualizar foto: {str(e)}', 'danger')
+    finally:
+        invalidar_usuario_atual()
     
     return redirect(url_for('user.perfil'))
 
@@ -242,7 +249,7 @@ def atualizar_foto():
 @user_bp.route('/perfil/alterar-senha', methods=['POST'])
 @login_required
 def alterar_senha():
-    usuario = db.session.get(Usuario, session['usuario_id'])
+    usuario = get_usuario_atual()
     
     senha_atual = request.form.get('senha_atual', '').strip()
     nova_senha = request.form.get('nova_senha', '').strip()
@@ -298,6 +305,7 @@ def alterar_senha():
             token.is_revogado = True
         
         db.session.commit()
+        token_cache.revogar_usuario(usuario.id)
         
         # Gerar novo token de autenticação se o método existir
         if hasattr(usuario, 'gerar_auth_token'):
@@ -305,7 +313,7 @@ def alterar_senha():
             session['auth_token'] = token
             
             # Salvar novo token no banco - removendo o IP
-            novo_token = Token(
+            novo_token = Token.criar(
                 usuario_id=usuario.id,
                 token=token,
                 device_info=request.user_agent.string,
@@ -318,6 +326,8 @@ def alterar_senha():
     except Exception as e:
         db.session.rollback()
         flash(f'Erro ao alterar senha: {str(e)}', 'danger')
+    finally:
+        invalidar_usuario_atual()
     
     return redirect(url_for('user.perfil'))
 
@@ -333,13 +343,14 @@ def revogar_token(token_id):
         return redirect(url_for('user.perfil'))
     
     # Não permitir revogar o token atual
-    if token.token == session.get('auth_token'):
+    if session.get('auth_token') and token.token_hash == Token.calcular_hash(session['auth_token']):
         flash('Não é possível revogar a sessão atual', 'danger')
         return redirect(url_for('user.perfil'))
     
     try:
         token.is_revogado = True
         db.session.commit()
+        token_cache.revogar_hash(token.token_hash)
         flash('Sessão encerrada com sucesso', 'success')
     except Exception as e:
         db.session.rollback()
@@ -350,7 +361,7 @@ def revogar_token(token_id):
 @user_bp.route('/perfil/excluir', methods=['POST'])
 @login_required
 def excluir_conta():
-    usuario = db.session.get(Usuario, session['usuario_id'])
+    usuario = get_usuario_atual()
     
     # Verificar confirmação
     confirmar_exclusao = request.form.get('confirmar_exclusao')
@@ -368,14 +379,8 @@ def excluir_conta():
         flash('Senha incorreta', 'danger')
         return redirect(url_for('user.perfil'))
     
-    # Excluir foto de perfil se existir
-    if usuario.foto_perfil and usuario.foto_perfil.startswith('/static/uploads/profile_pics/'):
-        try:
-            caminho_foto = os.path.join(current_app.root_path, usuario.foto_perfil.lstrip('/'))
-            if os.path.exists(caminho_foto):
-                os.remove(caminho_foto)
-        except Exception as e:
-            print(f"Erro ao excluir foto de perfil: {e}")
+    foto_perfil = usuario.foto_perfil
+    foto_perfil_variantes = usuario.foto_perfil_variantes
     
     # Implementação de anonimização/exclusão conforme LGPD
     try:
@@ -384,6 +389,7 @@ def excluir_conta():
         usuario.email = f"excluido_{uuid.uuid4()}@anonimo.com"
         usuario.senha = generate_password_hash(str(uuid.uuid4()))
         usuario.foto_perfil = None
+        usuario.foto_perfil_variantes = None
         usuario.cpf_hash = None
         usuario.endereco_cep = None
         usuario.endereco_rua = None
@@ -400,13 +406,23 @@ def excluir_conta():
         for token in tokens:
             token.is_revogado = True
         
+        # Rascunhos de pedidos guardam o endereço de entrega
+        RascunhoPedido.query.filter_by(usuario_id=usuario.id).delete(synchronize_session=False)
+        
         # Encerrar a sessão do usuário
         session.pop('usuario_id', None)
         session.pop('auth_token', None)
         session.pop('carrinho', None)
         session.pop('carrinho_personalizado', None)
+        session.pop(CHAVE_RASCUNHO, None)
         
         db.session.commit()
+        invalidar_usuario_atual()
+        token_cache.revogar_usuario(usuario.id)
+        
+        # Excluir a foto de perfil depois do commit, se nenhum outro registro a usa
+        liberar(foto_perfil, foto_perfil_variantes,
+                legado=bool(foto_perfil) and foto_perfil.startswith('/static/uploads/profile_pics/'))
         flash('Sua conta foi excluída com sucesso. Esperamos vê-lo novamente em breve!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -422,7 +438,7 @@ def excluir_conta():
 @user_bp.route('/perfil/dados-pessoais')
 @login_required
 def dados_pessoais():
-    usuario = db.session.get(Usuario, session['usuario_id'])
+    usuario = get_usuario_atual()
     
     # Buscar pedidos do usuário
     pedidos = Pedido.query.filter_by(usuario_id=usuario.id).order_by(Pedido.data.desc()).all()
@@ -435,119 +451,24 @@ def dados_pessoais():
 @user_bp.route('/perfil/exportar-dados')
 @login_required
 def exportar_dados():
-    usuario = db.session.get(Usuario, session['usuario_id'])
-    
-    # Preparar dados do usuário (excluindo a senha por segurança)
-    dados_usuario = {
-        'id': usuario.id,
-        'nome': usuario.nome,
-        'email': usuario.email,
-        'data_registro': usuario.data_registro.strftime('%Y-%m-%d %H:%M:%S'),
-        'is_admin': usuario.is_admin
-    }
-    
-    # Adicionar endereço de forma segura
-    if usuario.endereco_cep:
-        dados_usuario['endereco'] = {
-            'cep': usuario.endereco_cep,
-            'rua': usuario.endereco_rua,
-            'numero': usuario.endereco_numero,
-            'complemento': usuario.endereco_complemento,
-            'bairro': usuario.endereco_bairro,
-            'cidade': usuario.endereco_cidade,
-            'estado': usuario.endereco_estado
-        }
-    
-    # CPF mascarado
-    if usuario.cpf_hash:
-        if hasattr(usuario, 'get_cpf_masked'):
-            dados_usuario['cpf'] = usuario.get_cpf_masked()
-        else:
-            dados_usuario['cpf'] = "***.***.***-**"
+    usuario = get_usuario_atual()
     
-    # Buscar pedidos do usuário
-    pedidos_usuario = []
-    pedidos = Pedido.query.filter_by(usuario_id=usuario.id).all()
-    
-    for pedido in pedidos:
-        itens_regulares = []
-        for item in ItemPedido.query.filter_by(pedido_id=pedido.id).all():
-            produto = Produto.query.get(item.produto_id)
-            if produto:
-                itens_regulares.append({
-                    'produto': produto.nome,
-                    'quantidade': item.quantidade,
-                    'preco_unitario': float(item.preco_unitario),
-                    'subtotal': float(item.preco_unitario * item.quantidade)
-                })
-        
-        itens_personalizados = []
-        for item in ItemPedidoPersonalizado.query.filter_by(pedido_id=pedido.id).all():
-            bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-            if bolo:
-                itens_personalizados.append({
-                    'tipo': 'Bolo Personalizado',
-                    'nome': bolo.nome,
-                    'massa': bolo.massa,
-                    'quantidade': item.quantidade,
-                    'preco_unitario': float(item.preco_unitario),
-                    'subtotal': float(item.preco_unitario * item.quantidade)
-                })
-        
-        pedidos_usuario.append({
-            'id': pedido.id,
-            'data': pedido.data.strftime('%Y-%m-%d %H:%M:%S'),
-            'status': pedido.status,
-            'total': float(pedido.total),
-            'itens_regulares': itens_regulares,
-            'itens_personalizados': itens_personalizados
-        })
-    
-    # Buscar bolos personalizados do usuário
-    bolos_personalizados_usuario = []
-    bolos = BoloPersonalizado.query.filter_by(usuario_id=usuario.id).all()
-    
-    for bolo in bolos:
-        try:
-            recheios = json.loads(bolo.recheios) if bolo.recheios else []
-            finalizacao = json.loads(bolo.finalizacao) if bolo.finalizacao else []
-        except json.JSONDecodeError:
-            recheios = []
-            finalizacao = []
-        
-        bolos_personalizados_usuario.append({
-            'id': bolo.id,
-            'nome': bolo.nome,
-            'massa': bolo.massa,
-            'recheios': recheios,
-            'cobertura': bolo.cobertura,
-            'finalizacao': finalizacao,
-            'observacoes': bolo.observacoes,
-            'preco': float(bolo.preco),
-            'data_criacao': bolo.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
-            'ativo': bolo.ativo
-        })
-    
-    # Agrupar todos os dados
-    dados_completos = {
-        'usuario': dados_usuario,
-        'pedidos': pedidos_usuario,
-        'bolos_personalizados': bolos_personalizados_usuario,
-        'data_exportacao': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-    }
+    # ?formato=gz para baixar o arquivo compactado
+    compactar = request.args.get('formato') == 'gz'
     
     try:
-        # Retornar como um download de arquivo JSON
-        arquivo_json = io.BytesIO()
-        arquivo_json.write(json.dumps(dados_completos, indent=4, ensure_ascii=False).encode('utf-8'))
-        arquivo_json.seek(0)
-        
-        return send_file(
-            arquivo_json,
-            as_attachment=True,
-            download_name=f'dados_doce_sonho_usuario_{usuario.id}.json',
-            mimetype='application/json'
-        )
+        # Dados cadastrais lidos antes de iniciar o streaming (excluindo a senha por segurança)
+        dados_usuario = data_export.dados_pessoais(usuario)
     except Exception as e:
         flash(f'Erro ao exportar dados: {str(e)}', 'danger')
-        return redirect(url_for('user.perfil'))
\ No newline at end of file
+        return redirect(url_for('user.perfil'))
+    
+    # Documento gerado e enviado em partes: memória constante mesmo para clientes antigos
+    conteudo = data_export.codificar(data_export.gerar_exportacao(dados_usuario), compactar=compactar)
+    nome_arquivo = f'dados_doce_sonho_usuario_{usuario.id}.json' + ('.gz' if compactar else '')
+    
+    return Response(
+        stream_with_context(conteudo),
+        mimetype='application/gzip' if compactar else 'application/json',
+        headers={'Content-Disposition': f'attachment; filename={nome_arquivo}'}
+    )
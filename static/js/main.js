@@ -20,63 +20,8 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 100 + (index * 100));
     });
 
-    // === FUNCIONALIDADE DE FILTROS E BUSCA ===
-    const produtos = document.querySelectorAll('.produto-card');
-    const filtroCategoriaSelect = document.getElementById('filtro-categoria');
-    const filtroPrecoSelect = document.getElementById('filtro-preco');
-    const buscaProdutoInput = document.getElementById('busca-produto');
-    const buscaBotao = buscaProdutoInput?.nextElementSibling;
-
-    // Função para filtrar produtos
-    function filtrarProdutos() {
-        const categoriaFiltro = filtroCategoriaSelect.value;
-        const precoFiltro = filtroPrecoSelect.value;
-        const termoBusca = buscaProdutoInput.value.toLowerCase();
-        
-        // Captura todos os produtos para reordenar se necessário
-        let produtosArray = Array.from(produtos);
-        
-        // Ordenar por preço se selecionado
-        if (precoFiltro) {
-            produtosArray.sort((a, b) => {
-                const precoA = parseFloat(a.querySelector('.preco').textContent.replace('R$ ', '').replace(',', '.'));
-                const precoB = parseFloat(b.querySelector('.preco').textContent.replace('R$ ', '').replace(',', '.'));
-                
-                return precoFiltro === 'menor' ? precoA - precoB : precoB - precoA;
-            });
-            
-            // Reordenar na DOM
-            const grid = document.querySelector('.produto-grid');
-            produtosArray.forEach(produto => {
-                grid.appendChild(produto.parentElement);
-            });
-        }
-        
-        // Filtrar por categoria e busca
-        produtos.forEach(produto => {
-            const card = produto;
-            const categoria = card.querySelector('.badge').textContent.toLowerCase();
-            const nome = card.querySelector('.card-title').textContent.toLowerCase();
-            const descricao = card.querySelector('.card-text').textContent.toLowerCase();
-            
-            const matchCategoria = !categoriaFiltro || categoria.includes(categoriaFiltro);
-            const matchBusca = !termoBusca || 
-                nome.includes(termoBusca) || 
-                descricao.includes(termoBusca);
-            
-            if (matchCategoria && matchBusca) {
-                card.parentElement.style.display = '';
-            } else {
-                card.parentElement.style.display = 'none';
-            }
-        });
-    }
-
-    // Adicionar event listeners para filtros
-    if (filtroCategoriaSelect) filtroCategoriaSelect.addEventListener('change', filtrarProdutos);
-    if (filtroPrecoSelect) filtroPrecoSelect.addEventListener('change', filtrarProdutos);
-    if (buscaProdutoInput) buscaProdutoInput.addEventListener('keyup', filtrarProdutos);
-    if (buscaBotao) buscaBotao.addEventListener('click', filtrarProdutos);
+    // === FILTROS E BUSCA ===
+    // Filtragem, ordenação e paginação do catálogo são feitas no servidor (/produtos?categoria=&ordem=&busca=)
 
     // === MELHORIAS NO FORMULÁRIO DE NEWSLETTER ===
     const newsletterForm = document.querySelector('.newsletter .input-group');
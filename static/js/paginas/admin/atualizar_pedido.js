@@ -0,0 +1,25 @@
+// Toggle sidebar on mobile
+document.getElementById('sidebarToggle').addEventListener('click', function() {
+    document.querySelector('.sidebar').classList.toggle('active');
+    document.querySelector('.main-content').classList.toggle('active');
+});
+
+// Inicializar a seleção de status
+document.addEventListener('DOMContentLoaded', function() {
+    const statusOptions = document.querySelectorAll('.status-option');
+    const selectedStatusInput = document.getElementById('selectedStatus');
+
+    // Adicionar evento de clique a cada opção de status
+    statusOptions.forEach(option => {
+        option.addEventListener('click', function() {
+            // Remover a classe selected de todas as opções
+            statusOptions.forEach(opt => opt.classList.remove('selected'));
+
+            // Adicionar a classe selected à opção clicada
+            this.classList.add('selected');
+
+            // Atualizar o valor do input hidden
+            selectedStatusInput.value = this.dataset.status;
+        });
+    });
+});
@@ -0,0 +1,23 @@
+// Toggle sidebar on mobile
+document.getElementById('sidebarToggle').addEventListener('click', function() {
+    document.querySelector('.sidebar').classList.toggle('active');
+    document.querySelector('.main-content').classList.toggle('active');
+});
+
+// Confirmation dialog for status change
+function confirmarAlteracaoStatus(botao) {
+    const novoStatus = botao.closest('form').querySelector('input[name="novo_status"]').value;
+    const mensagem = novoStatus === 'ativo' 
+        ? 'Tem certeza que deseja ativar este cliente?' 
+        : 'Tem certeza que deseja desativar este cliente? Ele não poderá mais fazer pedidos.';
+
+    if (confirm(mensagem)) {
+        botao.closest('form').submit();
+    }
+}
+
+// Initialize tooltips
+var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'))
+var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+    return new bootstrap.Tooltip(tooltipTriggerEl)
+});
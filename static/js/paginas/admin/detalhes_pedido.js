@@ -0,0 +1,307 @@
+// Toggle sidebar on mobile
+document.getElementById('sidebarToggle').addEventListener('click', function() {
+    document.querySelector('.sidebar').classList.toggle('active');
+    document.querySelector('.main-content').classList.toggle('active');
+});
+
+// Initialize tooltips
+var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'))
+var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+    return new bootstrap.Tooltip(tooltipTriggerEl)
+});
+
+// Script para converter JSON em texto legível na página de detalhes do pedido
+document.addEventListener('DOMContentLoaded', function() {
+
+    /**
+     * Limpa JSON e retorna apenas texto legível
+     */
+    function limparJSON(texto) {
+        // Se não parece JSON, retornar como está
+        if (!texto.includes('{') && !texto.includes('[')) {
+            return texto;
+        }
+
+        try {
+            const dados = JSON.parse(texto.trim());
+            return extrairTextoLimpo(dados);
+        } catch (e) {
+            // Não é JSON válido, retornar original
+            return texto;
+        }
+    }
+
+    /**
+     * Extrai apenas o texto útil do JSON
+     */
+    function extrairTextoLimpo(dados) {
+        // Null ou undefined
+        if (dados == null) {
+            return 'Não informado';
+        }
+
+        // Array
+        if (Array.isArray(dados)) {
+            if (dados.length === 0) return 'Nenhum';
+
+            // Se todos são strings, juntar com vírgula
+            if (dados.every(x => typeof x === 'string')) {
+                return dados.map(limparUnderscores).join(', ');
+            }
+
+            // Se são objetos, extrair texto de cada um
+            return dados.map(extrairTextoLimpo).filter(x => x).join(', ');
+        }
+
+
+        // Objeto
+        if (typeof dados === 'object') {
+            // Campos prioritários para mostrar
+            const campos = ['nome', 'descricao', 'valor', 'texto', 'title', 'label', 'name', 'description'];
+
+            // Tentar encontrar campo prioritário
+            for (let campo of campos) {
+                if (dados[campo]) {
+                    return limparUnderscores(String(dados[campo]));
+                }
+            }
+
+            // Se não encontrou, pegar todos os valores não-objeto
+            const valores = Object.values(dados)
+                .filter(v => v != null && v !== '' && typeof v !== 'object')
+                .map(v => limparUnderscores(String(v)));
+
+            if (valores.length > 0) {
+                return valores.join(', ');
+            }
+
+            // Se só tem objetos aninhados, tentar extrair deles
+            const valoresAninhados = Object.values(dados)
+                .filter(v => v != null)
+                .map(extrairTextoLimpo)
+                .filter(x => x && x !== 'Não informado');
+
+            if (valoresAninhados.length > 0) {
+                return valoresAninhados.join(', ');
+            }
+
+            return 'Não informado';
+        }
+
+        // String, número ou boolean
+        return limparUnderscores(String(dados));
+    }
+
+function limparUnderscores(texto) {
+    return texto
+        .replace(/_/g, ' ')
+        .replace(/\b\w/g, l => l.toUpperCase());
+}
+
+    /**
+     * Função para detectar e converter JSON em texto formatado
+     */
+function converterJSONParaTexto(elemento) {
+    const texto = elemento.textContent.trim();
+
+    // Pular elementos vazios
+    if (!texto) return;
+
+    // Verificar se o texto parece ser JSON
+    if ((texto.startsWith('{') && texto.endsWith('}')) || 
+        (texto.startsWith('[') && texto.endsWith(']'))) {
+        try {
+            const textoLimpo = limparJSON(texto);
+
+            if (textoLimpo !== texto && textoLimpo !== 'Não informado') {
+                elemento.textContent = textoLimpo;
+                console.log('✅ JSON limpo:', texto.substring(0, 30) + '... → ' + textoLimpo);
+            }
+        } catch (e) {
+            console.log('Não foi possível converter:', texto.substring(0, 50));
+        }
+    } else {
+        // Mesmo que não seja JSON, limpar underscores de textos normais
+        const textoSemUnderscore = texto.replace(/_/g, ' ');
+        if (textoSemUnderscore !== texto) {
+            elemento.textContent = textoSemUnderscore;
+        }
+    }
+}
+
+    /**
+     * Formatar dados recursivamente em HTML legível (fallback)
+     */
+    function formatarDados(dados, nivel = 0) {
+        const indent = '  '.repeat(nivel);
+
+        if (Array.isArray(dados)) {
+            if (dados.length === 0) return '<span class="text-muted">Nenhum item</span>';
+
+            let html = '<ul class="list-unstyled mb-0">';
+            dados.forEach(item => {
+                html += '<li class="mb-1">';
+                html += formatarDados(item, nivel + 1);
+                html += '</li>';
+            });
+            html += '</ul>';
+            return html;
+        }
+
+        if (typeof dados === 'object' && dados !== null) {
+            let html = '<div class="ms-' + (nivel > 0 ? '3' : '0') + '">';
+
+            for (let chave in dados) {
+                const rotulo = formatarRotulo(chave);
+                const valor = dados[chave];
+
+                html += '<div class="mb-2">';
+                html += '<strong class="text-primary">' + rotulo + ':</strong> ';
+
+                if (typeof valor === 'object' && valor !== null) {
+                    html += formatarDados(valor, nivel + 1);
+                } else {
+                    html += formatarValor(valor);
+                }
+
+                html += '</div>';
+            }
+
+            html += '</div>';
+            return html;
+        }
+
+        return formatarValor(dados);
+    }
+
+    /**
+     * Formatar rótulo (chave do objeto)
+     */
+    function formatarRotulo(chave) {
+        // Remover underscores e converter para título
+        return chave
+            .replace(/_/g, ' ')
+            .replace(/\b\w/g, l => l.toUpperCase());
+    }
+
+    /**
+     * Formatar valor individual
+     */
+    function formatarValor(valor) {
+        if (valor === null || valor === undefined) {
+            return '<span class="text-muted">Não informado</span>';
+        }
+
+        if (typeof valor === 'boolean') {
+            return valor 
+                ? '<span class="badge bg-success">Sim</span>' 
+                : '<span class="badge bg-secondary">Não</span>';
+        }
+
+        if (typeof valor === 'number') {
+            // Verificar se parece ser um valor monetário
+            if (valor % 1 !== 0 || valor > 10) {
+                return 'R$ ' + valor.toFixed(2).replace('.', ',');
+            }
+            return valor;
+        }
+
+        if (typeof valor === 'string') {
+            // Verificar se é uma data ISO
+            if (/^\d{4}-\d{2}-\d{2}/.test(valor)) {
+                try {
+                    const data = new Date(valor);
+                    return data.toLocaleDateString('pt-BR') + ' às ' + 
+                           data.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
+                } catch (e) {
+                    return valor;
+                }
+            }
+
+            // Verificar se é URL
+            if (valor.startsWith('http://') || valor.startsWith('https://')) {
+                return '<a href="' + valor + '" target="_blank" class="text-decoration-none">' + 
+                       valor + ' <i class="bi bi-box-arrow-up-right"></i></a>';
+            }
+
+            return valor;
+        }
+
+        return String(valor);
+    }
+
+    /**
+     * Processar todos os elementos que podem conter JSON
+     */
+    function processarPagina() {
+        // Áreas onde JSON pode aparecer
+       const seletores = [
+    '.bg-light.p-3.rounded',                          // Observações e endereços
+    '.bolo-details span:not(.bolo-detail-label)',     // Detalhes de bolos
+    '.bolo-detail-item span:last-child',              // Valores dos detalhes de bolos
+    '.small.text-muted',                              // Descrições
+    'td:not(:has(button))',                           // Células de tabela (exceto as com botões)
+    'address',                                        // Endereços
+    'p:not(.mb-1):not(.fw-bold):not(.menu-header)'   // Parágrafos de conteúdo
+];
+
+        seletores.forEach(seletor => {
+            const elementos = document.querySelectorAll(seletor);
+            elementos.forEach(elemento => {
+                // Evitar processar elementos que já foram processados
+                if (!elemento.hasAttribute('data-json-processado')) {
+                    converterJSONParaTexto(elemento);
+                    elemento.setAttribute('data-json-processado', 'true');
+                }
+            });
+        });
+    }
+
+    /**
+     * Observar mudanças no DOM (útil para conteúdo carregado dinamicamente)
+     */
+    const observer = new MutationObserver(function(mutations) {
+        mutations.forEach(function(mutation) {
+            if (mutation.addedNodes.length) {
+                processarPagina();
+            }
+        });
+    });
+
+    // Configurar o observador
+    observer.observe(document.body, {
+        childList: true,
+        subtree: true
+    });
+
+    // Processar a página inicialmente
+    processarPagina();
+
+    console.log('✅ Conversor JSON ativado - Detalhes do Pedido');
+});
+
+// Adicionar estilos para melhorar a apresentação dos dados convertidos
+const style = document.createElement('style');
+style.textContent = `
+    .json-convertido {
+        background-color: #f8f9fa;
+        padding: 0.5rem;
+        border-radius: 0.25rem;
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    }
+
+    .json-convertido strong {
+        color: #0d6efd;
+        font-weight: 600;
+    }
+
+    .json-convertido ul {
+        margin-top: 0.5rem;
+        padding-left: 1rem;
+    }
+
+    .json-convertido li {
+        padding: 0.25rem 0;
+    }
+`;
+document.head.appendChild(style);
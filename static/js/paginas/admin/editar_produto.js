@@ -0,0 +1,7 @@
+flatpickr("#data_validade", {
+    dateFormat: "d/m/Y",  // Formato brasileiro
+    minDate: "today",     // Bloqueia seleção de datas passadas
+    locale: "pt",         // Português
+    disableMobile: true,  // Força usar o calendário do Flatpickr no mobile
+    allowInput: false     // Impede digitação manual
+});
@@ -0,0 +1,327 @@
+// Inicializar Flatpickr
+flatpickr("#data_validade", {
+    dateFormat: "d/m/Y",  // Formato brasileiro
+    minDate: "today",     // Bloqueia seleção de datas passadas
+    locale: "pt",         // Português
+    disableMobile: true,  // Força usar o calendário do Flatpickr no mobile
+    allowInput: false     // Impede digitação manual
+});
+
+// Formatação automática dos campos de preço e peso
+const precoInput = document.getElementById('preco');
+const pesoInput = document.getElementById('peso');
+
+function formatarDecimal(input) {
+    input.addEventListener('blur', function() {
+        if (this.value) {
+            const valor = parseFloat(this.value);
+            if (!isNaN(valor)) {
+                this.value = valor.toFixed(2);
+            }
+        }
+    });
+}
+
+formatarDecimal(precoInput);
+formatarDecimal(pesoInput);
+
+// Toggle sidebar on mobile
+if(document.getElementById('sidebarToggle')) {
+    document.getElementById('sidebarToggle').addEventListener('click', function() {
+        document.querySelector('.sidebar').classList.toggle('active');
+        document.querySelector('.main-content').classList.toggle('active');
+    });
+}
+
+// Initialize tooltips
+var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'))
+var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+    return new bootstrap.Tooltip(tooltipTriggerEl)
+});
+
+// Auto-hide flash messages after 5 seconds
+document.addEventListener('DOMContentLoaded', function() {
+    const flashMessages = document.querySelectorAll('.alert');
+    flashMessages.forEach(message => {
+        setTimeout(function() {
+            const bsAlert = new bootstrap.Alert(message);
+            bsAlert.close();
+        }, 5000);
+    });
+});
+
+// Toggle password visibility for novo_usuario.html
+if(document.getElementById('togglePassword')) {
+    document.getElementById('togglePassword').addEventListener('click', function() {
+        const senha = document.getElementById('senha');
+        const type = senha.getAttribute('type') === 'password' ? 'text' : 'password';
+        senha.setAttribute('type', type);
+        this.querySelector('i').classList.toggle('bi-eye');
+        this.querySelector('i').classList.toggle('bi-eye-slash');
+    });
+}
+
+if(document.getElementById('toggleConfirmPassword')) {
+    document.getElementById('toggleConfirmPassword').addEventListener('click', function() {
+        const confirmarSenha = document.getElementById('confirmar_senha');
+        const type = confirmarSenha.getAttribute('type') === 'password' ? 'text' : 'password';
+        confirmarSenha.setAttribute('type', type);
+        this.querySelector('i').classList.toggle('bi-eye');
+        this.querySelector('i').classList.toggle('bi-eye-slash');
+    });
+}
+
+// Senha validation for novo_usuario.html
+if(document.getElementById('senha') && document.getElementById('confirmar_senha')) {
+    const senha = document.getElementById('senha');
+    const confirmarSenha = document.getElementById('confirmar_senha');
+    const senhaFeedback = document.getElementById('senha-feedback');
+    const submitBtn = document.getElementById('submitBtn');
+
+    function validarSenhas() {
+        if (confirmarSenha.value && senha.value !== confirmarSenha.value) {
+            senhaFeedback.classList.remove('d-none');
+            confirmarSenha.classList.add('is-invalid');
+            submitBtn.disabled = true;
+        } else {
+            senhaFeedback.classList.add('d-none');
+            confirmarSenha.classList.remove('is-invalid');
+            submitBtn.disabled = false;
+        }
+    }
+
+    senha.addEventListener('input', validarSenhas);
+    confirmarSenha.addEventListener('input', validarSenhas);
+}
+
+// CEP API integration for novo_usuario.html when tipo == 'cliente'
+if(document.getElementById('cep')) {
+    const cepInput = document.getElementById('cep');
+
+    cepInput.addEventListener('blur', function() {
+        const cep = this.value.replace(/\D/g, '');
+
+        if (cep.length !== 8) {
+            return;
+        }
+
+        // Show loading indicator
+        const enderecoFields = document.querySelectorAll('#rua, #bairro, #cidade, #estado');
+        enderecoFields.forEach(field => {
+            field.value = 'Carregando...';
+            field.disabled = true;
+        });
+
+        fetch(`https://viacep.com.br/ws/${cep}/json/`)
+            .then(response => response.json())
+            .then(data => {
+                // Remove loading indicator
+                enderecoFields.forEach(field => {
+                    field.disabled = false;
+                });
+
+                if (!data.erro) {
+                    document.getElementById('rua').value = data.logradouro;
+                    document.getElementById('bairro').value = data.bairro;
+                    document.getElementById('cidade').value = data.localidade;
+                    document.getElementById('estado').value = data.uf;
+                    // Focus on numero after filling address
+                    document.getElementById('numero').focus();
+                } else {
+                    // Clear fields if CEP not found
+                    enderecoFields.forEach(field => {
+                        field.value = '';
+                    });
+                    alert('CEP não encontrado. Por favor, preencha os campos manualmente.');
+                }
+            })
+            .catch(error => {
+                console.error('Erro ao buscar CEP:', error);
+                // Clear loading indicator
+                enderecoFields.forEach(field => {
+                    field.disabled = false;
+                    field.value = '';
+                });
+                alert('Erro ao buscar CEP. Por favor, preencha os campos manualmente.');
+            });
+    });
+
+    // Format CEP as it's typed
+    cepInput.addEventListener('input', function() {
+        let cep = this.value.replace(/\D/g, '');
+        if (cep.length > 5) {
+            cep = cep.substring(0, 5) + '-' + cep.substring(5);
+        }
+        this.value = cep.substring(0, 9);
+    });
+}
+
+// For novo_produto.html - Image preview
+if(document.getElementById('imagem')) {
+    const imagemInput = document.getElementById('imagem');
+
+    imagemInput.addEventListener('change', function() {
+        // Check if an image preview container already exists, otherwise create one
+        let previewContainer = document.querySelector('.image-preview-container');
+
+        if (!previewContainer) {
+            previewContainer = document.createElement('div');
+            previewContainer.classList.add('image-preview-container', 'mb-3', 'mt-2');
+            imagemInput.parentNode.appendChild(previewContainer);
+        } else {
+            // Clear existing preview
+            previewContainer.innerHTML = '';
+        }
+
+        if (this.files && this.files[0]) {
+            const reader = new FileReader();
+
+            reader.onload = function(e) {
+                const preview = document.createElement('div');
+                preview.classList.add('image-preview');
+                preview.style.width = '150px';
+                preview.style.height = '150px';
+                preview.style.backgroundImage = `url('${e.target.result}')`;
+                preview.style.backgroundSize = 'cover';
+                preview.style.backgroundPosition = 'center';
+                preview.style.borderRadius = '8px';
+                preview.style.border = '1px solid var(--border-color)';
+
+                previewContainer.appendChild(preview);
+            }
+
+            reader.readAsDataURL(this.files[0]);
+        }
+    });
+}
+
+// Animated scroll to top for long pages
+window.addEventListener('scroll', function() {
+    const scrollToTopBtn = document.getElementById('scrollToTopBtn');
+
+    if (!scrollToTopBtn && window.pageYOffset > 300) {
+        const newScrollToTopBtn = document.createElement('button');
+        newScrollToTopBtn.id = 'scrollToTopBtn';
+        newScrollToTopBtn.innerHTML = '<i class="bi bi-arrow-up"></i>';
+        newScrollToTopBtn.className = 'btn btn-primary rounded-circle position-fixed';
+        newScrollToTopBtn.style.bottom = '90px';
+        newScrollToTopBtn.style.right = '30px';
+        newScrollToTopBtn.style.width = '45px';
+        newScrollToTopBtn.style.height = '45px';
+        newScrollToTopBtn.style.padding = '0';
+        newScrollToTopBtn.style.display = 'flex';
+        newScrollToTopBtn.style.alignItems = 'center';
+        newScrollToTopBtn.style.justifyContent = 'center';
+        newScrollToTopBtn.style.zIndex = '999';
+        newScrollToTopBtn.style.opacity = '0';
+        newScrollToTopBtn.style.transition = 'opacity 0.3s';
+
+        document.body.appendChild(newScrollToTopBtn);
+
+        newScrollToTopBtn.addEventListener('click', function() {
+            window.scrollTo({
+                top: 0,
+                behavior: 'smooth'
+            });
+        });
+
+        // Fade in the button
+        setTimeout(() => {
+            newScrollToTopBtn.style.opacity = '1';
+        }, 100);
+    } else if (scrollToTopBtn) {
+        if (window.pageYOffset > 300) {
+            scrollToTopBtn.style.opacity = '1';
+        } else {
+            scrollToTopBtn.style.opacity = '0';
+        }
+    }
+});
+
+// Form validation for the new product form
+if (document.querySelector('form')) {
+    const form = document.querySelector('form');
+
+    form.addEventListener('submit', function(event) {
+        const requiredFields = form.querySelectorAll('[required]');
+        let hasErrors = false;
+
+        requiredFields.forEach(field => {
+            if (!field.value.trim()) {
+                field.classList.add('is-invalid');
+
+                if (!field.nextElementSibling || !field.nextElementSibling.classList.contains('invalid-feedback')) {
+                    const feedback = document.createElement('div');
+                    feedback.classList.add('invalid-feedback');
+                    feedback.textContent = 'Este campo é obrigatório.';
+                    field.parentNode.insertBefore(feedback, field.nextSibling);
+                }
+
+                hasErrors = true;
+            } else {
+                field.classList.remove('is-invalid');
+            }
+        });
+
+        if (hasErrors) {
+            event.preventDefault();
+            // Scroll to the first error
+            const firstError = form.querySelector('.is-invalid');
+            if (firstError) {
+                firstError.scrollIntoView({ behavior: 'smooth', block: 'center' });
+                firstError.focus();
+            }
+        }
+    });
+
+    // Remove validation errors when field is corrected
+    form.querySelectorAll('input, textarea, select').forEach(field => {
+        field.addEventListener('input', function() {
+            if (this.value.trim()) {
+                this.classList.remove('is-invalid');
+            }
+        });
+    });
+}
+
+// Contact form in product page footer
+if (document.getElementById('contato-form')) {
+    document.getElementById('contato-form').addEventListener('submit', function(e) {
+        e.preventDefault();
+
+        // Animated success message
+        const successMessage = document.createElement('div');
+        successMessage.className = 'alert alert-success fade show';
+        successMessage.innerHTML = '<i class="bi bi-check-circle me-2"></i> Obrigado pelo contato! Responderemos em breve.';
+        successMessage.style.position = 'fixed';
+        successMessage.style.top = '20px';
+        successMessage.style.right = '20px';
+        successMessage.style.zIndex = '9999';
+        successMessage.style.maxWidth = '400px';
+        successMessage.style.boxShadow = '0 5px 15px rgba(39, 174, 96, 0.3)';
+        successMessage.style.opacity = '0';
+        successMessage.style.transform = 'translateY(-20px)';
+        successMessage.style.transition = 'all 0.3s ease';
+
+        document.body.appendChild(successMessage);
+
+        // Fade in
+        setTimeout(() => {
+            successMessage.style.opacity = '1';
+            successMessage.style.transform = 'translateY(0)';
+        }, 100);
+
+        // Fade out after 5 seconds
+        setTimeout(() => {
+            successMessage.style.opacity = '0';
+            successMessage.style.transform = 'translateY(-20px)';
+
+            // Remove from DOM after animation
+            setTimeout(() => {
+                document.body.removeChild(successMessage);
+            }, 300);
+        }, 5000);
+
+        this.reset();
+    });
+}
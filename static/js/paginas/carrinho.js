@@ -0,0 +1,166 @@
+// Script para atualização automática do carrinho
+document.addEventListener('DOMContentLoaded', function() {
+    // Selecionar todos os inputs de quantidade
+    const quantityInputs = document.querySelectorAll('.quantity-input');
+
+    quantityInputs.forEach(input => {
+        // Debounce para evitar muitas requisições
+        let timeoutId;
+
+        input.addEventListener('change', function() {
+            clearTimeout(timeoutId);
+            timeoutId = setTimeout(() => {
+                atualizarQuantidade(this);
+            }, 300);
+        });
+
+        input.addEventListener('input', function() {
+            // Validação em tempo real
+            let valor = parseInt(this.value);
+
+            if (valor < 1) {
+                this.value = 1;
+            } else if (valor > 10) {
+                this.value = 10;
+                mostrarAlerta('Quantidade máxima é 10 unidades', 'warning');
+            }
+        });
+    });
+
+    function atualizarQuantidade(input) {
+        const itemId = input.dataset.itemId;
+        const itemTipo = input.dataset.itemTipo;
+        const quantidade = parseInt(input.value);
+
+        // Validação
+        if (quantidade < 1 || quantidade > 10 || isNaN(quantidade)) {
+            mostrarAlerta('Quantidade inválida', 'danger');
+            input.value = 1;
+            return;
+        }
+
+        // Mostrar indicador de carregamento
+        const cartItem = input.closest('.cart-item');
+        cartItem.style.opacity = '0.6';
+        input.disabled = true;
+
+        // Fazer requisição AJAX
+        fetch('/atualizar_quantidade', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                item_id: itemId,
+                item_tipo: itemTipo,
+                quantidade: quantidade
+            })
+        })
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(data => {
+                    throw new Error(data.message || 'Erro ao atualizar');
+                });
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.status === 'success') {
+                // Atualizar subtotal do item
+                const subtotalElement = document.getElementById(`subtotal-${itemTipo}-${itemId}`);
+                if (subtotalElement) {
+                    subtotalElement.textContent = `R$ ${data.subtotal.toFixed(2)}`;
+                }
+
+                // Atualizar totais gerais
+                const subtotalGeral = document.getElementById('subtotal-geral');
+                const totalGeral = document.getElementById('total-geral');
+
+                if (subtotalGeral) {
+                    subtotalGeral.textContent = `R$ ${data.total.toFixed(2)}`;
+                }
+                if (totalGeral) {
+                    totalGeral.textContent = `R$ ${data.total.toFixed(2)}`;
+                }
+
+                // Animação de sucesso
+                cartItem.style.transition = 'all 0.3s ease';
+                cartItem.style.backgroundColor = '#ffffffff';
+                setTimeout(() => {
+                    cartItem.style.backgroundColor = '';
+                }, 500);
+            } else {
+                throw new Error(data.message || 'Erro desconhecido');
+            }
+        })
+        .catch(error => {
+            console.error('Erro:', error);
+            mostrarAlerta(error.message || 'Erro ao atualizar quantidade', 'danger');
+            // Recarregar a página em caso de erro grave
+            setTimeout(() => {
+                location.reload();
+            }, 2000);
+        })
+        .finally(() => {
+            // Remover indicador de carregamento
+            cartItem.style.opacity = '1';
+            input.disabled = false;
+        });
+    }
+
+    function mostrarAlerta(mensagem, tipo) {
+        // Criar elemento de alerta
+        const alertDiv = document.createElement('div');
+        alertDiv.className = `alert alert-${tipo} alert-dismissible fade show`;
+        alertDiv.role = 'alert';
+        alertDiv.innerHTML = `
+            ${mensagem}
+            <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+        `;
+
+        // Inserir no container de mensagens
+        const flashContainer = document.querySelector('.flash-messages');
+        if (flashContainer) {
+            flashContainer.appendChild(alertDiv);
+
+            // Auto-remover após 5 segundos
+            setTimeout(() => {
+                alertDiv.remove();
+            }, 5000);
+        }
+    }
+
+    // Validar carrinho antes de finalizar compra
+    const finalizarBtn = document.querySelector('a[href*="finalizar_compra"]');
+    if (finalizarBtn) {
+        finalizarBtn.addEventListener('click', function(e) {
+            e.preventDefault();
+            const url = this.href;
+
+            // Validar carrinho
+            fetch('/validar_carrinho')
+                .then(response => response.json())
+                .then(data => {
+                    if (data.status === 'success') {
+                        if (data.valido) {
+                            window.location.href = url;
+                        } else {
+                            // Mostrar erros
+                            data.erros.forEach(erro => {
+                                mostrarAlerta(erro, 'warning');
+                            });
+
+                            // Recarregar após mostrar erros
+                            setTimeout(() => {
+                                location.reload();
+                            }, 3000);
+                        }
+                    }
+                })
+                .catch(error => {
+                    console.error('Erro:', error);
+                    mostrarAlerta('Erro ao validar carrinho', 'danger');
+                });
+        });
+    }
+});
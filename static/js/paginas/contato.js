@@ -0,0 +1,5 @@
+document.getElementById('contato-form').addEventListener('submit', function(e) {
+    e.preventDefault();
+    alert('Obrigado pelo contato! Responderemos em breve.');
+    this.reset();
+});
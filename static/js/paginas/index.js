@@ -0,0 +1,100 @@
+// Animações de scroll
+document.addEventListener('DOMContentLoaded', function() {
+    // Animação para elementos com fade-in
+    const fadeElements = document.querySelectorAll('.fade-in');
+
+    const fadeObserver = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('show');
+                fadeObserver.unobserve(entry.target);
+            }
+        });
+    }, {
+        threshold: 0.1
+    });
+
+    fadeElements.forEach(element => {
+        fadeObserver.observe(element);
+    });
+
+    // Botão voltar ao topo
+    const backToTopButton = document.querySelector('.back-to-top');
+
+    window.addEventListener('scroll', () => {
+        if (window.scrollY > 300) {
+            backToTopButton.classList.add('show');
+        } else {
+            backToTopButton.classList.remove('show');
+        }
+    });
+
+    document.getElementById('back-to-top-btn').addEventListener('click', function(e) {
+        e.preventDefault();
+        window.scrollTo({
+            top: 0,
+            behavior: 'smooth'
+        });
+    });
+
+    // Navigation active state
+    const navLinks = document.querySelectorAll('.nav-link');
+
+    navLinks.forEach(link => {
+        link.addEventListener('click', function() {
+            navLinks.forEach(l => l.classList.remove('active'));
+            this.classList.add('active');
+        });
+    });
+
+    // Formulário de contato
+    document.getElementById('contato-form').addEventListener('submit', function(e) {
+        e.preventDefault();
+
+        // Animação de envio
+        const submitBtn = this.querySelector('button[type="submit"]');
+        const originalText = submitBtn.innerHTML;
+
+        submitBtn.innerHTML = '<i class="bi bi-arrow-repeat"></i> Enviando...';
+        submitBtn.disabled = true;
+
+        // Simulação de envio
+        setTimeout(() => {
+            submitBtn.innerHTML = '<i class="bi bi-check-lg"></i> Enviado!';
+            submitBtn.classList.add('btn-success');
+
+            // Reset do formulário
+            this.reset();
+
+            // Notificação
+            alert('Obrigado pelo contato! Responderemos em breve.');
+
+            // Reset do botão após alguns segundos
+            setTimeout(() => {
+                submitBtn.innerHTML = originalText;
+                submitBtn.disabled = false;
+                submitBtn.classList.remove('btn-success');
+            }, 3000);
+        }, 1500);
+    });
+
+    // Navegação suave para links internos
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+
+            const targetId = this.getAttribute('href');
+
+            if (targetId === '#') return;
+
+            const targetElement = document.querySelector(targetId);
+
+            if (targetElement) {
+                window.scrollTo({
+                    top: targetElement.offsetTop - 90,
+                    behavior: 'smooth'
+                });
+            }
+        });
+    });
+});
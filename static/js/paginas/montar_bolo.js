@@ -0,0 +1,331 @@
+        // Dicionário de formatação no frontend
+// Dicionário de formatação
+const formatarIngredientes = {
+    'red_velvet': 'Red Velvet',
+    'chocolate_branco': 'Chocolate Branco',
+    'pasta_americana': 'Pasta Americana',
+    'doce_de_leite': 'Doce de Leite',
+    'cream_cheese': 'Cream Cheese',
+    'chocolate_raspas': 'Raspas de Chocolate',
+    'mm': 'M&M\'s',
+    'morangos': 'Morangos Frescos',
+    'confete': 'Confetes Coloridos',
+    'baunilha': 'Baunilha',
+    'chocolate': 'Chocolate',
+    'limao': 'Limão',
+    'brigadeiro': 'Brigadeiro',
+    'morango': 'Morango',
+    'chantilly': 'Chantilly',
+    'ganache': 'Ganache'
+};
+
+function formatarNome(valor) {
+    return formatarIngredientes[valor] || valor.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Variáveis de preço
+    const precos = {
+        base: 50,
+        massa: {
+            'chocolate': 25,
+            'baunilha': 20,
+            'red_velvet': 30,
+            'limao': 22
+        },
+        recheio: {
+            'brigadeiro': 15,
+            'morango': 18,
+            'doce_de_leite': 12,
+            'chocolate_branco': 16
+        },
+        cobertura: {
+            'chantilly': 18,
+            'ganache': 20,
+            'pasta_americana': 25,
+            'cream_cheese': 22
+        },
+        finalizacao: {
+            'morangos': 12,
+            'chocolate_raspas': 8,
+            'mm': 10,
+            'confete': 5
+        }
+    };
+
+    // Elementos do DOM
+    const steps = document.querySelectorAll('.step');
+    const stepContents = document.querySelectorAll('.step-content');
+    const nextButtons = document.querySelectorAll('.btn-next');
+    const prevButtons = document.querySelectorAll('.btn-prev');
+    const selectorItems = document.querySelectorAll('.selector-item');
+
+    const massaSelText = document.getElementById('massa-selecionada');
+    const recheiosSelText = document.getElementById('recheios-selecionados');
+    const coberturaSelText = document.getElementById('cobertura-selecionada');
+    const finalizacaoSelText = document.getElementById('finalizacao-selecionada');
+    const precoTotal = document.getElementById('preco-total');
+
+    // Elementos do bolo
+    const cakeBase = document.querySelector('.cake-base');
+    const cakeMiddle = document.querySelector('.cake-middle');
+    const cakeTop = document.querySelector('.cake-top');
+    const cakeFillingBottom = document.querySelector('.cake-filling-bottom');
+    const cakeFillingTop = document.querySelector('.cake-filling-top');
+    const cakeFrosting = document.querySelector('.cake-frosting');
+    const cakeDecoration = document.getElementById('cake-decoration');
+    const frostingDrips = document.querySelectorAll('.frosting-drip');
+
+    // Cores e estilos
+    const massaCores = {
+        'chocolate': '#5d4037',
+        'baunilha': '#f5e9be',
+        'red_velvet': '#c62828',
+        'limao': '#fff176'
+    };
+
+    const recheioCores = {
+        'brigadeiro': '#3e2723',
+        'morango': '#e57373',
+        'doce_de_leite': '#d4a76a',
+        'chocolate_branco': '#f5f5dc'
+    };
+
+    const coberturaCores = {
+        'chantilly': '#ffffff',
+        'ganache': '#3e2723',
+        'pasta_americana': '#f8bbd0',
+        'cream_cheese': '#f5f5f5'
+    };
+
+    const finalizacaoIcones = {
+        'morangos': '🍓',
+        'chocolate_raspas': '🍫',
+        'mm': '🍬',
+        'confete': '✨'
+    };
+
+    // Função para validar cada etapa
+    function validateStep(stepNumber) {
+        switch(stepNumber) {
+            case 1:
+                // Validar massa
+                const massa = document.querySelector('input[name="massa"]:checked');
+                if (!massa) {
+                    alert('Por favor, selecione um tipo de massa antes de continuar.');
+                    return false;
+                }
+                return true;
+
+            case 2:
+                // Validar recheios (pelo menos 1, máximo 2)
+                const recheios = document.querySelectorAll('input[name="recheios"]:checked');
+                if (recheios.length === 0) {
+                    alert('Por favor, selecione pelo menos um recheio antes de continuar.');
+                    return false;
+                }
+                return true;
+
+            case 3:
+                // Validar cobertura
+                const cobertura = document.querySelector('input[name="cobertura"]:checked');
+                if (!cobertura) {
+                    alert('Por favor, selecione uma cobertura antes de continuar.');
+                    return false;
+                }
+                return true;
+
+            default:
+                return true;
+        }
+    }
+
+    // Funções de navegação entre etapas
+    function goToStep(stepNumber) {
+        steps.forEach((step, index) => {
+            if (index + 1 <= stepNumber) {
+                step.classList.add('active');
+            } else {
+                step.classList.remove('active');
+            }
+        });
+
+        stepContents.forEach((content, index) => {
+            if (index + 1 === stepNumber) {
+                content.style.display = 'block';
+            } else {
+                content.style.display = 'none';
+            }
+        });
+    }
+
+    // Adicionar eventos para navegação com validação
+    nextButtons.forEach((button, index) => {
+        button.addEventListener('click', () => {
+            const currentStepNumber = index + 1;
+            if (validateStep(currentStepNumber)) {
+                goToStep(currentStepNumber + 1);
+            }
+        });
+    });
+
+    prevButtons.forEach((button, index) => {
+        button.addEventListener('click', () => {
+            goToStep(index + 1);
+        });
+    });
+
+    // Função para atualizar o resumo e o preço
+    function updateSummaryAndPrice() {
+        let total = precos.base;
+        // Massa
+        const massaSelecionada = document.querySelector('input[name="massa"]:checked');
+        if (massaSelecionada) {
+            const massaValor = massaSelecionada.value;
+            massaSelText.textContent = formatarNome(massaValor);
+            total += precos.massa[massaValor];
+
+            // Atualizar visualização do bolo
+            const massaCor = massaCores[massaValor];
+            if (cakeBase) cakeBase.style.backgroundColor = massaCor;
+            if (cakeMiddle) cakeMiddle.style.backgroundColor = massaCor;
+            if (cakeTop) cakeTop.style.backgroundColor = massaCor;
+        } else {
+            massaSelText.textContent = '-';
+        }
+
+        // Recheios
+        const recheiosSelecionados = document.querySelectorAll('input[name="recheios"]:checked');
+        if (recheiosSelecionados.length > 0) {
+            const recheiosTexto = Array.from(recheiosSelecionados).map(recheio => {
+                total += precos.recheio[recheio.value];
+                // USAR FORMATAÇÃO AQUI
+                return formatarNome(recheio.value);
+            }).join(', ');
+
+            recheiosSelText.textContent = recheiosTexto;
+
+            // Atualizar visualização do bolo (usar o primeiro recheio)
+            if (recheiosSelecionados.length > 0) {
+                const recheioCor = recheioCores[recheiosSelecionados[0].value];
+                if (cakeFillingBottom) cakeFillingBottom.style.backgroundColor = recheioCor;
+                if (cakeFillingTop) cakeFillingTop.style.backgroundColor = recheioCor;
+            }
+        } else {
+            recheiosSelText.textContent = '-';
+            if (cakeFillingBottom) cakeFillingBottom.style.backgroundColor = '#ffffff';
+            if (cakeFillingTop) cakeFillingTop.style.backgroundColor = '#ffffff';
+        }
+
+        // Cobertura
+        const coberturaSelecionada = document.querySelector('input[name="cobertura"]:checked');
+        if (coberturaSelecionada) {
+            const coberturaValor = coberturaSelecionada.value;
+            // USAR FORMATAÇÃO AQUI
+            coberturaSelText.textContent = formatarNome(coberturaValor);
+            total += precos.cobertura[coberturaValor];
+
+            // Atualizar visualização do bolo
+            const coberturaCor = coberturaCores[coberturaValor];
+            if (cakeFrosting) cakeFrosting.style.backgroundColor = coberturaCor;
+            frostingDrips.forEach(drip => {
+                drip.style.backgroundColor = coberturaCor;
+            });
+        } else {
+            coberturaSelText.textContent = '-';
+        }
+
+        // Finalização
+        const finalizacoesSelecionadas = document.querySelectorAll('input[name="finalizacao"]:checked');
+        if (finalizacoesSelecionadas.length > 0) {
+            const finalizacoesTexto = Array.from(finalizacoesSelecionadas).map(finalizacao => {
+                total += precos.finalizacao[finalizacao.value];
+                // USAR FORMATAÇÃO AQUI
+                return formatarNome(finalizacao.value);
+            }).join(', ');
+
+            finalizacaoSelText.textContent = finalizacoesTexto;
+
+            // Atualizar visualização do bolo
+            if (cakeDecoration) {
+                cakeDecoration.innerHTML = '';
+                finalizacoesSelecionadas.forEach(finalizacao => {
+                    cakeDecoration.innerHTML += finalizacaoIcones[finalizacao.value] || '⭐';
+                });
+            }
+        } else {
+            finalizacaoSelText.textContent = '-';
+            if (cakeDecoration) cakeDecoration.innerHTML = '';
+        }
+
+        // Atualizar preço total
+        precoTotal.textContent = 'R$ ' + total.toFixed(2).replace('.', ',');
+    }
+
+    // Adicionar eventos de seleção com validação de recheios
+    selectorItems.forEach(item => {
+        item.addEventListener('click', function() {
+            const input = this.querySelector('input');
+            if (!input) return;
+            const inputType = input.type;
+            const inputName = input.name;
+            if (inputType === 'radio') {
+                // Desmarcar outras opções do mesmo grupo
+                document.querySelectorAll(`.selector-item[data-type="${this.dataset.type}"]`).forEach(otherItem => {
+                    otherItem.classList.remove('selected');
+                });
+                // Marcar este item
+                this.classList.add('selected');
+                input.checked = true;
+            } else if (inputType === 'checkbox') {
+                if (inputName === 'recheios') {
+                    // Limitar a 2 recheios
+                    const recheiosSelecionados = document.querySelectorAll('input[name="recheios"]:checked').length;
+                    if (recheiosSelecionados >= 2 && !input.checked) {
+                        alert('Você pode selecionar no máximo 2 recheios (um por andar).');
+                        return;
+                    }
+                }
+                this.classList.toggle('selected');
+                input.checked = !input.checked;
+            }
+            updateSummaryAndPrice();
+        });
+    });
+
+    // Verificar formulário antes de enviar
+    const form = document.getElementById('montagem-bolo-form');
+    if (form) {
+        form.addEventListener('submit', function(event) {
+            // Verificar se pelo menos uma massa foi selecionada
+            const massa = document.querySelector('input[name="massa"]:checked');
+            if (!massa) {
+                event.preventDefault();
+                alert('Por favor, selecione uma massa para o bolo');
+                goToStep(1);
+                return;
+            }
+
+            // Verificar se pelo menos um recheio foi selecionado
+            const recheios = document.querySelectorAll('input[name="recheios"]:checked');
+            if (recheios.length === 0) {
+                event.preventDefault();
+                alert('Por favor, selecione pelo menos um recheio para o bolo');
+                goToStep(2);
+                return;
+            }
+
+            // Verificar se uma cobertura foi selecionada
+            const cobertura = document.querySelector('input[name="cobertura"]:checked');
+            if (!cobertura) {
+                event.preventDefault();
+                alert('Por favor, selecione uma cobertura para o bolo');
+                goToStep(3);
+                return;
+            }
+        });
+    }
+
+    // Inicializar
+    updateSummaryAndPrice();
+});
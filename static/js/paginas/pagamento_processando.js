@@ -0,0 +1,65 @@
+// Consulta a situação do pagamento até o pedido ser criado pelo processamento da notificação
+document.addEventListener('DOMContentLoaded', function() {
+    const painel = document.getElementById('pagamento-situacao');
+    if (!painel) {
+        return;
+    }
+
+    const icone = painel.querySelector('[data-situacao-icone]');
+    const titulo = painel.querySelector('[data-situacao-titulo]');
+    const mensagem = painel.querySelector('[data-situacao-mensagem]');
+    const acao = painel.querySelector('[data-situacao-acao]');
+
+    // Intervalo cresce de 1s até 10s; desiste depois de ~3 minutos
+    const intervaloMaximo = 10000;
+    const tempoLimite = 180000;
+    const inicio = Date.now();
+    let intervalo = 1000;
+
+    function finalizar(classeIcone, textoTitulo, textoMensagem, url, textoAcao) {
+        icone.innerHTML = '<i class="bi ' + classeIcone + ' fs-1"></i>';
+        titulo.textContent = textoTitulo;
+        mensagem.textContent = textoMensagem;
+        acao.href = url;
+        acao.lastChild.textContent = ' ' + textoAcao;
+        acao.classList.remove('d-none');
+    }
+
+    function agendar() {
+        if (Date.now() - inicio > tempoLimite) {
+            finalizar('bi-hourglass-split text-warning', 'Ainda aguardando a confirmação',
+                'O pagamento está sendo processado. Seu pedido aparecerá em Meus Pedidos assim que for confirmado.',
+                painel.dataset.urlPedidos, 'Meus Pedidos');
+            return;
+        }
+        setTimeout(consultar, intervalo);
+        intervalo = Math.min(intervalo * 1.5, intervaloMaximo);
+    }
+
+    function consultar() {
+        fetch(painel.dataset.urlSituacao, { headers: { 'Accept': 'application/json' }, cache: 'no-store' })
+            .then(resposta => resposta.json())
+            .then(dados => {
+                if (dados.situacao === 'aprovado') {
+                    window.location.href = dados.url;
+                } else if (dados.situacao === 'recusado') {
+                    finalizar('bi-x-circle text-danger', 'Pagamento não aprovado',
+                        'O Mercado Pago recusou o pagamento. Tente novamente ou escolha outro método de pagamento.',
+                        painel.dataset.urlCarrinho, 'Voltar ao carrinho');
+                } else if (dados.situacao === 'pendente') {
+                    finalizar('bi-hourglass-split text-warning', 'Pagamento pendente',
+                        'Seu pagamento está em análise. O pedido será criado assim que ele for aprovado.',
+                        painel.dataset.urlPedidos, 'Meus Pedidos');
+                } else if (dados.situacao === 'falhou') {
+                    finalizar('bi-exclamation-triangle text-danger', 'Não foi possível registrar o pedido',
+                        'Recebemos o pagamento, mas houve um problema ao registrar o pedido. Entre em contato conosco.',
+                        painel.dataset.urlPedidos, 'Meus Pedidos');
+                } else {
+                    agendar();
+                }
+            })
+            .catch(() => agendar());
+    }
+
+    consultar();
+});
@@ -0,0 +1,353 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // ========== MASCARAMENTO DE DADOS ==========
+    const toggleDataMasking = document.getElementById('toggleDataMasking');
+    const dataFields = document.querySelectorAll('.data-field');
+
+    function applyDataMasking(shouldMask) {
+        dataFields.forEach(field => {
+            if (shouldMask) {
+                field.classList.add('masked-data');
+            } else {
+                field.classList.remove('masked-data');
+            }
+        });
+
+        // Salvar preferência no localStorage
+        localStorage.setItem('dataMasking', shouldMask ? 'true' : 'false');
+    }
+
+    // Inicializar com base no localStorage ou padrão como ativado
+    const savedMaskingPreference = localStorage.getItem('dataMasking');
+    const shouldMaskData = savedMaskingPreference !== null ? savedMaskingPreference === 'true' : true;
+
+    if (toggleDataMasking) {
+        toggleDataMasking.checked = shouldMaskData;
+        applyDataMasking(shouldMaskData);
+
+        // Ouvir mudanças no toggle
+        toggleDataMasking.addEventListener('change', function() {
+            applyDataMasking(this.checked);
+        });
+    }
+
+    // ========== PREVIEW DE IMAGEM ==========
+    const fotoInput = document.getElementById('foto_perfil');
+    const previewImg = document.querySelector('.preview-img');
+
+    if (fotoInput && previewImg) {
+        fotoInput.addEventListener('change', function() {
+            const file = this.files[0];
+            if (file) {
+                const reader = new FileReader();
+                reader.onload = function(e) {
+                    previewImg.src = e.target.result;
+                };
+                reader.readAsDataURL(file);
+            }
+        });
+    }
+
+    // ========== VALIDAÇÃO DE SENHA ==========
+    const novaSenha = document.getElementById('nova_senha');
+    const confirmarSenha = document.getElementById('confirmar_nova_senha');
+
+    if (novaSenha) {
+        novaSenha.addEventListener('input', function() {
+            const senha = this.value;
+
+            // Verificar requisitos
+            const requisitos = [
+                { id: 'req-length', test: senha.length >= 8, text: 'Mínimo 8 caracteres' },
+                { id: 'req-lowercase', test: /[a-z]/.test(senha), text: 'Letra minúscula' },
+                { id: 'req-uppercase', test: /[A-Z]/.test(senha), text: 'Letra maiúscula' },
+                { id: 'req-number', test: /\d/.test(senha), text: 'Número' },
+                { id: 'req-special', test: /[@$!%*?&]/.test(senha), text: 'Caractere especial' }
+            ];
+
+            requisitos.forEach(req => {
+                const elemento = document.getElementById(req.id);
+                if (elemento) {
+                    elemento.innerHTML = req.test ? 
+                        `<i class="bi bi-check-circle-fill text-success me-1"></i>${req.text}` : 
+                        `<i class="bi bi-x-circle me-1"></i>${req.text}`;
+
+                    // Atualizar classes visuais
+                    if (req.test) {
+                        elemento.classList.remove('bg-light', 'text-dark');
+                        elemento.classList.add('bg-success', 'text-white');
+                    } else {
+                        elemento.classList.remove('bg-success', 'text-white');
+                        elemento.classList.add('bg-light', 'text-dark');
+                    }
+                }
+            });
+        });
+    }
+
+    // Verificação de senhas iguais
+    if (novaSenha && confirmarSenha) {
+        confirmarSenha.addEventListener('input', function() {
+            if (this.value !== novaSenha.value) {
+                this.setCustomValidity('As senhas não coincidem');
+            } else {
+                this.setCustomValidity('');
+            }
+        });
+    }
+
+    // ========== FORMATAÇÃO DE CAMPOS ==========
+
+    // Formatação de CPF
+    const cpfInput = document.getElementById('cpf');
+    if (cpfInput) {
+        cpfInput.addEventListener('input', function(e) {
+            let value = e.target.value.replace(/\D/g, '');
+            if (value.length > 11) {
+                value = value.substring(0, 11);
+            }
+
+            if (value.length > 9) {
+                value = value.replace(/^(\d{3})(\d{3})(\d{3})(\d{2})$/, "$1.$2.$3-$4");
+            } else if (value.length > 6) {
+                value = value.replace(/^(\d{3})(\d{3})(\d{0,3})/, "$1.$2.$3");
+            } else if (value.length > 3) {
+                value = value.replace(/^(\d{3})(\d{0,3})/, "$1.$2");
+            }
+
+            e.target.value = value;
+        });
+    }
+
+    // ========== VIACEP - BUSCA DE ENDEREÇO ==========
+    const cepInput = document.getElementById('endereco_cep');
+    const buscarCepBtn = document.getElementById('buscarCep');
+    const cepCache = new Map();
+
+    // Formatação de CEP com auto-busca
+    if (cepInput) {
+        cepInput.addEventListener('input', function(e) {
+            let value = e.target.value.replace(/\D/g, '');
+            if (value.length > 8) {
+                value = value.substring(0, 8);
+            }
+
+            if (value.length > 5) {
+                value = value.replace(/^(\d{5})(\d{0,3})/, "$1-$2");
+            }
+
+            e.target.value = value;
+
+            // Auto-busca quando CEP estiver completo
+            const cepLimpo = value.replace(/\D/g, '');
+            if (cepLimpo.length === 8) {
+                buscarCEP(cepLimpo);
+            }
+        });
+
+        // Busca também quando usuário cola um CEP
+        cepInput.addEventListener('paste', function(e) {
+            setTimeout(() => {
+                const cepLimpo = this.value.replace(/\D/g, '');
+                if (cepLimpo.length === 8) {
+                    buscarCEP(cepLimpo);
+                }
+            }, 100);
+        });
+
+        // Permitir busca com Enter
+        cepInput.addEventListener('keypress', function(e) {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                const cep = this.value.replace(/\D/g, '');
+                buscarCEP(cep);
+            }
+        });
+    }
+
+    // Função principal de busca de CEP
+    async function buscarCEP(cep) {
+        if (!cep || cep.length !== 8) {
+            mostrarErro('CEP deve conter exatamente 8 dígitos.');
+            return;
+        }
+
+        // Verificar cache primeiro
+        if (cepCache.has(cep)) {
+            preencherEndereco(cepCache.get(cep));
+            mostrarSucesso('Endereço encontrado (cache)!');
+            return;
+        }
+
+        // Mostrar indicador de carregamento
+        setLoadingState(true);
+
+        try {
+            const response = await fetch(`https://viacep.com.br/ws/${cep}/json/`);
+            const data = await response.json();
+
+            if (!response.ok) {
+                throw new Error('Erro na requisição');
+            }
+
+            if (data.erro) {
+                mostrarErro('CEP não encontrado. Verifique se o número está correto.');
+                return;
+            }
+
+            // Salvar no cache
+            cepCache.set(cep, data);
+
+            // Preencher campos
+            preencherEndereco(data);
+            mostrarSucesso('Endereço encontrado com sucesso!');
+
+        } catch (error) {
+            console.error('Erro ao buscar CEP:', error);
+            mostrarErro('Erro ao buscar CEP. Verifique sua conexão e tente novamente.');
+        } finally {
+            setLoadingState(false);
+        }
+    }
+
+    // Função para preencher os campos de endereço
+    function preencherEndereco(data) {
+        const campos = {
+            'endereco_rua': data.logradouro,
+            'endereco_bairro': data.bairro,
+            'endereco_cidade': data.localidade,
+            'endereco_estado': data.uf
+        };
+
+        Object.entries(campos).forEach(([id, valor]) => {
+            const campo = document.getElementById(id);
+            if (campo && valor) {
+                campo.value = valor;
+                // Animação sutil para mostrar que o campo foi preenchido
+                campo.classList.add('border-success');
+                setTimeout(() => {
+                    campo.classList.remove('border-success');
+                }, 2000);
+            }
+        });
+
+        // SEMPRE limpar o campo número quando endereço mudar
+        const numeroField = document.getElementById('endereco_numero');
+        const complementoField = document.getElementById('endereco_complemento');
+
+        if (numeroField) {
+            numeroField.value = '';
+            numeroField.focus();
+        }
+
+        // Também limpar complemento para começar com endereço "limpo"
+        if (complementoField) {
+            complementoField.value = '';
+        }
+    }
+
+    // Função para controlar estado de carregamento
+    function setLoadingState(isLoading) {
+        if (!buscarCepBtn) return;
+
+        if (isLoading) {
+            buscarCepBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>';
+            buscarCepBtn.disabled = true;
+            if (cepInput) cepInput.disabled = true;
+        } else {
+            buscarCepBtn.innerHTML = '<i class="bi bi-search"></i>';
+            buscarCepBtn.disabled = false;
+            if (cepInput) cepInput.disabled = false;
+        }
+    }
+
+    // Busca manual via botão
+    if (buscarCepBtn) {
+        buscarCepBtn.addEventListener('click', function() {
+            const cep = cepInput.value.replace(/\D/g, '');
+            buscarCEP(cep);
+        });
+    }
+
+    // Limpeza de campos quando CEP é alterado significativamente
+    if (cepInput) {
+        let ultimoCepBuscado = '';
+
+        cepInput.addEventListener('input', function() {
+            const cepAtual = this.value.replace(/\D/g, '');
+
+            // Se o CEP mudou significativamente, limpar campos
+            if (ultimoCepBuscado && 
+                cepAtual.length < 8 && 
+                !ultimoCepBuscado.startsWith(cepAtual.substring(0, 5))) {
+
+                limparCamposEndereco();
+            }
+        });
+
+        function limparCamposEndereco() {
+            const campos = ['endereco_rua', 'endereco_bairro', 'endereco_cidade', 'endereco_estado', 'endereco_numero', 'endereco_complemento'];
+            campos.forEach(id => {
+                const campo = document.getElementById(id);
+                if (campo) {
+                    campo.value = '';
+                    campo.classList.remove('border-success');
+                }
+            });
+        }
+    }
+
+    // ========== SISTEMA DE TOAST NOTIFICATIONS ==========
+
+    // Funções para mostrar mensagens
+    function mostrarSucesso(mensagem) {
+        mostrarToast(mensagem, 'success');
+    }
+
+    function mostrarErro(mensagem) {
+        mostrarToast(mensagem, 'danger');
+    }
+
+    // Sistema de toast melhorado (substitui alerts)
+    function mostrarToast(mensagem, tipo = 'info') {
+        // Remove toasts anteriores
+        const existingToasts = document.querySelectorAll('.toast-custom');
+        existingToasts.forEach(toast => toast.remove());
+
+        const toast = document.createElement('div');
+        toast.className = `toast-custom alert alert-${tipo} alert-dismissible fade show position-fixed`;
+        toast.style.cssText = `
+            top: 20px; 
+            right: 20px; 
+            z-index: 9999; 
+            min-width: 300px;
+            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        `;
+
+        const icon = tipo === 'success' ? 'check-circle-fill' : 
+                    tipo === 'danger' ? 'exclamation-triangle-fill' : 'info-circle-fill';
+
+        toast.innerHTML = `
+            <i class="bi bi-${icon} me-2"></i>${mensagem}
+            <button type="button" class="btn-close" onclick="this.parentElement.remove()"></button>
+        `;
+
+        document.body.appendChild(toast);
+
+        // Auto-remove após 5 segundos
+        setTimeout(() => {
+            if (toast.parentElement) {
+                toast.remove();
+            }
+        }, 5000);
+    }
+
+    // ========== FORMULÁRIO DE CONTATO ==========
+    const contatoForm = document.getElementById('contato-form');
+    if (contatoForm) {
+        contatoForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            mostrarSucesso('Obrigado pelo contato! Responderemos em breve.');
+            this.reset();
+        });
+    }
+});
@@ -0,0 +1,59 @@
+// Script para validação das senhas e indicador de força
+document.addEventListener('DOMContentLoaded', function() {
+    const novaSenha = document.getElementById('nova_senha');
+    const confirmarSenha = document.getElementById('confirmar_senha');
+    const passwordStrength = document.getElementById('passwordStrength');
+
+    // Verificar igualdade das senhas
+    confirmarSenha.addEventListener('input', function() {
+        if (novaSenha.value !== confirmarSenha.value) {
+            confirmarSenha.setCustomValidity('As senhas não coincidem');
+        } else {
+            confirmarSenha.setCustomValidity('');
+        }
+    });
+
+    // Verificar força da senha
+    novaSenha.addEventListener('input', function() {
+        const value = novaSenha.value;
+
+        // Redefinir senha de confirmação
+        if (confirmarSenha.value) {
+            if (novaSenha.value !== confirmarSenha.value) {
+                confirmarSenha.setCustomValidity('As senhas não coincidem');
+            } else {
+                confirmarSenha.setCustomValidity('');
+            }
+        }
+
+        // Verificar força
+        let strength = 0;
+
+        // Verificar comprimento
+        if (value.length >= 8) {
+            strength += 1;
+        }
+
+        // Verificar letras maiúsculas e minúsculas
+        if (value.match(/[a-z]/) && value.match(/[A-Z]/)) {
+            strength += 1;
+        }
+
+        // Verificar números e caracteres especiais
+        if (value.match(/[0-9]/) && value.match(/[^a-zA-Z0-9]/)) {
+            strength += 1;
+        }
+
+        // Atualizar indicador de força
+        passwordStrength.className = 'password-strength';
+        if (strength === 0) {
+            passwordStrength.style.width = '0';
+        } else if (strength === 1) {
+            passwordStrength.classList.add('password-weak');
+        } else if (strength === 2) {
+            passwordStrength.classList.add('password-medium');
+        } else {
+            passwordStrength.classList.add('password-strong');
+        }
+    });
+});
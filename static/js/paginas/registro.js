@@ -0,0 +1,412 @@
+        // Verificação de senhas iguais no formulário de registro
+        document.getElementById('confirmar_senha').addEventListener('input', function() {
+            const senha = document.getElementById('senha').value;
+            const confirmarSenha = this.value;
+
+            if (senha !== confirmarSenha) {
+                this.setCustomValidity('As senhas não coincidem');
+            } else {
+                this.setCustomValidity('');
+            }
+        });
+
+        // Atualizar a validação quando a senha original mudar
+        document.getElementById('senha').addEventListener('input', function() {
+            const confirmarSenha = document.getElementById('confirmar_senha');
+            if (confirmarSenha.value) {
+                if (this.value !== confirmarSenha.value) {
+                    confirmarSenha.setCustomValidity('As senhas não coincidem');
+                } else {
+                    confirmarSenha.setCustomValidity('');
+                }
+            }
+        });
+
+        // Formatação automática do CPF
+        document.getElementById('cpf').addEventListener('input', function(e) {
+            let value = this.value.replace(/\D/g, '');
+            if (value.length > 11) {
+                value = value.slice(0, 11);
+            }
+
+            if (value.length > 9) {
+                this.value = value.replace(/^(\d{3})(\d{3})(\d{3})(\d{2})$/, "$1.$2.$3-$4");
+            } else if (value.length > 6) {
+                this.value = value.replace(/^(\d{3})(\d{3})(\d{3})$/, "$1.$2.$3");
+            } else if (value.length > 3) {
+                this.value = value.replace(/^(\d{3})(\d{3})$/, "$1.$2");
+            } else {
+                this.value = value;
+            }
+        });
+
+        // Formatação automática do CEP
+        document.getElementById('cep').addEventListener('input', function(e) {
+            let value = this.value.replace(/\D/g, '');
+            if (value.length > 8) {
+                value = value.slice(0, 8);
+            }
+
+            if (value.length > 5) {
+                this.value = value.replace(/^(\d{5})(\d{3})$/, "$1-$2");
+            } else {
+                this.value = value;
+            }
+        });
+
+        // Busca de endereço por CEP
+        document.getElementById('cep').addEventListener('blur', function() {
+            const cep = this.value.replace(/\D/g, '');
+            if (cep.length !== 8) return;
+
+            fetch(`https://viacep.com.br/ws/${cep}/json/`)
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.erro) {
+                        document.getElementById('rua').value = data.logradouro;
+                        document.getElementById('bairro').value = data.bairro;
+                        document.getElementById('cidade').value = data.localidade;
+                        document.getElementById('estado').value = data.uf;
+                        document.getElementById('numero').focus();
+                    }
+                })
+                .catch(error => console.error('Erro ao buscar CEP:', error));
+        });
+
+        // Sistema de Validação e Sugestões de Email
+(function() {
+    // Domínios populares para sugestões
+    const popularDomains = [
+        'gmail.com', 'hotmail.com', 'yahoo.com.br', 'yahoo.com', 'outlook.com',
+        'uol.com.br', 'bol.com.br', 'terra.com.br', 'globo.com', 'r7.com',
+        'live.com', 'icloud.com', 'me.com', 'aol.com', 'msn.com'
+    ];
+
+    // Correções automáticas para erros comuns
+    const domainCorrections = {
+        'gmal.com': 'gmail.com',
+        'gmial.com': 'gmail.com',
+        'gmail.co': 'gmail.com',
+        'gmail.cm': 'gmail.com',
+        'gmai.com': 'gmail.com',
+        'hotmial.com': 'hotmail.com',
+        'hotmai.com': 'hotmail.com',
+        'hotmail.co': 'hotmail.com',
+        'yahoo.co': 'yahoo.com',
+        'yahoo.cm': 'yahoo.com',
+        'yahooo.com': 'yahoo.com',
+        'yaho.com': 'yahoo.com',
+        'outlok.com': 'outlook.com',
+        'outlook.co': 'outlook.com',
+        'uol.com': 'uol.com.br',
+        'bol.com': 'bol.com.br',
+        'terra.com': 'terra.com.br'
+    };
+
+    function initEmailValidator() {
+        const emailInput = document.getElementById('email');
+        if (!emailInput) return;
+
+        // Criar container para sugestões
+        const container = document.createElement('div');
+        container.className = 'email-input-container position-relative';
+        emailInput.parentNode.insertBefore(container, emailInput);
+        container.appendChild(emailInput);
+
+        // Criar dropdown para sugestões
+        const suggestionsDropdown = document.createElement('div');
+        suggestionsDropdown.className = 'email-suggestions position-absolute bg-white border border-top-0 rounded-bottom w-100';
+        suggestionsDropdown.style.top = '100%';
+        suggestionsDropdown.style.left = '0';
+        suggestionsDropdown.style.zIndex = '1000';
+        suggestionsDropdown.style.display = 'none';
+        suggestionsDropdown.style.maxHeight = '200px';
+        suggestionsDropdown.style.overflowY = 'auto';
+        container.appendChild(suggestionsDropdown);
+
+        // Criar feedback de validação
+        const feedback = document.createElement('div');
+        feedback.className = 'email-validation-feedback mt-1';
+        container.appendChild(feedback);
+
+        let selectedSuggestionIndex = -1;
+        let currentSuggestions = [];
+
+        // Função para validar sintaxe de email
+        function isValidEmailSyntax(email) {
+            const regex = /^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$/;
+            return regex.test(email);
+        }
+
+        // Função para calcular distância de Levenshtein (similaridade)
+        function levenshteinDistance(str1, str2) {
+            const matrix = [];
+            for (let i = 0; i <= str2.length; i++) {
+                matrix[i] = [i];
+            }
+            for (let j = 0; j <= str1.length; j++) {
+                matrix[0][j] = j;
+            }
+            for (let i = 1; i <= str2.length; i++) {
+                for (let j = 1; j <= str1.length; j++) {
+                    if (str2.charAt(i - 1) === str1.charAt(j - 1)) {
+                        matrix[i][j] = matrix[i - 1][j - 1];
+                    } else {
+                        matrix[i][j] = Math.min(
+                            matrix[i - 1][j - 1] + 1,
+                            matrix[i][j - 1] + 1,
+                            matrix[i - 1][j] + 1
+                        );
+                    }
+                }
+            }
+            return matrix[str2.length][str1.length];
+        }
+
+        // Função para sugerir correção de domínio
+        function suggestDomainCorrection(domain) {
+            // Verificar correções diretas
+            if (domainCorrections[domain.toLowerCase()]) {
+                return domainCorrections[domain.toLowerCase()];
+            }
+
+            // Encontrar domínio mais similar
+            let bestMatch = null;
+            let bestDistance = Infinity;
+
+            popularDomains.forEach(popularDomain => {
+                const distance = levenshteinDistance(domain.toLowerCase(), popularDomain);
+                if (distance < bestDistance && distance <= 2) {
+                    bestDistance = distance;
+                    bestMatch = popularDomain;
+                }
+            });
+
+            return bestMatch;
+        }
+
+        // Função para gerar sugestões de autocomplete
+        function generateAutocompleteSuggestions(email) {
+            const [localPart, domain] = email.split('@');
+            if (!domain || !localPart) return [];
+
+            const suggestions = [];
+            const domainLower = domain.toLowerCase();
+
+            // Filtrar domínios que começam com o que foi digitado
+            popularDomains.forEach(popularDomain => {
+                if (popularDomain.toLowerCase().startsWith(domainLower) && 
+                    popularDomain.toLowerCase() !== domainLower) {
+                    suggestions.push(`${localPart}@${popularDomain}`);
+                }
+            });
+
+            return suggestions.slice(0, 5); // Limitar a 5 sugestões
+        }
+
+        // Função para mostrar sugestões
+        function showSuggestions(suggestions, type = 'autocomplete') {
+            if (suggestions.length === 0) {
+                hideSuggestions();
+                return;
+            }
+
+            currentSuggestions = suggestions;
+            selectedSuggestionIndex = -1;
+
+            suggestionsDropdown.innerHTML = '';
+
+            suggestions.forEach((suggestion, index) => {
+                const item = document.createElement('div');
+                item.className = 'suggestion-item p-2 cursor-pointer';
+                item.style.cursor = 'pointer';
+                item.style.borderBottom = '1px solid #f0f0f0';
+
+                if (type === 'correction') {
+                    item.innerHTML = `
+                        <i class="bi bi-exclamation-triangle text-warning me-2"></i>
+                        Você quis dizer: <strong>${suggestion}</strong>?
+                    `;
+                } else {
+                    item.innerHTML = `
+                        <i class="bi bi-at me-2"></i>
+                        ${suggestion}
+                    `;
+                }
+
+                item.addEventListener('click', () => {
+                    emailInput.value = suggestion;
+                    hideSuggestions();
+                    validateEmail();
+                    emailInput.focus();
+                });
+
+                item.addEventListener('mouseenter', () => {
+                    selectedSuggestionIndex = index;
+                    updateSuggestionSelection();
+                });
+
+                suggestionsDropdown.appendChild(item);
+            });
+
+            suggestionsDropdown.style.display = 'block';
+        }
+
+        // Função para esconder sugestões
+        function hideSuggestions() {
+            suggestionsDropdown.style.display = 'none';
+            currentSuggestions = [];
+            selectedSuggestionIndex = -1;
+        }
+
+        // Função para atualizar seleção visual das sugestões
+        function updateSuggestionSelection() {
+            const items = suggestionsDropdown.querySelectorAll('.suggestion-item');
+            items.forEach((item, index) => {
+                if (index === selectedSuggestionIndex) {
+                    item.style.backgroundColor = '#f8f9fa';
+                } else {
+                    item.style.backgroundColor = '';
+                }
+            });
+        }
+
+        // Função principal de validação
+        function validateEmail() {
+            const email = emailInput.value.trim();
+
+            if (!email) {
+                feedback.innerHTML = '';
+                hideSuggestions();
+                return;
+            }
+
+            // Verificar se tem @
+            if (!email.includes('@')) {
+                feedback.innerHTML = '<i class="bi bi-info-circle text-muted me-1"></i>Digite seu email completo';
+                feedback.className = 'email-validation-feedback mt-1 text-muted';
+
+                // Sugestões de domínios populares
+                if (email.length >= 2) {
+                    const suggestions = popularDomains
+                        .slice(0, 3)
+                        .map(domain => `${email}@${domain}`);
+                    showSuggestions(suggestions);
+                }
+                return;
+            }
+
+            const [localPart, domain] = email.split('@');
+
+            // Validação básica de sintaxe
+            if (!isValidEmailSyntax(email)) {
+                feedback.innerHTML = '<i class="bi bi-exclamation-circle text-danger me-1"></i>Formato de email inválido';
+                feedback.className = 'email-validation-feedback mt-1 text-danger';
+
+                // Sugerir correção se possível
+                if (domain) {
+                    const suggestion = suggestDomainCorrection(domain);
+                    if (suggestion) {
+                        const correctedEmail = `${localPart}@${suggestion}`;
+                        showSuggestions([correctedEmail], 'correction');
+                    }
+                }
+                return;
+            }
+
+            // Verificar se precisa de correção de domínio
+            const domainSuggestion = suggestDomainCorrection(domain);
+            if (domainSuggestion && domainSuggestion !== domain) {
+                const correctedEmail = `${localPart}@${domainSuggestion}`;
+                feedback.innerHTML = `<i class="bi bi-exclamation-triangle text-warning me-1"></i>Você quis dizer <button type="button" class="correction-button" onclick="document.getElementById('email').value='${correctedEmail}'; validateEmail(); hideSuggestions();">${correctedEmail}</button>?`;
+                feedback.className = 'email-validation-feedback mt-1 text-warning';
+                return;
+            }
+
+            // Email válido
+            feedback.innerHTML = '<i class="bi bi-check-circle text-success me-1"></i>Email válido';
+            feedback.className = 'email-validation-feedback mt-1 text-success';
+            hideSuggestions();
+        }
+
+        // Event listeners
+        emailInput.addEventListener('input', function() {
+            const email = this.value;
+
+            // Validar email
+            validateEmail();
+
+            // Mostrar sugestões de autocomplete se estiver digitando domínio
+            if (email.includes('@') && !email.endsWith('@')) {
+                const suggestions = generateAutocompleteSuggestions(email);
+                if (suggestions.length > 0) {
+                    showSuggestions(suggestions);
+                }
+            }
+        });
+
+        emailInput.addEventListener('blur', function() {
+            // Pequeno delay para permitir clique nas sugestões
+            setTimeout(() => {
+                if (!suggestionsDropdown.matches(':hover')) {
+                    hideSuggestions();
+                }
+            }, 150);
+        });
+
+        emailInput.addEventListener('keydown', function(e) {
+            if (suggestionsDropdown.style.display === 'none') return;
+
+            switch (e.key) {
+                case 'ArrowDown':
+                    e.preventDefault();
+                    selectedSuggestionIndex = Math.min(
+                        selectedSuggestionIndex + 1, 
+                        currentSuggestions.length - 1
+                    );
+                    updateSuggestionSelection();
+                    break;
+
+                case 'ArrowUp':
+                    e.preventDefault();
+                    selectedSuggestionIndex = Math.max(selectedSuggestionIndex - 1, 0);
+                    updateSuggestionSelection();
+                    break;
+
+                case 'Enter':
+                    if (selectedSuggestionIndex >= 0 && selectedSuggestionIndex < currentSuggestions.length) {
+                        e.preventDefault();
+                        emailInput.value = currentSuggestions[selectedSuggestionIndex];
+                        hideSuggestions();
+                        validateEmail();
+                    }
+                    break;
+
+                case 'Escape':
+                    hideSuggestions();
+                    break;
+            }
+        });
+
+        // Esconder sugestões quando clicar fora
+        document.addEventListener('click', function(e) {
+            if (!container.contains(e.target)) {
+                hideSuggestions();
+            }
+        });
+
+        // Função global para correção (usada nos botões)
+        window.applyEmailCorrection = function(correctedEmail) {
+            emailInput.value = correctedEmail;
+            validateEmail();
+            hideSuggestions();
+        };
+    }
+
+    // Inicializar quando o DOM estiver pronto
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initEmailValidator);
+    } else {
+        initEmailValidator();
+    }
+})();
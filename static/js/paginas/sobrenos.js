@@ -0,0 +1,69 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Animação de elementos ao scroll
+    const fadeElements = document.querySelectorAll('.about-image, .valores-card, .team-member, .testimonial-card, .counter-item, .gallery-item');
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('fade-in');
+                entry.target.classList.add('show');
+                observer.unobserve(entry.target);
+            }
+        });
+    }, {
+        threshold: 0.1
+    });
+
+    fadeElements.forEach(element => {
+        observer.observe(element);
+    });
+
+    // Contadores animados
+    const counterElements = document.querySelectorAll('.counter-number');
+    const counterSpeed = 200; // Velocidade da contagem (ms)
+
+    counterElements.forEach(counter => {
+        const target = +counter.innerText;
+        let count = 0;
+        const updateCounter = () => {
+            const increment = target / (counterSpeed / 10);
+            if (count < target) {
+                count += increment;
+                counter.innerText = Math.ceil(count);
+                setTimeout(updateCounter, 10);
+            } else {
+                counter.innerText = target;
+            }
+        };
+
+        const counterObserver = new IntersectionObserver((entries) => {
+            if (entries[0].isIntersecting) {
+                updateCounter();
+                counterObserver.unobserve(entries[0].target);
+            }
+        }, {
+            threshold: 0.5
+        });
+
+        counterObserver.observe(counter);
+    });
+
+    // Botão voltar ao topo
+    const backToTopButton = document.querySelector('.back-to-top');
+
+    window.addEventListener('scroll', () => {
+        if (window.scrollY > 300) {
+            backToTopButton.classList.add('show');
+        } else {
+            backToTopButton.classList.remove('show');
+        }
+    });
+
+    document.getElementById('back-to-top-btn').addEventListener('click', function(e) {
+        e.preventDefault();
+        window.scrollTo({
+            top: 0,
+            behavior: 'smooth'
+        });
+    });
+});
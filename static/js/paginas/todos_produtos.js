@@ -0,0 +1,44 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Adicionar classe de animação aos cards
+    const cards = document.querySelectorAll('.produto-card');
+    cards.forEach((card, index) => {
+        setTimeout(() => {
+            card.classList.add('fade-in');
+            card.classList.add('show');
+        }, 100 * index);
+    });
+
+    // Os filtros são aplicados no servidor: basta reenviar o formulário
+    const formFiltros = document.getElementById('form-filtros');
+    document.getElementById('filtro-categoria').addEventListener('change', () => formFiltros.submit());
+    document.getElementById('filtro-preco').addEventListener('change', () => formFiltros.submit());
+
+    // Botão voltar ao topo
+    const backToTopButton = document.querySelector('.back-to-top');
+
+    window.addEventListener('scroll', () => {
+        if (window.scrollY > 300) {
+            backToTopButton.classList.add('show');
+        } else {
+            backToTopButton.classList.remove('show');
+        }
+    });
+
+    document.getElementById('back-to-top-btn').addEventListener('click', function(e) {
+        e.preventDefault();
+        window.scrollTo({
+            top: 0,
+            behavior: 'smooth'
+        });
+    });
+
+
+
+});
+
+// Script para o formulário de contato (mantido do script original)
+document.getElementById('contato-form').addEventListener('submit', function(e) {
+    e.preventDefault();
+    alert('Obrigado pelo contato! Responderemos em breve.');
+    this.reset();
+});
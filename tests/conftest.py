@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from database import db
+from models.models import Usuario, Produto
+
+
+class GatewayFalso:
+    """
+    Servidor HTTP local no lugar da API do Mercado Pago.
+
+    `pagamentos` mapeia o ID para (status HTTP, corpo) de GET /v1/payments/<id>;
+    `respostas_preferencia` é a fila de respostas de POST /checkout/preferences
+    (vazia: 201 com um init_point novo). Todas as requisições ficam em `requisicoes` e os
+    cabeçalhos recebidos em `cabecalhos`; `atraso` segura cada resposta por alguns segundos.
+    """
+
+    def __init__(self):
+        self.pagamentos = {}
+        self.respostas_preferencia = []
+        self.requisicoes = []
+        self.cabecalhos = []
+        self.atraso = 0
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, status, corpo):
+                gateway.cabecalhos.append(dict(self.headers))
+                if gateway.atraso:
+                    time.sleep(gateway.atraso)
+                dados = json.dumps(corpo).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(dados)))
+                    self.end_headers()
+                    self.wfile.write(dados)
+                except (BrokenPipeError, ConnectionResetError):
+                    # O cliente desistiu antes da resposta (timeout de leitura)
+                    pass
+
+            def do_GET(self):
+                gateway.requisicoes.append(('GET', self.path, None))
+                pagamento_id = self.path.rsplit('/', 1)[-1]
+                self._responder(*gateway.pagamentos.get(pagamento_id, (404, {'message': 'not found'})))
+
+            def do_POST(self):
+                tamanho = int(self.headers.get('Content-Length') or 0)
+                corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+                gateway.requisicoes.append(('POST', self.path, corpo))
+                if gateway.respostas_preferencia:
+                    self._responder(*gateway.respostas_preferencia.pop(0))
+                else:
+                    numero = len(gateway.requisicoes)
+                    self._responder(201, {'id': f'pref-{numero}', 'init_point': f'https://pagar.teste/{numero}'})
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.servidor.server_address[1]}'
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self._thread.start()
+
+    def aprovar(self, pagamento_id, rascunho, status='approved', valor=None):
+        self.pagamentos[str(pagamento_id)] = (200, {
+            'id': int(pagamento_id),
+            'status': status,
+            'external_reference': rascunho.codigo,
+            'metadata': {'rascunho': rascunho.codigo},
+            'transaction_amount': rascunho.total if valor is None else valor
+        })
+
+    def encerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def gateway():
+    gateway = GatewayFalso()
+    yield gateway
+    gateway.encerrar()
+
+
+@pytest.fixture
+def criar_app(tmp_path):
+    """Fábrica de aplicações com banco SQLite em memória e sem threads em segundo plano"""
+    def criar(**config):
+        configuracao = {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'SESSION_COOKIE_SECURE': False,
+            'AUDIT_LOG_SYNC': True,
+            'EMAIL_OUTBOX_WORKER': False,
+            'EMAIL_OUTBOX_PATH': str(tmp_path / 'email_outbox.sqlite3'),
+            'PAGAMENTOS_WORKER': False,
+            'PAGE_CACHE_ENABLED': False,
+            'SESSAO_SQLITE_PATH': str(tmp_path / 'sessoes.sqlite3'),
+        }
+        configuracao.update(config)
+        app = create_app(configuracao)
+        with app.app_context():
+            db.create_all()
+        return app
+    return criar
+
+
+@pytest.fixture
+def app(criar_app):
+    app = criar_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def usuario(app):
+    usuario = Usuario(nome='Cliente Teste', email='cliente@teste.com', senha=generate_password_hash('1234'))
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+@pytest.fixture
+def produto(app):
+    produto = Produto(nome='Bolo de Chocolate', preco=45.9, categoria='Bolos')
+    db.session.add(produto)
+    db.session.commit()
+    return produto
+
+
+def entrar(client, usuario):
+    """Marca a sessão do cliente de testes como logada com o usuário"""
+    with client.session_transaction() as sessao:
+        sessao['usuario_id'] = usuario.id
+
+
+@pytest.fixture
+def admin(app):
+    admin = Usuario(nome='Administrador', email='admin@teste.com', senha=generate_password_hash('1234'), is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    return admin
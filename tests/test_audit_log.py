@@ -0,0 +1,85 @@
+import pytest
+from database import db
+from models.models import Log
+from tests.conftest import entrar
+from utils.audit_log import audit_log
+from utils.helpers import registrar_log
+
+
+@pytest.fixture
+def app_assincrona(criar_app):
+    app = criar_app(AUDIT_LOG_SYNC=False, AUDIT_LOG_BATCH_SIZE=100, AUDIT_LOG_FLUSH_INTERVAL=0.05)
+    with app.app_context():
+        yield app
+        audit_log.encerrar()
+        db.session.remove()
+
+
+def test_modo_sincrono_grava_na_hora(app):
+    gravados = audit_log.estatisticas()['gravados']
+
+    registrar_log('login', 'Usuário entrou', None)
+
+    assert Log.query.filter_by(tipo='login').count() == 1
+    assert audit_log.estatisticas()['gravados'] == gravados + 1
+    assert audit_log.estatisticas()['sincrono'] is True
+    assert not audit_log.estatisticas()['worker_ativo']
+
+
+def test_registro_nao_faz_commit_na_sessao_de_quem_chamou(app, usuario):
+    usuario_id = usuario.id
+    usuario.nome = 'Alterado sem commit'
+
+    registrar_log('usuario_atualizado', 'Nome alterado', usuario_id)
+
+    assert usuario in db.session.dirty
+    db.session.rollback()
+    assert db.session.get(type(usuario), usuario_id).nome == 'Cliente Teste'
+    assert Log.query.filter_by(tipo='usuario_atualizado', usuario_id=usuario_id).count() == 1
+
+
+def test_modo_assincrono_grava_em_lotes(app_assincrona):
+    antes = audit_log.estatisticas()
+
+    for i in range(250):
+        assert registrar_log('INFO', f'evento {i}') is None
+
+    assert audit_log.flush()
+    depois = audit_log.estatisticas()
+    assert Log.query.count() == 250
+    assert depois['gravados'] - antes['gravados'] == 250
+    assert 3 <= depois['lotes'] - antes['lotes'] <= 250
+    assert depois['worker_ativo']
+
+
+def test_encerrar_esvazia_a_fila(app_assincrona):
+    for i in range(20):
+        audit_log.registrar('INFO', f'evento {i}')
+
+    audit_log.encerrar()
+
+    assert Log.query.count() == 20
+    assert not audit_log.estatisticas()['worker_ativo']
+
+
+def test_fila_cheia_descarta_sem_bloquear(criar_app, monkeypatch):
+    app = criar_app(AUDIT_LOG_SYNC=False, AUDIT_LOG_QUEUE_SIZE=2)
+    # Sem worker a fila não esvazia
+    monkeypatch.setattr(audit_log, '_iniciar_worker', lambda: None)
+    descartados = audit_log.estatisticas()['descartados']
+
+    with app.app_context():
+        resultados = [audit_log.registrar('INFO', f'evento {i}') for i in range(3)]
+
+    assert resultados == [True, True, False]
+    assert audit_log.estatisticas()['descartados'] == descartados + 1
+    assert audit_log.estatisticas()['tamanho_fila'] == 2
+
+
+def test_metricas_no_admin(client, admin):
+    entrar(client, admin)
+
+    resposta = client.get('/admin/logs/metricas')
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['metricas']['sincrono'] is True
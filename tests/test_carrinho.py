@@ -0,0 +1,70 @@
+from database import db
+from models.models import Produto, BoloPersonalizado, CarrinhoItem, CarrinhoBoloPersonalizado
+from tests.conftest import entrar
+from utils.cart_repository import QUANTIDADE_MAXIMA, somar_produtos_carrinho
+
+
+def _quantidades(modelo, coluna, usuario_id):
+    return {getattr(item, coluna): item.quantidade for item in modelo.query.filter_by(usuario_id=usuario_id)}
+
+
+def test_adicionar_repetido_soma_na_mesma_linha(client, usuario, produto):
+    entrar(client, usuario)
+
+    for _ in range(3):
+        assert client.get(f'/adicionar/{produto.id}').status_code == 302
+
+    item = CarrinhoItem.query.filter_by(usuario_id=usuario.id).one()
+    assert item.quantidade == 3
+
+
+def test_adicionar_para_na_quantidade_maxima(client, usuario, produto):
+    entrar(client, usuario)
+
+    for _ in range(QUANTIDADE_MAXIMA + 2):
+        client.get(f'/adicionar/{produto.id}')
+
+    assert CarrinhoItem.query.filter_by(usuario_id=usuario.id).one().quantidade == QUANTIDADE_MAXIMA
+    with client.session_transaction() as sessao:
+        assert 'quantidade máxima' in sessao['_flashes'][-1][1]
+
+
+def test_soma_limita_cada_item_ao_maximo(app, usuario, produto):
+    outro = Produto(nome='Torta de Limão', preco=30, categoria='Tortas')
+    db.session.add(outro)
+    db.session.commit()
+
+    somar_produtos_carrinho(usuario.id, {produto.id: 8, outro.id: 25})
+    somar_produtos_carrinho(usuario.id, {produto.id: 5, outro.id: 0})
+    db.session.commit()
+
+    assert _quantidades(CarrinhoItem, 'produto_id', usuario.id) == {produto.id: QUANTIDADE_MAXIMA,
+                                                                    outro.id: QUANTIDADE_MAXIMA}
+
+
+def test_sincronizar_soma_o_carrinho_de_visitante_as_linhas_existentes(client, usuario, produto):
+    novo = Produto(nome='Torta de Limão', preco=30, categoria='Tortas')
+    bolo = BoloPersonalizado(usuario_id=usuario.id, massa='Chocolate', recheios='["Brigadeiro"]',
+                             cobertura='Ganache', preco=80)
+    db.session.add_all([novo, bolo])
+    db.session.commit()
+    db.session.add_all([
+        CarrinhoItem(usuario_id=usuario.id, produto_id=produto.id, quantidade=7),
+        CarrinhoBoloPersonalizado(usuario_id=usuario.id, bolo_personalizado_id=bolo.id, quantidade=1)
+    ])
+    db.session.commit()
+
+    # Carrinho montado como visitante
+    for _ in range(6):
+        client.get(f'/adicionar/{produto.id}')
+    client.get(f'/adicionar/{novo.id}')
+    with client.session_transaction() as sessao:
+        sessao['carrinho_personalizado'] = {str(bolo.id): {'id': bolo.id, 'quantidade': 2}}
+
+    entrar(client, usuario)
+    assert client.get('/sincronizar_carrinho').get_json()['status'] == 'success'
+
+    assert _quantidades(CarrinhoItem, 'produto_id', usuario.id) == {produto.id: QUANTIDADE_MAXIMA, novo.id: 1}
+    assert _quantidades(CarrinhoBoloPersonalizado, 'bolo_personalizado_id', usuario.id) == {bolo.id: 3}
+    with client.session_transaction() as sessao:
+        assert 'carrinho' not in sessao and 'carrinho_personalizado' not in sessao
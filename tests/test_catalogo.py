@@ -0,0 +1,133 @@
+import pytest
+from database import db
+from models.models import Produto
+from tests.conftest import entrar
+from utils.catalog import catalogo
+from utils.page_cache import page_cache, ArquivoBackend
+
+
+@pytest.fixture
+def produtos(app):
+    """14 produtos ativos em duas categorias e um inativo"""
+    catalogo.invalidar()
+    for i in range(14):
+        db.session.add(Produto(nome=f'Produto {i}', descricao='Feito no dia', preco=10 + i,
+                               categoria='Bolos' if i % 2 == 0 else 'Doces'))
+    db.session.add(Produto(nome='Produto inativo', preco=1, categoria='Bolos', ativo=False))
+    db.session.commit()
+    return Produto.query.filter_by(ativo=True).order_by(Produto.id).all()
+
+
+def test_paginacao_do_catalogo(produtos):
+    primeira = catalogo.paginar(pagina=1, por_pagina=5)
+    ultima = catalogo.paginar(pagina=3, por_pagina=5)
+
+    assert primeira.total == 14
+    assert primeira.pages == 3
+    assert [p.id for p in primeira.items] == [p.id for p in produtos[:5]]
+    assert not primeira.has_prev and primeira.next_num == 2
+    assert [p.id for p in ultima.items] == [p.id for p in produtos[10:]]
+    assert ultima.has_prev and not ultima.has_next
+
+
+def test_pagina_fora_do_intervalo_e_ajustada(produtos):
+    assert catalogo.paginar(pagina=99, por_pagina=5).page == 3
+    assert catalogo.paginar(pagina=0, por_pagina=5).page == 1
+
+
+def test_filtro_por_categoria_ignora_inativos(produtos):
+    pagina = catalogo.paginar(categoria=' bolos ', por_pagina=50)
+
+    assert pagina.total == 7
+    assert all(p.categoria == 'Bolos' for p in pagina.items)
+    assert 'Produto inativo' not in [p.nome for p in pagina.items]
+    assert catalogo.categorias() == ('Bolos', 'Doces')
+
+
+def test_ordenacao_por_preco(produtos):
+    menor = catalogo.paginar(ordem='menor', por_pagina=50).items
+    maior = catalogo.paginar(ordem='maior', por_pagina=50).items
+
+    assert [p.preco for p in menor] == sorted(p.preco for p in produtos)
+    assert [p.preco for p in maior] == sorted((p.preco for p in produtos), reverse=True)
+
+
+def test_busca_por_palavras(produtos):
+    assert catalogo.paginar(busca='produto 13').total == 14
+    assert catalogo.paginar(busca='doces').total == 7
+    assert catalogo.paginar(busca='inexistente').total == 0
+
+
+def test_snapshot_reaproveitado_ate_invalidar(produtos):
+    snapshot = catalogo.snapshot()
+    db.session.add(Produto(nome='Produto novo', preco=99, categoria='Tortas'))
+    db.session.commit()
+
+    assert catalogo.snapshot() is snapshot
+    assert catalogo.paginar().total == 14
+
+    versao = catalogo.versao
+    catalogo.invalidar()
+
+    assert catalogo.versao == versao + 1
+    assert catalogo.paginar().total == 15
+    assert 'Tortas' in catalogo.categorias()
+
+
+def test_produto_do_snapshot_e_imutavel(produtos):
+    produto = catalogo.destaques(1)[0]
+    with pytest.raises(AttributeError):
+        produto.nome = 'Outro'
+
+
+def test_api_produtos(client, produtos):
+    resposta = client.get('/api/produtos?categoria=Doces&ordem=maior&por_pagina=3&pagina=2')
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['total'] == 7
+    assert dados['paginas'] == 3
+    assert dados['pagina'] == 2
+    assert [p['preco'] for p in dados['produtos']] == [17, 15, 13]
+
+
+def test_desativar_produto_no_admin_invalida_catalogo(client, admin, produtos):
+    assert catalogo.paginar().total == 14
+    entrar(client, admin)
+
+    resposta = client.post(f'/admin/produtos/deletar/{produtos[0].id}')
+
+    assert resposta.status_code == 302
+    assert catalogo.paginar().total == 13
+    assert produtos[0].id not in [p['id'] for p in client.get('/api/produtos').get_json()['produtos']]
+
+
+def test_chave_do_cache_de_pagina_igual_entre_processos(client, produtos, tmp_path, monkeypatch):
+    monkeypatch.setattr(page_cache, 'habilitado', True)
+    monkeypatch.setattr(page_cache, 'backend', ArquivoBackend(str(tmp_path / 'page_cache')))
+
+    assert client.get('/produtos').headers['X-Page-Cache'] == 'MISS'
+
+    # Outro processo: contador de versão diferente, mesmo catálogo no banco
+    catalogo.invalidar()
+    catalogo.invalidar()
+    assert client.get('/produtos').headers['X-Page-Cache'] == 'HIT'
+
+    # Um processo com o snapshot antigo continua na chave antiga e não afeta os atualizados
+    snapshot_antigo = catalogo.snapshot()
+    produtos[0].preco = 99
+    db.session.commit()
+    catalogo.invalidar()
+    atualizada = client.get('/produtos')
+    assert atualizada.headers['X-Page-Cache'] == 'MISS'
+
+    snapshot_novo = catalogo.snapshot()
+    monkeypatch.setattr(catalogo, 'ttl', 0)
+    monkeypatch.setattr(catalogo, '_snapshot', snapshot_antigo)
+    antiga = client.get('/produtos')
+    assert antiga.headers['X-Page-Cache'] == 'HIT'
+
+    monkeypatch.setattr(catalogo, '_snapshot', snapshot_novo)
+    resposta = client.get('/produtos')
+    assert resposta.headers['X-Page-Cache'] == 'HIT'
+    assert resposta.data == atualizada.data != antiga.data
@@ -0,0 +1,177 @@
+import socketserver
+import threading
+from contextlib import closing
+import pytest
+from utils.email_sender import email_outbox, enfileirar_email
+
+
+class SMTPFalso:
+    """
+    Servidor SMTP mínimo (sem TLS nem autenticação) para exercitar a fila de emails.
+
+    Guarda as mensagens recebidas em `mensagens` e conta as conexões abertas;
+    com `recusar` verdadeiro responde 451 ao MAIL FROM.
+    """
+
+    def __init__(self):
+        self.mensagens = []
+        self.conexoes = 0
+        self.recusar = False
+        smtp = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _responder(self, linha):
+                self.wfile.write(f'{linha}\r\n'.encode())
+
+            def handle(self):
+                smtp.conexoes += 1
+                self._responder('220 smtp.teste')
+                destinatarios = []
+                for linha in self.rfile:
+                    comando = linha.decode().strip()
+                    verbo = comando.split(' ', 1)[0].upper()
+                    if verbo in ('EHLO', 'HELO'):
+                        self._responder('250 smtp.teste')
+                    elif verbo == 'MAIL':
+                        destinatarios = []
+                        self._responder('451 tente mais tarde' if smtp.recusar else '250 OK')
+                    elif verbo == 'RCPT':
+                        destinatarios.append(comando.split(':', 1)[1].strip('<> '))
+                        self._responder('250 OK')
+                    elif verbo == 'DATA':
+                        self._responder('354 fim com .')
+                        corpo = []
+                        for linha_dados in self.rfile:
+                            if linha_dados.rstrip(b'\r\n') == b'.':
+                                break
+                            corpo.append(linha_dados)
+                        smtp.mensagens.append((destinatarios, b''.join(corpo).decode()))
+                        self._responder('250 OK')
+                    elif verbo in ('NOOP', 'RSET'):
+                        self._responder('250 OK')
+                    elif verbo == 'QUIT':
+                        self._responder('221 tchau')
+                        return
+                    else:
+                        self._responder('502 comando não implementado')
+
+        self.servidor = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.servidor.daemon_threads = True
+        self.porta = self.servidor.server_address[1]
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def encerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    smtp = SMTPFalso()
+    monkeypatch.setenv('EMAIL_HOST', '127.0.0.1')
+    monkeypatch.setenv('EMAIL_PORT', str(smtp.porta))
+    monkeypatch.setenv('EMAIL_USE_TLS', 'false')
+    monkeypatch.setenv('EMAIL_TIMEOUT', '5')
+    monkeypatch.setenv('EMAIL_FROM', 'loja@teste.com')
+    monkeypatch.delenv('EMAIL_USER', raising=False)
+    monkeypatch.delenv('EMAIL_PASSWORD', raising=False)
+    yield smtp
+    email_outbox.encerrar()
+    email_outbox.conexao_smtp.fechar()
+    smtp.encerrar()
+
+
+def _situacao(email_id):
+    with closing(email_outbox._conectar()) as conexao:
+        return conexao.execute('SELECT * FROM email_outbox WHERE id = ?', (email_id,)).fetchone()
+
+
+def test_enfileirar_nao_envia_na_hora(smtp):
+    assert enfileirar_email('cliente@teste.com', 'Pedido recebido', 'Obrigado!')
+
+    assert smtp.mensagens == []
+    assert email_outbox.estatisticas() == {'pendente': 1}
+
+
+def test_lote_enviado_com_uma_unica_conexao(smtp):
+    for i in range(3):
+        enfileirar_email(f'cliente{i}@teste.com', f'Pedido {i}', 'Olá, confirmação do pedido', html='<p>Olá</p>')
+
+    assert email_outbox.processar_pendentes() == 3
+
+    assert smtp.conexoes == 1
+    assert [destinatarios for destinatarios, _ in smtp.mensagens] == [
+        ['cliente0@teste.com'], ['cliente1@teste.com'], ['cliente2@teste.com']
+    ]
+    assert 'text/html' in smtp.mensagens[0][1]
+    assert email_outbox.estatisticas() == {'enviado': 3}
+
+
+def test_falha_reagenda_com_backoff(smtp):
+    smtp.recusar = True
+    enfileirar_email('cliente@teste.com', 'Pedido', 'Mensagem')
+
+    assert email_outbox.processar_pendentes() == 1
+
+    email = _situacao(1)
+    assert email['status'] == email_outbox.STATUS_PENDENTE
+    assert email['tentativas'] == 1
+    assert '451' in email['ultimo_erro']
+    assert email['proxima_tentativa'] > email['data_criacao']
+    # Ainda não venceu: nada a processar
+    assert email_outbox.processar_pendentes() == 0
+
+
+def test_falha_apos_maximo_de_tentativas(smtp, monkeypatch):
+    smtp.recusar = True
+    monkeypatch.setattr(email_outbox, 'max_tentativas', 2)
+    monkeypatch.setattr(email_outbox, 'backoff_base', 0)
+    enfileirar_email('cliente@teste.com', 'Pedido', 'Mensagem')
+
+    email_outbox.processar_pendentes()
+
+    assert _situacao(1)['status'] == email_outbox.STATUS_FALHOU
+    assert _situacao(1)['tentativas'] == 2
+    assert smtp.mensagens == []
+
+
+def test_reconecta_depois_de_erro(smtp, monkeypatch):
+    smtp.recusar = True
+    monkeypatch.setattr(email_outbox, 'backoff_base', 0)
+    enfileirar_email('cliente@teste.com', 'Pedido', 'Mensagem')
+    email_outbox.processar_lote()
+
+    smtp.recusar = False
+    assert email_outbox.processar_pendentes() == 1
+
+    assert smtp.conexoes == 2
+    assert _situacao(1)['status'] == email_outbox.STATUS_ENVIADO
+    assert len(smtp.mensagens) == 1
+
+
+def test_reserva_abandonada_volta_para_a_fila(smtp):
+    enfileirar_email('cliente@teste.com', 'Pedido', 'Mensagem')
+    # Worker que reservou o lote e parou antes de enviar
+    assert len(email_outbox._reservar_lote()) == 1
+    assert _situacao(1)['status'] == email_outbox.STATUS_ENVIANDO
+    assert email_outbox.processar_pendentes() == 0
+
+    # Prazo da reserva vencido
+    with closing(email_outbox._conectar()) as conexao:
+        conexao.execute("UPDATE email_outbox SET proxima_tentativa = '2000-01-01T00:00:00'")
+
+    assert email_outbox.processar_pendentes() == 1
+    assert _situacao(1)['status'] == email_outbox.STATUS_ENVIADO
+    assert len(smtp.mensagens) == 1
+
+
+def test_worker_envia_em_segundo_plano(smtp, monkeypatch):
+    monkeypatch.setattr(email_outbox, 'worker_habilitado', True)
+
+    enfileirar_email('cliente@teste.com', 'Pedido', 'Mensagem')
+    for _ in range(200):
+        if smtp.mensagens:
+            break
+        threading.Event().wait(0.01)
+
+    assert len(smtp.mensagens) == 1
@@ -0,0 +1,47 @@
+import gzip
+import json
+from database import db
+from models.models import Pedido, ItemPedido
+from tests.conftest import entrar
+
+
+def _criar_pedido(usuario, produto):
+    pedido = Pedido(usuario_id=usuario.id, status='Pago', total=91.8)
+    db.session.add(pedido)
+    db.session.flush()
+    db.session.add(ItemPedido(pedido_id=pedido.id, produto_id=produto.id, quantidade=2, preco_unitario=45.9))
+    db.session.commit()
+    return pedido
+
+
+def test_exportacao_retorna_o_documento(client, usuario, produto):
+    pedido = _criar_pedido(usuario, produto)
+    entrar(client, usuario)
+
+    resposta = client.get('/perfil/exportar-dados')
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/json'
+    documento = json.loads(resposta.get_data())
+    assert documento['usuario']['email'] == 'cliente@teste.com'
+    assert 'senha' not in documento['usuario']
+    assert [p['id'] for p in documento['pedidos']] == [pedido.id]
+    assert documento['pedidos'][0]['itens_regulares'][0]['quantidade'] == 2
+
+
+def test_exportacao_compactada(client, usuario, produto):
+    _criar_pedido(usuario, produto)
+    entrar(client, usuario)
+
+    resposta = client.get('/perfil/exportar-dados?formato=gz')
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/gzip'
+    assert resposta.headers['Content-Disposition'].endswith('.json.gz')
+    documento = json.loads(gzip.decompress(resposta.get_data()))
+    assert documento['usuario']['id'] == usuario.id
+    assert len(documento['pedidos']) == 1
+
+
+def test_exportacao_exige_login(client):
+    assert client.get('/perfil/exportar-dados').status_code == 302
@@ -0,0 +1,34 @@
+import os
+import pytest
+from tests.conftest import entrar
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def test_montar_bolo_sem_variantes_usa_o_original(app, client, usuario, tmp_path):
+    app.static_folder = str(tmp_path / 'static')
+    entrar(client, usuario)
+
+    html = client.get('/montar-bolo').get_data(as_text=True)
+
+    assert '<img src="/static/uploads/bolochocolate.png" alt="Massa de Chocolate" loading="lazy">' in html
+    assert 'srcset' not in html
+
+
+def test_montar_bolo_usa_as_variantes_estaticas(app, client, usuario, tmp_path):
+    from utils.images import processar_imagem
+
+    uploads = tmp_path / 'static' / 'uploads'
+    uploads.mkdir(parents=True)
+    Image.new('RGB', (64, 40), (120, 60, 20)).save(uploads / 'bolochocolate.png')
+    processar_imagem(str(uploads / 'bolochocolate.png'), larguras=(32,))
+    app.static_folder = str(tmp_path / 'static')
+    entrar(client, usuario)
+
+    html = client.get('/montar-bolo').get_data(as_text=True)
+
+    assert 'srcset="/static/uploads/bolochocolate-32w.webp 32w, /static/uploads/bolochocolate.webp 64w"' in html
+    assert 'srcset="/static/uploads/bolochocolate-32w.png 32w, /static/uploads/bolochocolate.png 64w"' in html
+    # Opções sem variantes continuam com a imagem original
+    assert '<img src="/static/uploads/bolobaunilha.png" alt="Massa de Baunilha" loading="lazy">' in html
+    assert os.path.exists(uploads / 'bolochocolate-32w.png')
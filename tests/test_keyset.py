@@ -0,0 +1,140 @@
+import re
+from datetime import datetime, timedelta
+import pytest
+from database import db
+from models.models import Log
+from tests.conftest import entrar
+from utils.keyset import paginar_por_cursor, codificar_cursor, decodificar_cursor
+
+
+@pytest.fixture
+def logs(app):
+    """25 logs; de 5 em 5 compartilham o mesmo horário (o id desempata)"""
+    inicio = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(25):
+        db.session.add(Log(tipo='INFO', descricao=f'log {i}', data=inicio + timedelta(minutes=i // 5)))
+    db.session.commit()
+    return Log.query.order_by(Log.data.desc(), Log.id.desc()).all()
+
+
+def _paginar(cursor=None, **kwargs):
+    kwargs.setdefault('por_pagina', 10)
+    return paginar_por_cursor(Log.query, [Log.data, Log.id], cursor=cursor, **kwargs)
+
+
+def test_percorre_todas_as_paginas_sem_repetir(logs):
+    vistos = []
+    cursor = None
+    paginas = 0
+    while True:
+        pagina = _paginar(cursor)
+        paginas += 1
+        vistos.extend(pagina.items)
+        if not pagina.has_next:
+            break
+        cursor = pagina.next_cursor
+
+    assert paginas == 3
+    assert [log.id for log in vistos] == [log.id for log in logs]
+
+
+def test_primeira_pagina_nao_tem_anterior(logs):
+    pagina = _paginar()
+
+    assert pagina.page == 1
+    assert not pagina.has_prev
+    assert pagina.has_next
+
+
+def test_ultima_pagina_completa_nao_tem_proxima(logs):
+    pagina = _paginar(por_pagina=5)
+    for _ in range(4):
+        pagina = _paginar(pagina.next_cursor, por_pagina=5)
+
+    assert pagina.page == 5
+    assert len(pagina.items) == 5
+    assert not pagina.has_next
+    assert pagina.has_prev
+
+
+def test_voltar_devolve_a_mesma_pagina(logs):
+    primeira = _paginar()
+    segunda = _paginar(primeira.next_cursor)
+    terceira = _paginar(segunda.next_cursor)
+
+    de_volta = _paginar(terceira.prev_cursor)
+    assert [log.id for log in de_volta.items] == [log.id for log in segunda.items]
+    assert de_volta.page == 2
+    assert de_volta.has_next
+
+    inicio = _paginar(de_volta.prev_cursor)
+    assert [log.id for log in inicio.items] == [log.id for log in primeira.items]
+    assert not inicio.has_prev
+
+
+def test_empates_no_horario_sao_desempatados_pelo_id(logs):
+    # Páginas de 3 cortam os grupos de 5 logs com o mesmo horário
+    pagina = _paginar(por_pagina=3)
+    vistos = list(pagina.items)
+    while pagina.has_next:
+        pagina = _paginar(pagina.next_cursor, por_pagina=3)
+        vistos.extend(pagina.items)
+
+    assert [log.id for log in vistos] == [log.id for log in logs]
+
+
+def test_ordem_crescente(logs):
+    primeira = _paginar(decrescente=False)
+    segunda = _paginar(primeira.next_cursor, decrescente=False)
+
+    crescente = sorted(logs, key=lambda log: (log.data, log.id))
+    assert [log.id for log in primeira.items + segunda.items] == [log.id for log in crescente[:20]]
+
+
+def test_listagem_vazia(app):
+    pagina = _paginar()
+
+    assert pagina.items == []
+    assert not pagina.has_next
+    assert not pagina.has_prev
+
+
+def test_cursor_invalido_volta_para_a_primeira_pagina(logs):
+    pagina = _paginar('nao-e-um-cursor')
+
+    assert pagina.page == 1
+    assert [log.id for log in pagina.items] == [log.id for log in logs[:10]]
+
+
+def test_cursor_preserva_datas():
+    valores = [datetime(2025, 1, 1, 12, 30), 42]
+
+    assert decodificar_cursor(codificar_cursor(valores, 3, 'p')) == (valores, 3, 'p')
+
+
+def test_total_e_reaproveitado(logs):
+    assert _paginar(chave_total='teste-logs').total == 25
+
+    db.session.add(Log(tipo='INFO', descricao='novo', data=datetime(2025, 1, 2)))
+    db.session.commit()
+
+    pagina = _paginar(chave_total='teste-logs')
+    assert pagina.total == 25
+    assert pagina.pages == 3
+    assert _paginar(chave_total='teste-logs-2').total == 26
+
+
+def test_admin_logs_navega_pelo_cursor(client, admin, logs):
+    def ids_na_pagina(html):
+        return [int(i) for i in re.findall(r'<td>(\d+)</td>', html)]
+
+    entrar(client, admin)
+    resposta = client.get('/admin/logs')
+    assert resposta.status_code == 200
+    html = resposta.get_data(as_text=True)
+    assert ids_na_pagina(html) == [log.id for log in logs[:20]]
+
+    cursor = re.search(r'cursor=([A-Za-z0-9_=-]+)', html).group(1)
+    resposta = client.get(f'/admin/logs?cursor={cursor}')
+    assert resposta.status_code == 200
+    assert ids_na_pagina(resposta.get_data(as_text=True)) == [log.id for log in logs[20:]]
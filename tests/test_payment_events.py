@@ -0,0 +1,193 @@
+from datetime import datetime
+import pytest
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models.models import Pedido, ItemPedido, EventoPagamento, CarrinhoItem, RascunhoPedido, PedidoStatusHistorico
+from utils import payment_events as modulo
+from utils.payment_events import payment_events
+from utils.checkout_draft import salvar_rascunho
+from tests.conftest import entrar
+
+
+@pytest.fixture
+def app(criar_app, gateway):
+    app = criar_app(MERCADO_PAGO_API_URL=gateway.url, MERCADO_PAGO_ACCESS_TOKEN='TEST-token',
+                    MERCADO_PAGO_TENTATIVAS=1)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def rascunho(usuario, produto):
+    db.session.add(CarrinhoItem(usuario_id=usuario.id, produto_id=produto.id, quantidade=2))
+    db.session.commit()
+    return salvar_rascunho(usuario.id, {
+        'tipo_entrega': 'retirada',
+        'valor_frete': 0,
+        'endereco_entrega': None,
+        'observacoes': '',
+        'total': 91.8,
+        'itens_regulares': [{'produto_id': produto.id, 'quantidade': 2}],
+        'itens_personalizados': []
+    })
+
+
+def notificar(client, pagamento_id):
+    return client.post(f'/pagamento/notificacao?type=payment&data.id={pagamento_id}',
+                       json={'type': 'payment', 'data': {'id': str(pagamento_id)}})
+
+
+def test_pagamento_aprovado_cria_o_pedido(client, gateway, usuario, rascunho):
+    gateway.aprovar(1001, rascunho)
+
+    assert notificar(client, 1001).status_code == 200
+    assert payment_events.processar_pendentes() == 1
+
+    pedido = Pedido.query.one()
+    assert pedido.mercado_pago_transaction_id == '1001'
+    assert pedido.status == 'Aprovado'
+    assert [(i.quantidade, i.preco_unitario) for i in ItemPedido.query.all()] == [(2, 45.9)]
+    assert CarrinhoItem.query.count() == 0
+    assert db.session.get(RascunhoPedido, rascunho.id).pedido_id == pedido.id
+    assert EventoPagamento.query.one().status == EventoPagamento.STATUS_PROCESSADO
+
+
+def test_valor_pago_divergente_deixa_o_pedido_pendente(client, gateway, rascunho):
+    gateway.aprovar(1010, rascunho, valor=1.0)
+
+    notificar(client, 1010)
+    payment_events.processar_pendentes()
+
+    pedido = Pedido.query.one()
+    assert pedido.status == 'Pendente'
+    assert pedido.total == 91.8
+    historico = PedidoStatusHistorico.query.filter_by(pedido_id=pedido.id).one()
+    assert historico.status_novo == 'Pendente'
+    assert 'R$ 1.00' in historico.observacao and 'R$ 91.80' in historico.observacao
+    assert EventoPagamento.query.one().status == EventoPagamento.STATUS_PROCESSADO
+
+
+def test_notificacoes_duplicadas_geram_um_pedido(client, gateway, rascunho):
+    gateway.aprovar(1002, rascunho)
+
+    notificar(client, 1002)
+    notificar(client, 1002)
+    assert EventoPagamento.query.count() == 1
+
+    payment_events.processar_pendentes()
+    notificar(client, 1002)
+    payment_events.processar_pendentes()
+
+    assert Pedido.query.count() == 1
+    pedido_id = Pedido.query.one().id
+    assert {e.pedido_id for e in EventoPagamento.query.all()} == {pedido_id}
+
+
+@pytest.mark.parametrize('status, situacao', [('rejected', 'recusado'), ('in_process', 'pendente')])
+def test_pagamento_nao_aprovado_nao_cria_pedido(client, gateway, usuario, rascunho, status, situacao):
+    gateway.aprovar(1003, rascunho, status=status)
+
+    notificar(client, 1003)
+    payment_events.processar_pendentes()
+
+    assert Pedido.query.count() == 0
+    evento = EventoPagamento.query.one()
+    assert evento.status == EventoPagamento.STATUS_IGNORADO
+    assert evento.status_pagamento == status
+
+    entrar(client, usuario)
+    resposta = client.get('/pagamento/1003/situacao')
+    assert resposta.get_json()['situacao'] == situacao
+    assert resposta.headers['Cache-Control'] == 'no-store'
+
+
+def test_falha_na_api_e_repetida_com_backoff(client, gateway, rascunho):
+    gateway.pagamentos['1004'] = (500, {'message': 'erro'})
+
+    notificar(client, 1004)
+    payment_events.processar_pendentes()
+
+    evento = EventoPagamento.query.one()
+    assert evento.status == EventoPagamento.STATUS_PENDENTE
+    assert evento.tentativas == 1
+    assert evento.ultimo_erro
+    assert evento.proxima_tentativa > datetime.utcnow()
+    assert Pedido.query.count() == 0
+
+    # Na próxima tentativa a API responde e o pedido é criado
+    gateway.aprovar(1004, rascunho)
+    evento.proxima_tentativa = datetime.utcnow()
+    db.session.commit()
+    payment_events.processar_pendentes()
+
+    assert Pedido.query.count() == 1
+    assert db.session.get(EventoPagamento, evento.id).status == EventoPagamento.STATUS_PROCESSADO
+
+
+def test_tentativas_esgotadas_marcam_falha(client, gateway, rascunho):
+    payment_events.max_tentativas = 1
+    gateway.pagamentos['1005'] = (500, {'message': 'erro'})
+
+    notificar(client, 1005)
+    payment_events.processar_pendentes()
+
+    assert EventoPagamento.query.one().status == EventoPagamento.STATUS_FALHOU
+
+
+def test_rascunho_inexistente_falha_sem_repetir(client, gateway):
+    gateway.pagamentos['1006'] = (200, {'id': 1006, 'status': 'approved', 'metadata': {'rascunho': 'nao-existe'}})
+
+    notificar(client, 1006)
+    payment_events.processar_pendentes()
+
+    evento = EventoPagamento.query.one()
+    assert evento.status == EventoPagamento.STATUS_FALHOU
+    assert 'Rascunho' in evento.ultimo_erro
+
+
+def test_integridade_sem_pedido_volta_para_a_fila(client, gateway, rascunho, monkeypatch):
+    gateway.aprovar(1007, rascunho)
+
+    def violar_restricao(pagamento_id, pagamento):
+        raise IntegrityError('INSERT INTO item_pedido', {}, Exception('restrição violada'))
+
+    monkeypatch.setattr(modulo, 'materializar_pedido', violar_restricao)
+    notificar(client, 1007)
+    payment_events.processar_pendentes()
+
+    evento = EventoPagamento.query.one()
+    assert evento.status == EventoPagamento.STATUS_PENDENTE
+    assert evento.pedido_id is None
+    assert 'restrição violada' in evento.ultimo_erro
+
+
+def test_integridade_com_pedido_de_outro_worker_conclui(client, gateway, usuario, rascunho, monkeypatch):
+    gateway.aprovar(1008, rascunho)
+
+    def criado_por_outro_worker(pagamento_id, pagamento):
+        db.session.rollback()
+        db.session.add(Pedido(usuario_id=usuario.id, status='Aprovado', mercado_pago_transaction_id=pagamento_id))
+        db.session.commit()
+        raise IntegrityError('INSERT INTO pedido', {}, Exception('duplicado'))
+
+    monkeypatch.setattr(modulo, 'materializar_pedido', criado_por_outro_worker)
+    notificar(client, 1008)
+    payment_events.processar_pendentes()
+
+    evento = EventoPagamento.query.one()
+    assert evento.status == EventoPagamento.STATUS_PROCESSADO
+    assert evento.pedido_id == Pedido.query.one().id
+
+
+def test_assinatura_invalida_e_recusada(client, gateway):
+    payment_events.segredo = 'segredo'
+    try:
+        resposta = client.post('/pagamento/notificacao?type=payment&data.id=1009',
+                               headers={'x-signature': 'ts=1,v1=invalida', 'x-request-id': 'r'})
+    finally:
+        payment_events.segredo = None
+
+    assert resposta.status_code == 401
+    assert EventoPagamento.query.count() == 0
@@ -0,0 +1,125 @@
+import socket
+import time
+import pytest
+from utils.payment_gateway import CircuitBreaker, GatewayIndisponivel, mercado_pago
+
+
+@pytest.fixture
+def app(criar_app, gateway):
+    app = criar_app(MERCADO_PAGO_API_URL=gateway.url, MERCADO_PAGO_ACCESS_TOKEN='TEST-token',
+                    MERCADO_PAGO_TENTATIVAS=3, MERCADO_PAGO_TIMEOUT_LEITURA=0.2,
+                    MERCADO_PAGO_CIRCUITO_FALHAS=2, MERCADO_PAGO_CIRCUITO_SEGUNDOS=0.2)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(mercado_pago, 'backoff', 0)
+
+
+def _posts(gateway):
+    return [r for r in gateway.requisicoes if r[0] == 'POST']
+
+
+def test_resposta_no_formato_do_sdk(app, gateway):
+    resultado = mercado_pago.criar_preferencia({'items': []})
+
+    assert resultado == {'status': 201, 'response': {'id': 'pref-1', 'init_point': 'https://pagar.teste/1'}}
+    assert gateway.cabecalhos[0]['Authorization'] == 'Bearer TEST-token'
+    assert mercado_pago.estatisticas() == {'circuito': CircuitBreaker.FECHADO, 'api_url': gateway.url}
+
+
+def test_sem_access_token_nao_chama_a_api(app, gateway, monkeypatch):
+    monkeypatch.setattr(mercado_pago, 'access_token', None)
+
+    with pytest.raises(GatewayIndisponivel, match='MERCADO_PAGO_ACCESS_TOKEN'):
+        mercado_pago.criar_preferencia({'items': []})
+
+    assert gateway.requisicoes == []
+    assert mercado_pago.circuito.estado == CircuitBreaker.FECHADO
+
+
+def test_repete_erro_transitorio_com_a_mesma_chave_de_idempotencia(app, gateway):
+    gateway.respostas_preferencia = [(500, {}), (429, {})]
+
+    resultado = mercado_pago.criar_preferencia({'items': []})
+
+    assert resultado['status'] == 201
+    assert len(_posts(gateway)) == 3
+    chaves = {cabecalhos['X-Idempotency-Key'] for cabecalhos in gateway.cabecalhos}
+    assert len(chaves) == 1
+
+
+def test_erro_do_cliente_nao_e_repetido(app, gateway):
+    gateway.respostas_preferencia = [(400, {'message': 'invalid items'})]
+
+    resultado = mercado_pago.criar_preferencia({'items': []})
+
+    assert resultado == {'status': 400, 'response': {'message': 'invalid items'}}
+    assert len(_posts(gateway)) == 1
+    assert mercado_pago.circuito.estado == CircuitBreaker.FECHADO
+
+
+def test_erro_persistente_levanta_gateway_indisponivel(app, gateway):
+    gateway.respostas_preferencia = [(503, {})] * 3
+
+    with pytest.raises(GatewayIndisponivel, match='HTTP 503'):
+        mercado_pago.criar_preferencia({'items': []})
+
+    assert len(_posts(gateway)) == 3
+
+
+def test_timeout_de_leitura(app, gateway):
+    gateway.atraso = 0.5
+    inicio = time.monotonic()
+
+    with pytest.raises(GatewayIndisponivel, match='Timeout'):
+        mercado_pago.buscar_pagamento('123')
+
+    assert time.monotonic() - inicio < 1.5
+    assert len(gateway.requisicoes) == 3
+
+
+def test_erro_de_conexao(criar_app):
+    with socket.socket() as livre:
+        livre.bind(('127.0.0.1', 0))
+        porta = livre.getsockname()[1]
+    criar_app(MERCADO_PAGO_API_URL=f'http://127.0.0.1:{porta}', MERCADO_PAGO_ACCESS_TOKEN='TEST-token',
+              MERCADO_PAGO_TENTATIVAS=1)
+
+    with pytest.raises(GatewayIndisponivel, match='ConnectionError'):
+        mercado_pago.buscar_pagamento('123')
+
+
+def test_circuito_abre_e_fecha_depois_da_chamada_de_teste(app, gateway):
+    gateway.respostas_preferencia = [(503, {})] * 6
+
+    for _ in range(2):
+        with pytest.raises(GatewayIndisponivel):
+            mercado_pago.criar_preferencia({'items': []})
+    assert mercado_pago.circuito.estado == CircuitBreaker.ABERTO
+
+    # Aberto: falha na hora, sem chamar a API
+    with pytest.raises(GatewayIndisponivel, match='temporariamente'):
+        mercado_pago.criar_preferencia({'items': []})
+    assert len(_posts(gateway)) == 6
+
+    time.sleep(0.25)
+    assert mercado_pago.circuito.estado == CircuitBreaker.MEIO_ABERTO
+    assert mercado_pago.criar_preferencia({'items': []})['status'] == 201
+    assert mercado_pago.circuito.estado == CircuitBreaker.FECHADO
+
+
+def test_meio_aberto_libera_uma_chamada_de_teste_por_vez():
+    circuito = CircuitBreaker(limite_falhas=1, tempo_aberto=0)
+    circuito.registrar_falha()
+
+    assert circuito.permitir()
+    assert not circuito.permitir()
+
+    circuito.registrar_falha()
+    assert circuito.permitir()
+    circuito.registrar_sucesso()
+    assert circuito.estado == CircuitBreaker.FECHADO
+    assert circuito.permitir() and circuito.permitir()
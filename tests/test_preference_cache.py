@@ -0,0 +1,103 @@
+import pytest
+from tests.conftest import entrar
+from utils.cart_snapshot import CartLine, CartSnapshot, invalidar_snapshot_carrinho
+from utils.preference_cache import PreferenceCache, preference_cache
+
+
+@pytest.fixture
+def app(criar_app, gateway):
+    app = criar_app(MERCADO_PAGO_API_URL=gateway.url, MERCADO_PAGO_ACCESS_TOKEN='TEST-token',
+                    MERCADO_PAGO_TENTATIVAS=1)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def cache():
+    cache = PreferenceCache()
+    cache.ttl = 60
+    return cache
+
+
+def _snapshot(usuario_id=1, quantidade=1, preco=45.9):
+    return CartSnapshot(usuario_id, [CartLine('regular', 1, 'Bolo', preco, quantidade)])
+
+
+def test_chave_estavel_para_o_mesmo_carrinho():
+    linhas = [CartLine('regular', 1, 'Bolo', 45.9, 1), CartLine('personalizado', 2, 'Bolo', 80, 1)]
+    chave = PreferenceCache.calcular_chave(CartSnapshot(1, linhas), 'pickup', 'rascunho')
+
+    assert PreferenceCache.calcular_chave(CartSnapshot(1, linhas[::-1]), 'pickup', 'rascunho') == chave
+    assert PreferenceCache.calcular_chave(_snapshot(quantidade=2), 'pickup', 'rascunho') != chave
+    assert PreferenceCache.calcular_chave(CartSnapshot(1, linhas), 'delivery', 'rascunho') != chave
+    assert PreferenceCache.calcular_chave(CartSnapshot(1, linhas), 'pickup', 'outro') != chave
+
+
+def test_reaproveita_link_enquanto_a_chave_bate(cache):
+    chave = cache.calcular_chave(_snapshot(), 'pickup')
+    cache.guardar(1, chave, 'https://pagar.teste/1')
+
+    assert cache.obter(1, chave) == 'https://pagar.teste/1'
+    assert cache.obter(1, cache.calcular_chave(_snapshot(preco=50), 'pickup')) is None
+    assert cache.obter(2, chave) is None
+    assert cache.estatisticas() == {'hits': 1, 'misses': 2, 'invalidacoes': 0, 'entradas': 1}
+
+
+def test_entrada_expira_pelo_ttl(cache):
+    chave = cache.calcular_chave(_snapshot(), 'pickup')
+    cache.ttl = -1
+    cache.guardar(1, chave, 'https://pagar.teste/1')
+    assert cache.obter(1, chave) is None
+
+    cache.ttl = 60
+    cache.guardar(1, chave, 'https://pagar.teste/1')
+    cache._entradas[1] = cache._entradas[1][:2] + (0,)
+    cache.limpar_expirados()
+    assert cache.obter(1, chave) is None
+    assert cache.estatisticas()['entradas'] == 0
+
+
+def test_invalidar_snapshot_remove_o_link(app):
+    chave = preference_cache.calcular_chave(_snapshot(usuario_id=7), 'pickup')
+    preference_cache.guardar(7, chave, 'https://pagar.teste/1')
+
+    with app.test_request_context():
+        invalidar_snapshot_carrinho(7)
+
+    assert preference_cache.obter(7, chave) is None
+
+
+def _finalizar(client):
+    return client.post('/finalizar_compra', data={'tipo_entrega': 'retirada'})
+
+
+def _preferencias_criadas(gateway):
+    return [r for r in gateway.requisicoes if r[0] == 'POST' and r[1].startswith('/checkout/preferences')]
+
+
+def test_finalizar_compra_reaproveita_preferencia(client, gateway, usuario, produto):
+    preference_cache.invalidar(usuario.id)
+    entrar(client, usuario)
+    client.get(f'/adicionar/{produto.id}')
+
+    primeira = _finalizar(client)
+    segunda = _finalizar(client)
+
+    assert primeira.status_code == 302
+    assert primeira.headers['Location'].startswith('https://pagar.teste/')
+    assert segunda.headers['Location'] == primeira.headers['Location']
+    assert len(_preferencias_criadas(gateway)) == 1
+
+
+def test_alterar_carrinho_cria_nova_preferencia(client, gateway, usuario, produto):
+    preference_cache.invalidar(usuario.id)
+    entrar(client, usuario)
+    client.get(f'/adicionar/{produto.id}')
+    primeira = _finalizar(client)
+
+    client.get(f'/adicionar/{produto.id}')
+    segunda = _finalizar(client)
+
+    assert segunda.headers['Location'] != primeira.headers['Location']
+    assert len(_preferencias_criadas(gateway)) == 2
+    assert _preferencias_criadas(gateway)[-1][2]['items'][0]['quantity'] == 2
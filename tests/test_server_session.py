@@ -0,0 +1,105 @@
+import pytest
+from utils.server_session import SessaoServidor, ServerSessionInterface, serializar, desserializar
+
+
+@pytest.mark.parametrize('backend', ['cookie', 'sqlite'])
+def test_app_responde_com_cada_backend(criar_app, backend):
+    app = criar_app(SESSAO_BACKEND=backend)
+    client = app.test_client()
+
+    assert client.get('/').status_code == 200
+
+    esperado = ServerSessionInterface if backend == 'sqlite' else type(app.session_interface)
+    assert isinstance(app.session_interface, esperado)
+
+
+def test_backend_padrao_e_cookie(criar_app):
+    app = criar_app()
+
+    assert app.config['SESSAO_BACKEND'] == 'cookie'
+    assert not isinstance(app.session_interface, ServerSessionInterface)
+
+
+def test_backend_redis_indisponivel_usa_sqlite(criar_app):
+    app = criar_app(SESSAO_BACKEND='redis', SESSAO_REDIS_URL='redis://127.0.0.1:1/0')
+    client = app.test_client()
+
+    assert client.get('/').status_code == 200
+    assert isinstance(app.session_interface, ServerSessionInterface)
+
+
+def test_carrinho_de_visitante_fica_no_servidor(criar_app, tmp_path):
+    app = criar_app(SESSAO_BACKEND='sqlite')
+    client = app.test_client()
+
+    with client.session_transaction() as sessao:
+        sessao['carrinho'] = {'1': {'id': 1, 'nome': 'Bolo', 'preco': 45.9, 'quantidade': 2}}
+
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    assert cookie is not None
+    assert 'Bolo' not in cookie.value
+
+    with client.session_transaction() as sessao:
+        assert sessao['carrinho']['1']['quantidade'] == 2
+
+    assert len(app.session_interface.backend) == 1
+
+
+def test_regenerar_troca_o_id_e_mantem_os_dados(criar_app):
+    app = criar_app(SESSAO_BACKEND='sqlite')
+    client = app.test_client()
+
+    with client.session_transaction() as sessao:
+        sessao['carrinho'] = {'1': {'id': 1, 'quantidade': 1}}
+    antes = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+
+    with client.session_transaction() as sessao:
+        sessao.regenerar()
+    depois = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+
+    assert antes != depois
+    assert len(app.session_interface.backend) == 1
+    with client.session_transaction() as sessao:
+        assert sessao['carrinho']['1']['quantidade'] == 1
+
+
+def test_sessao_so_carrega_no_primeiro_acesso():
+    chamadas = []
+
+    def carregar():
+        chamadas.append(1)
+        return serializar({'a': 1}), None
+
+    sessao = SessaoServidor('x' * 43, carregar=carregar)
+    assert not chamadas
+
+    assert sessao['a'] == 1
+    assert sessao.get('a') == 1
+    assert len(chamadas) == 1
+
+
+def test_serializacao_ida_e_volta():
+    dados = {'carrinho': {'1': {'id': 1, 'preco': 45.9, 'quantidade': 2}}, '_flashes': [('success', 'ok')]}
+
+    assert desserializar(serializar(dados))['carrinho'] == dados['carrinho']
+
+
+@pytest.mark.parametrize('backend', ['cookie', 'sqlite'])
+def test_login_com_cada_backend(criar_app, backend):
+    from werkzeug.security import generate_password_hash
+    from database import db
+    from models.models import Usuario
+
+    app = criar_app(SESSAO_BACKEND=backend)
+    client = app.test_client()
+    with app.app_context():
+        usuario = Usuario(nome='Cliente', email='cliente@teste.com', senha=generate_password_hash('1234'))
+        db.session.add(usuario)
+        db.session.commit()
+        usuario_id = usuario.id
+
+    resposta = client.post('/login', data={'email': 'cliente@teste.com', 'senha': '1234'})
+
+    assert resposta.status_code == 302
+    with client.session_transaction() as sessao:
+        assert sessao['usuario_id'] == usuario_id
@@ -0,0 +1,78 @@
+import hashlib
+import io
+import os
+import pytest
+from werkzeug.datastructures import FileStorage
+from utils.storage import armazenar
+from utils.uploads import receber_upload
+
+Image = pytest.importorskip('PIL.Image')
+
+
+@pytest.fixture
+def app(criar_app, tmp_path):
+    app = criar_app(UPLOAD_FOLDER=str(tmp_path / 'uploads'))
+    with app.app_context():
+        yield app
+
+
+def _jpeg(exif=True):
+    imagem = Image.new('RGB', (64, 48), (200, 120, 40))
+    dados = Image.Exif()
+    if exif:
+        dados[0x010F] = 'Camera'
+        dados[0x0112] = 6  # Orientação: girar 90°
+    saida = io.BytesIO()
+    imagem.save(saida, format='JPEG', exif=dados)
+    return saida.getvalue()
+
+
+def _enviar(app, conteudo):
+    recebido = receber_upload(FileStorage(io.BytesIO(conteudo), filename='foto.jpg'), 'perfil')
+    url, novo = armazenar(recebido)
+    caminho = os.path.join(app.config['UPLOAD_FOLDER'], url[len('/static/uploads/'):])
+    return url, novo, caminho
+
+
+def test_exif_removido_antes_do_hash(app):
+    url, novo, caminho = _enviar(app, _jpeg())
+
+    assert novo
+    with open(caminho, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    assert os.path.basename(caminho) == hashlib.sha256(conteudo).hexdigest() + '.jpg'
+    with Image.open(caminho) as imagem:
+        assert not imagem.getexif()
+        # A rotação do EXIF foi aplicada antes de descartá-lo
+        assert imagem.size == (48, 64)
+
+
+def test_mesmo_upload_reaproveita_o_arquivo(app):
+    conteudo = _jpeg()
+    primeira, _, _ = _enviar(app, conteudo)
+    segunda, novo, _ = _enviar(app, conteudo)
+
+    assert segunda == primeira
+    assert not novo
+
+
+def test_imagem_sem_exif_nao_e_recodificada(app):
+    conteudo = _jpeg(exif=False)
+    _, _, caminho = _enviar(app, conteudo)
+
+    with open(caminho, 'rb') as arquivo:
+        assert arquivo.read() == conteudo
+
+
+def test_variantes_nao_alteram_o_original(app):
+    from utils.images import processar_imagem
+
+    _, _, caminho = _enviar(app, _jpeg())
+    with open(caminho, 'rb') as arquivo:
+        antes = arquivo.read()
+
+    variantes = processar_imagem(caminho, larguras=(32,))
+
+    with open(caminho, 'rb') as arquivo:
+        assert arquivo.read() == antes
+    assert os.path.exists(variantes['webp'][32])
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import inspect, text
+from database import db
+from models.models import Token
+from tests.conftest import entrar
+from utils.token_cache import TokenCache, token_cache, backfill_token_hash_command
+
+
+def _emitir(usuario, horas=24):
+    token = usuario.gerar_auth_token(expira_em=horas)
+    db.session.add(Token.criar(usuario.id, token, datetime.utcnow() + timedelta(hours=horas)))
+    db.session.commit()
+    return token
+
+
+@pytest.fixture
+def cache(app):
+    return TokenCache(app)
+
+
+def test_ttl_padrao_curto(app):
+    assert app.config['TOKEN_CACHE_TTL'] == 30
+    assert token_cache.ttl == 30
+
+
+def test_validacao_reaproveitada_do_cache(cache, usuario):
+    token = _emitir(usuario)
+
+    assert cache.validar(usuario.id, token)
+    assert cache.validar(usuario.id, token)
+
+    metricas = cache.estatisticas()
+    assert (metricas['misses'], metricas['hits'], metricas['entradas']) == (1, 1, 1)
+
+
+def test_token_de_outro_usuario_nao_e_aceito(cache, usuario, admin):
+    token = _emitir(usuario)
+    cache.validar(usuario.id, token)
+
+    assert not cache.validar(admin.id, token)
+
+
+def test_revogacao_em_outro_processo_vale_apos_o_ttl(cache, usuario):
+    token = _emitir(usuario)
+    cache.validar(usuario.id, token)
+
+    # Outro processo revoga direto no banco: este só percebe quando a entrada expira
+    Token.buscar(token).update({'is_revogado': True})
+    db.session.commit()
+    assert cache.validar(usuario.id, token)
+
+    chave = Token.calcular_hash(token)
+    cache._entradas[chave] = (usuario.id, 0)
+    assert not cache.validar(usuario.id, token)
+
+
+def test_validade_limitada_pela_expiracao_do_token(cache, usuario):
+    token = usuario.gerar_auth_token()
+    db.session.add(Token.criar(usuario.id, token, datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+    assert not cache.validar(usuario.id, token)
+    assert cache.estatisticas()['entradas'] == 0
+
+
+def test_logout_revoga_o_token(client, usuario):
+    token = _emitir(usuario)
+    assert token_cache.validar(usuario.id, token)
+    with client.session_transaction() as sessao:
+        sessao['usuario_id'] = usuario.id
+        sessao['auth_token'] = token
+
+    client.get('/logout')
+
+    assert Token.buscar(token).first().is_revogado
+    assert not token_cache.validar(usuario.id, token)
+
+
+def test_desativar_usuario_no_admin_revoga_tokens(client, admin, usuario):
+    token = _emitir(usuario)
+    assert token_cache.validar(usuario.id, token)
+    entrar(client, admin)
+
+    resposta = client.post(f'/admin/usuarios/status/{usuario.id}', data={'novo_status': 'inativo'})
+
+    assert resposta.status_code == 302
+    assert Token.buscar(token).first().is_revogado
+    assert Token.calcular_hash(token) not in token_cache._entradas
+    assert not token_cache.validar(usuario.id, token)
+
+
+def test_reativar_usuario_nao_revoga_tokens(client, admin, usuario):
+    token = _emitir(usuario)
+    entrar(client, admin)
+
+    client.post(f'/admin/usuarios/status/{usuario.id}', data={'novo_status': 'ativo'})
+
+    assert not Token.buscar(token).first().is_revogado
+    assert token_cache.validar(usuario.id, token)
+
+
+def test_backfill_cria_a_coluna_em_banco_antigo(app, usuario):
+    # Tabela como era antes da migração 002 (SQLite de desenvolvimento)
+    db.session.execute(text('DROP TABLE token'))
+    db.session.execute(text(
+        'CREATE TABLE token (id INTEGER PRIMARY KEY, usuario_id INTEGER NOT NULL, token VARCHAR(500) NOT NULL, '
+        'tipo VARCHAR(20), device_info VARCHAR(200), data_criacao DATETIME, data_expiracao DATETIME NOT NULL, '
+        'is_revogado BOOLEAN)'
+    ))
+    db.session.execute(text("INSERT INTO token (usuario_id, token, data_expiracao, is_revogado) "
+                            "VALUES (:usuario_id, 'jwt-antigo', '2999-01-01', 0)"), {'usuario_id': usuario.id})
+    db.session.commit()
+
+    resultado = app.test_cli_runner().invoke(backfill_token_hash_command, ['--limpar-token'])
+
+    assert resultado.exit_code == 0, resultado.output
+    assert 'Coluna token.token_hash criada' in resultado.output
+    assert '1 token(s) atualizados' in resultado.output
+    assert db.session.execute(text('SELECT token_hash, token FROM token')).one() == (
+        Token.calcular_hash('jwt-antigo'), 'jwt-antigo')
+    assert 'idx_token_hash' in {indice['name'] for indice in inspect(db.engine).get_indexes('token')}
@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import click
+from flask import request, send_from_directory, url_for, abort
+from flask.cli import with_appcontext
+
+# Minificadores e brotli são opcionais: sem eles os arquivos são apenas versionados e compactados em gzip
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Pastas de static/ com os arquivos-fonte e pasta de saída da build
+DIRETORIOS_FONTE = ('style', 'js')
+DIRETORIO_SAIDA = 'dist'
+ARQUIVO_MANIFESTO = 'manifest.json'
+
+EXTENSOES = ('.css', '.js')
+
+CACHE_CONTROL_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+
+def _minificar_css(conteudo):
+    """Minificação conservadora de CSS usada quando o rcssmin não está instalado"""
+    conteudo = re.sub(r'/\*.*?\*/', '', conteudo, flags=re.S)
+    conteudo = re.sub(r'\s+', ' ', conteudo)
+    conteudo = re.sub(r'\s*([{};,>])\s*', r'\1', conteudo)
+    conteudo = conteudo.replace(';}', '}')
+    return conteudo.strip()
+
+
+def minificar(caminho, conteudo):
+    if caminho.endswith('.css'):
+        return rcssmin.cssmin(conteudo) if rcssmin else _minificar_css(conteudo)
+    # Sem o rjsmin o JavaScript não é alterado (um minificador por regex pode quebrar strings e regex)
+    return rjsmin.jsmin(conteudo) if rjsmin else conteudo
+
+
+def _gravar(caminho, dados):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(dados)
+    os.replace(temporario, caminho)
+
+
+def construir(static_folder):
+    """
+    Gera os assets versionados em static/dist a partir de static/style e static/js.
+
+    Cada arquivo é minificado, recebe o hash do conteúdo no nome e ganha cópias
+    .gz e .br (se o brotli estiver instalado). O manifesto relaciona o nome lógico
+    (ex.: style/paginas/index.css) ao arquivo gerado.
+
+    Returns:
+        Dicionário do manifesto
+    """
+    saida = os.path.join(static_folder, DIRETORIO_SAIDA)
+    manifesto = {}
+
+    for diretorio in DIRETORIOS_FONTE:
+        raiz = os.path.join(static_folder, diretorio)
+        for pasta, _, arquivos in os.walk(raiz):
+            for nome in sorted(arquivos):
+                if not nome.endswith(EXTENSOES):
+                    continue
+                origem = os.path.join(pasta, nome)
+                logico = os.path.relpath(origem, static_folder).replace(os.sep, '/')
+
+                with open(origem, encoding='utf-8') as arquivo:
+                    dados = minificar(logico, arquivo.read()).encode('utf-8')
+
+                digest = hashlib.sha256(dados).hexdigest()[:12]
+                base, extensao = os.path.splitext(logico)
+                versionado = f'{base}.{digest}{extensao}'
+                destino = os.path.join(saida, versionado)
+
+                if not os.path.exists(destino):
+                    _gravar(destino, dados)
+                    # mtime fixo: o gzip gerado é o mesmo a cada build
+                    _gravar(destino + '.gz', gzip.compress(dados, compresslevel=9, mtime=0))
+                    if brotli:
+                        _gravar(destino + '.br', brotli.compress(dados))
+
+                manifesto[logico] = versionado
+
+    # Versões anteriores são mantidas: páginas já entregues ainda podem referenciá-las
+    _gravar(os.path.join(saida, ARQUIVO_MANIFESTO), json.dumps(manifesto, indent=2, sort_keys=True).encode('utf-8'))
+    return manifesto
+
+
+class AssetPipeline:
+    """
+    Resolve os nomes lógicos dos assets para os arquivos versionados de static/dist
+    e os serve com cache imutável e a versão pré-compactada aceita pelo navegador.
+
+    Sem manifesto (build não executada), asset_url aponta para os arquivos-fonte.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._manifesto = {}
+        self._mtime_manifesto = None
+        self.versao = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_RECARREGAR', app.debug)
+        self.app = app
+        app.extensions['assets'] = self
+        app.jinja_env.globals['asset_url'] = self.asset_url
+        app.add_url_rule(f'/static/{DIRETORIO_SAIDA}/<path:arquivo>', 'asset_versionado', self.servir)
+        self.carregar_manifesto()
+
+    @property
+    def diretorio_saida(self):
+        return os.path.join(self.app.static_folder, DIRETORIO_SAIDA)
+
+    def carregar_manifesto(self):
+        caminho = os.path.join(self.diretorio_saida, ARQUIVO_MANIFESTO)
+        try:
+            mtime = os.path.getmtime(caminho)
+            if mtime != self._mtime_manifesto:
+                with open(caminho, 'rb') as arquivo:
+                    conteudo = arquivo.read()
+                self._manifesto = json.loads(conteudo)
+                self._mtime_manifesto = mtime
+                # Identifica a build atual (igual em todos os processos que leem o mesmo manifesto)
+                self.versao = hashlib.sha256(conteudo).hexdigest()[:12]
+        except FileNotFoundError:
+            self._manifesto = {}
+            self._mtime_manifesto = None
+            self.versao = ''
+        except ValueError as e:
+            logger.error(f"Manifesto de assets inválido: {e}")
+
+    def asset_url(self, nome):
+        """URL do asset versionado (ou do arquivo-fonte, se a build não foi executada)"""
+        if self.app.config['ASSETS_RECARREGAR']:
+            self.carregar_manifesto()
+        versionado = self._manifesto.get(nome)
+        if versionado:
+            return url_for('asset_versionado', arquivo=versionado)
+        return url_for('static', filename=nome)
+
+    def servir(self, arquivo):
+        if arquivo.endswith(('.gz', '.br')) or arquivo == ARQUIVO_MANIFESTO:
+            abort(404)
+
+        aceitas = request.headers.get('Accept-Encoding', '')
+        codificacao = None
+        for sufixo, nome in (('.br', 'br'), ('.gz', 'gzip')):
+            if nome in aceitas and os.path.isfile(os.path.join(self.diretorio_saida, arquivo + sufixo)):
+                codificacao = (sufixo, nome)
+                break
+
+        if codificacao:
+            # O tipo do conteúdo é o do arquivo original, não o do .gz/.br
+            mimetype = 'text/css' if arquivo.endswith('.css') else 'application/javascript'
+            resposta = send_from_directory(self.diretorio_saida, arquivo + codificacao[0], mimetype=mimetype)
+            resposta.headers['Content-Encoding'] = codificacao[1]
+        else:
+            resposta = send_from_directory(self.diretorio_saida, arquivo)
+
+        resposta.headers['Cache-Control'] = CACHE_CONTROL_IMUTAVEL
+        resposta.vary.add('Accept-Encoding')
+        return resposta
+
+
+assets = AssetPipeline()
+
+
+@click.command('construir-assets')
+@click.option('--limpar', is_flag=True, help='Apaga static/dist (inclusive versões antigas) antes de gerar os arquivos.')
+@with_appcontext
+def construir_assets_command(limpar):
+    """Gera os CSS/JS versionados, minificados e pré-compactados em static/dist."""
+    from flask import current_app
+
+    if limpar:
+        shutil.rmtree(os.path.join(current_app.static_folder, DIRETORIO_SAIDA), ignore_errors=True)
+
+    manifesto = construir(current_app.static_folder)
+    assets.carregar_manifesto()
+
+    # As páginas em cache apontam para as versões anteriores dos assets
+    from utils.page_cache import page_cache
+    page_cache.backend.limpar()
+
+    avisos = [nome for nome, modulo in (('rcssmin', rcssmin), ('rjsmin', rjsmin), ('brotli', brotli)) if modulo is None]
+    click.echo(f'{len(manifesto)} asset(s) gerado(s) em static/{DIRETORIO_SAIDA}.')
+    if avisos:
+        click.echo(f'Pacotes opcionais ausentes: {", ".join(avisos)}')
@@ -0,0 +1,175 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from database import db
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogSink:
+    """
+    Gravação assíncrona dos logs de auditoria.
+
+    Os eventos entram em uma fila limitada em memória e são inseridos em lote por uma
+    thread própria, usando uma conexão separada da sessão da requisição. Assim o
+    registro de log não faz commit na sessão de quem chamou nem aumenta a latência.
+    Com AUDIT_LOG_SYNC=True (útil em testes) cada evento é gravado na hora.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.sincrono = False
+        self.tamanho_lote = 100
+        self.intervalo_flush = 1.0
+        self.timeout_enfileirar = 0.05
+        self.fila = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._metricas = {
+            'enfileirados': 0,
+            'gravados': 0,
+            'descartados': 0,
+            'falhas': 0,
+            'lotes': 0,
+            'ultimo_lote_ms': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUDIT_LOG_SYNC', False)
+        app.config.setdefault('AUDIT_LOG_QUEUE_SIZE', 10000)
+        app.config.setdefault('AUDIT_LOG_BATCH_SIZE', 100)
+        app.config.setdefault('AUDIT_LOG_FLUSH_INTERVAL', 1.0)
+
+        self.app = app
+        self.sincrono = bool(app.config['AUDIT_LOG_SYNC'])
+        self.tamanho_lote = int(app.config['AUDIT_LOG_BATCH_SIZE'])
+        self.intervalo_flush = float(app.config['AUDIT_LOG_FLUSH_INTERVAL'])
+        self.fila = queue.Queue(maxsize=int(app.config['AUDIT_LOG_QUEUE_SIZE']))
+
+        app.extensions['audit_log'] = self
+        # Gravar o que estiver pendente quando o processo terminar
+        atexit.register(self.encerrar)
+
+    def registrar(self, tipo, descricao, usuario_id=None):
+        """
+        Enfileira um evento de auditoria.
+
+        Returns:
+            bool: False se o evento foi descartado porque a fila está cheia
+        """
+        registro = {
+            'tipo': tipo,
+            'descricao': descricao,
+            'usuario_id': usuario_id,
+            'data': datetime.utcnow()
+        }
+
+        if self.sincrono or self.app is None:
+            self._incrementar('enfileirados')
+            self._gravar([registro])
+            return True
+
+        self._iniciar_worker()
+        try:
+            # Backpressure: espera um instante por espaço e, se não houver, descarta
+            self.fila.put(registro, timeout=self.timeout_enfileirar)
+        except queue.Full:
+            self._incrementar('descartados')
+            logger.warning(f"Fila de auditoria cheia, log descartado: [{tipo}] {descricao[:50]}")
+            return False
+
+        self._incrementar('enfileirados')
+        return True
+
+    def flush(self, timeout=5.0):
+        """Aguarda até que todos os eventos enfileirados tenham sido gravados"""
+        limite = time.monotonic() + timeout
+        while self.fila.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.01)
+        return self.fila.unfinished_tasks == 0
+
+    def encerrar(self, timeout=5.0):
+        """Para a thread de gravação depois de esvaziar a fila"""
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def estatisticas(self):
+        """Métricas de uso da fila (para monitorar backpressure)"""
+        with self._lock:
+            metricas = dict(self._metricas)
+        metricas.update({
+            'tamanho_fila': self.fila.qsize(),
+            'capacidade_fila': self.fila.maxsize,
+            'sincrono': self.sincrono,
+            'worker_ativo': bool(self._thread and self._thread.is_alive())
+        })
+        return metricas
+
+    def _incrementar(self, metrica, valor=1):
+        with self._lock:
+            self._metricas[metrica] += valor
+
+    def _iniciar_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        while not self._parar.is_set() or not self.fila.empty():
+            lote = self._coletar_lote()
+            if not lote:
+                continue
+            try:
+                with self.app.app_context():
+                    self._gravar(lote)
+            finally:
+                for _ in lote:
+                    self.fila.task_done()
+
+    def _coletar_lote(self):
+        try:
+            lote = [self.fila.get(timeout=self.intervalo_flush)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self.fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _gravar(self, lote):
+        # Import dentro da função para evitar importação circular
+        from models.models import Log
+
+        inicio = time.perf_counter()
+        try:
+            # Conexão própria: não interfere na transação da requisição
+            with db.engine.begin() as conexao:
+                conexao.execute(Log.__table__.insert(), lote)
+        except Exception as e:
+            self._incrementar('falhas', len(lote))
+            logger.error(f"Erro ao gravar {len(lote)} log(s) de auditoria: {e}")
+            return
+
+        with self._lock:
+            self._metricas['gravados'] += len(lote)
+            self._metricas['lotes'] += 1
+            self._metricas['ultimo_lote_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+
+
+audit_log = AuditLogSink()
@@ -0,0 +1,206 @@
+from sqlalchemy import func
+from database import db
+from models.models import Produto, BoloPersonalizado, CarrinhoItem, CarrinhoBoloPersonalizado
+
+# Quantidade máxima permitida por item do carrinho
+QUANTIDADE_MAXIMA = 10
+
+
+def _somar_quantidades(modelo, coluna, usuario_id, quantidades):
+    """
+    Soma quantidades ao carrinho com um único INSERT ... ON DUPLICATE KEY UPDATE (MySQL)
+    ou INSERT ... ON CONFLICT (SQLite), limitando cada item a QUANTIDADE_MAXIMA.
+    Depende do índice único (usuario_id, coluna). Não faz commit.
+    """
+    linhas = [
+        {'usuario_id': usuario_id, coluna: int(item_id), 'quantidade': min(int(quantidade), QUANTIDADE_MAXIMA)}
+        for item_id, quantidade in quantidades.items() if int(quantidade) > 0
+    ]
+    if not linhas:
+        return
+
+    tabela = modelo.__table__
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        comando = insert(tabela).values(linhas)
+        comando = comando.on_duplicate_key_update(
+            quantidade=func.least(tabela.c.quantidade + comando.inserted.quantidade, QUANTIDADE_MAXIMA)
+        )
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        comando = insert(tabela).values(linhas)
+        comando = comando.on_conflict_do_update(
+            index_elements=['usuario_id', coluna],
+            set_={'quantidade': func.min(tabela.c.quantidade + comando.excluded.quantidade, QUANTIDADE_MAXIMA)}
+        )
+    else:
+        # Outros bancos: leitura seguida de escrita, item a item
+        existentes = {
+            getattr(item, coluna): item for item in modelo.query.filter(
+                modelo.usuario_id == usuario_id,
+                getattr(modelo, coluna).in_([linha[coluna] for linha in linhas])
+            )
+        }
+        for linha in linhas:
+            item = existentes.get(linha[coluna])
+            if item:
+                item.quantidade = min(item.quantidade + linha['quantidade'], QUANTIDADE_MAXIMA)
+            else:
+                db.session.add(modelo(**linha))
+        return
+
+    db.session.execute(comando)
+
+
+def somar_produtos_carrinho(usuario_id, quantidades):
+    """
+    Adiciona produtos ao carrinho do usuário em uma única instrução (sem commit).
+
+    Args:
+        usuario_id: ID do usuário dono do carrinho
+        quantidades: Dicionário {produto_id: quantidade a somar}
+    """
+    _somar_quantidades(CarrinhoItem, 'produto_id', usuario_id, quantidades)
+
+
+def somar_bolos_carrinho(usuario_id, quantidades):
+    """
+    Adiciona bolos personalizados ao carrinho do usuário em uma única instrução (sem commit).
+
+    Args:
+        usuario_id: ID do usuário dono do carrinho
+        quantidades: Dicionário {bolo_personalizado_id: quantidade a somar}
+    """
+    _somar_quantidades(CarrinhoBoloPersonalizado, 'bolo_personalizado_id', usuario_id, quantidades)
+
+
+def carregar_itens_regulares(usuario_id):
+    """
+    Carrega os itens regulares do carrinho junto com o produto em uma única query.
+
+    Args:
+        usuario_id: ID do usuário dono do carrinho
+
+    Returns:
+        Lista de tuplas (CarrinhoItem, Produto) - o produto é None se não existir mais
+    """
+    return db.session.query(CarrinhoItem, Produto).outerjoin(
+        Produto, CarrinhoItem.produto_id == Produto.id
+    ).filter(
+        CarrinhoItem.usuario_id == usuario_id
+    ).order_by(CarrinhoItem.id).all()
+
+
+def carregar_itens_personalizados(usuario_id):
+    """
+    Carrega os bolos personalizados do carrinho junto com o bolo em uma única query.
+
+    Args:
+        usuario_id: ID do usuário dono do carrinho
+
+    Returns:
+        Lista de tuplas (CarrinhoBoloPersonalizado, BoloPersonalizado) - o bolo é None se não existir mais
+    """
+    return db.session.query(CarrinhoBoloPersonalizado, BoloPersonalizado).outerjoin(
+        BoloPersonalizado, CarrinhoBoloPersonalizado.bolo_personalizado_id == BoloPersonalizado.id
+    ).filter(
+        CarrinhoBoloPersonalizado.usuario_id == usuario_id
+    ).order_by(CarrinhoBoloPersonalizado.id).all()
+
+
+def carregar_carrinho(usuario_id):
+    """
+    Carrega o carrinho completo do usuário com uma query por tipo de item.
+
+    Returns:
+        Tupla (itens_regulares, itens_personalizados) com pares (item, produto/bolo)
+    """
+    return carregar_itens_regulares(usuario_id), carregar_itens_personalizados(usuario_id)
+
+
+def normalizar_carrinho(itens_regulares, itens_personalizados):
+    """
+    Aplica as regras do carrinho sobre os itens carregados: remove itens indisponíveis
+    e ajusta quantidades acima do máximo. Todas as alterações são gravadas em um único commit.
+
+    Args:
+        itens_regulares: Pares (CarrinhoItem, Produto) retornados por carregar_itens_regulares
+        itens_personalizados: Pares (CarrinhoBoloPersonalizado, BoloPersonalizado)
+
+    Returns:
+        Tupla (regulares_validos, personalizados_validos, erros)
+    """
+    regulares_validos = []
+    personalizados_validos = []
+    erros = []
+    alterado = False
+
+    for item, produto in itens_regulares:
+        if not produto or not produto.ativo:
+            # Produto não existe ou está inativo, remover do carrinho
+            db.session.delete(item)
+            alterado = True
+            erros.append(f"Produto ID {item.produto_id} removido do carrinho (não disponível)")
+            continue
+
+        if item.quantidade <= 0:
+            erros.append(f"Quantidade inválida para {produto.nome}")
+            continue
+        if item.quantidade > QUANTIDADE_MAXIMA:
+            item.quantidade = QUANTIDADE_MAXIMA
+            alterado = True
+            erros.append(f"Quantidade de {produto.nome} ajustada para o máximo permitido ({QUANTIDADE_MAXIMA})")
+
+        regulares_validos.append((item, produto))
+
+    for item, bolo in itens_personalizados:
+        if not bolo:
+            # Bolo não existe, remover do carrinho
+            db.session.delete(item)
+            alterado = True
+            erros.append(f"Bolo personalizado ID {item.bolo_personalizado_id} removido do carrinho (não disponível)")
+            continue
+
+        if item.quantidade <= 0:
+            erros.append("Quantidade inválida para bolo personalizado")
+            continue
+        if item.quantidade > QUANTIDADE_MAXIMA:
+            item.quantidade = QUANTIDADE_MAXIMA
+            alterado = True
+            erros.append(f"Quantidade de bolo personalizado ajustada para o máximo permitido ({QUANTIDADE_MAXIMA})")
+
+        personalizados_validos.append((item, bolo))
+
+    if alterado:
+        db.session.commit()
+
+    return regulares_validos, personalizados_validos, erros
+
+
+def carregar_produtos_ativos(ids):
+    """
+    Busca vários produtos ativos de uma vez (usado pelo carrinho da sessão).
+
+    Returns:
+        Dicionário {produto_id: Produto}
+    """
+    ids = {int(i) for i in ids}
+    if not ids:
+        return {}
+    produtos = Produto.query.filter(Produto.id.in_(ids), Produto.ativo == True).all()
+    return {produto.id: produto for produto in produtos}
+
+
+def carregar_bolos(ids):
+    """
+    Busca vários bolos personalizados de uma vez (usado pelo carrinho da sessão).
+
+    Returns:
+        Dicionário {bolo_id: BoloPersonalizado}
+    """
+    ids = {int(i) for i in ids}
+    if not ids:
+        return {}
+    bolos = BoloPersonalizado.query.filter(BoloPersonalizado.id.in_(ids)).all()
+    return {bolo.id: bolo for bolo in bolos}
@@ -0,0 +1,192 @@
+from decimal import Decimal, ROUND_HALF_UP
+from flask import g, session
+from utils.cart_repository import carregar_carrinho, carregar_produtos_ativos, carregar_bolos
+
+# Taxa fixa de entrega em domicílio
+TAXA_ENTREGA = Decimal('12.00')
+
+# Valores aceitos para indicar entrega em domicílio
+OPCOES_ENTREGA = ('delivery', 'frete', 'entrega')
+
+CENTAVOS = Decimal('0.01')
+
+
+def para_decimal(valor):
+    """Converte um valor monetário (float do banco) para Decimal com duas casas"""
+    return Decimal(str(valor or 0)).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def is_entrega(delivery_option):
+    """Verifica se a opção de entrega corresponde a entrega em domicílio"""
+    return bool(delivery_option) and str(delivery_option).lower().strip() in OPCOES_ENTREGA
+
+
+class CartLine:
+    """
+    Linha imutável do carrinho já precificada.
+    """
+    __slots__ = ('tipo', 'id', 'nome', 'descricao', 'categoria', 'massa', 'recheios',
+                 'cobertura', 'finalizacao', 'observacoes', 'preco', 'quantidade', 'subtotal')
+
+    def __init__(self, tipo, id, nome, preco, quantidade, descricao=None, categoria=None,
+                 massa=None, recheios=None, cobertura=None, finalizacao=None, observacoes=None):
+        preco = para_decimal(preco)
+        valores = {
+            'tipo': tipo,
+            'id': id,
+            'nome': nome,
+            'descricao': descricao,
+            'categoria': categoria,
+            'massa': massa,
+            'recheios': recheios,
+            'cobertura': cobertura,
+            'finalizacao': finalizacao,
+            'observacoes': observacoes,
+            'preco': preco,
+            'quantidade': int(quantidade),
+            'subtotal': preco * int(quantidade)
+        }
+        for campo, valor in valores.items():
+            object.__setattr__(self, campo, valor)
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('CartLine é imutável')
+
+    def __delattr__(self, campo):
+        raise AttributeError('CartLine é imutável')
+
+    def __repr__(self):
+        return f'<CartLine {self.tipo} {self.id}: {self.quantidade}x {self.preco}>'
+
+
+class CartSnapshot:
+    """
+    Foto imutável do carrinho de um usuário, montada uma única vez por requisição.
+    Checkout, preferências do Mercado Pago e cálculo de totais compartilham a mesma instância.
+    """
+    __slots__ = ('usuario_id', 'linhas', 'subtotal')
+
+    def __init__(self, usuario_id, linhas):
+        object.__setattr__(self, 'usuario_id', usuario_id)
+        object.__setattr__(self, 'linhas', tuple(linhas))
+        object.__setattr__(self, 'subtotal', sum((linha.subtotal for linha in self.linhas), Decimal('0.00')))
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('CartSnapshot é imutável')
+
+    def __delattr__(self, campo):
+        raise AttributeError('CartSnapshot é imutável')
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def __iter__(self):
+        return iter(self.linhas)
+
+    @property
+    def vazio(self):
+        return not self.linhas
+
+    @property
+    def regulares(self):
+        return tuple(linha for linha in self.linhas if linha.tipo == 'regular')
+
+    @property
+    def personalizados(self):
+        return tuple(linha for linha in self.linhas if linha.tipo == 'personalizado')
+
+    def taxa_entrega(self, delivery_option=None):
+        """Retorna a taxa de entrega aplicável à opção informada"""
+        return TAXA_ENTREGA if is_entrega(delivery_option) else Decimal('0.00')
+
+    def total(self, delivery_option=None):
+        """Total do carrinho incluindo a taxa de entrega, se aplicável"""
+        return self.subtotal + self.taxa_entrega(delivery_option)
+
+    def __repr__(self):
+        return f'<CartSnapshot usuario={self.usuario_id} linhas={len(self.linhas)} subtotal={self.subtotal}>'
+
+
+def _linha_produto(produto, quantidade):
+    return CartLine(
+        tipo='regular',
+        id=produto.id,
+        nome=produto.nome,
+        preco=produto.preco,
+        quantidade=quantidade,
+        descricao=produto.descricao,
+        categoria=produto.categoria
+    )
+
+
+def _linha_bolo(bolo, quantidade):
+    return CartLine(
+        tipo='personalizado',
+        id=bolo.id,
+        nome=bolo.nome,
+        preco=bolo.preco,
+        quantidade=quantidade,
+        massa=bolo.massa,
+        recheios=bolo.recheios,
+        cobertura=bolo.cobertura,
+        finalizacao=bolo.finalizacao,
+        observacoes=bolo.observacoes
+    )
+
+
+def montar_snapshot_carrinho(usuario_id=None):
+    """
+    Monta o snapshot do carrinho a partir do banco (usuário logado) ou da sessão (visitante).
+    Itens cujo produto ou bolo não existe mais são ignorados.
+    """
+    linhas = []
+
+    if usuario_id:
+        itens_regulares, itens_personalizados = carregar_carrinho(usuario_id)
+        for item, produto in itens_regulares:
+            if produto:
+                linhas.append(_linha_produto(produto, item.quantidade))
+        for item, bolo in itens_personalizados:
+            if bolo:
+                linhas.append(_linha_bolo(bolo, item.quantidade))
+    else:
+        carrinho = session.get('carrinho') or {}
+        carrinho_personalizado = session.get('carrinho_personalizado') or {}
+
+        produtos = carregar_produtos_ativos(item['id'] for item in carrinho.values())
+        for item in carrinho.values():
+            produto = produtos.get(int(item['id']))
+            if produto:
+                linhas.append(_linha_produto(produto, item['quantidade']))
+
+        bolos = carregar_bolos(item['id'] for item in carrinho_personalizado.values())
+        for item in carrinho_personalizado.values():
+            bolo = bolos.get(int(item['id']))
+            if bolo:
+                linhas.append(_linha_bolo(bolo, item['quantidade']))
+
+    return CartSnapshot(usuario_id, linhas)
+
+
+def obter_snapshot_carrinho(usuario_id=None):
+    """
+    Retorna o snapshot do carrinho da requisição atual, montando-o apenas na primeira chamada.
+    """
+    cache = g.setdefault('_cart_snapshots', {})
+    if usuario_id not in cache:
+        cache[usuario_id] = montar_snapshot_carrinho(usuario_id)
+    return cache[usuario_id]
+
+
+def invalidar_snapshot_carrinho(usuario_id=None):
+    """
+    Descarta o snapshot da requisição atual após uma alteração no carrinho,
+    junto com o link de pagamento criado para o conteúdo anterior.
+    """
+    cache = g.get('_cart_snapshots')
+    if cache:
+        cache.pop(usuario_id, None)
+    if usuario_id is not None:
+        # Import dentro da função: preference_cache depende deste módulo
+        from utils.preference_cache import preference_cache
+        preference_cache.invalidar(usuario_id)
@@ -0,0 +1,227 @@
+import hashlib
+import math
+import threading
+import time
+from database import db
+
+# Opções de ordenação aceitas pela vitrine
+ORDENACOES = ('menor', 'maior')
+
+
+class ProdutoCatalogo:
+    """
+    Cópia imutável e desacoplada da sessão de um produto ativo.
+    Pode ser compartilhada entre requisições sem risco de DetachedInstanceError.
+    """
+    __slots__ = ('id', 'nome', 'descricao', 'preco', 'categoria', 'imagem', 'imagem_variantes', 'data_atualizacao')
+
+    def __init__(self, produto):
+        valores = {
+            'id': produto.id,
+            'nome': produto.nome,
+            'descricao': produto.descricao or '',
+            'preco': float(produto.preco or 0),
+            'categoria': produto.categoria,
+            'imagem': produto.imagem,
+            'imagem_variantes': produto.imagem_variantes,
+            'data_atualizacao': produto.data_atualizacao
+        }
+        for campo, valor in valores.items():
+            object.__setattr__(self, campo, valor)
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('ProdutoCatalogo é imutável')
+
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __repr__(self):
+        return f'<ProdutoCatalogo {self.id}: {self.nome}>'
+
+
+class CatalogSnapshot:
+    """Produtos ativos e categorias de uma determinada versão do catálogo"""
+    __slots__ = ('versao', 'produtos', 'categorias', 'carregado_em', 'ultima_atualizacao', 'assinatura')
+
+    def __init__(self, versao, produtos):
+        self.versao = versao
+        self.produtos = tuple(produtos)
+        self.categorias = tuple(sorted({p.categoria for p in self.produtos if p.categoria}))
+        self.carregado_em = time.monotonic()
+
+        # Validadores HTTP das páginas de listagem: a data mais recente não muda quando
+        # um produto sai do catálogo, por isso a assinatura também considera os ids
+        datas = [p.data_atualizacao for p in self.produtos if p.data_atualizacao]
+        self.ultima_atualizacao = max(datas) if datas else None
+        conteudo = ';'.join(f'{p.id}:{p.data_atualizacao.isoformat() if p.data_atualizacao else ""}'
+                            for p in self.produtos)
+        self.assinatura = hashlib.sha1(conteudo.encode()).hexdigest()
+
+
+class PaginaCatalogo:
+    """
+    Página de resultados do catálogo.
+    Expõe a mesma interface do Pagination do Flask-SQLAlchemy usada nos templates.
+    """
+
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page)) if self.per_page else 1
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        ultimo = 0
+        for num in range(1, self.pages + 1):
+            if (num <= left_edge
+                    or self.page - left_current - 1 < num < self.page + right_current
+                    or num > self.pages - right_edge):
+                if ultimo + 1 != num:
+                    yield None
+                yield num
+                ultimo = num
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class CatalogService:
+    """
+    Mantém em memória um snapshot versionado dos produtos ativos.
+
+    O snapshot é montado na primeira consulta e reaproveitado até que o catálogo seja
+    invalidado (cadastro, edição, desativação ou reativação de produto) ou até expirar o
+    CATALOGO_CACHE_TTL, que cobre alterações feitas por outros processos.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.por_pagina = 12
+        self._versao = 1
+        self._snapshot = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATALOGO_CACHE_TTL', 300)
+        app.config.setdefault('CATALOGO_POR_PAGINA', 12)
+        self.ttl = float(app.config['CATALOGO_CACHE_TTL'])
+        self.por_pagina = int(app.config['CATALOGO_POR_PAGINA'])
+        app.extensions['catalogo'] = self
+
+    @property
+    def versao(self):
+        return self._versao
+
+    def invalidar(self):
+        """Descarta o snapshot atual; o próximo acesso recarrega do banco"""
+        with self._lock:
+            self._versao += 1
+            self._snapshot = None
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expirado(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or self._expirado(snapshot):
+                # Expiração por TTL também gera nova versão (chaves de cache derivadas mudam)
+                if snapshot is not None:
+                    self._versao += 1
+                snapshot = CatalogSnapshot(self._versao, self._carregar_produtos())
+                self._snapshot = snapshot
+        return snapshot
+
+    def categorias(self):
+        return self.snapshot().categorias
+
+    def validadores(self):
+        """
+        Validadores HTTP das páginas montadas a partir do catálogo.
+
+        Returns:
+            Tupla (assinatura dos produtos ativos, maior data_atualizacao)
+        """
+        snapshot = self.snapshot()
+        return snapshot.assinatura, snapshot.ultima_atualizacao
+
+    def destaques(self, limite=6):
+        """Primeiros produtos ativos, usados na página inicial"""
+        return self.snapshot().produtos[:limite]
+
+    def paginar(self, pagina=1, por_pagina=None, categoria=None, ordem=None, busca=None):
+        """
+        Filtra, ordena e pagina os produtos ativos do snapshot.
+
+        Args:
+            pagina: Número da página (1 em diante)
+            por_pagina: Itens por página (padrão CATALOGO_POR_PAGINA)
+            categoria: Nome da categoria (comparação sem diferenciar maiúsculas)
+            ordem: 'menor' ou 'maior' para ordenar por preço
+            busca: Termos buscados em nome, descrição e categoria
+
+        Returns:
+            PaginaCatalogo
+        """
+        por_pagina = por_pagina or self.por_pagina
+        produtos = self.snapshot().produtos
+
+        if categoria:
+            categoria = categoria.strip().lower()
+            produtos = [p for p in produtos if (p.categoria or '').lower() == categoria]
+
+        if busca:
+            # Basta uma das palavras (com mais de uma letra) aparecer no produto
+            palavras = [palavra for palavra in busca.lower().split() if len(palavra) > 1]
+            if palavras:
+                produtos = [p for p in produtos
+                            if any(palavra in f'{p.nome} {p.descricao} {p.categoria or ""}'.lower()
+                                   for palavra in palavras)]
+
+        if ordem in ORDENACOES:
+            produtos = sorted(produtos, key=lambda p: p.preco, reverse=(ordem == 'maior'))
+
+        total = len(produtos)
+        paginas = max(1, math.ceil(total / por_pagina))
+        pagina = min(max(1, pagina), paginas)
+        inicio = (pagina - 1) * por_pagina
+        return PaginaCatalogo(list(produtos[inicio:inicio + por_pagina]), pagina, por_pagina, total)
+
+    def _expirado(self, snapshot):
+        return self.ttl > 0 and time.monotonic() - snapshot.carregado_em > self.ttl
+
+    def _carregar_produtos(self):
+        # Import dentro da função para evitar importação circular
+        from models.models import Produto
+
+        produtos = db.session.query(
+            Produto.id, Produto.nome, Produto.descricao, Produto.preco, Produto.categoria, Produto.imagem,
+            Produto.imagem_variantes, Produto.data_atualizacao
+        ).filter(Produto.ativo == True).order_by(Produto.id).all()
+        return [ProdutoCatalogo(produto) for produto in produtos]
+
+
+catalogo = CatalogService()
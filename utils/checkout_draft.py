@@ -0,0 +1,104 @@
+import json
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from database import db
+from models.models import RascunhoPedido
+
+# Chave da sessão com o código do rascunho em andamento (o conteúdo fica no banco)
+CHAVE_SESSAO = 'rascunho_pedido'
+
+# Rascunhos abertos mais antigos que isso são removidos por flask limpar-rascunhos-pedido
+VALIDADE_DIAS = 7
+
+
+def _colunas(dados):
+    """Valores das colunas do rascunho a partir dos dados do formulário de finalização"""
+    return {
+        'tipo_entrega': dados['tipo_entrega'],
+        'valor_frete': float(dados['valor_frete']),
+        'endereco_entrega': json.dumps(dados['endereco_entrega'], sort_keys=True) if dados.get('endereco_entrega') else None,
+        'observacoes': dados.get('observacoes') or '',
+        'total': float(dados['total']),
+        'itens': json.dumps({
+            'regulares': dados['itens_regulares'],
+            'personalizados': dados['itens_personalizados']
+        }, sort_keys=True)
+    }
+
+
+def carregar_rascunho(codigo, usuario_id=None):
+    """Busca o rascunho pelo código (índice único), opcionalmente restrito ao dono"""
+    if not codigo:
+        return None
+    consulta = RascunhoPedido.query.filter_by(codigo=codigo)
+    if usuario_id is not None:
+        consulta = consulta.filter_by(usuario_id=usuario_id)
+    return consulta.first()
+
+
+def salvar_rascunho(usuario_id, dados, codigo_atual=None):
+    """
+    Grava o pedido pendente e faz commit.
+
+    Se o rascunho atual do usuário ainda está aberto e tem exatamente o mesmo conteúdo,
+    ele é reaproveitado: o código não muda e a preferência já criada para ele continua válida.
+
+    Args:
+        usuario_id: Dono do rascunho
+        dados: tipo_entrega, valor_frete, endereco_entrega, observacoes, total,
+            itens_regulares e itens_personalizados
+        codigo_atual: Código guardado na sessão (opcional)
+
+    Returns:
+        RascunhoPedido
+    """
+    colunas = _colunas(dados)
+    atual = carregar_rascunho(codigo_atual, usuario_id)
+    if atual and atual.status == RascunhoPedido.STATUS_ABERTO and all(
+            getattr(atual, coluna) == valor for coluna, valor in colunas.items()):
+        return atual
+
+    rascunho = RascunhoPedido(usuario_id=usuario_id, **colunas)
+    db.session.add(rascunho)
+    db.session.commit()
+    return rascunho
+
+
+def dados_rascunho(rascunho):
+    """Conteúdo do rascunho no formato usado para criar o pedido"""
+    itens = json.loads(rascunho.itens)
+    return {
+        'usuario_id': rascunho.usuario_id,
+        'tipo_entrega': rascunho.tipo_entrega,
+        'valor_frete': rascunho.valor_frete,
+        'endereco_entrega': json.loads(rascunho.endereco_entrega) if rascunho.endereco_entrega else None,
+        'observacoes': rascunho.observacoes,
+        'total': rascunho.total,
+        'itens_regulares': itens.get('regulares', []),
+        'itens_personalizados': itens.get('personalizados', [])
+    }
+
+
+def limpar_rascunhos(dias=VALIDADE_DIAS):
+    """
+    Remove os rascunhos abertos criados há mais de `dias` dias (pagamentos abandonados).
+
+    Returns:
+        int: Quantidade de rascunhos removidos
+    """
+    limite = datetime.utcnow() - timedelta(days=dias)
+    removidos = RascunhoPedido.query.filter(
+        RascunhoPedido.status == RascunhoPedido.STATUS_ABERTO,
+        RascunhoPedido.data_criacao < limite
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removidos
+
+
+@click.command('limpar-rascunhos-pedido')
+@click.option('--dias', default=VALIDADE_DIAS, show_default=True, help='Remove rascunhos abertos mais antigos que isso.')
+@with_appcontext
+def limpar_rascunhos_pedido_command(dias):
+    """Remove os rascunhos de pedidos cujo pagamento não foi concluído."""
+    click.echo(f'{limpar_rascunhos(dias)} rascunho(s) removido(s).')
@@ -0,0 +1,198 @@
+import json
+import zlib
+from datetime import datetime
+from database import db
+from models.models import Pedido, ItemPedido, ItemPedidoPersonalizado, Produto, BoloPersonalizado
+
+# Pedidos carregados por vez (os itens do lote vêm em uma query por tipo)
+LOTE_PEDIDOS = 200
+
+# Linhas trazidas do cursor por vez nas consultas em streaming
+LOTE_CURSOR = 500
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+
+def dados_pessoais(usuario):
+    """Dados cadastrais do usuário para exportação (sem a senha)"""
+    dados = {
+        'id': usuario.id,
+        'nome': usuario.nome,
+        'email': usuario.email,
+        'data_registro': usuario.data_registro.strftime(FORMATO_DATA),
+        'is_admin': usuario.is_admin
+    }
+
+    if usuario.endereco_cep:
+        dados['endereco'] = {
+            'cep': usuario.endereco_cep,
+            'rua': usuario.endereco_rua,
+            'numero': usuario.endereco_numero,
+            'complemento': usuario.endereco_complemento,
+            'bairro': usuario.endereco_bairro,
+            'cidade': usuario.endereco_cidade,
+            'estado': usuario.endereco_estado
+        }
+
+    # CPF mascarado
+    if usuario.cpf_hash:
+        if hasattr(usuario, 'get_cpf_masked'):
+            dados['cpf'] = usuario.get_cpf_masked()
+        else:
+            dados['cpf'] = "***.***.***-**"
+
+    return dados
+
+
+def _json(valor, nivel):
+    """Serializa um valor com indentação de 4 espaços a partir do nível informado"""
+    texto = json.dumps(valor, indent=4, ensure_ascii=False)
+    return texto.replace('\n', '\n' + '    ' * nivel)
+
+
+def _lista(nome, itens, ultima=False):
+    """Gera a chave `nome` com uma lista JSON emitida item a item"""
+    yield f'    "{nome}": ['
+    primeiro = True
+    for item in itens:
+        yield ('\n' if primeiro else ',\n') + '        ' + _json(item, 2)
+        primeiro = False
+    yield ('\n    ]' if not primeiro else ']') + ('\n' if ultima else ',\n')
+
+
+def _itens_por_pedido(pedidos_ids):
+    """
+    Itens regulares e personalizados de um lote de pedidos, com uma query por tipo.
+
+    Returns:
+        Dicionários {pedido_id: [itens]} para itens regulares e personalizados
+    """
+    regulares = {}
+    linhas = db.session.query(
+        ItemPedido.pedido_id, ItemPedido.quantidade, ItemPedido.preco_unitario, Produto.nome
+    ).join(Produto, ItemPedido.produto_id == Produto.id).filter(
+        ItemPedido.pedido_id.in_(pedidos_ids)
+    ).order_by(ItemPedido.pedido_id, ItemPedido.id)
+    for pedido_id, quantidade, preco_unitario, nome in linhas:
+        regulares.setdefault(pedido_id, []).append({
+            'produto': nome,
+            'quantidade': quantidade,
+            'preco_unitario': float(preco_unitario),
+            'subtotal': float(preco_unitario * quantidade)
+        })
+
+    personalizados = {}
+    linhas = db.session.query(
+        ItemPedidoPersonalizado.pedido_id, ItemPedidoPersonalizado.quantidade,
+        ItemPedidoPersonalizado.preco_unitario, BoloPersonalizado.nome, BoloPersonalizado.massa
+    ).join(BoloPersonalizado, ItemPedidoPersonalizado.bolo_personalizado_id == BoloPersonalizado.id).filter(
+        ItemPedidoPersonalizado.pedido_id.in_(pedidos_ids)
+    ).order_by(ItemPedidoPersonalizado.pedido_id, ItemPedidoPersonalizado.id)
+    for pedido_id, quantidade, preco_unitario, nome, massa in linhas:
+        personalizados.setdefault(pedido_id, []).append({
+            'tipo': 'Bolo Personalizado',
+            'nome': nome,
+            'massa': massa,
+            'quantidade': quantidade,
+            'preco_unitario': float(preco_unitario),
+            'subtotal': float(preco_unitario * quantidade)
+        })
+
+    return regulares, personalizados
+
+
+def _pedidos(usuario_id):
+    """
+    Pedidos do usuário com seus itens, em lotes de LOTE_PEDIDOS paginados pelo id.
+
+    Lotes por chave em vez de um cursor em streaming: o MySQL não permite abrir as
+    consultas de itens enquanto um resultado não bufferizado está em leitura na conexão.
+    """
+    ultimo_id = 0
+    while True:
+        pedidos = db.session.query(
+            Pedido.id, Pedido.data, Pedido.status, Pedido.total
+        ).filter(
+            Pedido.usuario_id == usuario_id,
+            Pedido.id > ultimo_id
+        ).order_by(Pedido.id).limit(LOTE_PEDIDOS).all()
+        if not pedidos:
+            return
+
+        regulares, personalizados = _itens_por_pedido([pedido.id for pedido in pedidos])
+        for pedido in pedidos:
+            yield {
+                'id': pedido.id,
+                'data': pedido.data.strftime(FORMATO_DATA),
+                'status': pedido.status,
+                'total': float(pedido.total),
+                'itens_regulares': regulares.get(pedido.id, []),
+                'itens_personalizados': personalizados.get(pedido.id, [])
+            }
+        ultimo_id = pedidos[-1].id
+
+
+def _bolos_personalizados(usuario_id):
+    """Bolos personalizados do usuário lidos em streaming (yield_per)"""
+    bolos = BoloPersonalizado.query.filter_by(
+        usuario_id=usuario_id
+    ).order_by(BoloPersonalizado.id).yield_per(LOTE_CURSOR)
+
+    for bolo in bolos:
+        try:
+            recheios = json.loads(bolo.recheios) if bolo.recheios else []
+            finalizacao = json.loads(bolo.finalizacao) if bolo.finalizacao else []
+        except json.JSONDecodeError:
+            recheios = []
+            finalizacao = []
+
+        yield {
+            'id': bolo.id,
+            'nome': bolo.nome,
+            'massa': bolo.massa,
+            'recheios': recheios,
+            'cobertura': bolo.cobertura,
+            'finalizacao': finalizacao,
+            'observacoes': bolo.observacoes,
+            'preco': float(bolo.preco),
+            'data_criacao': bolo.data_criacao.strftime(FORMATO_DATA),
+            'ativo': bolo.ativo
+        }
+
+
+def gerar_exportacao(dados_usuario):
+    """
+    Gera o documento JSON de exportação em partes, sem montá-lo inteiro na memória.
+
+    Args:
+        dados_usuario: Dicionário retornado por dados_pessoais
+
+    Yields:
+        Trechos de texto do documento JSON
+    """
+    usuario_id = dados_usuario['id']
+    yield '{\n    "usuario": ' + _json(dados_usuario, 1) + ',\n'
+    yield from _lista('pedidos', _pedidos(usuario_id))
+    yield from _lista('bolos_personalizados', _bolos_personalizados(usuario_id))
+    yield '    "data_exportacao": ' + json.dumps(datetime.utcnow().strftime(FORMATO_DATA)) + '\n}\n'
+
+
+def codificar(partes, compactar=False):
+    """
+    Converte os trechos de texto em bytes UTF-8, opcionalmente compactados em gzip.
+
+    Yields:
+        Blocos de bytes prontos para enviar na resposta
+    """
+    if not compactar:
+        for parte in partes:
+            yield parte.encode('utf-8')
+        return
+
+    # wbits=31: formato gzip (cabeçalho e CRC) em vez de zlib puro
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for parte in partes:
+        bloco = compressor.compress(parte.encode('utf-8'))
+        if bloco:
+            yield bloco
+    yield compressor.flush()
@@ -2,62 +2,380 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.header import Header
+from datetime import datetime, timedelta
+import logging
 import os
+import random
+import sqlite3
+import threading
+import time
+import click
+from contextlib import closing
+from flask.cli import with_appcontext
+
+logger = logging.getLogger(__name__)
+
+def _configuracao_smtp():
+    """Lê as configurações de email das variáveis de ambiente"""
+    email_user = os.environ.get('EMAIL_USER')
+    return {
+        'host': os.environ.get('EMAIL_HOST', 'smtp.gmail.com'),
+        'port': int(os.environ.get('EMAIL_PORT', 587)),
+        'user': email_user,
+        'password': os.environ.get('EMAIL_PASSWORD'),
+        'from': os.environ.get('EMAIL_FROM', email_user),
+        # Desligar STARTTLS permite testar com um servidor SMTP local (ex: aiosmtpd)
+        'use_tls': os.environ.get('EMAIL_USE_TLS', 'true').lower() == 'true',
+        'timeout': float(os.environ.get('EMAIL_TIMEOUT', 30))
+    }
+
+def _montar_mensagem(email_from, destinatario, assunto, mensagem, html=None):
+    """Monta a mensagem MIME com encoding UTF-8"""
+    msg = MIMEMultipart('alternative')
+
+    # Configurar headers com encoding UTF-8
+    msg['Subject'] = Header(assunto, 'utf-8')
+    msg['From'] = Header(email_from, 'utf-8')
+    msg['To'] = Header(destinatario, 'utf-8')
+
+    # Adicionar partes da mensagem com encoding UTF-8
+    part1 = MIMEText(mensagem, 'plain', 'utf-8')
+    msg.attach(part1)
+
+    if html:
+        part2 = MIMEText(html, 'html', 'utf-8')
+        msg.attach(part2)
+
+    return msg
 
 def enviar_email(destinatario, assunto, mensagem, html=None):
     """
     Função para enviar emails com suporte completo a caracteres especiais
-    
+
+    Envia na hora, abrindo uma conexão SMTP só para esta mensagem. Em rotas
+    prefira enfileirar_email, que não faz o usuário esperar pelo SMTP.
+
     Args:
         destinatario (str): Email do destinatário
         assunto (str): Assunto do email
         mensagem (str): Corpo do email em texto plano
         html (str, optional): Corpo do email em HTML
-    
+
     Returns:
         bool: True se enviado com sucesso, False caso contrário
     """
     # Configurações de email
-    email_host = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
-    email_port = int(os.environ.get('EMAIL_PORT', 587))
-    email_user = os.environ.get('EMAIL_USER')
-    email_password = os.environ.get('EMAIL_PASSWORD')
-    email_from = os.environ.get('EMAIL_FROM', email_user)
-    
+    config = _configuracao_smtp()
+
     # Verificar se as credenciais essenciais estão definidas
-    if not email_user or not email_password:
+    if not config['user'] or not config['password']:
         print("Erro: EMAIL_USER e EMAIL_PASSWORD devem estar definidos nas variáveis de ambiente")
         return False
-    
+
     try:
-        # Preparar mensagem com encoding correto
-        msg = MIMEMultipart('alternative')
-        
-        # Configurar headers com encoding UTF-8
-        msg['Subject'] = Header(assunto, 'utf-8')
-        msg['From'] = Header(email_from, 'utf-8')
-        msg['To'] = Header(destinatario, 'utf-8')
-        
-        # Adicionar partes da mensagem com encoding UTF-8
-        part1 = MIMEText(mensagem, 'plain', 'utf-8')
-        msg.attach(part1)
-        
-        if html:
-            part2 = MIMEText(html, 'html', 'utf-8')
-            msg.attach(part2)
-        
+        msg = _montar_mensagem(config['from'], destinatario, assunto, mensagem, html)
+
         # Conectar ao servidor SMTP
-        with smtplib.SMTP(email_host, email_port) as server:
+        with smtplib.SMTP(config['host'], config['port'], timeout=config['timeout']) as server:
             server.ehlo()
-            server.starttls()
-            server.login(email_user, email_password)
-            
+            if config['use_tls']:
+                server.starttls()
+            server.login(config['user'], config['password'])
+
             # Enviar email
-            server.send_message(msg, from_addr=email_user, to_addrs=[destinatario])
-        
+            server.send_message(msg, from_addr=config['user'], to_addrs=[destinatario])
+
         print(f"Email enviado com sucesso para {destinatario}")
         return True
-        
+
     except Exception as e:
         print(f"Erro ao enviar email: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+
+class ConexaoSMTP:
+    """
+    Conexão SMTP autenticada reaproveitada entre envios.
+    STARTTLS e login acontecem apenas quando a conexão é aberta; a conexão
+    é fechada depois de ficar ociosa por mais de `ociosidade_maxima` segundos.
+    """
+
+    def __init__(self, ociosidade_maxima=60):
+        self.ociosidade_maxima = ociosidade_maxima
+        self._server = None
+        self._ultimo_uso = 0.0
+
+    def obter(self):
+        if self._server is not None:
+            if time.monotonic() - self._ultimo_uso > self.ociosidade_maxima or not self._ativa():
+                self.fechar()
+        if self._server is None:
+            self._server = self._conectar()
+        self._ultimo_uso = time.monotonic()
+        return self._server
+
+    def fechar(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            pass
+        self._server = None
+
+    def _ativa(self):
+        try:
+            return self._server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _conectar(self):
+        config = _configuracao_smtp()
+        server = smtplib.SMTP(config['host'], config['port'], timeout=config['timeout'])
+        server.ehlo()
+        if config['use_tls']:
+            server.starttls()
+            server.ehlo()
+        if config['user'] and config['password']:
+            server.login(config['user'], config['password'])
+        return server
+
+
+class EmailOutbox:
+    """
+    Fila persistente de emails (SQLite) processada por uma thread em segundo plano.
+
+    As rotas apenas gravam a mensagem na fila; o worker envia em lotes usando uma
+    única conexão SMTP autenticada e reagenda falhas com backoff exponencial.
+    Emails são reservados com um prazo: se o processo cair no meio do envio,
+    o lote volta para a fila depois de `tempo_reserva`.
+    """
+
+    STATUS_PENDENTE = 'pendente'
+    STATUS_ENVIANDO = 'enviando'
+    STATUS_ENVIADO = 'enviado'
+    STATUS_FALHOU = 'falhou'
+
+    def __init__(self, app=None):
+        self.caminho = None
+        self.tamanho_lote = 20
+        self.intervalo = 5.0
+        self.max_tentativas = 5
+        self.worker_habilitado = True
+        self.backoff_base = 30
+        self.backoff_maximo = 3600
+        self.tempo_reserva = timedelta(minutes=5)
+        self.conexao_smtp = ConexaoSMTP()
+        self._thread = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EMAIL_OUTBOX_PATH', os.path.join(app.instance_path, 'email_outbox.sqlite3'))
+        app.config.setdefault('EMAIL_OUTBOX_BATCH_SIZE', 20)
+        app.config.setdefault('EMAIL_OUTBOX_INTERVAL', 5.0)
+        app.config.setdefault('EMAIL_OUTBOX_MAX_TENTATIVAS', 5)
+        app.config.setdefault('EMAIL_OUTBOX_WORKER', True)
+
+        self.caminho = app.config['EMAIL_OUTBOX_PATH']
+        self.tamanho_lote = int(app.config['EMAIL_OUTBOX_BATCH_SIZE'])
+        self.intervalo = float(app.config['EMAIL_OUTBOX_INTERVAL'])
+        self.max_tentativas = int(app.config['EMAIL_OUTBOX_MAX_TENTATIVAS'])
+        self.worker_habilitado = bool(app.config['EMAIL_OUTBOX_WORKER'])
+
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._criar_tabela()
+
+        app.extensions['email_outbox'] = self
+        app.cli.add_command(processar_emails_command)
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute('PRAGMA journal_mode=WAL')
+        return conexao
+
+    def _criar_tabela(self):
+        with closing(self._conectar()) as conexao:
+            conexao.execute('''
+                CREATE TABLE IF NOT EXISTS email_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    destinatario TEXT NOT NULL,
+                    assunto TEXT NOT NULL,
+                    mensagem TEXT NOT NULL,
+                    html TEXT,
+                    status TEXT NOT NULL DEFAULT 'pendente',
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    ultimo_erro TEXT,
+                    proxima_tentativa TEXT NOT NULL,
+                    data_criacao TEXT NOT NULL,
+                    data_envio TEXT
+                )
+            ''')
+            conexao.execute(
+                'CREATE INDEX IF NOT EXISTS idx_email_outbox_status ON email_outbox(status, proxima_tentativa)'
+            )
+
+    def enfileirar(self, destinatario, assunto, mensagem, html=None):
+        """
+        Grava o email na fila para envio em segundo plano.
+
+        Returns:
+            bool: True se o email foi enfileirado
+        """
+        agora = datetime.utcnow().isoformat()
+        try:
+            with closing(self._conectar()) as conexao:
+                conexao.execute(
+                    'INSERT INTO email_outbox (destinatario, assunto, mensagem, html, status, proxima_tentativa, data_criacao) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (destinatario, assunto, mensagem, html, self.STATUS_PENDENTE, agora, agora)
+                )
+        except Exception as e:
+            logger.error(f"Erro ao enfileirar email: {str(e)}")
+            return False
+
+        if self.worker_habilitado:
+            self._iniciar_worker()
+            self._acordar.set()
+        return True
+
+    def _reservar_lote(self):
+        """Marca um lote de emails vencidos como 'enviando' até o fim da reserva e o retorna"""
+        agora = datetime.utcnow()
+        conexao = self._conectar()
+        try:
+            conexao.execute('BEGIN IMMEDIATE')
+            # Pendentes vencidos ou reservas abandonadas por um worker que parou
+            linhas = conexao.execute(
+                'SELECT * FROM email_outbox WHERE status IN (?, ?) AND proxima_tentativa <= ? '
+                'ORDER BY proxima_tentativa LIMIT ?',
+                (self.STATUS_PENDENTE, self.STATUS_ENVIANDO, agora.isoformat(), self.tamanho_lote)
+            ).fetchall()
+            if linhas:
+                fim_reserva = (agora + self.tempo_reserva).isoformat()
+                conexao.executemany(
+                    'UPDATE email_outbox SET status = ?, proxima_tentativa = ? WHERE id = ?',
+                    [(self.STATUS_ENVIANDO, fim_reserva, linha['id']) for linha in linhas]
+                )
+            conexao.execute('COMMIT')
+            return linhas
+        except Exception:
+            conexao.execute('ROLLBACK')
+            raise
+        finally:
+            conexao.close()
+
+    def _calcular_backoff(self, tentativas):
+        espera = min(self.backoff_base * (2 ** (tentativas - 1)), self.backoff_maximo)
+        return espera + random.uniform(0, espera * 0.1)
+
+    def processar_lote(self):
+        """
+        Envia um lote de emails pendentes reaproveitando a conexão SMTP.
+
+        Returns:
+            int: Quantidade de emails processados
+        """
+        linhas = self._reservar_lote()
+        if not linhas:
+            return 0
+
+        config = _configuracao_smtp()
+        resultados = []
+        for linha in linhas:
+            try:
+                msg = _montar_mensagem(config['from'], linha['destinatario'], linha['assunto'],
+                                       linha['mensagem'], linha['html'])
+                server = self.conexao_smtp.obter()
+                server.send_message(msg, from_addr=config['user'] or config['from'],
+                                    to_addrs=[linha['destinatario']])
+                resultados.append((self.STATUS_ENVIADO, linha['tentativas'] + 1, None,
+                                   linha['proxima_tentativa'], datetime.utcnow().isoformat(), linha['id']))
+            except Exception as e:
+                # A conexão pode ter caído: descartar para reconectar no próximo envio
+                self.conexao_smtp.fechar()
+                tentativas = linha['tentativas'] + 1
+                status = self.STATUS_FALHOU if tentativas >= self.max_tentativas else self.STATUS_PENDENTE
+                proxima = datetime.utcnow() + timedelta(seconds=self._calcular_backoff(tentativas))
+                resultados.append((status, tentativas, str(e)[:500], proxima.isoformat(), None, linha['id']))
+                logger.error(f"Erro ao enviar email {linha['id']} (tentativa {tentativas}): {str(e)}")
+
+        with closing(self._conectar()) as conexao:
+            conexao.executemany(
+                'UPDATE email_outbox SET status = ?, tentativas = ?, ultimo_erro = ?, '
+                'proxima_tentativa = ?, data_envio = ? WHERE id = ?',
+                resultados
+            )
+        return len(linhas)
+
+    def processar_pendentes(self):
+        """Processa a fila até não restarem emails vencidos"""
+        total = 0
+        while True:
+            processados = self.processar_lote()
+            if not processados:
+                return total
+            total += processados
+
+    def estatisticas(self):
+        with closing(self._conectar()) as conexao:
+            linhas = conexao.execute('SELECT status, COUNT(*) AS total FROM email_outbox GROUP BY status').fetchall()
+        return {linha['status']: linha['total'] for linha in linhas}
+
+    def encerrar(self, timeout=5.0):
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._acordar.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.conexao_smtp.fechar()
+
+    def _iniciar_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='email-outbox', daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.processar_pendentes()
+            except Exception as e:
+                logger.error(f"Erro no processamento da fila de emails: {str(e)}")
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+
+email_outbox = EmailOutbox()
+
+def enfileirar_email(destinatario, assunto, mensagem, html=None):
+    """
+    Enfileira um email para envio em segundo plano (não bloqueia a requisição).
+
+    Args:
+        destinatario (str): Email do destinatário
+        assunto (str): Assunto do email
+        mensagem (str): Corpo do email em texto plano
+        html (str, optional): Corpo do email em HTML
+
+    Returns:
+        bool: True se o email foi enfileirado com sucesso
+    """
+    return email_outbox.enfileirar(destinatario, assunto, mensagem, html)
+
+@click.command('processar-emails')
+@with_appcontext
+def processar_emails_command():
+    """Envia os emails pendentes da fila e encerra."""
+    total = email_outbox.processar_pendentes()
+    email_outbox.conexao_smtp.fechar()
+    click.echo(f'{total} email(s) processado(s). Situação da fila: {email_outbox.estatisticas()}')
@@ -1,4 +1,4 @@
-from flask import session, request
+from flask import session, request, g
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 import os
@@ -9,18 +9,42 @@ def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def is_admin():
-    if 'usuario_id' in session:
+def get_usuario_atual():
+    """
+    Retorna o usuário logado, consultando o banco no máximo uma vez por requisição.
+    O resultado fica guardado em flask.g e é carregado apenas quando solicitado.
+    """
+    usuario_id = session.get('usuario_id')
+    if not usuario_id:
+        return None
+    
+    cache = g.get('_usuario_atual')
+    if cache is None or cache[0] != usuario_id:
         # Import dentro da função para evitar importação circular
         from models.models import Usuario
-        usuario = Usuario.query.get(session['usuario_id'])
-        return usuario and usuario.is_admin
-    return False
+        g._usuario_atual = (usuario_id, db.session.get(Usuario, usuario_id))
+    return g._usuario_atual[1]
+
+def definir_usuario_atual(usuario):
+    """Guarda no cache da requisição um usuário já carregado"""
+    if usuario is not None:
+        g._usuario_atual = (usuario.id, usuario)
+
+def invalidar_usuario_atual():
+    """Descarta o usuário em cache (usar após alterações no perfil ou logout)"""
+    g.pop('_usuario_atual', None)
+
+def is_admin():
+    usuario = get_usuario_atual()
+    return bool(usuario and usuario.is_admin)
 
 def registrar_log(tipo, descricao, usuario_id=None):
     """
     Registra um log no sistema
     
+    O log é enviado para a fila de auditoria (utils/audit_log.py) e gravado em lote
+    por uma thread própria, sem fazer commit na sessão de quem chamou.
+    
     Args:
         tipo: Tipo do log (ex: 'login', 'produto_novo', 'pedido_atualizado')
         descricao: Descrição detalhada da ação
@@ -28,26 +52,12 @@ def registrar_log(tipo, descricao, usuario_id=None):
     """
     try:
         # Import dentro da função para evitar importação circular
-        from models.models import Log
-        
-        # Criar log SEM campo IP
-        novo_log = Log(
-            tipo=tipo,
-            descricao=descricao,
-            usuario_id=usuario_id,
-            data=datetime.now()
-        )
-        
-        db.session.add(novo_log)
-        db.session.commit()
+        from utils.audit_log import audit_log
         
-        print(f"✅ Log registrado: [{tipo}] {descricao[:50]}...")
+        audit_log.registrar(tipo, descricao, usuario_id)
         
     except Exception as e:
         print(f"❌ Erro ao registrar log: {e}")
-        import traceback
-        traceback.print_exc()
-        db.session.rollback()
 
 def inicializar_db(app, admin_email='admin@docesonho.com', admin_senha='admin123', admin_nome='Administrador'):
     # Import dentro da função para evitar importação circular
@@ -0,0 +1,90 @@
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, make_response, request
+from werkzeug.http import is_resource_modified
+from utils.page_cache import page_cache
+
+
+class HttpCache:
+    """
+    Respostas condicionais (ETag / Last-Modified) para as páginas públicas do catálogo.
+
+    Os validadores são calculados antes da renderização; se o navegador ou o proxy já
+    tem a versão atual, a resposta é um 304 sem corpo. Só valem para visitantes
+    anônimos (mesmo critério do PageCache), pois o cabeçalho das páginas muda com a sessão.
+    """
+
+    def __init__(self, app=None):
+        self.s_maxage = 60
+        self._versao_templates = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HTTP_CACHE_S_MAXAGE', 60)
+        self.s_maxage = int(app.config['HTTP_CACHE_S_MAXAGE'])
+        self._versao_templates = self._calcular_versao_templates(app)
+        app.extensions['http_cache'] = self
+
+    @staticmethod
+    def _calcular_versao_templates(app):
+        """Identifica a versão dos templates implantada (igual em todos os processos)"""
+        datas = []
+        for pasta, _, arquivos in os.walk(os.path.join(app.root_path, app.template_folder or 'templates')):
+            datas.extend(int(os.path.getmtime(os.path.join(pasta, nome))) for nome in arquivos)
+        return str(max(datas)) if datas else ''
+
+    def montar_etag(self, *partes):
+        # Import dentro da função: os assets são inicializados depois deste módulo
+        from utils.assets import assets
+
+        conteudo = ':'.join(str(parte) for parte in (*partes, self._versao_templates, assets.versao))
+        return hashlib.sha1(conteudo.encode()).hexdigest()
+
+    def condicional(self, validadores):
+        """
+        Decorador que responde 304 quando a página não mudou desde a versão do cliente.
+
+        Args:
+            validadores: Função que recebe os argumentos da rota e devolve
+                (identificador, data de atualização) ou None para não usar validação
+        """
+        def decorador(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not page_cache.cacheavel():
+                    resposta = make_response(view(*args, **kwargs))
+                    resposta.cache_control.private = True
+                    resposta.cache_control.no_cache = True
+                    return resposta
+
+                valores = validadores(**kwargs)
+                if valores is None:
+                    return view(*args, **kwargs)
+
+                identificador, modificado = valores
+                etag = self.montar_etag(request.endpoint, identificador)
+
+                if not is_resource_modified(request.environ, etag=etag, last_modified=modificado):
+                    resposta = current_app.response_class(status=304)
+                else:
+                    resposta = make_response(view(*args, **kwargs))
+                    if resposta.status_code != 200:
+                        return resposta
+
+                resposta.set_etag(etag)
+                if modificado:
+                    resposta.last_modified = modificado
+                resposta.cache_control.public = True
+                resposta.cache_control.max_age = 0
+                resposta.cache_control.s_maxage = self.s_maxage
+                resposta.cache_control.must_revalidate = True
+                # Visitantes com sessão recebem outra versão da página
+                resposta.vary.add('Cookie')
+                return resposta
+            return wrapper
+        return decorador
+
+
+http_cache = HttpCache()
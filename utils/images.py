@@ -0,0 +1,379 @@
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional: sem ele as imagens são servidas como enviadas
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Larguras (px) das versões reduzidas usadas no srcset
+LARGURAS = (320, 640, 1024)
+
+QUALIDADE = 80
+
+
+def _salvar(imagem, caminho, formato, qualidade):
+    """Grava a imagem em um arquivo temporário e move para o destino (sem metadados EXIF)"""
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    if formato == 'JPEG' and imagem.mode not in ('RGB', 'L'):
+        imagem = imagem.convert('RGB')
+    elif formato == 'WEBP' and imagem.mode not in ('RGB', 'RGBA'):
+        imagem = imagem.convert('RGBA')
+
+    opcoes = {'format': formato}
+    if formato in ('JPEG', 'WEBP'):
+        opcoes['quality'] = qualidade
+    if formato == 'JPEG':
+        opcoes.update(optimize=True, progressive=True)
+    elif formato == 'PNG':
+        opcoes['optimize'] = True
+    elif formato == 'WEBP':
+        opcoes['method'] = 4
+
+    imagem.save(temporario, **opcoes)
+    os.replace(temporario, caminho)
+
+
+def remover_metadados(caminho, qualidade=QUALIDADE):
+    """
+    Regrava a imagem sem os metadados EXIF (localização, câmera), aplicando antes a rotação
+    indicada neles. Imagens sem EXIF não são recodificadas; GIFs animados ficam como estão.
+
+    Chamada antes do hash do armazenamento por conteúdo: o arquivo gravado nunca muda depois.
+
+    Returns:
+        True se o arquivo foi regravado
+    """
+    if Image is None:
+        return False
+
+    with Image.open(caminho) as aberta:
+        formato = aberta.format
+        if getattr(aberta, 'is_animated', False) or formato not in ('JPEG', 'PNG', 'WEBP') or not aberta.getexif():
+            return False
+        imagem = ImageOps.exif_transpose(aberta)
+        imagem.load()
+
+    _salvar(imagem, caminho, formato, qualidade)
+    return True
+
+
+def processar_imagem(caminho, larguras=LARGURAS, qualidade=QUALIDADE):
+    """
+    Gera as versões reduzidas e WebP de uma imagem. O original não é alterado: os metadados
+    já foram removidos por remover_metadados antes de ele ser armazenado.
+    Executada no pool de processos (ou diretamente pelo comando de backfill).
+
+    Args:
+        caminho: Caminho absoluto da imagem original
+        larguras: Larguras das versões reduzidas (maiores que o original são ignoradas)
+
+    Returns:
+        Dicionário {'largura': int, 'webp': {largura: caminho}, 'original': {largura: caminho}}
+    """
+    base, extensao = os.path.splitext(caminho)
+    variantes = {'webp': {}, 'original': {}}
+
+    with Image.open(caminho) as aberta:
+        formato = aberta.format or 'JPEG'
+        # Aplicar a rotação indicada no EXIF (imagens antigas ainda podem tê-lo)
+        imagem = ImageOps.exif_transpose(aberta)
+        imagem.load()
+
+    variantes['largura'] = imagem.width
+
+    caminho_webp = f'{base}.webp'
+    if caminho_webp != caminho:
+        _salvar(imagem, caminho_webp, 'WEBP', qualidade)
+    variantes['webp'][imagem.width] = caminho_webp
+    variantes['original'][imagem.width] = caminho
+
+    formato_reduzida = formato if formato in ('JPEG', 'PNG', 'WEBP') else 'PNG'
+    extensao_reduzida = extensao if formato_reduzida == formato else '.png'
+    for largura in sorted(larguras):
+        if largura >= imagem.width:
+            continue
+        altura = max(1, round(imagem.height * largura / imagem.width))
+        reduzida = imagem.resize((largura, altura), Image.LANCZOS)
+
+        caminho_reduzida = f'{base}-{largura}w{extensao_reduzida}'
+        _salvar(reduzida, caminho_reduzida, formato_reduzida, qualidade)
+        variantes['original'][largura] = caminho_reduzida
+
+        caminho_reduzida_webp = f'{base}-{largura}w.webp'
+        _salvar(reduzida, caminho_reduzida_webp, 'WEBP', qualidade)
+        variantes['webp'][largura] = caminho_reduzida_webp
+
+    return variantes
+
+
+def caminhos_variantes(variantes_json):
+    """Caminhos (URLs) de todos os arquivos derivados registrados para uma imagem"""
+    try:
+        variantes = json.loads(variantes_json) if variantes_json else {}
+    except ValueError:
+        return []
+    return [url for formato in ('webp', 'original') for url in variantes.get(formato, {}).values()]
+
+
+def srcset(variantes_json, formato='original'):
+    """
+    Monta o atributo srcset a partir das variantes gravadas no banco.
+
+    Args:
+        variantes_json: Conteúdo de Produto.imagem_variantes / Usuario.foto_perfil_variantes
+        formato: 'webp' ou 'original'
+
+    Returns:
+        String no formato "url 320w, url 640w" ou '' se não houver variantes
+    """
+    try:
+        variantes = json.loads(variantes_json) if variantes_json else {}
+    except ValueError:
+        return ''
+    return _montar_srcset(variantes.get(formato) or {})
+
+
+def _montar_srcset(versoes):
+    return ', '.join(f'{url} {largura}w' for largura, url in sorted(versoes.items(), key=lambda v: int(v[0])))
+
+
+# Variantes das imagens fixas de static/, por caminho: (mtime do .webp, variantes)
+_variantes_estaticas = {}
+
+
+def _variantes_em_disco(caminho, url):
+    """Variantes geradas por processar_imagem ao lado de um arquivo, lidas pelos nomes no diretório"""
+    diretorio, nome = os.path.split(caminho)
+    base, extensao = os.path.splitext(nome)
+    prefixo_url = url.rsplit('/', 1)[0]
+    padrao = re.compile(rf'^{re.escape(base)}-(\d+)w(\.webp|{re.escape(extensao)}|\.png)$')
+
+    with Image.open(caminho) as imagem:
+        largura = imagem.width
+    variantes = {'webp': {largura: f'{prefixo_url}/{base}.webp'}, 'original': {largura: url}}
+    for arquivo in os.listdir(diretorio):
+        encontrado = padrao.match(arquivo)
+        if encontrado:
+            formato = 'webp' if encontrado.group(2) == '.webp' else 'original'
+            variantes[formato][int(encontrado.group(1))] = f'{prefixo_url}/{arquivo}'
+    return variantes
+
+
+def srcset_estatico(url, formato='original'):
+    """
+    Monta o srcset de uma imagem fixa de static/ (como as opções do montar bolo) a partir
+    das variantes gravadas ao lado dela por flask gerar-variantes-imagens --estaticas.
+
+    Returns:
+        String no formato "url 320w, url 640w" ou '' se as variantes não foram geradas
+    """
+    if Image is None:
+        return ''
+    relativo = url[len(current_app.static_url_path):].lstrip('/')
+    caminho = os.path.join(current_app.static_folder, relativo)
+    try:
+        marca = os.path.getmtime(f'{os.path.splitext(caminho)[0]}.webp')
+        em_cache = _variantes_estaticas.get(caminho)
+        if em_cache is None or em_cache[0] != marca:
+            em_cache = (marca, _variantes_em_disco(caminho, url))
+            _variantes_estaticas[caminho] = em_cache
+    except OSError:
+        return ''
+    return _montar_srcset(em_cache[1][formato])
+
+
+class ImagePipeline:
+    """
+    Gera as variantes das imagens enviadas em um pool de processos.
+
+    A requisição só agenda o trabalho; quando o processo termina, as URLs das variantes
+    são gravadas na coluna indicada, desde que a imagem do registro não tenha mudado.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.processos = 2
+        self.larguras = LARGURAS
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IMAGENS_PROCESSOS', 2)
+        app.config.setdefault('IMAGENS_LARGURAS', LARGURAS)
+        self.app = app
+        self.processos = int(app.config['IMAGENS_PROCESSOS'])
+        self.larguras = tuple(app.config['IMAGENS_LARGURAS'])
+        app.extensions['image_pipeline'] = self
+        app.jinja_env.globals['srcset'] = srcset
+        app.jinja_env.globals['srcset_estatico'] = srcset_estatico
+
+    @property
+    def disponivel(self):
+        return Image is not None
+
+    def _obter_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: o processo filho não herda threads nem conexões do servidor
+                    contexto = multiprocessing.get_context('spawn')
+                    self._executor = ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto)
+        return self._executor
+
+    def url_para_caminho(self, url):
+        return os.path.join(self.app.root_path, url.lstrip('/'))
+
+    def caminho_para_url(self, caminho):
+        return '/' + os.path.relpath(caminho, self.app.root_path).replace(os.sep, '/')
+
+    def _para_urls(self, variantes):
+        return {
+            'largura': variantes['largura'],
+            'webp': {str(l): self.caminho_para_url(c) for l, c in variantes['webp'].items()},
+            'original': {str(l): self.caminho_para_url(c) for l, c in variantes['original'].items()}
+        }
+
+    def agendar(self, modelo, registro_id, coluna_imagem, coluna_variantes, url, ao_concluir=None):
+        """
+        Agenda a geração das variantes de uma imagem já gravada em disco.
+
+        Args:
+            modelo: Classe do modelo (Produto ou Usuario)
+            registro_id: ID do registro dono da imagem
+            coluna_imagem: Nome da coluna com a URL da imagem
+            coluna_variantes: Nome da coluna onde as variantes são registradas
+            url: URL da imagem original (ex.: /static/uploads/bolo.jpg)
+            ao_concluir: Função chamada (com contexto da aplicação) após registrar as variantes
+        """
+        if not self.disponivel or not url:
+            return None
+
+        caminho = self.url_para_caminho(url)
+        if self.processos <= 0:
+            self._registrar(modelo, registro_id, coluna_imagem, coluna_variantes, url,
+                            processar_imagem(caminho, self.larguras), ao_concluir)
+            return None
+
+        futuro = self._obter_executor().submit(processar_imagem, caminho, self.larguras)
+
+        def concluido(f):
+            try:
+                variantes = f.result()
+            except Exception as e:
+                logger.error(f"Erro ao gerar variantes de {url}: {e}")
+                return
+            self._registrar(modelo, registro_id, coluna_imagem, coluna_variantes, url, variantes, ao_concluir)
+
+        futuro.add_done_callback(concluido)
+        return futuro
+
+    def _registrar(self, modelo, registro_id, coluna_imagem, coluna_variantes, url, variantes, ao_concluir):
+        # Import dentro da função: o módulo também é carregado nos processos do pool
+        from database import db
+
+        with self.app.app_context():
+            try:
+                atualizados = modelo.query.filter(
+                    modelo.id == registro_id,
+                    getattr(modelo, coluna_imagem) == url
+                ).update({coluna_variantes: json.dumps(self._para_urls(variantes))}, synchronize_session=False)
+                db.session.commit()
+                if atualizados and ao_concluir:
+                    ao_concluir()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Erro ao registrar variantes de {url}: {e}")
+
+    def processar_agora(self, url):
+        """Gera as variantes no processo atual e retorna o JSON a ser gravado (usado no backfill)"""
+        return json.dumps(self._para_urls(processar_imagem(self.url_para_caminho(url), self.larguras)))
+
+    def encerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+image_pipeline = ImagePipeline()
+
+
+REGEX_VARIANTE = re.compile(r'-\d+w\.[a-z]+$')
+
+
+def _gerar_variantes_estaticas(todas):
+    """Gera as variantes das imagens fixas de static/uploads (usadas com srcset_estatico)"""
+    diretorio = os.path.join(current_app.static_folder, 'uploads')
+    geradas = falhas = 0
+    for nome in sorted(os.listdir(diretorio)):
+        caminho = os.path.join(diretorio, nome)
+        base, extensao = os.path.splitext(nome)
+        if not os.path.isfile(caminho) or extensao.lower() not in ('.jpg', '.jpeg', '.png') or REGEX_VARIANTE.search(nome):
+            continue
+        if not todas and os.path.exists(os.path.join(diretorio, f'{base}.webp')):
+            continue
+        try:
+            processar_imagem(caminho, image_pipeline.larguras)
+            geradas += 1
+        except Exception as e:
+            falhas += 1
+            click.echo(f'Erro em {nome}: {e}')
+    return geradas, falhas
+
+
+@click.command('gerar-variantes-imagens')
+@click.option('--todas', is_flag=True, help='Regera também as imagens que já possuem variantes.')
+@click.option('--estaticas', is_flag=True, help='Processa também as imagens fixas de static/uploads (montar bolo).')
+@with_appcontext
+def gerar_variantes_imagens_command(todas, estaticas):
+    """Gera as versões reduzidas/WebP das imagens de produtos e fotos de perfil já enviadas."""
+    from database import db
+    from models.models import Produto, Usuario
+
+    if not image_pipeline.disponivel:
+        click.echo('Pillow não está instalado: pip install Pillow')
+        return
+
+    geradas = falhas = 0
+    for modelo, coluna_imagem, coluna_variantes in ((Produto, 'imagem', 'imagem_variantes'),
+                                                    (Usuario, 'foto_perfil', 'foto_perfil_variantes')):
+        consulta = modelo.query.filter(getattr(modelo, coluna_imagem).like('/static/uploads/%'))
+        if not todas:
+            consulta = consulta.filter(getattr(modelo, coluna_variantes).is_(None))
+
+        for registro in consulta.all():
+            url = getattr(registro, coluna_imagem)
+            if not os.path.exists(image_pipeline.url_para_caminho(url)):
+                continue
+            try:
+                setattr(registro, coluna_variantes, image_pipeline.processar_agora(url))
+                db.session.commit()
+                geradas += 1
+            except Exception as e:
+                db.session.rollback()
+                falhas += 1
+                click.echo(f'Erro em {url}: {e}')
+
+    if estaticas:
+        estaticas_geradas, estaticas_falhas = _gerar_variantes_estaticas(todas)
+        click.echo(f'{estaticas_geradas} imagem(ns) fixa(s) processada(s), {estaticas_falhas} falha(s).')
+
+    if geradas:
+        from utils.catalog import catalogo
+        from utils.page_cache import page_cache
+        catalogo.invalidar()
+        page_cache.backend.limpar()
+    click.echo(f'{geradas} imagem(ns) processada(s), {falhas} falha(s).')
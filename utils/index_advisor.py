@@ -0,0 +1,117 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, text
+from database import db
+
+
+def consultas_principais():
+    """
+    Consultas mais frequentes da aplicação, com parâmetros de exemplo.
+
+    Returns:
+        Lista de tuplas (descricao, statement)
+    """
+    # Import dentro da função para evitar importação circular
+    from models.models import (Produto, Pedido, ItemPedido, Log, Token,
+                               CarrinhoItem, CarrinhoBoloPersonalizado, BoloPersonalizado)
+
+    return [
+        ('Carrinho do usuário (com produtos)',
+         select(CarrinhoItem, Produto).outerjoin(Produto, CarrinhoItem.produto_id == Produto.id)
+         .where(CarrinhoItem.usuario_id == 1)),
+        ('Item do carrinho por usuário e produto',
+         select(CarrinhoItem).where(CarrinhoItem.usuario_id == 1, CarrinhoItem.produto_id == 1)),
+        ('Bolos personalizados no carrinho',
+         select(CarrinhoBoloPersonalizado, BoloPersonalizado)
+         .outerjoin(BoloPersonalizado, CarrinhoBoloPersonalizado.bolo_personalizado_id == BoloPersonalizado.id)
+         .where(CarrinhoBoloPersonalizado.usuario_id == 1)),
+        ('Pedidos do cliente',
+         select(Pedido).where(Pedido.usuario_id == 1).order_by(Pedido.data.desc())),
+        ('Pedidos por status (painel)',
+         select(Pedido).where(Pedido.status == 'Aprovado').order_by(Pedido.data.desc()).limit(10)),
+        ('Itens de um pedido',
+         select(ItemPedido).where(ItemPedido.pedido_id == 1)),
+        ('Logs recentes',
+         select(Log).order_by(Log.data.desc()).limit(20)),
+        ('Logs por tipo',
+         select(Log).where(Log.tipo == 'pedido_atualizado').order_by(Log.data.desc()).limit(20)),
+        ('Produtos ativos por categoria',
+         select(Produto).where(Produto.ativo == True, Produto.categoria == 'Bolos')),
+        ('Token de autenticação',
+         select(Token).where(Token.usuario_id == 1, Token.token_hash == Token.calcular_hash('exemplo'),
+                             Token.is_revogado == False)),
+    ]
+
+
+def _compilar(statement):
+    return str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _varreduras_mysql(conexao, sql):
+    """Tabelas lidas por completo segundo o EXPLAIN do MySQL (type = ALL)"""
+    linhas = conexao.execute(text(f'EXPLAIN {sql}')).mappings().all()
+    return [linha['table'] for linha in linhas if (linha.get('type') or '').upper() == 'ALL']
+
+
+def _varreduras_sqlite(conexao, sql):
+    """Tabelas lidas por completo segundo o EXPLAIN QUERY PLAN do SQLite"""
+    linhas = conexao.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    varreduras = []
+    for linha in linhas:
+        detalhe = linha[-1]
+        if detalhe.startswith('SCAN') and 'USING' not in detalhe:
+            varreduras.append(detalhe.split()[1])
+    return varreduras
+
+
+def analisar_consultas():
+    """
+    Executa EXPLAIN nas consultas principais e aponta varreduras completas de tabela.
+
+    Returns:
+        Lista de dicionários {'consulta', 'sql', 'varreduras', 'erro'}
+    """
+    dialeto = db.engine.dialect.name
+    if dialeto in ('mysql', 'mariadb'):
+        analisar = _varreduras_mysql
+    elif dialeto == 'sqlite':
+        analisar = _varreduras_sqlite
+    else:
+        raise RuntimeError(f'Banco de dados não suportado pelo analisador: {dialeto}')
+
+    resultados = []
+    with db.engine.connect() as conexao:
+        for descricao, statement in consultas_principais():
+            sql = _compilar(statement)
+            try:
+                varreduras = analisar(conexao, sql)
+                erro = None
+            except Exception as e:
+                varreduras = []
+                erro = str(e)
+            resultados.append({'consulta': descricao, 'sql': sql, 'varreduras': varreduras, 'erro': erro})
+    return resultados
+
+
+@click.command('analisar-indices')
+@click.option('--sql', 'mostrar_sql', is_flag=True, help='Mostra o SQL de cada consulta analisada.')
+@with_appcontext
+def analisar_indices_command(mostrar_sql):
+    """Roda EXPLAIN nas consultas principais e aponta varreduras completas."""
+    problemas = 0
+    for resultado in analisar_consultas():
+        if resultado['erro']:
+            status = f"ERRO: {resultado['erro']}"
+        elif resultado['varreduras']:
+            status = f"VARREDURA COMPLETA em: {', '.join(resultado['varreduras'])}"
+            problemas += 1
+        else:
+            status = 'ok (usa índice)'
+        click.echo(f"- {resultado['consulta']}: {status}")
+        if mostrar_sql:
+            click.echo(f"    {resultado['sql']}")
+
+    if problemas:
+        click.echo(f'\n{problemas} consulta(s) sem índice adequado. Veja migrations/ para os índices recomendados.')
+    else:
+        click.echo('\nNenhuma varredura completa encontrada.')
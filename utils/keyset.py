@@ -0,0 +1,176 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# Tempo (segundos) em que a contagem de registros de uma listagem é reaproveitada
+TTL_TOTAL = 60
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    return valor
+
+
+def _desserializar(valor):
+    if isinstance(valor, dict) and 'dt' in valor:
+        return datetime.fromisoformat(valor['dt'])
+    return valor
+
+
+def codificar_cursor(valores, pagina, direcao):
+    """Gera um cursor opaco (base64 url-safe) a partir dos valores da chave de ordenação"""
+    dados = {'v': [_serializar(v) for v in valores], 'p': pagina, 'd': direcao}
+    return base64.urlsafe_b64encode(json.dumps(dados, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Lê um cursor gerado por codificar_cursor.
+
+    Returns:
+        Tupla (valores, pagina, direcao) ou None se o cursor for inválido
+    """
+    if not cursor:
+        return None
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        valores = [_desserializar(v) for v in dados['v']]
+        direcao = dados['d'] if dados['d'] in ('n', 'p') else 'n'
+        return valores, max(1, int(dados['p'])), direcao
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class _CacheTotais:
+    """Contagens de registros reaproveitadas por alguns segundos entre as páginas"""
+
+    def __init__(self):
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave, contar):
+        agora = time.monotonic()
+        with self._lock:
+            registro = self._valores.get(chave)
+            if registro and registro[1] > agora:
+                return registro[0]
+        total = contar()
+        with self._lock:
+            self._valores[chave] = (total, agora + TTL_TOTAL)
+            if len(self._valores) > 1000:
+                for c in [c for c, r in self._valores.items() if r[1] <= agora]:
+                    del self._valores[c]
+        return total
+
+
+_totais = _CacheTotais()
+
+
+class PaginaKeyset:
+    """Página de uma listagem paginada por cursor"""
+
+    def __init__(self, items, page, per_page, total, next_cursor, prev_cursor):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def pages(self):
+        """Número aproximado de páginas (baseado no total em cache)"""
+        return max(1, -(-self.total // self.per_page)) if self.total is not None else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def _filtro_apos(colunas, valores, decrescente):
+    """
+    Condição "linha vem depois de valores" na ordem (col1, col2, ...).
+    Expandida em OR/AND para que o otimizador use o índice composto.
+    """
+    condicoes = []
+    for i, coluna in enumerate(colunas):
+        iguais = [colunas[j] == valores[j] for j in range(i)]
+        comparacao = coluna < valores[i] if decrescente else coluna > valores[i]
+        condicoes.append(and_(*iguais, comparacao))
+    return or_(*condicoes)
+
+
+def paginar_por_cursor(query, colunas, cursor=None, por_pagina=20, decrescente=True,
+                       chave=None, chave_total=None):
+    """
+    Pagina uma query pela chave de ordenação (seek method) em vez de OFFSET.
+
+    O custo de qualquer página é o mesmo da primeira: a consulta parte do último
+    registro visto usando o índice sobre as colunas de ordenação.
+
+    Args:
+        query: Query já filtrada, sem order_by
+        colunas: Colunas da chave de ordenação, terminando em uma coluna única (ex.: Log.data, Log.id)
+        cursor: Cursor recebido da página anterior (None para a primeira página)
+        por_pagina: Quantidade de itens por página
+        decrescente: Ordenação decrescente (True) ou crescente (False)
+        chave: Função que extrai os valores da chave de um item (padrão: atributos das colunas)
+        chave_total: Identificador da listagem/filtros para cachear a contagem (None para não contar)
+
+    Returns:
+        PaginaKeyset
+    """
+    if chave is None:
+        chave = lambda item: tuple(getattr(item, coluna.key) for coluna in colunas)
+
+    estado = decodificar_cursor(cursor)
+    if estado:
+        valores, pagina, direcao = estado
+    else:
+        valores, pagina, direcao = None, 1, 'n'
+
+    # Para voltar uma página a consulta é feita na ordem inversa e o resultado invertido
+    ordem_consulta = decrescente if direcao == 'n' else not decrescente
+    ordenacao = [coluna.desc() if ordem_consulta else coluna.asc() for coluna in colunas]
+
+    consulta = query
+    if valores is not None and len(valores) == len(colunas):
+        consulta = consulta.filter(_filtro_apos(colunas, valores, ordem_consulta))
+
+    linhas = consulta.order_by(*ordenacao).limit(por_pagina + 1).all()
+    ha_mais = len(linhas) > por_pagina
+    linhas = linhas[:por_pagina]
+    if direcao == 'p':
+        linhas.reverse()
+
+    if direcao == 'n':
+        tem_proxima = ha_mais
+        tem_anterior = valores is not None
+    else:
+        tem_proxima = True
+        tem_anterior = ha_mais
+
+    proximo = anterior = None
+    if linhas:
+        if tem_proxima:
+            proximo = codificar_cursor(chave(linhas[-1]), pagina + 1, 'n')
+        if tem_anterior and pagina > 1:
+            anterior = codificar_cursor(chave(linhas[0]), pagina - 1, 'p')
+
+    total = None
+    if chave_total is not None:
+        total = _totais.obter(chave_total, lambda: query.order_by(None).count())
+
+    return PaginaKeyset(linhas, pagina, por_pagina, total, proximo, anterior)
@@ -0,0 +1,181 @@
+import re
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from database import db
+from models.models import Pedido, ItemPedido, ItemPedidoPersonalizado, Log, PedidoStatusHistorico
+
+# Formatos dos logs de pedido gravados antes da tabela de histórico
+REGEX_LOG_ATUALIZACAO = re.compile(r'^Pedido #(\d+) atualizado de "(.*?)" para "(.*?)"(?: com observação: "(.*)")?$', re.DOTALL)
+REGEX_LOG_APROVACAO = re.compile(r'^Pedido #(\d+) criado e aprovado')
+
+
+def carregar_pedido_detalhado(pedido_id):
+    """
+    Carrega o pedido com cliente, itens, produtos e bolos personalizados de uma vez.
+
+    O pedido e o cliente vêm em um JOIN; os itens de cada tipo (com o produto ou bolo)
+    vêm em uma query extra por tipo via selectinload, em vez de uma query por item.
+
+    Returns:
+        Pedido ou None se não existir
+    """
+    return Pedido.query.options(
+        joinedload(Pedido.cliente),
+        selectinload(Pedido.itens).joinedload(ItemPedido.produto),
+        selectinload(Pedido.itens_personalizados).joinedload(ItemPedidoPersonalizado.bolo)
+    ).filter(Pedido.id == pedido_id).first()
+
+
+def montar_itens_pedido(pedido):
+    """
+    Monta a lista de itens exibida nas telas de pedido do painel administrativo.
+
+    Args:
+        pedido: Pedido carregado por carregar_pedido_detalhado
+
+    Returns:
+        Lista de dicionários com itens regulares seguidos dos personalizados
+    """
+    itens = []
+
+    for item in pedido.itens:
+        produto = item.produto
+
+        # Verificar se o produto ainda existe (mesmo que inativo)
+        if produto:
+            nome_produto = produto.nome
+            if not produto.ativo:
+                nome_produto += " (Produto descontinuado)"
+        else:
+            nome_produto = "Produto removido"
+
+        itens.append({
+            'nome': nome_produto,
+            'quantidade': item.quantidade,
+            'preco_unitario': item.preco_unitario,
+            'subtotal': item.preco_unitario * item.quantidade,
+            'tipo': 'regular',
+            'produto_ativo': produto.ativo if produto else False,
+            'produto': produto
+        })
+
+    for item in pedido.itens_personalizados:
+        bolo = item.bolo
+        itens.append({
+            'nome': f"Bolo Personalizado de {bolo.massa.capitalize()}" if bolo else "Bolo personalizado removido",
+            'quantidade': item.quantidade,
+            'preco_unitario': item.preco_unitario,
+            'subtotal': item.preco_unitario * item.quantidade,
+            'tipo': 'personalizado',
+            'bolo_id': item.bolo_personalizado_id,
+            'bolo': bolo
+        })
+
+    return itens
+
+
+def historico_status_pedido(pedido_id):
+    """
+    Histórico de alterações de status do pedido, mais recentes primeiro.
+    Busca pelo índice (pedido_id, data) da tabela pedido_status_historico.
+
+    Returns:
+        Lista de PedidoStatusHistorico (com os atributos data e descricao)
+    """
+    return PedidoStatusHistorico.query.filter_by(
+        pedido_id=pedido_id
+    ).order_by(PedidoStatusHistorico.data.desc(), PedidoStatusHistorico.id.desc()).all()
+
+
+def _interpretar_log(log):
+    """
+    Extrai a mudança de status de um log antigo de pedido.
+
+    Returns:
+        Dicionário com os campos do histórico ou None se o texto não for reconhecido
+    """
+    if log.tipo == 'pedido_atualizado':
+        encontrado = REGEX_LOG_ATUALIZACAO.match(log.descricao or '')
+        if encontrado:
+            return {
+                'pedido_id': int(encontrado.group(1)),
+                'status_anterior': encontrado.group(2),
+                'status_novo': encontrado.group(3),
+                'observacao': encontrado.group(4)
+            }
+    elif log.tipo == 'pagamento_aprovado':
+        encontrado = REGEX_LOG_APROVACAO.match(log.descricao or '')
+        if encontrado:
+            return {
+                'pedido_id': int(encontrado.group(1)),
+                'status_anterior': None,
+                'status_novo': 'Aprovado',
+                'observacao': None
+            }
+    return None
+
+
+def migrar_historico_dos_logs(lote=1000):
+    """
+    Preenche pedido_status_historico a partir dos logs de pedido já existentes.
+
+    Só são migrados os logs anteriores ao primeiro registro de histórico do pedido, pois
+    as mudanças posteriores já foram gravadas na tabela. Por isso a função pode ser
+    executada mais de uma vez sem duplicar registros.
+
+    Returns:
+        Tupla (migrados, ignorados)
+    """
+    migrados = ignorados = 0
+    ultimo_id = 0
+    consultados = set()
+    existentes = set()
+    inicio_historico = {}
+
+    while True:
+        logs = Log.query.filter(
+            Log.id > ultimo_id,
+            Log.tipo.in_(('pedido_atualizado', 'pagamento_aprovado'))
+        ).order_by(Log.id).limit(lote).all()
+        if not logs:
+            break
+        ultimo_id = logs[-1].id
+
+        candidatos = [(log, _interpretar_log(log)) for log in logs]
+        candidatos = [(log, dados) for log, dados in candidatos if dados]
+        ignorados += len(logs) - len(candidatos)
+
+        # Cada pedido é consultado uma única vez, antes de receber registros desta execução
+        novos_ids = {dados['pedido_id'] for _, dados in candidatos} - consultados
+        if novos_ids:
+            existentes.update(pedido_id for (pedido_id,) in db.session.query(Pedido.id).filter(Pedido.id.in_(novos_ids)))
+            # Mudanças a partir do primeiro registro de histórico de cada pedido já estão na tabela
+            inicio_historico.update(db.session.query(
+                PedidoStatusHistorico.pedido_id, func.min(PedidoStatusHistorico.data)
+            ).filter(PedidoStatusHistorico.pedido_id.in_(novos_ids)).group_by(
+                PedidoStatusHistorico.pedido_id
+            ).all())
+            consultados.update(novos_ids)
+
+        for log, dados in candidatos:
+            inicio = inicio_historico.get(dados['pedido_id'])
+            if dados['pedido_id'] not in existentes or (inicio and log.data >= inicio):
+                ignorados += 1
+                continue
+            PedidoStatusHistorico.registrar(usuario_id=log.usuario_id, data=log.data, **dados)
+            migrados += 1
+
+        db.session.commit()
+
+    return migrados, ignorados
+
+
+@click.command('migrar-historico-status')
+@click.option('--lote', default=1000, show_default=True, help='Logs processados por commit.')
+@with_appcontext
+def migrar_historico_status_command(lote):
+    """Cria o histórico de status dos pedidos a partir da tabela log."""
+    migrados, ignorados = migrar_historico_dos_logs(lote)
+    click.echo(f'{migrados} registro(s) de histórico criados, {ignorados} log(s) ignorados.')
@@ -0,0 +1,309 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session, make_response
+
+logger = logging.getLogger(__name__)
+
+# Namespace das páginas que listam vários produtos (início e catálogo)
+NAMESPACE_CATALOGO = 'catalogo'
+
+
+def namespace_produto(produto_id):
+    """Namespace da página de detalhes de um produto"""
+    return f'produto-{produto_id}'
+
+
+class MemoriaLRU:
+    """Backend em memória com despejo LRU (padrão)"""
+
+    def __init__(self, max_itens=500):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            registro = self._itens.get(chave)
+            if registro is None:
+                return None
+            html, expira_em = registro
+            if expira_em and expira_em < time.time():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return html
+
+    def gravar(self, chave, html, ttl):
+        with self._lock:
+            self._itens[chave] = (html, time.time() + ttl if ttl else None)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def excluir_namespace(self, namespace):
+        prefixo = f'{namespace}:'
+        with self._lock:
+            for chave in [c for c in self._itens if c.startswith(prefixo)]:
+                del self._itens[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class ArquivoBackend:
+    """
+    Backend em disco, compartilhado entre processos da mesma máquina.
+    A data de acesso do arquivo é usada para despejar os menos usados.
+    """
+
+    def __init__(self, diretorio, max_itens=500):
+        self.diretorio = diretorio
+        self.max_itens = max_itens
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        namespace, _, resto = chave.partition(':')
+        return os.path.join(self.diretorio, f'{namespace}.{hashlib.sha256(resto.encode()).hexdigest()}.html')
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                expira_em = float(arquivo.readline())
+                if expira_em and expira_em < time.time():
+                    os.remove(caminho)
+                    return None
+                html = arquivo.read()
+            os.utime(caminho)
+            return html
+        except (OSError, ValueError):
+            return None
+
+    def gravar(self, chave, html, ttl):
+        caminho = self._caminho(chave)
+        temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(f'{time.time() + ttl if ttl else 0}\n')
+            arquivo.write(html)
+        os.replace(temporario, caminho)
+        self._despejar()
+
+    def _arquivos(self, namespace=None):
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError:
+            return []
+        return [os.path.join(self.diretorio, nome) for nome in nomes
+                if nome.endswith('.html') and (namespace is None or nome.startswith(f'{namespace}.'))]
+
+    def _despejar(self):
+        arquivos = self._arquivos()
+        excedente = len(arquivos) - self.max_itens
+        if excedente <= 0:
+            return
+        arquivos.sort(key=lambda caminho: os.path.getmtime(caminho) if os.path.exists(caminho) else 0)
+        for caminho in arquivos[:excedente]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+    def excluir_namespace(self, namespace):
+        for caminho in self._arquivos(namespace):
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+    def limpar(self):
+        self.excluir_namespace(None)
+
+    def __len__(self):
+        return len(self._arquivos())
+
+
+class RedisBackend:
+    """Backend compartilhado em Redis (ou serviço compatível); o despejo fica a cargo do servidor"""
+
+    def __init__(self, url, prefixo='doce_sonho:pagina:'):
+        import redis
+        self.cliente = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+
+    def obter(self, chave):
+        valor = self.cliente.get(self.prefixo + chave)
+        return valor.decode('utf-8') if valor is not None else None
+
+    def gravar(self, chave, html, ttl):
+        self.cliente.set(self.prefixo + chave, html.encode('utf-8'), ex=int(ttl) if ttl else None)
+
+    def excluir_namespace(self, namespace):
+        padrao = f'{self.prefixo}{namespace}:*' if namespace else f'{self.prefixo}*'
+        chaves = list(self.cliente.scan_iter(match=padrao))
+        if chaves:
+            self.cliente.delete(*chaves)
+
+    def limpar(self):
+        self.excluir_namespace(None)
+
+    def __len__(self):
+        return sum(1 for _ in self.cliente.scan_iter(match=f'{self.prefixo}*'))
+
+
+class PageCache:
+    """
+    Cache do HTML renderizado das páginas públicas do catálogo.
+
+    Só guarda respostas de visitantes anônimos (sem login, carrinho na sessão ou
+    mensagens flash pendentes), pois o cabeçalho dessas páginas depende da sessão.
+    A chave combina namespace, rota, parâmetros da query string e a assinatura do
+    snapshot do catálogo. A assinatura vem do conteúdo do banco, então é a mesma em
+    todos os processos que enxergam o mesmo catálogo; o contador de versão do catálogo
+    é por processo e não serve para os backends compartilhados (arquivo e Redis).
+    """
+
+    def __init__(self, app=None):
+        self.habilitado = True
+        self.ttl = 600
+        self.backend = MemoriaLRU()
+        self._lock = threading.Lock()
+        self._metricas = {'hits': 0, 'misses': 0, 'armazenados': 0, 'ignorados': 0,
+                          'invalidacoes': 0, 'erros': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_ENABLED', True)
+        app.config.setdefault('PAGE_CACHE_BACKEND', 'memoria')
+        app.config.setdefault('PAGE_CACHE_MAX_ITENS', 500)
+        app.config.setdefault('PAGE_CACHE_TTL', 600)
+        app.config.setdefault('PAGE_CACHE_DIR', os.path.join(app.instance_path, 'page_cache'))
+        app.config.setdefault('PAGE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+        self.habilitado = bool(app.config['PAGE_CACHE_ENABLED'])
+        self.ttl = int(app.config['PAGE_CACHE_TTL'])
+        self.backend = self._criar_backend(app.config)
+        app.extensions['page_cache'] = self
+
+    def _criar_backend(self, config):
+        tipo = config['PAGE_CACHE_BACKEND']
+        max_itens = int(config['PAGE_CACHE_MAX_ITENS'])
+        try:
+            if tipo == 'arquivo':
+                return ArquivoBackend(config['PAGE_CACHE_DIR'], max_itens)
+            if tipo == 'redis':
+                return RedisBackend(config['PAGE_CACHE_REDIS_URL'])
+        except Exception as e:
+            logger.warning(f"Backend de cache '{tipo}' indisponível, usando memória: {e}")
+        return MemoriaLRU(max_itens)
+
+    def _incrementar(self, metrica):
+        with self._lock:
+            self._metricas[metrica] += 1
+
+    def cacheavel(self):
+        """Verifica se a requisição atual pode ser servida a partir do cache"""
+        if not self.habilitado or request.method != 'GET':
+            return False
+        return not any(chave in session for chave in ('usuario_id', 'auth_token', 'carrinho',
+                                                      'carrinho_personalizado', '_flashes'))
+
+    def montar_chave(self, namespace):
+        # Import dentro da função para evitar importação circular
+        from utils.catalog import catalogo
+
+        argumentos = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        # Um processo com snapshot desatualizado grava sob a assinatura antiga, que os demais não leem
+        return f'{namespace}:{catalogo.snapshot().assinatura}:{request.endpoint}?{argumentos}'
+
+    def obter(self, chave):
+        try:
+            html = self.backend.obter(chave)
+        except Exception as e:
+            self._incrementar('erros')
+            logger.error(f"Erro ao ler cache de página: {e}")
+            return None
+        self._incrementar('hits' if html is not None else 'misses')
+        return html
+
+    def gravar(self, chave, html):
+        try:
+            self.backend.gravar(chave, html, self.ttl)
+            self._incrementar('armazenados')
+        except Exception as e:
+            self._incrementar('erros')
+            logger.error(f"Erro ao gravar cache de página: {e}")
+
+    def invalidar_namespace(self, namespace):
+        try:
+            self.backend.excluir_namespace(namespace)
+            self._incrementar('invalidacoes')
+        except Exception as e:
+            self._incrementar('erros')
+            logger.error(f"Erro ao invalidar cache de página '{namespace}': {e}")
+
+    def invalidar_produto(self, produto_id):
+        """Remove as páginas afetadas pela alteração de um produto: listagens e o seu detalhe"""
+        self.invalidar_namespace(NAMESPACE_CATALOGO)
+        self.invalidar_namespace(namespace_produto(produto_id))
+
+    def limpar(self):
+        self.backend.limpar()
+        self._incrementar('invalidacoes')
+
+    def estatisticas(self):
+        with self._lock:
+            metricas = dict(self._metricas)
+        consultas = metricas['hits'] + metricas['misses']
+        metricas.update({
+            'taxa_acerto': round(metricas['hits'] / consultas, 4) if consultas else 0.0,
+            'backend': type(self.backend).__name__,
+            'itens': len(self.backend),
+            'habilitado': self.habilitado
+        })
+        return metricas
+
+    def cachear(self, namespace):
+        """
+        Decorador que serve a página do cache para visitantes anônimos.
+
+        Args:
+            namespace: Nome fixo ou função que recebe os argumentos da rota e devolve o namespace
+        """
+        def decorador(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.cacheavel():
+                    self._incrementar('ignorados')
+                    return view(*args, **kwargs)
+
+                nome = namespace(**kwargs) if callable(namespace) else namespace
+                chave = self.montar_chave(nome)
+                html = self.obter(chave)
+                if html is not None:
+                    resposta = make_response(html)
+                    resposta.headers['X-Page-Cache'] = 'HIT'
+                    return resposta
+
+                resultado = view(*args, **kwargs)
+                # Só respostas renderizadas diretamente (status 200) vão para o cache
+                if isinstance(resultado, str):
+                    self.gravar(chave, resultado)
+                    resposta = make_response(resultado)
+                    resposta.headers['X-Page-Cache'] = 'MISS'
+                    return resposta
+                return resultado
+            return wrapper
+        return decorador
+
+
+page_cache = PageCache()
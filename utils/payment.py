@@ -1,18 +1,27 @@
 import mysql.connector
-import mercadopago
 from decimal import Decimal
-from flask import session, current_app
-from models.models import Produto, BoloPersonalizado, CarrinhoItem, CarrinhoBoloPersonalizado
+from flask import current_app
+from utils.cart_snapshot import obter_snapshot_carrinho, is_entrega, TAXA_ENTREGA
 from database import db
+from utils.payment_gateway import mercado_pago, GatewayIndisponivel
 import logging
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _anexar_notificacao(preference_data, rascunho):
+    """Inclui a URL de notificação e o código do rascunho do pedido (necessários para o webhook)"""
+    notification_url = current_app.config.get('MERCADO_PAGO_NOTIFICATION_URL')
+    if notification_url:
+        preference_data["notification_url"] = notification_url
+    if rascunho:
+        preference_data["external_reference"] = rascunho
+        preference_data.setdefault("metadata", {})["rascunho"] = rascunho
+
 # utils/payment.py - Função create_mercadopago_preference corrigida
 
-def create_mercadopago_preference(user_id, success_url, failure_url, pending_url, delivery_option=None):
+def create_mercadopago_preference(user_id, success_url, failure_url, pending_url, delivery_option=None, snapshot=None, rascunho=None):
     """
     Cria uma preferência de pagamento no MercadoPago com base nos itens do carrinho.
     
@@ -22,6 +31,9 @@ def create_mercadopago_preference(user_id, success_url, failure_url, pending_url
         failure_url: URL de retorno em caso de falha
         pending_url: URL de retorno em caso de pagamento pendente
         delivery_option: Opção de entrega ('delivery' para entrega em casa, 'pickup' para retirada)
+        snapshot: CartSnapshot já montado na requisição (opcional)
+        rascunho: Código do RascunhoPedido; identifica o pedido quando a notificação
+            do pagamento chega (utils/payment_events.py)
         
     Returns:
         Tupla (link_pagamento, erro) - link de pagamento do MercadoPago ou None em caso de erro
@@ -29,131 +41,74 @@ def create_mercadopago_preference(user_id, success_url, failure_url, pending_url
     items = []
     
     try:
-        # Se usuário estiver logado, buscar itens do banco de dados
-        if user_id:
-            # Buscar produtos regulares
-            itens_regulares = CarrinhoItem.query.filter_by(usuario_id=user_id).all()
-            for item in itens_regulares:
-                produto = Produto.query.get(item.produto_id)
-                if produto:
-                    # Validar dados antes de adicionar
-                    if produto.preco <= 0:
-                        logger.warning(f"Produto {produto.id} tem preço inválido: {produto.preco}")
-                        continue
-                    
-                    # Melhorar descrição do item com mais detalhes
-                    descricao_detalhada = f"Produto: {produto.nome}"
-                    if produto.descricao:
-                        descricao_detalhada += f" - {produto.descricao}"
-                    if produto.categoria:
-                        descricao_detalhada += f" - Categoria: {produto.categoria}"
-                    
-                    items.append({
-                        'id': str(produto.id),
-                        'title': produto.nome[:256],  # Limitar tamanho do título
-                        'description': descricao_detalhada[:256],
-                        'quantity': int(item.quantidade),
-                        'unit_price': float(produto.preco),
-                        'currency_id': 'BRL',
-                        'category_id': produto.categoria if hasattr(produto, 'categoria') else 'produtos'
-                    })
+        # Usar o snapshot do carrinho da requisição (montado uma única vez)
+        if snapshot is None:
+            snapshot = obter_snapshot_carrinho(user_id)
+        
+        for linha in snapshot.regulares:
+            # Validar dados antes de adicionar
+            if linha.preco <= 0:
+                logger.warning(f"Produto {linha.id} tem preço inválido: {linha.preco}")
+                continue
             
-            # Buscar bolos personalizados
-            bolos_personalizados = CarrinhoBoloPersonalizado.query.filter_by(usuario_id=user_id).all()
-            for item in bolos_personalizados:
-                bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-                if bolo:
-                    # Validar dados antes de adicionar
-                    if bolo.preco <= 0:
-                        logger.warning(f"Bolo personalizado {bolo.id} tem preço inválido: {bolo.preco}")
-                        continue
-                    
-                    # Descrição mais detalhada do bolo personalizado
-                    descricao = f"Bolo Personalizado - Massa: {bolo.massa.capitalize()}"
-                    if bolo.recheios:
-                        descricao += f", Recheios: {bolo.recheios}"
-                    if bolo.cobertura:
-                        descricao += f", Cobertura: {bolo.cobertura}"
-                    if hasattr(bolo, 'finalizacao') and bolo.finalizacao:
-                        descricao += f", Finalização: {bolo.finalizacao}"
-                    if hasattr(bolo, 'observacoes') and bolo.observacoes:
-                        descricao += f", Obs: {bolo.observacoes}"
-                    
-                    items.append({
-                        'id': str(bolo.id),
-                        'title': 'Bolo Personalizado',
-                        'description': descricao[:256],  # Limitar tamanho da descrição
-                        'quantity': int(item.quantidade),
-                        'unit_price': float(bolo.preco),
-                        'currency_id': 'BRL',
-                        'category_id': 'bolos_personalizados'
-                    })
-        else:
-            # Buscar itens da sessão (usuário não logado)
-            if 'carrinho' in session and session['carrinho']:
-                for item_id, item in session['carrinho'].items():
-                    if item['preco'] <= 0:
-                        logger.warning(f"Item da sessão {item_id} tem preço inválido: {item['preco']}")
-                        continue
-                    
-                    # Melhorar descrição do item da sessão
-                    descricao_detalhada = f"Produto: {item['nome']}"
-                    if 'descricao' in item and item['descricao']:
-                        descricao_detalhada += f" - {item['descricao']}"
-                    if 'categoria' in item and item['categoria']:
-                        descricao_detalhada += f" - Categoria: {item['categoria']}"
-                    
-                    items.append({
-                        'id': str(item['id']),
-                        'title': item['nome'][:256],
-                        'description': descricao_detalhada[:256],
-                        'quantity': int(item['quantidade']),
-                        'unit_price': float(item['preco']),
-                        'currency_id': 'BRL',
-                        'category_id': item.get('categoria', 'produtos')
-                    })
+            # Melhorar descrição do item com mais detalhes
+            descricao_detalhada = f"Produto: {linha.nome}"
+            if linha.descricao:
+                descricao_detalhada += f" - {linha.descricao}"
+            if linha.categoria:
+                descricao_detalhada += f" - Categoria: {linha.categoria}"
             
-            if 'carrinho_personalizado' in session and session['carrinho_personalizado']:
-                for item_id, item in session['carrinho_personalizado'].items():
-                    if item['preco'] <= 0:
-                        logger.warning(f"Bolo personalizado da sessão {item_id} tem preço inválido: {item['preco']}")
-                        continue
-                    
-                    # Descrição mais detalhada do bolo personalizado da sessão
-                    descricao = f"Bolo Personalizado - Massa: {item.get('massa', '').capitalize()}"
-                    if 'recheios' in item and item['recheios']:
-                        descricao += f", Recheios: {item['recheios']}"
-                    if 'cobertura' in item and item['cobertura']:
-                        descricao += f", Cobertura: {item['cobertura']}"
-                    if 'finalizacao' in item and item['finalizacao']:
-                        descricao += f", Finalização: {item['finalizacao']}"
-                    if 'observacoes' in item and item['observacoes']:
-                        descricao += f", Obs: {item['observacoes']}"
-                        
-                    items.append({
-                        'id': str(item['id']),
-                        'title': 'Bolo Personalizado',
-                        'description': descricao[:256],
-                        'quantity': int(item['quantidade']),
-                        'unit_price': float(item['preco']),
-                        'currency_id': 'BRL',
-                        'category_id': 'bolos_personalizados'
-                    })
+            items.append({
+                'id': str(linha.id),
+                'title': linha.nome[:256],  # Limitar tamanho do título
+                'description': descricao_detalhada[:256],
+                'quantity': linha.quantidade,
+                'unit_price': float(linha.preco),
+                'currency_id': 'BRL',
+                'category_id': linha.categoria or 'produtos'
+            })
+        
+        for linha in snapshot.personalizados:
+            # Validar dados antes de adicionar
+            if linha.preco <= 0:
+                logger.warning(f"Bolo personalizado {linha.id} tem preço inválido: {linha.preco}")
+                continue
+            
+            # Descrição mais detalhada do bolo personalizado
+            descricao = f"Bolo Personalizado - Massa: {(linha.massa or '').capitalize()}"
+            if linha.recheios:
+                descricao += f", Recheios: {linha.recheios}"
+            if linha.cobertura:
+                descricao += f", Cobertura: {linha.cobertura}"
+            if linha.finalizacao:
+                descricao += f", Finalização: {linha.finalizacao}"
+            if linha.observacoes:
+                descricao += f", Obs: {linha.observacoes}"
+            
+            items.append({
+                'id': str(linha.id),
+                'title': 'Bolo Personalizado',
+                'description': descricao[:256],  # Limitar tamanho da descrição
+                'quantity': linha.quantidade,
+                'unit_price': float(linha.preco),
+                'currency_id': 'BRL',
+                'category_id': 'bolos_personalizados'
+            })
         
         # Adicionar taxa de entrega se a opção for 'delivery'
         # Quando adiciona a taxa de entrega
        # Modificação na função create_mercadopago_preference
-        if delivery_option and str(delivery_option).lower().strip() in ['delivery', 'frete', 'entrega']:
+        if is_entrega(delivery_option):
         # Simplificar e tornar mais explícito o item de entrega
             items.append({
         'id': 'delivery_fee',
         'title': 'Taxa de Entrega',
         'description': 'Taxa de entrega em domicílio',
         'quantity': 1,
-        'unit_price': 12.00,  # Garantir que é float
+        'unit_price': float(TAXA_ENTREGA),  # Garantir que é float
         'currency_id': 'BRL'
         })
-        logger.info("Taxa de entrega de R$ 12,00 adicionada ao pedido")
+            logger.info(f"Taxa de entrega de R$ {TAXA_ENTREGA} adicionada ao pedido")
         
         if not items:
             return None, "Não há itens no carrinho"
@@ -166,10 +121,6 @@ def create_mercadopago_preference(user_id, success_url, failure_url, pending_url
         if not success_url or not failure_url or not pending_url:
             return None, "URLs de retorno não foram definidas corretamente"
         
-        # Configurar SDK do MercadoPago
-        access_token = current_app.config.get('MERCADO_PAGO_ACCESS_TOKEN') or "APP_USR-3186829371371378-033109-bd70da5615618f6121a56627b441334a-2363984332"
-        sdk = mercadopago.SDK(access_token)
-        
         # Criar preferência de pagamento com informações mais detalhadas
         preference_data = {
     "items": items,
@@ -187,7 +138,7 @@ def create_mercadopago_preference(user_id, success_url, failure_url, pending_url
     },
     "metadata": {
         "delivery_option": delivery_option,
-        "delivery_fee": "12.00" if delivery_option == 'delivery' else "0.00",
+        "delivery_fee": str(TAXA_ENTREGA) if is_entrega(delivery_option) else "0.00",
         "store_name": "Doce Sonho Confeitaria",
         "order_type": "website",
         "items_count": len(items)
@@ -198,15 +149,12 @@ def create_mercadopago_preference(user_id, success_url, failure_url, pending_url
     # "shipments": {...}
 }
         
-        # Remover notification_url se não estiver configurado
         # Adicionar notification_url apenas se estiver configurado
-        notification_url = current_app.config.get('MERCADO_PAGO_NOTIFICATION_URL')
-        if notification_url:
-            preference_data["notification_url"] = notification_url
+        _anexar_notificacao(preference_data, rascunho)
         
         logger.info(f"Dados da preferência: {preference_data}")
         
-        preference_response = sdk.preference().create(preference_data)
+        preference_response = mercado_pago.criar_preferencia(preference_data)
         
         # Log da resposta completa para debug
         logger.info(f"Resposta do Mercado Pago: {preference_response}")
@@ -236,12 +184,15 @@ def create_mercadopago_preference(user_id, success_url, failure_url, pending_url
             logger.error(f"Resposta não contém init_point: {preference}")
             return None, "Não foi possível obter o link de pagamento"
     
+    except GatewayIndisponivel:
+        # Sem novas tentativas com outros formatos: o provedor está fora do ar ou lento
+        raise
     except Exception as e:
         logger.error(f"Erro ao criar preferência de pagamento: {str(e)}")
         return None, f"Erro ao criar preferência de pagamento: {str(e)}"
 
 
-def create_mercadopago_preference_simple(user_id, success_url, failure_url, pending_url, delivery_option=None):
+def create_mercadopago_preference_simple(user_id, success_url, failure_url, pending_url, delivery_option=None, snapshot=None, rascunho=None):
     """
     Versão simplificada e mais robusta da função de criação de preferência.
     """
@@ -249,43 +200,40 @@ def create_mercadopago_preference_simple(user_id, success_url, failure_url, pend
         # Buscar itens do carrinho
         items = []
         
-        if user_id:
-            # Produtos regulares
-            itens_regulares = CarrinhoItem.query.filter_by(usuario_id=user_id).all()
-            for item in itens_regulares:
-                produto = Produto.query.get(item.produto_id)
-                if produto and produto.preco > 0:
-                    items.append({
-                        'id': str(produto.id),
-                        'title': produto.nome[:256],  # Limitar tamanho do título
-                        'quantity': int(item.quantidade),
-                        'unit_price': float(produto.preco),
-                        'currency_id': 'BRL'
-                    })
-            
-            # Bolos personalizados
-            bolos_personalizados = CarrinhoBoloPersonalizado.query.filter_by(usuario_id=user_id).all()
-            for item in bolos_personalizados:
-                bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-                if bolo and bolo.preco > 0:
-                    items.append({
-                        'id': f"bolo_{bolo.id}",
-                        'title': f"Bolo Personalizado - {bolo.massa}",
-                        'quantity': int(item.quantidade),
-                        'unit_price': float(bolo.preco),
-                        'currency_id': 'BRL'
-                    })
+        # Usar o snapshot do carrinho da requisição (montado uma única vez)
+        if snapshot is None:
+            snapshot = obter_snapshot_carrinho(user_id)
+        
+        for linha in snapshot.linhas:
+            if linha.preco <= 0:
+                continue
+            if linha.tipo == 'regular':
+                items.append({
+                    'id': str(linha.id),
+                    'title': linha.nome[:256],  # Limitar tamanho do título
+                    'quantity': linha.quantidade,
+                    'unit_price': float(linha.preco),
+                    'currency_id': 'BRL'
+                })
+            else:
+                items.append({
+                    'id': f"bolo_{linha.id}",
+                    'title': f"Bolo Personalizado - {linha.massa}",
+                    'quantity': linha.quantidade,
+                    'unit_price': float(linha.preco),
+                    'currency_id': 'BRL'
+                })
         
         # Adicionar taxa de entrega se a opção for 'delivery'
-        if delivery_option and str(delivery_option).lower().strip() in ['delivery', 'frete', 'entrega']:
+        if is_entrega(delivery_option):
             items.append({
                 'id': 'delivery_fee',
                 'title': 'Taxa de Entrega',
                 'quantity': 1,
-                'unit_price': 12.00,
+                'unit_price': float(TAXA_ENTREGA),
                 'currency_id': 'BRL'
             })
-            logger.info("Taxa de entrega de R$ 12,00 adicionada ao pedido (versão simples)")
+            logger.info(f"Taxa de entrega de R$ {TAXA_ENTREGA} adicionada ao pedido (versão simples)")
         
         if not items:
             return None, "Carrinho vazio"
@@ -294,9 +242,6 @@ def create_mercadopago_preference_simple(user_id, success_url, failure_url, pend
         if not all([success_url, failure_url, pending_url]):
             return None, "URLs de retorno inválidas"
         
-        # Configurar SDK
-        sdk = mercadopago.SDK("APP_USR-3186829371371378-033109-bd70da5615618f6121a56627b441334a-2363984332")
-        
         # Dados da preferência (versão mais simples e corrigida)
         preference_data = {
             "items": items,
@@ -313,14 +258,16 @@ def create_mercadopago_preference_simple(user_id, success_url, failure_url, pend
             # Adicionar informações sobre a entrega nos metadados
             "metadata": {
                 "delivery_option": delivery_option or "pickup",
-                "delivery_fee": "12.00" if delivery_option == 'delivery' else "0.00"
+                "delivery_fee": str(TAXA_ENTREGA) if is_entrega(delivery_option) else "0.00"
             }
         }
         
+        _anexar_notificacao(preference_data, rascunho)
+        
         logger.info(f"Criando preferência com dados: {preference_data}")
         
         # Criar preferência
-        result = sdk.preference().create(preference_data)
+        result = mercado_pago.criar_preferencia(preference_data)
         
         logger.info(f"Resultado da criação: {result}")
         
@@ -341,12 +288,15 @@ def create_mercadopago_preference_simple(user_id, success_url, failure_url, pend
                     error_msg = result["response"]["cause"]
             return None, f"Erro {result['status']}: {error_msg}"
             
+    except GatewayIndisponivel:
+        # Sem novas tentativas com outros formatos: o provedor está fora do ar ou lento
+        raise
     except Exception as e:
         logger.error(f"Erro na criação da preferência: {str(e)}")
         return None, f"Erro interno: {str(e)}"
 
 
-def create_mercadopago_preference_minimal(user_id, success_url, failure_url, pending_url, delivery_option=None):
+def create_mercadopago_preference_minimal(user_id, success_url, failure_url, pending_url, delivery_option=None, snapshot=None, rascunho=None):
     """
     Versão minimalista para testes - apenas com campos obrigatórios.
     """
@@ -354,47 +304,37 @@ def create_mercadopago_preference_minimal(user_id, success_url, failure_url, pen
         # Buscar itens do carrinho
         items = []
         
-        if user_id:
-            # Produtos regulares
-            itens_regulares = CarrinhoItem.query.filter_by(usuario_id=user_id).all()
-            for item in itens_regulares:
-                produto = Produto.query.get(item.produto_id)
-                if produto and produto.preco > 0:
-                    items.append({
-                        'title': produto.nome[:256],
-                        'quantity': int(item.quantidade),
-                        'unit_price': float(produto.preco),
-                        'currency_id': 'BRL'
-                    })
-            
-            # Bolos personalizados
-            bolos_personalizados = CarrinhoBoloPersonalizado.query.filter_by(usuario_id=user_id).all()
-            for item in bolos_personalizados:
-                bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-                if bolo and bolo.preco > 0:
-                    items.append({
-                        'title': f"Bolo Personalizado - {bolo.massa}",
-                        'quantity': int(item.quantidade),
-                        'unit_price': float(bolo.preco),
-                        'currency_id': 'BRL'
-                    })
+        # Usar o snapshot do carrinho da requisição (montado uma única vez)
+        if snapshot is None:
+            snapshot = obter_snapshot_carrinho(user_id)
+        
+        for linha in snapshot.linhas:
+            if linha.preco <= 0:
+                continue
+            if linha.tipo == 'regular':
+                title = linha.nome[:256]
+            else:
+                title = f"Bolo Personalizado - {linha.massa}"
+            items.append({
+                'title': title,
+                'quantity': linha.quantidade,
+                'unit_price': float(linha.preco),
+                'currency_id': 'BRL'
+            })
         
         # Adicionar taxa de entrega se a opção for 'delivery'
-        if delivery_option and str(delivery_option).lower().strip() in ['delivery', 'frete', 'entrega']:
+        if is_entrega(delivery_option):
             items.append({
                 'title': 'Taxa de Entrega',
                 'quantity': 1,
-                'unit_price': 12.00,
+                'unit_price': float(TAXA_ENTREGA),
                 'currency_id': 'BRL'
             })
-            logger.info("Taxa de entrega de R$ 12,00 adicionada ao pedido (versão minimal)")
+            logger.info(f"Taxa de entrega de R$ {TAXA_ENTREGA} adicionada ao pedido (versão minimal)")
         
         if not items:
             return None, "Carrinho vazio"
         
-        # Configurar SDK
-        sdk = mercadopago.SDK("APP_USR-3186829371371378-033109-bd70da5615618f6121a56627b441334a-2363984332")
-        
         # Dados da preferência minimalista
         preference_data = {
             "items": items,
@@ -405,10 +345,12 @@ def create_mercadopago_preference_minimal(user_id, success_url, failure_url, pen
             }
         }
         
+        _anexar_notificacao(preference_data, rascunho)
+        
         logger.info(f"Criando preferência minimalista: {preference_data}")
         
         # Criar preferência
-        result = sdk.preference().create(preference_data)
+        result = mercado_pago.criar_preferencia(preference_data)
         
         logger.info(f"Resultado da criação minimalista: {result}")
         
@@ -429,6 +371,9 @@ def create_mercadopago_preference_minimal(user_id, success_url, failure_url, pen
                     error_msg = result["response"]["cause"]
             return None, f"Erro {result['status']}: {error_msg}"
             
+    except GatewayIndisponivel:
+        # Sem novas tentativas com outros formatos: o provedor está fora do ar ou lento
+        raise
     except Exception as e:
         logger.error(f"Erro na criação da preferência minimalista: {str(e)}")
         return None, f"Erro interno: {str(e)}"
@@ -442,11 +387,8 @@ def validate_mercadopago_config():
         Tuple (is_valid, error_message)
     """
     try:
-        access_token = current_app.config.get('MERCADO_PAGO_ACCESS_TOKEN') or "APP_USR-3186829371371378-033109-bd70da5615618f6121a56627b441334a-2363984332"
-        sdk = mercadopago.SDK(access_token)
-        
         # Testar conectividade com uma requisição simples
-        response = sdk.preference().search()
+        response = mercado_pago.buscar_preferencias(limit=1)
         
         if response.get("status") == 200:
             return True, None
@@ -457,51 +399,28 @@ def validate_mercadopago_config():
         return False, f"Erro ao validar configuração do Mercado Pago: {str(e)}"
 
 
-def calculate_total_with_delivery(user_id, delivery_option=None):
+def calculate_total_with_delivery(user_id, delivery_option=None, snapshot=None):
     """
     Calcula o total do carrinho incluindo a taxa de entrega se aplicável.
     
     Args:
         user_id: ID do usuário
         delivery_option: Opção de entrega ('delivery' para entrega em casa, 'pickup' para retirada)
+        snapshot: CartSnapshot já montado na requisição (opcional)
         
     Returns:
         float: Total do carrinho com ou sem taxa de entrega
     """
-    total = 0.0
-    
     try:
-        if user_id:
-            # Produtos regulares
-            itens_regulares = CarrinhoItem.query.filter_by(usuario_id=user_id).all()
-            for item in itens_regulares:
-                produto = Produto.query.get(item.produto_id)
-                if produto and produto.preco > 0:
-                    total += float(produto.preco) * item.quantidade
-            
-            # Bolos personalizados
-            bolos_personalizados = CarrinhoBoloPersonalizado.query.filter_by(usuario_id=user_id).all()
-            for item in bolos_personalizados:
-                bolo = BoloPersonalizado.query.get(item.bolo_personalizado_id)
-                if bolo and bolo.preco > 0:
-                    total += float(bolo.preco) * item.quantidade
-        else:
-            # Calcular da sessão (usuário não logado)
-            if 'carrinho' in session and session['carrinho']:
-                for item in session['carrinho'].values():
-                    if item['preco'] > 0:
-                        total += float(item['preco']) * item['quantidade']
-            
-            if 'carrinho_personalizado' in session and session['carrinho_personalizado']:
-                for item in session['carrinho_personalizado'].values():
-                    if item['preco'] > 0:
-                        total += float(item['preco']) * item['quantidade']
+        # Usar o snapshot do carrinho da requisição (montado uma única vez)
+        if snapshot is None:
+            snapshot = obter_snapshot_carrinho(user_id)
         
-        # Adicionar taxa de entrega se a opção for 'delivery'
-        # No código Python, aceitar ambos os valores:
-        if delivery_option and str(delivery_option).lower().strip() in ['delivery', 'frete', 'entrega']:
-            total += 12.00
-            logger.info(f"Taxa de entrega de R$ 12,00 adicionada ao total. Total final: R$ {total:.2f}")
+        subtotal = sum((linha.subtotal for linha in snapshot.linhas if linha.preco > 0), Decimal('0.00'))
+        total = float(subtotal + snapshot.taxa_entrega(delivery_option))
+        
+        if is_entrega(delivery_option):
+            logger.info(f"Taxa de entrega de R$ {TAXA_ENTREGA} adicionada ao total. Total final: R$ {total:.2f}")
         
         return total
         
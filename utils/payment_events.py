@@ -0,0 +1,427 @@
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models.models import (Pedido, ItemPedido, ItemPedidoPersonalizado, Produto, BoloPersonalizado,
+                           CarrinhoItem, CarrinhoBoloPersonalizado, PedidoStatusHistorico, EventoPagamento,
+                           RascunhoPedido)
+from utils.payment_gateway import mercado_pago
+from utils.checkout_draft import carregar_rascunho, dados_rascunho
+
+logger = logging.getLogger(__name__)
+
+STATUS_APROVADO = 'approved'
+
+# Situações em que o pagamento ainda vai mudar (o Mercado Pago envia outra notificação)
+STATUS_EM_ANDAMENTO = {'pending', 'in_process', 'authorized', 'in_mediation'}
+
+# Status do pedido criado por um pagamento aprovado; se o valor pago diferir do total do
+# rascunho o pedido fica pendente até a conferência do admin
+STATUS_PEDIDO_APROVADO = 'Aprovado'
+STATUS_PEDIDO_DIVERGENTE = 'Pendente'
+
+
+class DadosPedidoInvalidos(Exception):
+    """O pagamento não traz dados de pedido utilizáveis; repetir não resolve"""
+
+
+def assinatura_valida(cabecalho, request_id, data_id, segredo):
+    """
+    Confere o cabeçalho x-signature de uma notificação do Mercado Pago.
+
+    O cabeçalho tem o formato "ts=<timestamp>,v1=<hmac>"; o HMAC-SHA256 é calculado com a
+    chave secreta sobre o manifesto "id:<data.id>;request-id:<x-request-id>;ts:<ts>;".
+    """
+    partes = dict(item.strip().split('=', 1) for item in (cabecalho or '').split(',') if '=' in item)
+    ts = partes.get('ts')
+    recebido = partes.get('v1')
+    if not ts or not recebido:
+        return False
+
+    manifesto = f'id:{str(data_id).lower()};'
+    if request_id:
+        manifesto += f'request-id:{request_id};'
+    manifesto += f'ts:{ts};'
+    esperado = hmac.new(segredo.encode(), manifesto.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(esperado, recebido)
+
+
+def extrair_pagamento_id(args, corpo):
+    """
+    ID do pagamento de uma notificação (webhook ou IPN) ou None para outros tópicos.
+
+    Aceita o formato atual (type=payment&data.id=..., ou o mesmo no corpo JSON) e o
+    formato IPN antigo (topic=payment&id=...).
+    """
+    corpo = corpo if isinstance(corpo, dict) else {}
+    tipo = args.get('type') or args.get('topic') or corpo.get('type') or corpo.get('topic')
+    if tipo != 'payment':
+        return None
+    pagamento_id = args.get('data.id') or (corpo.get('data') or {}).get('id') or args.get('id')
+    return str(pagamento_id) if pagamento_id else None
+
+
+def _dados_do_pagamento(pagamento):
+    """Rascunho do pedido indicado pelo pagamento e seus dados"""
+    metadata = pagamento.get('metadata') or {}
+    rascunho = carregar_rascunho(metadata.get('rascunho') or pagamento.get('external_reference'))
+    if not rascunho:
+        raise DadosPedidoInvalidos('Rascunho do pedido não encontrado para o pagamento')
+    return rascunho, dados_rascunho(rascunho)
+
+
+def materializar_pedido(pagamento_id, pagamento):
+    """
+    Cria o pedido aprovado, seus itens e o histórico a partir de um pagamento.
+    Se transaction_amount diferir do total do rascunho o pedido é criado como
+    'Pendente', com a divergência registrada no histórico.
+
+    É idempotente: se o pagamento já gerou um pedido ele é devolvido sem alterações
+    (e o índice único de mercado_pago_transaction_id impede duplicidade entre processos).
+    Produtos e bolos são carregados em uma consulta por tabela. Não faz commit.
+
+    Args:
+        pagamento_id: ID do pagamento no Mercado Pago
+        pagamento: Corpo de GET /v1/payments/<id>, com o código do rascunho em metadata.rascunho
+            (ou external_reference)
+
+    Returns:
+        Tupla (pedido, criado_agora)
+
+    Raises:
+        DadosPedidoInvalidos: rascunho não encontrado
+    """
+    existente = Pedido.query.filter_by(mercado_pago_transaction_id=pagamento_id).first()
+    if existente:
+        return existente, False
+
+    rascunho, dados = _dados_do_pagamento(pagamento)
+    usuario_id = int(dados['usuario_id'])
+
+    itens_regulares = dados.get('itens_regulares') or []
+    itens_personalizados = dados.get('itens_personalizados') or []
+
+    ids_produtos = {int(item['produto_id']) for item in itens_regulares}
+    ids_bolos = {int(item['bolo_personalizado_id']) for item in itens_personalizados}
+    produtos = {p.id: p for p in Produto.query.filter(Produto.id.in_(ids_produtos))} if ids_produtos else {}
+    bolos = {b.id: b for b in BoloPersonalizado.query.filter(BoloPersonalizado.id.in_(ids_bolos))} if ids_bolos else {}
+
+    total = float(dados.get('total') or 0)
+    valor_pago = pagamento.get('transaction_amount')
+    divergencia = None
+    if valor_pago is not None and abs(float(valor_pago) - total) > 0.01:
+        divergencia = f'Valor pago R$ {float(valor_pago):.2f} difere do total R$ {total:.2f}; conferir antes de preparar'
+
+    pedido = Pedido(
+        usuario_id=usuario_id,
+        status=STATUS_PEDIDO_DIVERGENTE if divergencia else STATUS_PEDIDO_APROVADO,
+        tipo_entrega=dados.get('tipo_entrega'),
+        valor_frete=float(dados.get('valor_frete') or 0),
+        endereco_entrega=json.dumps(dados['endereco_entrega']) if dados.get('endereco_entrega') else None,
+        observacoes=dados.get('observacoes'),
+        total=total,
+        mercado_pago_transaction_id=pagamento_id
+    )
+    db.session.add(pedido)
+    db.session.flush()
+
+    PedidoStatusHistorico.registrar(pedido_id=pedido.id, status_novo=pedido.status, usuario_id=usuario_id,
+                                    observacao=divergencia)
+    rascunho.status = RascunhoPedido.STATUS_CONCLUIDO
+    rascunho.pedido_id = pedido.id
+
+    itens = []
+    for item in itens_regulares:
+        produto = produtos.get(int(item['produto_id']))
+        if produto:
+            itens.append(ItemPedido(pedido_id=pedido.id, produto_id=produto.id,
+                                    quantidade=int(item['quantidade']), preco_unitario=produto.preco))
+    for item in itens_personalizados:
+        bolo = bolos.get(int(item['bolo_personalizado_id']))
+        if bolo:
+            itens.append(ItemPedidoPersonalizado(pedido_id=pedido.id, bolo_personalizado_id=bolo.id,
+                                                 quantidade=int(item['quantidade']), preco_unitario=bolo.preco))
+    db.session.add_all(itens)
+
+    # Retirar do carrinho apenas o que foi pago (o usuário pode ter adicionado itens depois)
+    if produtos:
+        CarrinhoItem.query.filter(
+            CarrinhoItem.usuario_id == usuario_id, CarrinhoItem.produto_id.in_(list(produtos))
+        ).delete(synchronize_session=False)
+    if bolos:
+        CarrinhoBoloPersonalizado.query.filter(
+            CarrinhoBoloPersonalizado.usuario_id == usuario_id,
+            CarrinhoBoloPersonalizado.bolo_personalizado_id.in_(list(bolos))
+        ).delete(synchronize_session=False)
+
+    if divergencia:
+        logger.warning(f"Pedido #{pedido.id}: {divergencia}")
+
+    return pedido, True
+
+
+class PaymentEvents:
+    """
+    Fila persistente das notificações de pagamento, processada por uma thread em segundo plano.
+
+    O webhook apenas grava o ID do pagamento na tabela evento_pagamento e responde na hora.
+    O worker consulta o pagamento na API (a notificação em si não é confiável) e, se ele
+    foi aprovado, cria o pedido com materializar_pedido. Eventos são reservados com um
+    prazo: se o processo cair no meio, outro worker os retoma depois de `tempo_reserva`.
+    Falhas são reagendadas com backoff exponencial.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.segredo = None
+        self.tamanho_lote = 20
+        self.intervalo = 5.0
+        self.max_tentativas = 8
+        self.worker_habilitado = True
+        self.backoff_base = 15
+        self.backoff_maximo = 1800
+        self.tempo_reserva = timedelta(minutes=5)
+        self._thread = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MERCADO_PAGO_WEBHOOK_SECRET', None)
+        app.config.setdefault('PAGAMENTOS_WORKER', True)
+        app.config.setdefault('PAGAMENTOS_INTERVALO', 5.0)
+        app.config.setdefault('PAGAMENTOS_TAMANHO_LOTE', 20)
+        app.config.setdefault('PAGAMENTOS_MAX_TENTATIVAS', 8)
+
+        self.app = app
+        self.segredo = app.config['MERCADO_PAGO_WEBHOOK_SECRET']
+        self.worker_habilitado = bool(app.config['PAGAMENTOS_WORKER'])
+        self.intervalo = float(app.config['PAGAMENTOS_INTERVALO'])
+        self.tamanho_lote = int(app.config['PAGAMENTOS_TAMANHO_LOTE'])
+        self.max_tentativas = int(app.config['PAGAMENTOS_MAX_TENTATIVAS'])
+
+        app.extensions['payment_events'] = self
+        app.cli.add_command(processar_pagamentos_command)
+
+    def verificar_assinatura(self, cabecalho, request_id, data_id):
+        """Sem MERCADO_PAGO_WEBHOOK_SECRET configurado toda notificação é aceita (o pagamento é consultado na API)"""
+        if not self.segredo:
+            return True
+        return assinatura_valida(cabecalho, request_id, data_id, self.segredo)
+
+    def enfileirar(self, pagamento_id, origem='webhook'):
+        """
+        Registra o pagamento para processamento. Notificações repetidas de um pagamento
+        que ainda está na fila são ignoradas. Faz commit na sessão atual.
+        """
+        pagamento_id = str(pagamento_id).strip()
+        na_fila = db.session.query(EventoPagamento.id).filter(
+            EventoPagamento.pagamento_id == pagamento_id,
+            EventoPagamento.status.in_([EventoPagamento.STATUS_PENDENTE, EventoPagamento.STATUS_PROCESSANDO])
+        ).first()
+        if not na_fila:
+            db.session.add(EventoPagamento(pagamento_id=pagamento_id, origem=origem))
+            db.session.commit()
+
+        if self.worker_habilitado:
+            self._iniciar_worker()
+            self._acordar.set()
+
+    @staticmethod
+    def _disponiveis(agora):
+        # Pendentes vencidos ou reservas abandonadas por um worker que parou
+        return and_(
+            EventoPagamento.status.in_([EventoPagamento.STATUS_PENDENTE, EventoPagamento.STATUS_PROCESSANDO]),
+            EventoPagamento.proxima_tentativa <= agora
+        )
+
+    def _reservar_lote(self):
+        """Reserva um lote de eventos; cada um é tomado com um UPDATE condicional (seguro entre processos)"""
+        agora = datetime.utcnow()
+        ids = [id_ for (id_,) in db.session.query(EventoPagamento.id)
+               .filter(self._disponiveis(agora))
+               .order_by(EventoPagamento.proxima_tentativa)
+               .limit(self.tamanho_lote)]
+
+        reservados = []
+        for evento_id in ids:
+            tomado = EventoPagamento.query.filter(EventoPagamento.id == evento_id, self._disponiveis(agora)).update(
+                {'status': EventoPagamento.STATUS_PROCESSANDO, 'proxima_tentativa': agora + self.tempo_reserva},
+                synchronize_session=False
+            )
+            if tomado:
+                reservados.append(evento_id)
+        db.session.commit()
+        return reservados
+
+    def _calcular_backoff(self, tentativas):
+        espera = min(self.backoff_base * (2 ** (tentativas - 1)), self.backoff_maximo)
+        return espera + random.uniform(0, espera * 0.1)
+
+    def _processar(self, evento_id):
+        evento = db.session.get(EventoPagamento, evento_id)
+        try:
+            resposta = mercado_pago.buscar_pagamento(evento.pagamento_id)
+            if resposta['status'] != 200:
+                raise RuntimeError(f"Consulta do pagamento retornou HTTP {resposta['status']}")
+
+            pagamento = resposta['response']
+            evento.status_pagamento = pagamento.get('status')
+            pedido = None
+            criado = False
+            if evento.status_pagamento == STATUS_APROVADO:
+                pedido, criado = materializar_pedido(evento.pagamento_id, pagamento)
+                evento.pedido_id = pedido.id
+                evento.status = EventoPagamento.STATUS_PROCESSADO
+            else:
+                evento.status = EventoPagamento.STATUS_IGNORADO
+
+            evento.tentativas += 1
+            evento.ultimo_erro = None
+            evento.data_processamento = datetime.utcnow()
+            db.session.commit()
+
+            if criado:
+                self._pedido_criado(pedido)
+            return evento.status
+
+        except IntegrityError as e:
+            db.session.rollback()
+            evento = db.session.get(EventoPagamento, evento_id)
+            pedido = Pedido.query.filter_by(mercado_pago_transaction_id=evento.pagamento_id).first()
+            if pedido is None:
+                # Outra restrição violada: o pedido não foi criado, então o evento volta para a fila
+                return self._registrar_falha(evento, e)
+
+            # Outro worker criou o pedido deste pagamento ao mesmo tempo
+            evento.pedido_id = pedido.id
+            evento.status = EventoPagamento.STATUS_PROCESSADO
+            evento.tentativas += 1
+            evento.ultimo_erro = None
+            evento.data_processamento = datetime.utcnow()
+            db.session.commit()
+            return evento.status
+
+        except Exception as e:
+            db.session.rollback()
+            return self._registrar_falha(db.session.get(EventoPagamento, evento_id), e)
+
+    def _registrar_falha(self, evento, erro):
+        """Reagenda o evento com backoff ou o marca como falho (dados inválidos ou tentativas esgotadas)"""
+        evento.tentativas += 1
+        evento.ultimo_erro = str(erro)[:500]
+        if isinstance(erro, DadosPedidoInvalidos) or evento.tentativas >= self.max_tentativas:
+            evento.status = EventoPagamento.STATUS_FALHOU
+        else:
+            evento.status = EventoPagamento.STATUS_PENDENTE
+            evento.proxima_tentativa = datetime.utcnow() + timedelta(seconds=self._calcular_backoff(evento.tentativas))
+        db.session.commit()
+        logger.error(f"Erro ao processar o pagamento {evento.pagamento_id} (tentativa {evento.tentativas}): {erro}")
+        return evento.status
+
+    def _pedido_criado(self, pedido):
+        # Imports dentro da função para evitar importação circular
+        from utils.helpers import registrar_log
+        from utils.preference_cache import preference_cache
+
+        preference_cache.invalidar(pedido.usuario_id)
+        descricao = f"Pedido #{pedido.id} criado e aprovado pelo pagamento {pedido.mercado_pago_transaction_id}. Total: R$ {pedido.total:.2f}"
+        if pedido.valor_frete:
+            descricao += f" (inclui frete de R$ {pedido.valor_frete:.2f})"
+        registrar_log(tipo='pagamento_aprovado', descricao=descricao, usuario_id=pedido.usuario_id)
+
+    def processar_lote(self):
+        """
+        Processa um lote de eventos vencidos.
+
+        Returns:
+            int: Quantidade de eventos processados
+        """
+        ids = self._reservar_lote()
+        for evento_id in ids:
+            self._processar(evento_id)
+        return len(ids)
+
+    def processar_pendentes(self):
+        """Processa a fila até não restarem eventos vencidos"""
+        total = 0
+        while True:
+            processados = self.processar_lote()
+            if not processados:
+                return total
+            total += processados
+
+    def situacao(self, pagamento_id, usuario_id):
+        """
+        Situação de um pagamento para a página de retorno (consultada por polling).
+
+        Returns:
+            Dicionário com 'situacao' ('aprovado', 'processando', 'pendente', 'recusado'
+            ou 'falhou') e, quando aprovado, 'pedido_id'
+        """
+        pagamento_id = str(pagamento_id)
+        pedido = db.session.query(Pedido.id).filter_by(
+            mercado_pago_transaction_id=pagamento_id, usuario_id=usuario_id
+        ).first()
+        if pedido:
+            return {'situacao': 'aprovado', 'pedido_id': pedido.id}
+
+        evento = EventoPagamento.query.filter_by(pagamento_id=pagamento_id).order_by(EventoPagamento.id.desc()).first()
+        if evento is None or evento.status in (EventoPagamento.STATUS_PENDENTE, EventoPagamento.STATUS_PROCESSANDO):
+            return {'situacao': 'processando'}
+        if evento.status == EventoPagamento.STATUS_IGNORADO:
+            return {'situacao': 'pendente' if evento.status_pagamento in STATUS_EM_ANDAMENTO else 'recusado'}
+        return {'situacao': 'falhou'}
+
+    def estatisticas(self):
+        linhas = db.session.query(EventoPagamento.status, db.func.count(EventoPagamento.id)).group_by(EventoPagamento.status).all()
+        return {status: total for status, total in linhas}
+
+    def encerrar(self, timeout=5.0):
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._acordar.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _iniciar_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='payment-events', daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                with self.app.app_context():
+                    self.processar_pendentes()
+            except Exception as e:
+                logger.error(f"Erro no processamento da fila de pagamentos: {e}")
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+
+payment_events = PaymentEvents()
+
+
+@click.command('processar-pagamentos')
+@with_appcontext
+def processar_pagamentos_command():
+    """Processa as notificações de pagamento pendentes e encerra."""
+    total = payment_events.processar_pendentes()
+    click.echo(f'{total} evento(s) processado(s). Situação da fila: {payment_events.estatisticas()}')
@@ -0,0 +1,209 @@
+import logging
+import random
+import threading
+import time
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+API_URL_PADRAO = 'https://api.mercadopago.com'
+
+# Respostas que indicam instabilidade do provedor (podem ser repetidas)
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class GatewayIndisponivel(Exception):
+    """
+    O Mercado Pago não respondeu a tempo, retornou erro de servidor, o circuito está
+    aberto ou MERCADO_PAGO_ACCESS_TOKEN não foi configurado
+    """
+
+
+class CircuitBreaker:
+    """
+    Interrompe as chamadas a um serviço depois de falhas consecutivas.
+
+    Fechado: as chamadas passam normalmente. Após `limite_falhas` falhas seguidas o
+    circuito abre e as chamadas falham na hora durante `tempo_aberto` segundos; depois
+    disso uma única chamada de teste é liberada (meio aberto) e decide se ele fecha
+    de novo ou volta a abrir.
+    """
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio_aberto'
+
+    def __init__(self, limite_falhas=5, tempo_aberto=30):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self._estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self):
+        with self._lock:
+            if self._estado == self.ABERTO and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+                return self.MEIO_ABERTO
+            return self._estado
+
+    def permitir(self):
+        """Indica se uma chamada pode ser feita agora"""
+        with self._lock:
+            if self._estado == self.FECHADO:
+                return True
+            if self._estado == self.ABERTO:
+                if time.monotonic() - self._aberto_em < self.tempo_aberto:
+                    return False
+                self._estado = self.MEIO_ABERTO
+                self._teste_em_andamento = False
+            # Meio aberto: apenas uma chamada de teste por vez
+            if self._teste_em_andamento:
+                return False
+            self._teste_em_andamento = True
+            return True
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            self._teste_em_andamento = False
+            if self._estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                self._estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+
+class MercadoPagoClient:
+    """
+    Cliente HTTP da API do Mercado Pago compartilhado pela aplicação.
+
+    Mantém conexões keep-alive (uma sessão por thread), usa timeouts separados de
+    conexão e leitura, repete falhas transitórias com backoff exponencial e jitter
+    (com a mesma chave de idempotência) e protege os workers com um circuit breaker.
+    As respostas seguem o formato do SDK: {'status': código HTTP, 'response': JSON}.
+    """
+
+    def __init__(self, app=None):
+        self.api_url = API_URL_PADRAO
+        self.access_token = None
+        self.timeout = (3.05, 10)
+        self.tentativas = 2
+        self.backoff = 0.2
+        self.backoff_maximo = 2.0
+        self.circuito = CircuitBreaker()
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MERCADO_PAGO_API_URL', API_URL_PADRAO)
+        app.config.setdefault('MERCADO_PAGO_TIMEOUT_CONEXAO', 3.05)
+        app.config.setdefault('MERCADO_PAGO_TIMEOUT_LEITURA', 10)
+        app.config.setdefault('MERCADO_PAGO_TENTATIVAS', 2)
+        app.config.setdefault('MERCADO_PAGO_CIRCUITO_FALHAS', 5)
+        app.config.setdefault('MERCADO_PAGO_CIRCUITO_SEGUNDOS', 30)
+
+        self.api_url = app.config['MERCADO_PAGO_API_URL'].rstrip('/')
+        self.access_token = app.config.get('MERCADO_PAGO_ACCESS_TOKEN')
+        if not self.access_token:
+            logger.warning("MERCADO_PAGO_ACCESS_TOKEN não configurado: pagamentos indisponíveis")
+        self.timeout = (float(app.config['MERCADO_PAGO_TIMEOUT_CONEXAO']),
+                        float(app.config['MERCADO_PAGO_TIMEOUT_LEITURA']))
+        self.tentativas = max(1, int(app.config['MERCADO_PAGO_TENTATIVAS']))
+        self.circuito = CircuitBreaker(int(app.config['MERCADO_PAGO_CIRCUITO_FALHAS']),
+                                       float(app.config['MERCADO_PAGO_CIRCUITO_SEGUNDOS']))
+        self._local = threading.local()
+        app.extensions['mercado_pago'] = self
+
+    @property
+    def sessao(self):
+        sessao = getattr(self._local, 'sessao', None)
+        if sessao is None:
+            sessao = requests.Session()
+            sessao.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            sessao.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            sessao.headers.update({
+                'Authorization': f'Bearer {self.access_token}',
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            })
+            self._local.sessao = sessao
+        return sessao
+
+    def _espera(self, tentativa):
+        """Backoff exponencial com jitter completo, limitado a backoff_maximo"""
+        return random.uniform(0, min(self.backoff_maximo, self.backoff * (2 ** tentativa)))
+
+    def requisitar(self, metodo, caminho, **kwargs):
+        """
+        Faz uma chamada à API com timeouts, repetições e circuit breaker.
+
+        Returns:
+            Dicionário {'status': código HTTP, 'response': corpo JSON}
+
+        Raises:
+            GatewayIndisponivel: token ausente, circuito aberto, timeout, erro de conexão ou 5xx/429 persistente
+        """
+        if not self.access_token:
+            raise GatewayIndisponivel('MERCADO_PAGO_ACCESS_TOKEN não configurado')
+        if not self.circuito.permitir():
+            raise GatewayIndisponivel('Mercado Pago temporariamente indisponível')
+
+        # Mesma chave em todas as tentativas: a API não cria a preferência em duplicidade
+        cabecalhos = {'X-Idempotency-Key': uuid.uuid4().hex}
+        url = f'{self.api_url}{caminho}'
+        erro = None
+
+        for tentativa in range(self.tentativas):
+            if tentativa:
+                time.sleep(self._espera(tentativa))
+            try:
+                resposta = self.sessao.request(metodo, url, headers=cabecalhos, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                erro = f'{type(e).__name__}: {e}'
+                logger.warning(f"Mercado Pago {metodo} {caminho} falhou (tentativa {tentativa + 1}): {erro}")
+                continue
+            except Exception:
+                # Erro não recuperável: libera o circuito (inclusive uma chamada de teste em andamento)
+                self.circuito.registrar_falha()
+                raise
+
+            if resposta.status_code in STATUS_REPETIVEIS:
+                erro = f'HTTP {resposta.status_code}'
+                logger.warning(f"Mercado Pago {metodo} {caminho} retornou {resposta.status_code} (tentativa {tentativa + 1})")
+                continue
+
+            # Respostas 2xx e 4xx mostram que o serviço está respondendo
+            self.circuito.registrar_sucesso()
+            try:
+                corpo = resposta.json()
+            except ValueError:
+                corpo = {'message': resposta.text[:500]}
+            return {'status': resposta.status_code, 'response': corpo}
+
+        self.circuito.registrar_falha()
+        raise GatewayIndisponivel(f'Mercado Pago indisponível após {self.tentativas} tentativa(s): {erro}')
+
+    def criar_preferencia(self, dados):
+        return self.requisitar('POST', '/checkout/preferences', json=dados)
+
+    def buscar_preferencias(self, **filtros):
+        return self.requisitar('GET', '/checkout/preferences/search', params=filtros)
+
+    def buscar_pagamento(self, pagamento_id):
+        return self.requisitar('GET', f'/v1/payments/{pagamento_id}')
+
+    def estatisticas(self):
+        return {'circuito': self.circuito.estado, 'api_url': self.api_url}
+
+
+mercado_pago = MercadoPagoClient()
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from utils.cart_snapshot import is_entrega
+
+
+class PreferenceCache:
+    """
+    Cache em memória dos links de pagamento (init_point) criados no Mercado Pago.
+
+    Cada usuário tem no máximo uma entrada, identificada pelo hash das linhas do
+    carrinho (tipo, id, preço e quantidade), da opção de entrega e do restante do que vai
+    na preferência (URLs de retorno, dados do pedido pendente).
+    Reenviar o mesmo carrinho dentro de PREFERENCIA_CACHE_TTL segundos reaproveita o link
+    sem chamar a API. Qualquer alteração no carrinho remove a entrada na hora; em outros
+    processos o hash deixa de bater ou a entrada expira pelo TTL.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 1800
+        self.max_entradas = 10000
+        self._entradas = {}
+        self._lock = threading.Lock()
+        self._metricas = {'hits': 0, 'misses': 0, 'invalidacoes': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PREFERENCIA_CACHE_TTL', 1800)
+        self.ttl = float(app.config['PREFERENCIA_CACHE_TTL'])
+        app.extensions['preference_cache'] = self
+
+    @staticmethod
+    def calcular_chave(snapshot, delivery_option, *complementos):
+        """Hash estável do conteúdo que define a preferência enviada ao Mercado Pago"""
+        partes = [str(snapshot.usuario_id), 'entrega' if is_entrega(delivery_option) else 'retirada']
+        partes.extend(str(complemento) for complemento in complementos)
+        for linha in sorted(snapshot.linhas, key=lambda linha: (linha.tipo, linha.id)):
+            partes.append(f'{linha.tipo}:{linha.id}:{linha.preco}:{linha.quantidade}')
+        return hashlib.sha256('|'.join(partes).encode()).hexdigest()
+
+    def obter(self, usuario_id, chave):
+        """Link de pagamento guardado para o carrinho atual do usuário ou None"""
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+            if entrada and entrada[0] == chave and entrada[2] > agora:
+                self._metricas['hits'] += 1
+                return entrada[1]
+            self._metricas['misses'] += 1
+            return None
+
+    def guardar(self, usuario_id, chave, init_point):
+        if self.ttl <= 0:
+            return
+        if len(self._entradas) >= self.max_entradas:
+            self.limpar_expirados()
+        with self._lock:
+            self._entradas[usuario_id] = (chave, init_point, time.monotonic() + self.ttl)
+
+    def invalidar(self, usuario_id):
+        """Remove o link do usuário (carrinho alterado ou pedido concluído)"""
+        with self._lock:
+            if self._entradas.pop(usuario_id, None):
+                self._metricas['invalidacoes'] += 1
+
+    def limpar_expirados(self):
+        agora = time.monotonic()
+        with self._lock:
+            for usuario_id in [u for u, entrada in self._entradas.items() if entrada[2] <= agora]:
+                del self._entradas[usuario_id]
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self._metricas, entradas=len(self._entradas))
+
+
+preference_cache = PreferenceCache()
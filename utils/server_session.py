@@ -0,0 +1,349 @@
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from decimal import Decimal
+import click
+from flask import session
+from flask.cli import with_appcontext
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+
+# Serialização binária compacta é opcional: sem o msgpack usa JSON compactado com zlib
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Primeiro byte do valor gravado indica o formato (sessões antigas continuam legíveis após instalar o msgpack)
+FORMATO_MSGPACK = b'\x01'
+FORMATO_JSON_ZLIB = b'\x02'
+
+EXT_DECIMAL = 1
+EXT_DATETIME = 2
+
+REGEX_SID = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+_json_tag = TaggedJSONSerializer()
+
+
+def _codificar_extra(valor):
+    if isinstance(valor, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(valor).encode())
+    if isinstance(valor, datetime):
+        return msgpack.ExtType(EXT_DATETIME, valor.isoformat().encode())
+    raise TypeError(f'Tipo não suportado na sessão: {type(valor).__name__}')
+
+
+def _decodificar_extra(codigo, dados):
+    if codigo == EXT_DECIMAL:
+        return Decimal(dados.decode())
+    if codigo == EXT_DATETIME:
+        return datetime.fromisoformat(dados.decode())
+    return msgpack.ExtType(codigo, dados)
+
+
+def serializar(dados):
+    if msgpack:
+        return FORMATO_MSGPACK + msgpack.packb(dados, default=_codificar_extra, use_bin_type=True)
+    return FORMATO_JSON_ZLIB + zlib.compress(_json_tag.dumps(dados).encode('utf-8'))
+
+
+def desserializar(bruto):
+    formato, corpo = bruto[:1], bruto[1:]
+    if formato == FORMATO_MSGPACK:
+        if msgpack is None:
+            raise ValueError('Sessão gravada com msgpack, que não está instalado')
+        return msgpack.unpackb(corpo, ext_hook=_decodificar_extra, raw=False, strict_map_key=False)
+    if formato == FORMATO_JSON_ZLIB:
+        return _json_tag.loads(zlib.decompress(corpo).decode('utf-8'))
+    raise ValueError('Formato de sessão desconhecido')
+
+
+class SQLiteSessoes:
+    """Backend em um arquivo SQLite, compartilhado entre os processos da mesma máquina"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self._conexao().execute(
+            'CREATE TABLE IF NOT EXISTS sessao (sid TEXT PRIMARY KEY, dados BLOB NOT NULL, expira REAL NOT NULL)'
+        )
+        self._conexao().execute('CREATE INDEX IF NOT EXISTS idx_sessao_expira ON sessao(expira)')
+
+    def _conexao(self):
+        # Uma conexão por thread, reaproveitada entre requisições
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+        return conexao
+
+    def obter(self, sid):
+        linha = self._conexao().execute('SELECT dados, expira FROM sessao WHERE sid = ?', (sid,)).fetchone()
+        if linha is None or linha[1] <= time.time():
+            return None, None
+        return bytes(linha[0]), linha[1]
+
+    def gravar(self, sid, dados, ttl):
+        self._conexao().execute('INSERT OR REPLACE INTO sessao (sid, dados, expira) VALUES (?, ?, ?)',
+                                (sid, sqlite3.Binary(dados), time.time() + ttl))
+
+    def renovar(self, sid, ttl):
+        self._conexao().execute('UPDATE sessao SET expira = ? WHERE sid = ?', (time.time() + ttl, sid))
+
+    def excluir(self, sid):
+        self._conexao().execute('DELETE FROM sessao WHERE sid = ?', (sid,))
+
+    def limpar_expiradas(self):
+        return self._conexao().execute('DELETE FROM sessao WHERE expira <= ?', (time.time(),)).rowcount
+
+    def __len__(self):
+        return self._conexao().execute('SELECT COUNT(*) FROM sessao').fetchone()[0]
+
+
+class RedisSessoes:
+    """
+    Backend em Redis ou em um serviço compatível (usa apenas GET, SET EX, TTL, EXPIRE e DEL).
+    A expiração fica a cargo do servidor.
+    """
+
+    def __init__(self, url, prefixo='doce_sonho:sessao:'):
+        import redis
+        self.cliente = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self.cliente.ping()
+        self.prefixo = prefixo
+
+    def obter(self, sid):
+        pipeline = self.cliente.pipeline(transaction=False)
+        pipeline.get(self.prefixo + sid)
+        pipeline.ttl(self.prefixo + sid)
+        dados, restante = pipeline.execute()
+        if dados is None:
+            return None, None
+        return dados, time.time() + restante if restante and restante > 0 else None
+
+    def gravar(self, sid, dados, ttl):
+        self.cliente.set(self.prefixo + sid, dados, ex=int(ttl))
+
+    def renovar(self, sid, ttl):
+        self.cliente.expire(self.prefixo + sid, int(ttl))
+
+    def excluir(self, sid):
+        self.cliente.delete(self.prefixo + sid)
+
+    def limpar_expiradas(self):
+        return 0
+
+    def __len__(self):
+        return sum(1 for _ in self.cliente.scan_iter(match=f'{self.prefixo}*'))
+
+
+class SessaoServidor(SessionMixin):
+    """
+    Sessão cujos dados ficam no servidor; o cookie leva apenas o ID assinado.
+
+    Os dados só são lidos do backend no primeiro acesso, então requisições que não
+    usam a sessão não consultam o armazenamento.
+    """
+
+    def __init__(self, sid=None, carregar=None):
+        self.sid = sid
+        self.sid_anterior = None
+        self.original = None
+        self.expira_em = None
+        self.falha_leitura = False
+        self.modified = False
+        self.accessed = False
+        self.new = sid is None
+        self._carregar = carregar
+        self._dados = None
+
+    @property
+    def carregada(self):
+        return self._dados is not None
+
+    def _garantir(self):
+        if self._dados is None:
+            self.accessed = True
+            self._dados = {}
+            if self._carregar is not None:
+                try:
+                    bruto, self.expira_em = self._carregar()
+                    if bruto is not None:
+                        self._dados = desserializar(bruto)
+                        self.original = bruto
+                except Exception as e:
+                    # Não sobrescrever no save uma sessão que não pôde ser lida
+                    self.falha_leitura = True
+                    logger.error(f"Erro ao carregar a sessão: {e}")
+        return self._dados
+
+    def __getitem__(self, chave):
+        return self._garantir()[chave]
+
+    def __setitem__(self, chave, valor):
+        self._garantir()[chave] = valor
+        self.modified = True
+
+    def __delitem__(self, chave):
+        del self._garantir()[chave]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._garantir())
+
+    def __len__(self):
+        return len(self._garantir())
+
+    def __contains__(self, chave):
+        return chave in self._garantir()
+
+    def get(self, chave, padrao=None):
+        return self._garantir().get(chave, padrao)
+
+    def regenerar(self):
+        """Troca o ID mantendo os dados (o ID anterior é excluído ao salvar)"""
+        self._garantir()
+        if self.sid and not self.sid_anterior:
+            self.sid_anterior = self.sid
+        self.sid = None
+        self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Sessões guardadas no servidor (SQLite ou Redis) em vez do cookie assinado.
+
+    O carrinho de visitantes e demais dados deixam de viajar em todas as requisições.
+    Os dados são serializados em binário (msgpack) e só são regravados quando mudam; a
+    validade é renovada quando passa da metade. Por padrão (SESSAO_BACKEND='cookie') a
+    aplicação mantém a sessão do Flask; 'sqlite' ou 'redis' ativam o armazenamento no servidor.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 7 * 24 * 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SESSAO_BACKEND', 'cookie')
+        app.config.setdefault('SESSAO_SQLITE_PATH', os.path.join(app.instance_path, 'sessoes.sqlite3'))
+        app.config.setdefault('SESSAO_REDIS_URL', 'redis://localhost:6379/0')
+        app.config.setdefault('SESSAO_TTL', 7 * 24 * 3600)
+
+        self.ttl = int(app.config['SESSAO_TTL'])
+        app.cli.add_command(limpar_sessoes_command)
+        if app.config['SESSAO_BACKEND'] == 'cookie':
+            return
+
+        self.backend = self._criar_backend(app.config)
+        app.session_interface = self
+        app.extensions['server_session'] = self
+
+    def _criar_backend(self, config):
+        if config['SESSAO_BACKEND'] == 'redis':
+            try:
+                return RedisSessoes(config['SESSAO_REDIS_URL'])
+            except Exception as e:
+                logger.warning(f"Backend de sessão 'redis' indisponível, usando SQLite: {e}")
+        return SQLiteSessoes(config['SESSAO_SQLITE_PATH'])
+
+    def _assinador(self, app):
+        return Signer(app.secret_key, salt='sessao-servidor')
+
+    def _ttl(self, app, sessao):
+        if sessao.permanent:
+            return int(app.permanent_session_lifetime.total_seconds())
+        return self.ttl
+
+    def open_session(self, app, request):
+        valor = request.cookies.get(self.get_cookie_name(app))
+        if not valor or not app.secret_key:
+            return SessaoServidor()
+        try:
+            sid = self._assinador(app).unsign(valor).decode()
+        except BadSignature:
+            return SessaoServidor()
+        if not REGEX_SID.match(sid):
+            return SessaoServidor()
+        return SessaoServidor(sid, carregar=lambda: self.backend.obter(sid))
+
+    def save_session(self, app, sessao, resposta):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+
+        if sessao.sid_anterior:
+            self.backend.excluir(sessao.sid_anterior)
+
+        # Não acessada nesta requisição (ou ilegível): nada a gravar nem a renovar
+        if not sessao.carregada or sessao.falha_leitura:
+            return
+
+        resposta.vary.add('Cookie')
+
+        if not sessao:
+            if sessao.sid and sessao.original is not None:
+                self.backend.excluir(sessao.sid)
+            if sessao.sid or sessao.sid_anterior:
+                resposta.delete_cookie(nome, domain=dominio, path=caminho,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        ttl = self._ttl(app, sessao)
+        dados = serializar(dict(sessao))
+        novo_id = sessao.sid is None
+        if novo_id:
+            sessao.sid = secrets.token_urlsafe(32)
+
+        if novo_id or dados != sessao.original:
+            self.backend.gravar(sessao.sid, dados, ttl)
+        elif sessao.expira_em and sessao.expira_em - time.time() < ttl / 2:
+            self.backend.renovar(sessao.sid, ttl)
+        else:
+            return
+
+        resposta.set_cookie(
+            nome,
+            self._assinador(app).sign(sessao.sid).decode(),
+            expires=self.get_expiration_time(app, sessao),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+sessoes_servidor = ServerSessionInterface()
+
+
+def regenerar_sessao():
+    """Gera um novo ID para a sessão atual (usar no login para evitar fixação de sessão)"""
+    if isinstance(session._get_current_object(), SessaoServidor):
+        session.regenerar()
+
+
+@click.command('limpar-sessoes')
+@with_appcontext
+def limpar_sessoes_command():
+    """Remove as sessões expiradas do armazenamento no servidor."""
+    if sessoes_servidor.backend is None:
+        click.echo('As sessões estão em cookies (SESSAO_BACKEND=cookie).')
+        return
+    click.echo(f'{sessoes_servidor.backend.limpar_expiradas()} sessão(ões) expirada(s) removida(s).')
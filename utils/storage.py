@@ -0,0 +1,294 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+import click
+from flask import current_app, request
+from flask.cli import with_appcontext
+from database import db
+from models.models import Produto, Usuario
+from utils.images import caminhos_variantes, remover_metadados
+
+logger = logging.getLogger(__name__)
+
+# Uploads endereçados pelo SHA-256 do conteúdo: /static/uploads/cas/ab/abcdef....jpg
+DIRETORIO_CAS = 'cas'
+PREFIXO_URL = '/static/uploads/cas/'
+
+# Arquivos no disco mais novos que isso não são removidos pela varredura
+# (o upload pode ter sido gravado e o commit que o referencia ainda não aconteceu)
+IDADE_MINIMA_ORFAO_MIN = 60
+
+CACHE_CONTROL_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+REGEX_HASH = re.compile(r'^([0-9a-f]{64})')
+
+# Colunas que referenciam imagens enviadas: (modelo, coluna da imagem, coluna das variantes)
+REFERENCIAS = (
+    (Produto, 'imagem', 'imagem_variantes'),
+    (Usuario, 'foto_perfil', 'foto_perfil_variantes')
+)
+
+
+def _diretorio_cas():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], DIRETORIO_CAS)
+
+
+def hash_da_url(url):
+    """SHA-256 de uma URL do armazenamento por conteúdo ou None para outros caminhos"""
+    if not url or not url.startswith(PREFIXO_URL):
+        return None
+    encontrado = REGEX_HASH.match(os.path.basename(url))
+    return encontrado.group(1) if encontrado else None
+
+
+def _hash_arquivo(caminho):
+    """SHA-256 e tamanho de um arquivo, lido em blocos"""
+    sha256 = hashlib.sha256()
+    tamanho = 0
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(64 * 1024), b''):
+            sha256.update(bloco)
+            tamanho += len(bloco)
+    return sha256.hexdigest(), tamanho
+
+
+def _limpar_metadados(caminho):
+    """Remove o EXIF antes do hash; devolve True se o arquivo mudou"""
+    try:
+        return remover_metadados(caminho)
+    except Exception as e:
+        logger.warning(f"Não foi possível remover os metadados de {caminho}: {e}")
+        return False
+
+
+def armazenar(recebido):
+    """
+    Grava um upload validado no armazenamento por conteúdo.
+
+    Os metadados EXIF são removidos antes do hash, então o nome sempre corresponde ao
+    conteúdo servido (com cache imutável). Se um arquivo com o mesmo conteúdo já
+    existir, o temporário é descartado e o arquivo existente é reaproveitado.
+
+    Args:
+        recebido: ArquivoRecebido de utils.uploads.receber_upload
+
+    Returns:
+        Tupla (url, novo) onde novo indica se o arquivo foi gravado agora
+    """
+    if _limpar_metadados(recebido.caminho_temporario):
+        recebido.sha256, recebido.tamanho = _hash_arquivo(recebido.caminho_temporario)
+
+    subdiretorio = recebido.sha256[:2]
+    nome = f'{recebido.sha256}.{recebido.extensao}'
+    destino = os.path.join(_diretorio_cas(), subdiretorio, nome)
+    url = f'{PREFIXO_URL}{subdiretorio}/{nome}'
+
+    if os.path.exists(destino):
+        recebido.descartar()
+        # Marca o arquivo como recém-usado para que liberar() não o remova antes do commit
+        os.utime(destino, None)
+        return url, False
+
+    recebido.mover_para(destino)
+    return url, True
+
+
+def contar_referencias(url):
+    """Quantidade de registros (produtos e usuários) que usam a imagem"""
+    return sum(
+        modelo.query.filter(getattr(modelo, coluna_imagem) == url).count()
+        for modelo, coluna_imagem, _ in REFERENCIAS
+    )
+
+
+def variantes_conhecidas(url):
+    """Variantes já geradas para a mesma imagem em outro registro (uploads repetidos)"""
+    for modelo, coluna_imagem, coluna_variantes in REFERENCIAS:
+        variantes = db.session.query(getattr(modelo, coluna_variantes)).filter(
+            getattr(modelo, coluna_imagem) == url,
+            getattr(modelo, coluna_variantes).isnot(None)
+        ).limit(1).scalar()
+        if variantes:
+            return variantes
+    return None
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def liberar(url, variantes_json=None, legado=False):
+    """
+    Remove os arquivos de uma imagem que deixou de ser referenciada.
+    Deve ser chamada depois do commit que trocou ou removeu a imagem.
+
+    Args:
+        url: URL da imagem anterior
+        variantes_json: Variantes registradas para ela (usadas apenas em arquivos legados)
+        legado: Remover também arquivos fora do armazenamento por conteúdo
+    """
+    if not url or not url.startswith('/static/uploads/'):
+        return
+    try:
+        if contar_referencias(url):
+            return
+
+        digest = hash_da_url(url)
+        if digest:
+            original = os.path.join(current_app.root_path, url.lstrip('/'))
+            # Reenviado há pouco por outra requisição ainda não confirmada: fica para a varredura
+            if os.path.exists(original) and os.path.getmtime(original) > time.time() - IDADE_MINIMA_ORFAO_MIN * 60:
+                return
+            # Original e variantes compartilham o prefixo do hash
+            subdiretorio = os.path.dirname(original)
+            if os.path.isdir(subdiretorio):
+                for nome in os.listdir(subdiretorio):
+                    if nome.startswith(digest):
+                        _remover(os.path.join(subdiretorio, nome))
+        elif legado:
+            for arquivo in [url] + caminhos_variantes(variantes_json):
+                _remover(os.path.join(current_app.root_path, arquivo.lstrip('/')))
+    except Exception as e:
+        logger.error(f"Erro ao remover a imagem {url}: {e}")
+
+
+def hashes_referenciados():
+    """SHA-256 de todas as imagens do armazenamento por conteúdo referenciadas no banco"""
+    hashes = set()
+    for modelo, coluna_imagem, _ in REFERENCIAS:
+        coluna = getattr(modelo, coluna_imagem)
+        for (url,) in db.session.query(coluna).filter(coluna.like(PREFIXO_URL + '%')).distinct():
+            digest = hash_da_url(url)
+            if digest:
+                hashes.add(digest)
+    return hashes
+
+
+def varrer_orfaos(idade_minima_min=IDADE_MINIMA_ORFAO_MIN, remover=True):
+    """
+    Encontra (e remove) os arquivos do armazenamento por conteúdo sem referência no banco,
+    além de temporários de uploads interrompidos.
+
+    As referências são lidas em uma consulta por coluna; o disco é percorrido uma vez.
+
+    Returns:
+        Tupla (lista de caminhos órfãos, bytes liberados)
+    """
+    limite = time.time() - idade_minima_min * 60
+    referenciados = hashes_referenciados()
+    orfaos = []
+    liberados = 0
+
+    diretorios = [(_diretorio_cas(), True), (os.path.join(current_app.config['UPLOAD_FOLDER'], '.tmp'), False)]
+    for raiz, verificar_hash in diretorios:
+        if not os.path.isdir(raiz):
+            continue
+        for pasta, _, arquivos in os.walk(raiz):
+            for nome in arquivos:
+                caminho = os.path.join(pasta, nome)
+                try:
+                    info = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                if info.st_mtime > limite:
+                    continue
+                if verificar_hash:
+                    encontrado = REGEX_HASH.match(nome)
+                    if encontrado and encontrado.group(1) in referenciados:
+                        continue
+                orfaos.append(caminho)
+                liberados += info.st_size
+                if remover:
+                    _remover(caminho)
+
+    return orfaos, liberados
+
+
+def migrar_para_cas():
+    """
+    Copia para o armazenamento por conteúdo as imagens enviadas antes dele e atualiza
+    as referências. Os arquivos antigos são mantidos, pois alguns templates usam
+    imagens de static/uploads diretamente.
+
+    Returns:
+        Tupla (registros migrados, arquivos não encontrados)
+    """
+    migrados = ausentes = 0
+    novas_urls = {}
+    for modelo, coluna_imagem, coluna_variantes in REFERENCIAS:
+        coluna = getattr(modelo, coluna_imagem)
+        registros = modelo.query.filter(
+            coluna.like('/static/uploads/%'), ~coluna.like(PREFIXO_URL + '%')
+        ).all()
+        for registro in registros:
+            url = getattr(registro, coluna_imagem)
+            if url not in novas_urls:
+                origem = os.path.join(current_app.root_path, url.lstrip('/'))
+                if not os.path.exists(origem):
+                    ausentes += 1
+                    continue
+                extensao = os.path.splitext(origem)[1].lower().lstrip('.') or 'jpg'
+                extensao = 'jpg' if extensao == 'jpeg' else extensao
+                # Cópia sem metadados; o hash é calculado sobre o arquivo já limpo
+                os.makedirs(_diretorio_cas(), exist_ok=True)
+                temporario = os.path.join(_diretorio_cas(), f'migracao.{os.getpid()}.{extensao}.tmp')
+                shutil.copyfile(origem, temporario)
+                _limpar_metadados(temporario)
+                digest, _ = _hash_arquivo(temporario)
+                destino = os.path.join(_diretorio_cas(), digest[:2], f'{digest}.{extensao}')
+                if os.path.exists(destino):
+                    os.remove(temporario)
+                else:
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    os.replace(temporario, destino)
+                novas_urls[url] = f'{PREFIXO_URL}{digest[:2]}/{digest}.{extensao}'
+
+            setattr(registro, coluna_imagem, novas_urls[url])
+            # As variantes são regeneradas ao lado do novo arquivo
+            setattr(registro, coluna_variantes, None)
+            migrados += 1
+        db.session.commit()
+
+    return migrados, ausentes
+
+
+def aplicar_cache_imutavel(resposta):
+    """Arquivos do armazenamento por conteúdo nunca mudam: cache de um ano sem revalidação"""
+    if request.path.startswith(PREFIXO_URL) and resposta.status_code in (200, 304):
+        resposta.headers['Cache-Control'] = CACHE_CONTROL_IMUTAVEL
+    return resposta
+
+
+@click.command('limpar-uploads-orfaos')
+@click.option('--idade-minima', default=IDADE_MINIMA_ORFAO_MIN, show_default=True,
+              help='Ignora arquivos gravados há menos minutos que isso.')
+@click.option('--simular', is_flag=True, help='Apenas lista os arquivos, sem removê-los.')
+@with_appcontext
+def limpar_uploads_orfaos_command(idade_minima, simular):
+    """Remove as imagens enviadas que não são usadas por nenhum produto ou usuário."""
+    orfaos, liberados = varrer_orfaos(idade_minima, remover=not simular)
+    for caminho in orfaos:
+        click.echo(caminho)
+    acao = 'seriam removidos' if simular else 'removidos'
+    click.echo(f'{len(orfaos)} arquivo(s) {acao}, {liberados / (1024 * 1024):.1f}MB.')
+
+
+@click.command('migrar-uploads-cas')
+@with_appcontext
+def migrar_uploads_cas_command():
+    """Copia as imagens antigas para o armazenamento por conteúdo e atualiza as referências."""
+    migrados, ausentes = migrar_para_cas()
+    click.echo(f'{migrados} referência(s) migrada(s), {ausentes} arquivo(s) não encontrado(s).')
+    if migrados:
+        from utils.catalog import catalogo
+        from utils.page_cache import page_cache
+        catalogo.invalidar()
+        page_cache.backend.limpar()
+        click.echo('Gere as variantes com: flask gerar-variantes-imagens')
@@ -0,0 +1,181 @@
+import click
+import threading
+import time
+from datetime import datetime, timedelta
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models.models import Token
+
+
+class TokenCache:
+    """
+    Cache em memória das validações de token.
+
+    Depois que um token é confirmado no banco (existe, não revogado, não expirado) o
+    resultado fica guardado pelo hash do token por até TOKEN_CACHE_TTL segundos (padrão
+    30), nunca além da data de expiração do token. Logout, revogação de sessão, troca de
+    senha e desativação do usuário pelo admin removem as entradas do processo que atendeu
+    a requisição e marcam o token como revogado no banco.
+
+    O cache é por processo: nos demais workers um token revogado continua aceito até a
+    entrada expirar, por isso o TTL deve ficar curto (é o atraso máximo da revogação).
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.max_entradas = 10000
+        self.intervalo_acesso = timedelta(minutes=5)
+        self._entradas = {}
+        self._lock = threading.Lock()
+        self._metricas = {'hits': 0, 'misses': 0, 'revogacoes': 0, 'acessos_gravados': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TOKEN_CACHE_TTL', 30)
+        app.config.setdefault('ULTIMO_ACESSO_INTERVALO_MIN', 5)
+        self.ttl = float(app.config['TOKEN_CACHE_TTL'])
+        self.intervalo_acesso = timedelta(minutes=float(app.config['ULTIMO_ACESSO_INTERVALO_MIN']))
+        app.extensions['token_cache'] = self
+
+    def _incrementar(self, metrica):
+        with self._lock:
+            self._metricas[metrica] += 1
+
+    def validar(self, usuario_id, token):
+        """
+        Verifica se o token do usuário está ativo, consultando o banco apenas em caso de miss.
+
+        Returns:
+            bool: True se o token existe, pertence ao usuário, não foi revogado nem expirou
+        """
+        chave = Token.calcular_hash(token)
+        agora = time.monotonic()
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] == usuario_id and entrada[1] > agora:
+                self._metricas['hits'] += 1
+                return True
+            self._entradas.pop(chave, None)
+            self._metricas['misses'] += 1
+
+        token_db = self._buscar_token(usuario_id, chave)
+        if not token_db or token_db.data_expiracao < datetime.utcnow():
+            return False
+
+        restante = (token_db.data_expiracao - datetime.utcnow()).total_seconds()
+        validade = min(self.ttl, restante)
+        if validade > 0:
+            if len(self._entradas) >= self.max_entradas:
+                self.limpar_expirados()
+            with self._lock:
+                self._entradas[chave] = (usuario_id, agora + validade)
+        return True
+
+    def _buscar_token(self, usuario_id, token_hash):
+        return Token.query.filter_by(
+            usuario_id=usuario_id,
+            token_hash=token_hash,
+            is_revogado=False
+        ).first()
+
+    def revogar(self, token):
+        """Remove um token específico do cache (logout)"""
+        self.revogar_hash(Token.calcular_hash(token))
+
+    def revogar_hash(self, token_hash):
+        """Remove do cache o token com o hash informado (revogação de sessão pelo perfil)"""
+        with self._lock:
+            if self._entradas.pop(token_hash, None):
+                self._metricas['revogacoes'] += 1
+
+    def revogar_usuario(self, usuario_id):
+        """Remove todos os tokens de um usuário do cache (troca de senha, exclusão de conta)"""
+        with self._lock:
+            chaves = [chave for chave, entrada in self._entradas.items() if entrada[0] == usuario_id]
+            for chave in chaves:
+                del self._entradas[chave]
+            self._metricas['revogacoes'] += len(chaves)
+
+    def registrar_acesso(self, usuario):
+        """
+        Atualiza o último acesso do usuário no máximo uma vez por intervalo.
+
+        Returns:
+            bool: True se o valor foi gravado no banco
+        """
+        agora = datetime.utcnow()
+        if usuario.ultimo_acesso and agora - usuario.ultimo_acesso < self.intervalo_acesso:
+            return False
+
+        usuario.ultimo_acesso = agora
+        db.session.commit()
+        self._incrementar('acessos_gravados')
+        return True
+
+    def limpar_expirados(self):
+        agora = time.monotonic()
+        with self._lock:
+            for chave in [c for c, entrada in self._entradas.items() if entrada[1] <= agora]:
+                del self._entradas[chave]
+
+    def estatisticas(self):
+        with self._lock:
+            metricas = dict(self._metricas)
+            metricas['entradas'] = len(self._entradas)
+        return metricas
+
+
+token_cache = TokenCache()
+
+
+@click.command('backfill-token-hash')
+@click.option('--lote', default=500, show_default=True, help='Registros atualizados por commit.')
+@click.option('--limpar-token', is_flag=True, help='Apaga o JWT bruto depois de gravar o hash.')
+@with_appcontext
+def backfill_token_hash_command(lote, limpar_token):
+    """Preenche token.token_hash dos registros criados antes da coluna existir."""
+    tabela = Token.__tablename__
+    colunas = {coluna['name']: coluna for coluna in inspect(db.engine).get_columns(tabela)}
+    if 'token_hash' not in colunas:
+        # Bancos que não passaram pelo script MySQL da migração 002 (ex.: SQLite de desenvolvimento)
+        db.session.execute(text(f'ALTER TABLE {tabela} ADD COLUMN token_hash CHAR(64) NULL'))
+        db.session.commit()
+        click.echo('Coluna token.token_hash criada.')
+    if limpar_token and not colunas['token']['nullable']:
+        # O SQLite não altera a restrição NOT NULL de uma coluna existente
+        click.echo('A coluna token.token é NOT NULL neste banco; o JWT bruto será mantido.')
+        limpar_token = False
+
+    atualizados = 0
+    ultimo_id = 0
+    while True:
+        tokens = Token.query.filter(
+            Token.id > ultimo_id,
+            Token.token.isnot(None)
+        ).order_by(Token.id).limit(lote).all()
+        if not tokens:
+            break
+
+        for token in tokens:
+            if not token.token_hash:
+                token.token_hash = Token.calcular_hash(token.token)
+                atualizados += 1
+            if limpar_token:
+                token.token = None
+        ultimo_id = tokens[-1].id
+        db.session.commit()
+
+    click.echo(f'{atualizados} token(s) atualizados.')
+
+    if 'idx_token_hash' not in {indice['name'] for indice in inspect(db.engine).get_indexes(tabela)}:
+        try:
+            db.session.execute(text(f'CREATE UNIQUE INDEX idx_token_hash ON {tabela}(token_hash)'))
+            db.session.commit()
+            click.echo('Índice idx_token_hash criado.')
+        except IntegrityError:
+            db.session.rollback()
+            click.echo('Há tokens duplicados; remova-os e execute o comando de novo para criar idx_token_hash.')
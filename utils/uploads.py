@@ -0,0 +1,126 @@
+import hashlib
+import os
+import tempfile
+from flask import current_app, request
+
+# Tamanho dos blocos lidos do arquivo enviado
+TAMANHO_BLOCO = 64 * 1024
+
+# Tamanho máximo (bytes) por tipo de upload
+LIMITES = {
+    'produto': 8 * 1024 * 1024,
+    'perfil': 5 * 1024 * 1024
+}
+
+# Assinaturas (magic bytes) aceitas e a extensão gravada para cada formato
+ASSINATURAS = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+class UploadInvalido(Exception):
+    """Arquivo recusado pelo receber_upload; a mensagem pode ser exibida ao usuário"""
+
+
+def identificar_formato(cabecalho):
+    """Extensão correspondente aos primeiros bytes do arquivo ou None se o formato não for aceito"""
+    for assinatura, extensao in ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return extensao
+    return None
+
+
+def _limite_mb(limite):
+    return f'{limite // (1024 * 1024)}MB'
+
+
+def verificar_tamanho_requisicao(tipo):
+    """
+    Recusa antes de ler o corpo as requisições cujo Content-Length já excede o limite do tipo.
+    Deve ser chamada antes de acessar request.files.
+    """
+    limite = LIMITES[tipo]
+    # Margem para os demais campos do formulário multipart
+    if request.content_length and request.content_length > limite + 64 * 1024:
+        raise UploadInvalido(f'O arquivo é muito grande. O tamanho máximo permitido é {_limite_mb(limite)}')
+
+
+class ArquivoRecebido:
+    """Upload validado, gravado em um arquivo temporário no mesmo disco do destino"""
+
+    def __init__(self, caminho_temporario, extensao, tamanho, sha256):
+        self.caminho_temporario = caminho_temporario
+        self.extensao = extensao
+        self.tamanho = tamanho
+        self.sha256 = sha256
+
+    def mover_para(self, destino):
+        """Move o arquivo para o destino de forma atômica (os.replace no mesmo sistema de arquivos)"""
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.chmod(self.caminho_temporario, 0o644)
+        os.replace(self.caminho_temporario, destino)
+        self.caminho_temporario = None
+        return destino
+
+    def descartar(self):
+        if self.caminho_temporario and os.path.exists(self.caminho_temporario):
+            os.remove(self.caminho_temporario)
+        self.caminho_temporario = None
+
+
+def receber_upload(arquivo, tipo):
+    """
+    Copia o arquivo enviado em blocos para um temporário, validando enquanto lê.
+
+    O tamanho é conferido a cada bloco e o formato pelos magic bytes do início do
+    arquivo (a extensão do nome enviado é ignorada). O SHA-256 é calculado na mesma
+    leitura, então a memória usada fica no tamanho de um bloco.
+
+    Args:
+        arquivo: FileStorage de request.files
+        tipo: Chave de LIMITES ('produto' ou 'perfil')
+
+    Returns:
+        ArquivoRecebido (chamar mover_para ou descartar)
+
+    Raises:
+        UploadInvalido: arquivo vazio, grande demais ou em formato não aceito
+    """
+    limite = LIMITES[tipo]
+    if arquivo.content_length and arquivo.content_length > limite:
+        raise UploadInvalido(f'O arquivo é muito grande. O tamanho máximo permitido é {_limite_mb(limite)}')
+
+    # Temporário ao lado dos uploads para que a movimentação final seja atômica
+    diretorio_temporario = os.path.join(current_app.config['UPLOAD_FOLDER'], '.tmp')
+    os.makedirs(diretorio_temporario, exist_ok=True)
+    descritor, caminho_temporario = tempfile.mkstemp(dir=diretorio_temporario, suffix='.upload')
+
+    sha256 = hashlib.sha256()
+    tamanho = 0
+    extensao = None
+    try:
+        with os.fdopen(descritor, 'wb') as destino:
+            while True:
+                bloco = arquivo.stream.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                if extensao is None:
+                    extensao = identificar_formato(bloco)
+                    if extensao is None:
+                        raise UploadInvalido('Formato de arquivo não permitido. Use JPG, JPEG, PNG ou GIF')
+                tamanho += len(bloco)
+                if tamanho > limite:
+                    raise UploadInvalido(f'O arquivo é muito grande. O tamanho máximo permitido é {_limite_mb(limite)}')
+                sha256.update(bloco)
+                destino.write(bloco)
+
+        if tamanho == 0:
+            raise UploadInvalido('O arquivo enviado está vazio')
+    except BaseException:
+        os.remove(caminho_temporario)
+        raise
+
+    return ArquivoRecebido(caminho_temporario, extensao, tamanho, sha256.hexdigest())